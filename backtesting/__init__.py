@@ -3,17 +3,67 @@ Backtesting Module - Модуль для бэктестирования торг
 
 Предоставляет инструменты для:
 - Запуска бэктестов на исторических данных
-- Расчета метрик производительности
+- Мультитаймфреймового реплея живых стратегий (analyze_with_data)
+- Локального memmap-кэша свечей с синхронизацией по водяному знаку БД
+- Параллельного перебора параметров над свечами в общей памяти
+- Walk-forward оптимизации с out-of-sample проверкой
+- Портфельного реплея нескольких символов с общим капиталом
+- Расчета метрик производительности (Sharpe/Sortino/Calmar, просадки, экспозиция)
 - Генерации отчетов в HTML формате
 """
 
-from .backtest_engine import BacktestEngine, BacktestResult
+from .backtest_engine import BacktestEngine, BacktestResult, Trade
+from .replay_data import CandleSeries, CandleWindow, CandleRow, ReplayRepository
+from .replay_engine import ReplayBacktestEngine, ReplayContextCache
+from .candle_cache import CandleCache, CachedCandleRepository
+from .parameter_sweep import (
+    SharedCandleStore,
+    ParameterSweep,
+    SweepResults,
+    EarlyStopping,
+    Uniform,
+    IntRange,
+    grid_configs,
+    random_configs
+)
+from .walk_forward import (
+    WalkForwardOptimizer,
+    WalkForwardWindow,
+    WalkForwardResult,
+    build_windows
+)
+from .portfolio_engine import PortfolioBacktestEngine, PortfolioBacktestResult
+from .equity_curve import EquityCurve
 from .performance_metrics import PerformanceMetrics
 from .report_generator import ReportGenerator
 
 __all__ = [
     "BacktestEngine",
     "BacktestResult", 
+    "Trade",
+    "ReplayBacktestEngine",
+    "ReplayContextCache",
+    "ReplayRepository",
+    "CandleSeries",
+    "CandleWindow",
+    "CandleRow",
+    "CandleCache",
+    "CachedCandleRepository",
+    "SharedCandleStore",
+    "ParameterSweep",
+    "SweepResults",
+    "EarlyStopping",
+    "Uniform",
+    "IntRange",
+    "grid_configs",
+    "random_configs",
+    "WalkForwardOptimizer",
+    "WalkForwardWindow",
+    "WalkForwardResult",
+    "build_windows",
+    "PortfolioBacktestEngine",
+    "PortfolioBacktestResult",
+    "EquityCurve",
     "PerformanceMetrics",
     "ReportGenerator"
 ]
@@ -6,6 +6,8 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 
+from .equity_curve import EquityCurve
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +25,11 @@ class Trade:
     is_open: bool = True
     signal_strength: float = 0.0
     signal_reasons: List[str] = field(default_factory=list)
+    symbol: Optional[str] = None
+    strategy: Optional[str] = None
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    exit_reason: Optional[str] = None  # stop_loss, take_profit, reverse, signal, end_of_data
 
 
 @dataclass
@@ -43,11 +50,12 @@ class BacktestResult:
     avg_loss: float
     largest_win: float
     largest_loss: float
-    equity_curve: List[Dict[str, Any]]
+    equity_curve: EquityCurve  # итерация дает словари {"timestamp", "equity", "price"}
     candles_data: List[Dict[str, Any]]
     start_time: datetime
     end_time: datetime
     duration_days: int
+    metrics: Dict[str, Any] = field(default_factory=dict)  # полный набор PerformanceMetrics
 
 
 class BacktestEngine:
@@ -59,6 +67,8 @@ class BacktestEngine:
     2. Генерирует сигналы через стратегию
     3. Симулирует вход/выход по сигналам
     4. Считает PnL и метрики
+    
+    Сам прогон выполняет ReplayBacktestEngine (реплей analyze_with_data).
     """
     
     def __init__(self, initial_capital: float = 10000.0, 
@@ -77,7 +87,7 @@ class BacktestEngine:
         self.current_capital = initial_capital
         self.trades: List[Trade] = []
         self.current_trade: Optional[Trade] = None
-        self.equity_curve: List[Dict[str, Any]] = []
+        self.equity_curve = EquityCurve()
         
         logger.info(f"🎯 BacktestEngine создан: капитал=${initial_capital:,.2f}, комиссия={commission_rate*100}%")
     
@@ -86,103 +96,46 @@ class BacktestEngine:
         """
         Запускает бэктестинг на исторических данных
         
+        Свечи одного интервала (формат отчетов или MarketDataRepository)
+        переводятся в колонки, старшие таймфреймы строятся ресемплингом,
+        и стратегия прогоняется через ReplayBacktestEngine с шагом в этот
+        интервал. Для полноценного мультитаймфреймового прогона используйте
+        ReplayBacktestEngine.run_from_repository().
+        
         Args:
-            candles: Список свечей из БД
-            strategy: Экземпляр стратегии (BaseStrategy)
+            candles: Список свечей одного интервала
+            strategy: Экземпляр стратегии (BaseStrategy с analyze_with_data)
             symbol: Торговый символ
             
         Returns:
             BacktestResult с результатами
         """
+        from .replay_data import CandleSeries
+        from .replay_engine import ReplayBacktestEngine
+        
         logger.info(f"🚀 Запуск бэктеста на {len(candles)} свечах для {symbol}")
         
         self._reset()
         
-        for i, candle in enumerate(candles):
-            # Создаем snapshot для стратегии
-            snapshot = self._candle_to_snapshot(candle, candles, i)
-            
-            # Генерируем сигнал через стратегию
-            signal = await strategy.analyze_market_data(snapshot)
-            
-            # Обрабатываем сигнал
-            if signal and signal.strength >= strategy.min_signal_strength:
-                await self._process_signal(signal, candle)
-            
-            # Записываем equity
-            self.equity_curve.append({
-                "timestamp": candle["open_time"],
-                "equity": self.current_capital,
-                "price": candle["close"]
-            })
-            
-            if (i + 1) % 1000 == 0:
-                logger.info(f"📊 Обработано {i+1}/{len(candles)} свечей")
+        interval = (candles[0].get("interval") or "1m") if candles else "1m"
+        series = CandleSeries.from_candles(candles, symbol, interval)
         
-        # Закрываем открытую позицию если есть
-        if self.current_trade and self.current_trade.is_open:
-            last_candle = candles[-1]
-            self._close_trade(last_candle["close"], last_candle["open_time"])
+        replay = ReplayBacktestEngine(
+            initial_capital=self.initial_capital,
+            commission_rate=self.commission_rate,
+            position_size_pct=self.position_size_pct,
+            step_interval=interval
+        )
+        result = await replay.run_replay({interval: series}, [strategy], symbol)
         
-        # Формируем результат
-        result = self._generate_result(candles, symbol)
+        self.current_capital = replay.current_capital
+        self.trades = replay.trades
+        self.equity_curve = replay.equity_curve
         
         logger.info(f"✅ Бэктест завершен: {result.total_trades} сделок, PnL: {result.total_pnl_percent:+.2f}%")
         
         return result
     
-    def _candle_to_snapshot(self, candle: Dict, all_candles: List[Dict], index: int):
-        """Преобразует свечу в MarketDataSnapshot для стратегии"""
-        from market_data import MarketDataSnapshot, DataSourceType
-        
-        # Вычисляем изменения цены
-        price_change_1m = 0.0
-        price_change_5m = 0.0
-        
-        if index > 0:
-            prev_candle = all_candles[index - 1]
-            price_change_1m = ((candle["close"] - prev_candle["close"]) / prev_candle["close"]) * 100
-        
-        if index >= 5:
-            candle_5m_ago = all_candles[index - 5]
-            price_change_5m = ((candle["close"] - candle_5m_ago["close"]) / candle_5m_ago["close"]) * 100
-        
-        return MarketDataSnapshot(
-            symbol=candle["symbol"],
-            timestamp=datetime.fromisoformat(candle["open_time"]),
-            current_price=candle["close"],
-            price_change_1m=price_change_1m,
-            price_change_5m=price_change_5m,
-            price_change_24h=0.0,  # Не используется в бэктесте
-            volume_24h=candle["volume"],
-            high_24h=candle["high"],
-            low_24h=candle["low"],
-            bid_price=candle["close"],
-            ask_price=candle["close"],
-            spread=0.0,
-            open_interest=0.0,
-            data_source=DataSourceType.REST_API,
-            has_realtime_data=False,
-            has_historical_data=True
-        )
-    
-    async def _process_signal(self, signal, candle: Dict):
-        """Обрабатывает торговый сигнал"""
-        from strategies import SignalType
-        
-        current_price = candle["close"]
-        timestamp = datetime.fromisoformat(candle["open_time"])
-        
-        # Если есть открытая позиция - закрываем
-        if self.current_trade and self.current_trade.is_open:
-            self._close_trade(current_price, timestamp)
-        
-        # Открываем новую позицию
-        if signal.signal_type in [SignalType.BUY, SignalType.STRONG_BUY]:
-            self._open_trade("BUY", current_price, timestamp, signal)
-        elif signal.signal_type in [SignalType.SELL, SignalType.STRONG_SELL]:
-            self._open_trade("SELL", current_price, timestamp, signal)
-    
     def _open_trade(self, side: str, price: float, timestamp: datetime, signal):
         """Открывает сделку"""
         position_value = self.current_capital * self.position_size_pct
@@ -261,7 +214,8 @@ class BacktestEngine:
             start_time=datetime.fromisoformat(candles[0]["open_time"]),
             end_time=datetime.fromisoformat(candles[-1]["open_time"]),
             duration_days=(datetime.fromisoformat(candles[-1]["open_time"]) - 
-                          datetime.fromisoformat(candles[0]["open_time"])).days
+                          datetime.fromisoformat(candles[0]["open_time"])).days,
+            metrics=metrics
         )
     
     def _reset(self):
@@ -269,4 +223,4 @@ class BacktestEngine:
         self.current_capital = self.initial_capital
         self.trades = []
         self.current_trade = None
-        self.equity_curve = []
+        self.equity_curve = EquityCurve()
@@ -0,0 +1,580 @@
+# backtesting/candle_cache.py
+
+"""
+Candle Cache - Локальный кэш свечей в memory-mapped колоночных файлах
+
+Каждая пара (символ, интервал) хранится в своей директории:
+- header.json: небольшой заголовок-индекс (число баров, первый/последний
+  open_time, водяной знак БД, поколение файлов)
+- <колонка>.<поколение>.bin: сырые int64/float64 колонки (open_time,
+  close_time, open, high, low, close, volume)
+
+Чтение - np.memmap без копирования: CandleSeries над кэшем строится за
+миллисекунды, диапазоны выбираются бинарным поиском по open_time.
+
+Синхронизация с БД по водяному знаку (COUNT, MAX(open_time), MAX(updated_at)):
+- ничего не изменилось - одна легкая проверка
+- новые бары - дописываются в конец колонок (append-only)
+- исправленные бары (тот же open_time) - правятся на месте
+- вставки в середину истории или удаления - файлы пересобираются в новом
+  поколении, заголовок переключается атомарно (os.replace)
+"""
+
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+from .replay_data import (
+    INTERVAL_SECONDS,
+    CandleSeries,
+    CandleWindow,
+    CandleRow,
+    to_epoch_us,
+    from_epoch_us
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: без межпроцессной блокировки
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+COLUMNS = ("open_time", "close_time", "open", "high", "low", "close", "volume")
+TIME_COLUMNS = ("open_time", "close_time")
+
+_US = 1_000_000
+
+
+def _dtype(column: str) -> np.dtype:
+    return np.dtype(np.int64) if column in TIME_COLUMNS else np.dtype(np.float64)
+
+
+# ==================== ФАЙЛЫ ОДНОЙ СЕРИИ ====================
+
+class CandleFile:
+    """
+    📁 Колоночные файлы одного (символ, интервал)
+
+    Количество валидных баров задает заголовок: хвост колонок за пределами
+    count (оборванная запись) игнорируется и обрезается при следующей дозаписи.
+    """
+
+    def __init__(self, root: Path, symbol: str, interval: str):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.path = root / f"{self.symbol}_{interval}"
+        self.header: Optional[Dict[str, Any]] = None
+        self._maps: Optional[Dict[str, np.ndarray]] = None
+        self._maps_key = None
+
+        self.reload_header()
+
+    # ---------- заголовок ----------
+
+    @property
+    def header_path(self) -> Path:
+        return self.path / "header.json"
+
+    def reload_header(self) -> Optional[Dict[str, Any]]:
+        """Прочитать заголовок с диска (None - кэша нет или другая версия)"""
+        try:
+            header = json.loads(self.header_path.read_text())
+        except (FileNotFoundError, ValueError):
+            header = None
+
+        if header is not None and header.get("version") != CACHE_VERSION:
+            header = None
+
+        self.header = header
+        return header
+
+    def _write_header(self, header: Dict[str, Any]):
+        """Атомарная запись заголовка"""
+        tmp = self.path / "header.json.tmp"
+        tmp.write_text(json.dumps(header))
+        os.replace(tmp, self.header_path)
+        self.header = header
+        self._maps = None
+
+    @property
+    def count(self) -> int:
+        return self.header["count"] if self.header else 0
+
+    def column_path(self, column: str, generation: Optional[int] = None) -> Path:
+        generation = self.header["generation"] if generation is None else generation
+        return self.path / f"{column}.{generation}.bin"
+
+    @contextmanager
+    def lock(self):
+        """Эксклюзивная блокировка серии между процессами"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / ".lock", "w") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    # ---------- чтение ----------
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Колонки как memory-mapped массивы длины count (только чтение)"""
+        key = (self.header["generation"], self.count) if self.header else None
+        if self._maps is not None and self._maps_key == key:
+            return self._maps
+
+        if not self.count:
+            maps = {name: np.empty(0, dtype=_dtype(name)) for name in COLUMNS}
+        else:
+            maps = {
+                name: np.asarray(np.memmap(self.column_path(name), dtype=_dtype(name),
+                                           mode="r", shape=(self.count,)))
+                for name in COLUMNS
+            }
+
+        self._maps, self._maps_key = maps, key
+        return maps
+
+    def series(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> CandleSeries:
+        """Серия [start, end) по open_time - views на memmap, без копирования"""
+        columns = self.columns()
+        open_time = columns["open_time"]
+
+        lo = int(np.searchsorted(open_time, start_us, side="left")) if start_us is not None else 0
+        hi = int(np.searchsorted(open_time, end_us, side="left")) if end_us is not None else len(open_time)
+
+        return CandleSeries(self.symbol, self.interval,
+                            **{name: column[lo:hi] for name, column in columns.items()})
+
+    # ---------- запись ----------
+
+    def write(self, series: CandleSeries, watermark: Dict[str, Any]):
+        """Записать серию целиком в новом поколении файлов"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        old_generation = self.header["generation"] if self.header else None
+        generation = (old_generation or 0) + 1
+
+        for name in COLUMNS:
+            column = np.ascontiguousarray(getattr(series, name), dtype=_dtype(name))
+            with open(self.column_path(name, generation), "wb") as handle:
+                column.tofile(handle)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+        self._write_header(self._new_header(series, generation, watermark))
+
+        if old_generation is not None:
+            for name in COLUMNS:
+                try:
+                    self.column_path(name, old_generation).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def append(self, series: CandleSeries, watermark: Dict[str, Any]):
+        """Дописать бары позже последнего в конец колонок"""
+        count = self.count
+        for name in COLUMNS:
+            column = np.ascontiguousarray(getattr(series, name), dtype=_dtype(name))
+            with open(self.column_path(name), "r+b") as handle:
+                handle.truncate(count * 8)  # хвост оборванной записи
+                handle.seek(count * 8)
+                column.tofile(handle)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+        header = dict(self.header)
+        header["count"] = count + len(series)
+        header["last_open_us"] = int(series.open_time[-1])
+        if not count:
+            header["first_open_us"] = int(series.open_time[0])
+        self._write_header({**header, **self._watermark_fields(watermark)})
+
+    def patch(self, index: np.ndarray, series: CandleSeries):
+        """Исправить существующие бары на месте (index - позиции в колонках)"""
+        for name in COLUMNS:
+            mapped = np.memmap(self.column_path(name), dtype=_dtype(name), mode="r+",
+                               shape=(self.count,))
+            mapped[index] = getattr(series, name)
+            mapped.flush()
+            del mapped
+
+    def set_watermark(self, watermark: Dict[str, Any]):
+        """Обновить только водяной знак (данные не менялись)"""
+        self._write_header({**self.header, **self._watermark_fields(watermark)})
+
+    def remove(self):
+        """Удалить файлы серии"""
+        if self.path.exists():
+            for item in self.path.iterdir():
+                if item.name != ".lock":
+                    item.unlink()
+        self.header = None
+        self._maps = None
+
+    def _new_header(self, series: CandleSeries, generation: int,
+                    watermark: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "version": CACHE_VERSION,
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "generation": generation,
+            "count": len(series),
+            "first_open_us": int(series.open_time[0]) if len(series) else None,
+            "last_open_us": int(series.open_time[-1]) if len(series) else None,
+            **self._watermark_fields(watermark)
+        }
+
+    @staticmethod
+    def _watermark_fields(watermark: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "db_count": watermark["count"],
+            "db_updated_us": watermark["updated_us"],
+            "synced_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def __repr__(self) -> str:
+        return f"CandleFile({self.symbol} {self.interval}, bars={self.count})"
+
+
+# ==================== КЭШ ====================
+
+class CandleCache:
+    """
+    💾 Локальный кэш свечей поверх MarketDataRepository
+
+    Usage:
+        cache = CandleCache("~/.cache/v3prostaya/candles")
+        series = await cache.load(repository, "BTCUSDT", "1m", start, end)
+
+        # или прозрачно для существующего кода:
+        repository = CachedCandleRepository(repository, cache)
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        chunk_days: int = 30,
+        overlap_sec: float = 60.0
+    ):
+        """
+        Args:
+            cache_dir: Директория кэша
+            chunk_days: Размер порции полной загрузки из БД
+            overlap_sec: Перекрытие при запросе измененных баров (updated_at
+                         коммитов, завершившихся позже снятия водяного знака)
+        """
+        self.root = Path(cache_dir).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.chunk_days = chunk_days
+        self.overlap_us = int(overlap_sec * _US)
+
+        self._files: Dict[tuple, CandleFile] = {}
+
+        self.stats = {
+            "syncs": 0,
+            "fresh": 0,
+            "created": 0,
+            "appended_bars": 0,
+            "patched_bars": 0,
+            "rebuilds": 0,
+            "series_served": 0,
+            "sync_errors": 0
+        }
+
+        logger.info(f"💾 CandleCache: {self.root}")
+
+    def file(self, symbol: str, interval: str) -> CandleFile:
+        """Файлы серии (создаются лениво)"""
+        key = (symbol.upper(), interval)
+        if key not in self._files:
+            self._files[key] = CandleFile(self.root, symbol, interval)
+        return self._files[key]
+
+    # ==================== СИНХРОНИЗАЦИЯ ====================
+
+    async def sync(self, repository, symbol: str, interval: str) -> str:
+        """
+        Привести кэш серии в соответствие с БД
+
+        Returns:
+            Что было сделано: fresh, created, appended, patched, rebuilt, empty
+        """
+        candle_file = self.file(symbol, interval)
+        self.stats["syncs"] += 1
+
+        raw = await repository.get_candles_watermark(symbol, interval)
+        watermark = {
+            "count": int(raw["count"] or 0),
+            "updated_us": to_epoch_us(raw["latest_updated_at"]) if raw["latest_updated_at"] else 0,
+            "latest_us": to_epoch_us(raw["latest_open_time"]) if raw["latest_open_time"] else None,
+            "earliest": raw["earliest_open_time"]
+        }
+
+        with candle_file.lock():
+            header = candle_file.reload_header()
+
+            if watermark["count"] == 0:
+                if header is not None:
+                    candle_file.remove()
+                return "empty"
+
+            if (header is not None
+                    and header["count"] == watermark["count"]
+                    and header["db_updated_us"] >= watermark["updated_us"]
+                    and header["last_open_us"] == watermark["latest_us"]):
+                self.stats["fresh"] += 1
+                return "fresh"
+
+            if header is None:
+                await self._rebuild(repository, candle_file, watermark)
+                self.stats["created"] += 1
+                logger.info(f"💾 {candle_file.symbol} {interval}: кэш создан ({candle_file.count} баров)")
+                return "created"
+
+            status = await self._apply_changes(repository, candle_file, watermark)
+
+            # Удаления и изменения мимо updated_at видны только по числу баров
+            if candle_file.count != watermark["count"]:
+                logger.info(f"💾 {candle_file.symbol} {interval}: расхождение с БД "
+                            f"({candle_file.count} != {watermark['count']}), пересборка")
+                await self._rebuild(repository, candle_file, watermark)
+                self.stats["rebuilds"] += 1
+                return "rebuilt"
+
+            return status
+
+    async def _rebuild(self, repository, candle_file: CandleFile, watermark: Dict[str, Any]):
+        """Полная загрузка серии из БД в новое поколение файлов"""
+        period = timedelta(seconds=INTERVAL_SECONDS[candle_file.interval])
+        series = await CandleSeries.load(
+            repository,
+            candle_file.symbol,
+            candle_file.interval,
+            watermark["earliest"],
+            from_epoch_us(watermark["latest_us"]) + period,
+            chunk_days=self.chunk_days
+        )
+        candle_file.write(series, watermark)
+
+    async def _apply_changes(self, repository, candle_file: CandleFile, watermark: Dict[str, Any]) -> str:
+        """Дописать новые и исправить измененные бары по updated_at"""
+        header = candle_file.header
+        since = from_epoch_us(header["db_updated_us"] - self.overlap_us)
+
+        changed = await repository.get_candles_updated_since(candle_file.symbol, candle_file.interval, since)
+        if changed:
+            watermark = {
+                **watermark,
+                "updated_us": max(watermark["updated_us"], max(to_epoch_us(c["updated_at"]) for c in changed))
+            }
+
+        updates = CandleSeries.from_candles(changed, candle_file.symbol, candle_file.interval)
+        if not len(updates):
+            candle_file.set_watermark(watermark)
+            return "fresh"
+
+        local = candle_file.columns()
+        local_time = local["open_time"]
+
+        pos = np.searchsorted(local_time, updates.open_time)
+        in_range = pos < len(local_time)
+        exists = np.zeros(len(updates), dtype=bool)
+        exists[in_range] = local_time[pos[in_range]] == updates.open_time[in_range]
+        appended = updates.open_time > header["last_open_us"]
+
+        # Бар вставлен внутрь истории - колонки пересобираются
+        if np.any(~exists & ~appended):
+            merged = CandleSeries.concat(
+                [candle_file.series(), updates], candle_file.symbol, candle_file.interval
+            )
+            candle_file.write(merged, watermark)
+            self.stats["rebuilds"] += 1
+            return "rebuilt"
+
+        status = "fresh"
+
+        if np.any(exists):
+            index = pos[exists]
+            patch = _take(updates, exists)
+            differs = np.zeros(len(index), dtype=bool)
+            for name in COLUMNS:
+                differs |= local[name][index] != getattr(patch, name)
+            if np.any(differs):
+                candle_file.patch(index[differs], _take(patch, differs))
+                self.stats["patched_bars"] += int(differs.sum())
+                status = "patched"
+
+        if np.any(appended):
+            candle_file.append(_take(updates, appended), watermark)
+            self.stats["appended_bars"] += int(appended.sum())
+            return "appended"
+
+        candle_file.set_watermark(watermark)
+        return status
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def series(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> CandleSeries:
+        """Серия [start, end) из кэша без обращения к БД (пустая, если кэша нет)"""
+        candle_file = self.file(symbol, interval)
+        if candle_file.header is None:
+            candle_file.reload_header()
+
+        self.stats["series_served"] += 1
+        return candle_file.series(
+            to_epoch_us(start) if start is not None else None,
+            to_epoch_us(end) if end is not None else None
+        )
+
+    async def load(
+        self,
+        repository,
+        symbol: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> CandleSeries:
+        """Синхронизировать с БД и вернуть серию [start, end)"""
+        try:
+            await self.sync(repository, symbol, interval)
+        except Exception as e:
+            # Без БД работаем с тем, что уже есть на диске
+            self.stats["sync_errors"] += 1
+            logger.warning(f"⚠️ {symbol} {interval}: кэш не синхронизирован: {e}")
+
+        return self.series(symbol, interval, start, end)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        return {
+            **self.stats,
+            "cache_dir": str(self.root),
+            "series": {f"{f.symbol} {f.interval}": f.count for f in self._files.values()}
+        }
+
+    def __repr__(self) -> str:
+        return f"CandleCache(root={self.root}, series={len(self._files)})"
+
+
+def _take(series: CandleSeries, mask: np.ndarray) -> CandleSeries:
+    """Подмножество баров серии по маске"""
+    return CandleSeries(series.symbol, series.interval,
+                        **{name: getattr(series, name)[mask] for name in COLUMNS})
+
+
+# ==================== РЕПОЗИТОРИЙ ====================
+
+class CachedCandleRepository:
+    """
+    🗄️ MarketDataRepository с чтением свечей из локального кэша
+
+    get_candles() / get_latest_candle() отдают бары из memmap-файлов с той же
+    семантикой фильтров, что и SQL запрос (open_time в [start, end], ORDER BY,
+    LIMIT). Серия синхронизируется с БД не чаще раза в sync_interval_sec.
+    Остальные методы проксируются в исходный репозиторий.
+    """
+
+    def __init__(
+        self,
+        repository,
+        cache: Union[CandleCache, str, Path],
+        sync_interval_sec: float = 30.0
+    ):
+        self.repository = repository
+        self.cache = cache if isinstance(cache, CandleCache) else CandleCache(cache)
+        self.sync_interval_sec = sync_interval_sec
+        self._synced_at: Dict[tuple, float] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repository, name)
+
+    async def _ensure_synced(self, symbol: str, interval: str):
+        key = (symbol.upper(), interval)
+        now = time.monotonic()
+        if now - self._synced_at.get(key, float("-inf")) < self.sync_interval_sec:
+            return
+
+        await self.cache.load(self.repository, symbol, interval)
+        self._synced_at[key] = now
+
+    async def load_candle_series(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> CandleSeries:
+        """Колоночная серия [start, end) без копирования (для CandleSeries.load)"""
+        await self._ensure_synced(symbol, interval)
+        return self.cache.series(symbol, interval, start, end)
+
+    async def get_candles(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        order_desc: bool = False
+    ) -> Union[CandleWindow, List[CandleRow]]:
+        """Свечи как у MarketDataRepository.get_candles(), но из кэша"""
+        await self._ensure_synced(symbol, interval)
+
+        series = self.cache.series(symbol, interval)
+        start = 0
+        stop = len(series)
+        if start_time is not None:
+            start = int(np.searchsorted(series.open_time, to_epoch_us(start_time), side="left"))
+        if end_time is not None:
+            stop = int(np.searchsorted(series.open_time, to_epoch_us(end_time), side="right"))
+        stop = max(start, stop)
+
+        if order_desc:
+            if limit:
+                start = max(start, stop - limit)
+            return list(reversed(CandleWindow(series, start, stop)))
+
+        if limit:
+            stop = min(stop, start + limit)
+        return CandleWindow(series, start, stop)
+
+    async def get_latest_candle(self, symbol: str, interval: str) -> Optional[CandleRow]:
+        """Последняя свеча из кэша"""
+        candles = await self.get_candles(symbol, interval, limit=1, order_desc=True)
+        return candles[0] if candles else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика репозитория и кэша"""
+        stats = self.repository.get_stats() if hasattr(self.repository, "get_stats") else {}
+        return {**stats, "candle_cache": self.cache.get_stats()}
+
+    def __repr__(self) -> str:
+        return f"CachedCandleRepository({self.repository!r}, {self.cache!r})"
+
+
+# Export
+__all__ = [
+    "CandleCache",
+    "CandleFile",
+    "CachedCandleRepository"
+]
+
+logger.info("✅ Candle cache module loaded")
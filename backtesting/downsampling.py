@@ -0,0 +1,216 @@
+# backtesting/downsampling.py
+
+"""
+Downsampling - Прореживание рядов для графиков дашборда
+
+Браузер не может отрисовать сотни тысяч свечей 1m бэктеста, а на экране
+все равно помещается пара тысяч пикселей по X. Здесь собраны прореживания,
+сохраняющие визуальную форму ряда:
+
+- ohlc_buckets: свечи группируются в корзины (open первой, max high,
+  min low, close последней) - экстремумы цены не теряются
+- lttb_indices: Largest-Triangle-Three-Buckets для линий (equity, buy&hold)
+- minmax_indices: min и max в каждой корзине (просадка - важна глубина)
+
+Все функции работают за O(n) на NumPy и возвращают индексы исходного ряда
+(кроме ohlc_buckets), чтобы вызывающий код мог взять время и значения
+любых параллельных колонок.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== СКОЛЬЗЯЩИЕ СРЕДНИЕ ====================
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Простая скользящая средняя за O(n) через кумулятивную сумму
+
+    Ряд центрируется на первом значении, чтобы разность больших
+    кумулятивных сумм не теряла точность на длинных рядах.
+    Первые period-1 значений - NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if period <= 0 or len(values) < period:
+        return result
+
+    shift = values[0]
+    csum = np.cumsum(values - shift)
+    window = csum[period - 1:].copy()
+    window[1:] -= csum[:-period]
+    result[period - 1:] = window / period + shift
+    return result
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Экспоненциальная скользящая средняя за один проход
+
+    Старт - SMA первых period значений на индексе period-1, до него NaN.
+    Рекурсия последовательна по природе, поэтому цикл идет по list
+    (без поэлементного доступа к NumPy скалярам).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.full(n, np.nan)
+    if period <= 0 or n < period:
+        return result
+
+    alpha = 2 / (period + 1)
+    prev = float(values[:period].sum() / period)
+    out = [prev]
+    for price in values[period:].tolist():
+        prev = (price - prev) * alpha + prev
+        out.append(prev)
+    result[period - 1:] = out
+    return result
+
+
+# ==================== КОРЗИНЫ ====================
+
+def bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """Границы buckets равных корзин по индексам [0, n): массив длины buckets+1"""
+    buckets = max(1, min(buckets, n))
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def ohlc_buckets(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    max_points: int
+) -> Dict[str, np.ndarray]:
+    """
+    Агрегирует свечи в не более чем max_points корзин
+
+    Returns:
+        {"start", "end", "open", "high", "low", "close"} - start/end
+        это индексы первой и последней свечи корзины
+    """
+    n = len(close)
+    if n <= max_points:
+        idx = np.arange(n)
+        return {
+            "start": idx, "end": idx,
+            "open": np.asarray(open_, dtype=np.float64),
+            "high": np.asarray(high, dtype=np.float64),
+            "low": np.asarray(low, dtype=np.float64),
+            "close": np.asarray(close, dtype=np.float64)
+        }
+
+    edges = bucket_edges(n, max_points)
+    starts = edges[:-1]
+    ends = edges[1:] - 1
+    return {
+        "start": starts,
+        "end": ends,
+        "open": np.asarray(open_, dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(np.asarray(high, dtype=np.float64), starts),
+        "low": np.minimum.reduceat(np.asarray(low, dtype=np.float64), starts),
+        "close": np.asarray(close, dtype=np.float64)[ends]
+    }
+
+
+def minmax_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Индексы min и max каждой корзины (в порядке времени)
+
+    Дает не более max_points точек; первая и последняя точки ряда
+    сохраняются всегда.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points or max_points < 4:
+        return np.arange(n) if n <= max_points else lttb_indices(np.arange(n), values, max_points)
+
+    edges = bucket_edges(n, (max_points - 2) // 2)
+    starts = edges[:-1]
+    lengths = np.diff(edges)
+
+    # Индекс экстремума внутри корзины: argmin/argmax по дополненной матрице
+    width = int(lengths.max())
+    padded_idx = starts[:, None] + np.arange(width)[None, :]
+    valid = np.arange(width)[None, :] < lengths[:, None]
+    padded_idx = np.where(valid, padded_idx, starts[:, None])
+    block = values[padded_idx]
+
+    mins = starts + np.argmin(np.where(valid, block, np.inf), axis=1)
+    maxs = starts + np.argmax(np.where(valid, block, -np.inf), axis=1)
+
+    idx = np.unique(np.concatenate(([0], mins, maxs, [n - 1])))
+    return idx
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: индексы точек, сохраняющих форму линии
+
+    Первая и последняя точки сохраняются; из каждой внутренней корзины
+    берется точка с наибольшей площадью треугольника с выбранной точкой
+    предыдущей корзины и средним следующей. NaN в y пропускаются.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Средние корзин для "следующей" вершины треугольника
+    sums_x = np.add.reduceat(x, edges[:-1])
+    sums_y = np.add.reduceat(np.nan_to_num(y), edges[:-1])
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        cx, cy = avg_x[b + 1], avg_y[b + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay)
+        )
+        area = np.nan_to_num(area, nan=-1.0)
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def take(values: Sequence, indices: np.ndarray) -> List:
+    """Значения по индексам; NaN -> None (для JSON)"""
+    if isinstance(values, np.ndarray):
+        picked = values[indices]
+        if picked.dtype.kind == "f":
+            return [None if v != v else v for v in picked.tolist()]
+        return picked.tolist()
+    return [values[i] for i in indices.tolist()]
+
+
+def nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    """NumPy ряд -> список float, NaN -> None"""
+    return [None if v != v else v for v in np.asarray(values, dtype=np.float64).tolist()]
+
+
+__all__ = [
+    "rolling_mean",
+    "ema",
+    "bucket_edges",
+    "ohlc_buckets",
+    "minmax_indices",
+    "lttb_indices",
+    "take",
+    "nan_to_none"
+]
+
+logger.info("✅ Downsampling module loaded")
@@ -0,0 +1,159 @@
+# backtesting/equity_curve.py
+
+"""
+Equity Curve - Кривая капитала как параллельные массивы
+
+Вместо списка словарей {"timestamp", "equity", "price"} на каждый бар
+хранятся растущие NumPy массивы (32 байта на точку). Для совместимости
+кривая ведет себя как последовательность таких словарей: итерация,
+индексация и len() работают как раньше (timestamp - ISO строка).
+"""
+
+import logging
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Union, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_us(value: Union[datetime, str, int]) -> int:
+    """datetime / ISO строка / мкс -> микросекунды epoch (naive = UTC)"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+class EquityCurve(Sequence):
+    """
+    📈 Кривая капитала: timestamp (int64 мкс), equity, price, exposure
+
+    exposure - доля капитала в позиции со знаком (+ long, - short, 0 - вне рынка).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(capacity, 1)
+        self._timestamp = np.empty(capacity, dtype=np.int64)
+        self._equity = np.empty(capacity, dtype=np.float64)
+        self._price = np.empty(capacity, dtype=np.float64)
+        self._exposure = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    @classmethod
+    def from_dicts(cls, points: List[Dict[str, Any]]) -> "EquityCurve":
+        """Построить из списка словарей (старый формат)"""
+        curve = cls(capacity=len(points))
+        for point in points:
+            curve.append(
+                point["timestamp"],
+                point["equity"],
+                point.get("price", 0.0),
+                point.get("exposure", 0.0)
+            )
+        return curve
+
+    @classmethod
+    def ensure(cls, curve: Union["EquityCurve", List[Dict[str, Any]], None]) -> "EquityCurve":
+        """Принять EquityCurve или список словарей"""
+        if isinstance(curve, cls):
+            return curve
+        return cls.from_dicts(curve or [])
+
+    def append(
+        self,
+        timestamp: Union[datetime, str, int],
+        equity: float,
+        price: float = 0.0,
+        exposure: float = 0.0
+    ):
+        """Добавить точку (амортизированно O(1))"""
+        if self._size == len(self._equity):
+            self._grow()
+
+        i = self._size
+        self._timestamp[i] = _to_us(timestamp)
+        self._equity[i] = equity
+        self._price[i] = price
+        self._exposure[i] = exposure
+        self._size += 1
+
+    def _grow(self):
+        """Удвоить емкость массивов"""
+        capacity = len(self._equity) * 2
+        for name in ("_timestamp", "_equity", "_price", "_exposure"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    # ==================== МАССИВЫ ====================
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        """Время точек, int64 мкс epoch (view)"""
+        return self._timestamp[:self._size]
+
+    @property
+    def equity(self) -> np.ndarray:
+        """Капитал (view)"""
+        return self._equity[:self._size]
+
+    @property
+    def price(self) -> np.ndarray:
+        """Цена (view)"""
+        return self._price[:self._size]
+
+    @property
+    def exposure(self) -> np.ndarray:
+        """Доля капитала в позиции со знаком (view)"""
+        return self._exposure[:self._size]
+
+    @property
+    def last_equity(self) -> Optional[float]:
+        return float(self._equity[self._size - 1]) if self._size else None
+
+    # ==================== СОВМЕСТИМОСТЬ СО СПИСКОМ СЛОВАРЕЙ ====================
+
+    def _point(self, i: int) -> Dict[str, Any]:
+        return {
+            "timestamp": (_EPOCH + timedelta(microseconds=int(self._timestamp[i]))).isoformat(),
+            "equity": float(self._equity[i]),
+            "price": float(self._price[i])
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._point(i) for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("EquityCurve index out of range")
+        return self._point(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._size):
+            yield self._point(i)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Старый формат: список словарей"""
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"EquityCurve(points={self._size})"
+
+
+# Export
+__all__ = ["EquityCurve"]
+
+logger.info("✅ Equity curve module loaded")
@@ -0,0 +1,694 @@
+# backtesting/parameter_sweep.py
+
+"""
+Parameter Sweep - Параллельный перебор параметров стратегий
+
+Свечи набора символов загружаются из БД один раз и кладутся в один блок
+multiprocessing.shared_memory. Воркеры (процессы) подключаются к блоку при
+старте и строят CandleSeries как views на общую память - задача несет только
+словарь параметров, без копирования свечей. Каждая конфигурация прогоняется
+через ReplayBacktestEngine, метрики собираются в таблицу результатов.
+
+Воркер держит ReplayContextCache на (символ, конфиги анализаторов): задачи,
+отличающиеся только параметрами стратегии или пересекающимся периодом,
+не пересчитывают уровни/ATR/рыночные условия повторно.
+
+Параметры:
+- "atr_exhaustion_threshold"           -> kwargs конструктора стратегии
+- "level_analyzer.min_touches"         -> level_analyzer_config
+- "pattern_detector.compression_..."   -> pattern_detector_config
+- "atr_calculator.*", "breakout_analyzer.*", "market_conditions.*" - аналогично
+
+Usage:
+    store = await SharedCandleStore.load(repository, ["BTCUSDT", "ETHUSDT"], start, end)
+    sweep = ParameterSweep(store, BounceStrategy, start=start, end=end, workers=8)
+    results = sweep.run(grid_configs({
+        "atr_exhaustion_threshold": [0.6, 0.75, 0.9],
+        "level_analyzer.min_touches": [2, 3]
+    }))
+    results.to_csv("sweep.csv")
+    store.unlink()
+"""
+
+import asyncio
+import csv
+import json
+import importlib
+import itertools
+import logging
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import List, Dict, Any, Optional, Union, Sequence
+
+import numpy as np
+
+from .replay_data import CandleSeries
+from .replay_engine import ReplayBacktestEngine, ReplayContextCache
+
+logger = logging.getLogger(__name__)
+
+
+# Префикс параметра -> аргумент TechnicalAnalysisContextManager
+ANALYZER_CONFIGS = {
+    "level_analyzer": "level_analyzer_config",
+    "atr_calculator": "atr_calculator_config",
+    "pattern_detector": "pattern_detector_config",
+    "breakout_analyzer": "breakout_analyzer_config",
+    "market_conditions": "market_conditions_config"
+}
+
+
+# ==================== ОБЩАЯ ПАМЯТЬ ====================
+
+class SharedCandleStore:
+    """
+    🧠 Колоночные свечи набора символов в одном блоке shared memory
+
+    Раскладка: для каждого (символ, интервал) подряд идут 7 колонок по n
+    значений (int64 времена, float64 цены/объем - по 8 байт).
+    В процессе-владельце блок создается, в воркерах - подключается по имени.
+    """
+
+    COLUMNS = ("open_time", "close_time", "open", "high", "low", "close", "volume")
+    TIME_COLUMNS = ("open_time", "close_time")
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        layout: Dict[str, Dict[str, List[int]]],
+        owner: bool
+    ):
+        """
+        Args:
+            shm: Блок общей памяти
+            layout: symbol -> interval -> [offset в байтах, число баров]
+            owner: Создан этим процессом (только владелец делает unlink)
+        """
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self._series: Dict[str, Dict[str, CandleSeries]] = {}
+
+    @classmethod
+    def create(cls, series_by_symbol: Dict[str, Dict[str, CandleSeries]]) -> "SharedCandleStore":
+        """Скопировать серии в новый блок общей памяти (один раз)"""
+        layout: Dict[str, Dict[str, List[int]]] = {}
+        offset = 0
+
+        for symbol, by_interval in series_by_symbol.items():
+            layout[symbol] = {}
+            for interval, series in by_interval.items():
+                layout[symbol][interval] = [offset, len(series)]
+                offset += len(cls.COLUMNS) * len(series) * 8
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        store = cls(shm, layout, owner=True)
+
+        for symbol, by_interval in series_by_symbol.items():
+            for interval, series in by_interval.items():
+                for name, column in store._columns(symbol, interval, writeable=True).items():
+                    column[:] = getattr(series, name)
+
+        total_bars = sum(n for by_interval in layout.values() for _, n in by_interval.values())
+        logger.info(f"🧠 SharedCandleStore: {len(layout)} символов, {total_bars} баров, "
+                    f"{offset / 1024 / 1024:.1f} MB ({shm.name})")
+        return store
+
+    @classmethod
+    async def load(
+        cls,
+        repository,
+        symbols: Sequence[str],
+        start: datetime,
+        end: datetime,
+        warmup_days: int = 180
+    ) -> "SharedCandleStore":
+        """Загрузить историю символов из MarketDataRepository и положить в общую память"""
+        loader = ReplayBacktestEngine()
+        series_by_symbol = {}
+
+        for symbol in symbols:
+            series_by_symbol[symbol.upper()] = await loader.load_series(
+                repository, symbol.upper(), start, end, warmup_days=warmup_days
+            )
+
+        return cls.create(series_by_symbol)
+
+    @classmethod
+    def attach(cls, descriptor: Dict[str, Any]) -> "SharedCandleStore":
+        """Подключиться к существующему блоку (в воркере)"""
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+        return cls(shm, descriptor["layout"], owner=False)
+
+    def descriptor(self) -> Dict[str, Any]:
+        """Описание блока для передачи воркерам (имя + раскладка, без данных)"""
+        return {"name": self.shm.name, "layout": self.layout}
+
+    def _columns(self, symbol: str, interval: str, writeable: bool = False) -> Dict[str, np.ndarray]:
+        """Колонки серии как views на общую память"""
+        offset, n = self.layout[symbol][interval]
+        columns = {}
+
+        for i, name in enumerate(self.COLUMNS):
+            dtype = np.int64 if name in self.TIME_COLUMNS else np.float64
+            column = np.ndarray((n,), dtype=dtype, buffer=self.shm.buf, offset=offset + i * n * 8)
+            column.flags.writeable = writeable
+            columns[name] = column
+
+        return columns
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.layout)
+
+    def series(self, symbol: str) -> Dict[str, CandleSeries]:
+        """Серии символа по интервалам (views, только чтение)"""
+        symbol = symbol.upper()
+        if symbol not in self._series:
+            self._series[symbol] = {
+                interval: CandleSeries(symbol=symbol, interval=interval,
+                                       **self._columns(symbol, interval))
+                for interval in self.layout[symbol]
+            }
+        return self._series[symbol]
+
+    def close(self):
+        """Отключиться от блока (views становятся недействительными)"""
+        self._series.clear()
+        try:
+            self.shm.close()
+        except BufferError:
+            # Остались живые views - блок освободится вместе с процессом
+            pass
+
+    def unlink(self):
+        """Закрыть и удалить блок (только владелец)"""
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> "SharedCandleStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+    def __repr__(self) -> str:
+        return f"SharedCandleStore(name={self.shm.name}, symbols={self.symbols}, owner={self.owner})"
+
+
+# ==================== ПРОСТРАНСТВО ПАРАМЕТРОВ ====================
+
+@dataclass(frozen=True)
+class Uniform:
+    """Непрерывный диапазон для случайного поиска"""
+    low: float
+    high: float
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.uniform(self.low, self.high)
+
+
+@dataclass(frozen=True)
+class IntRange:
+    """Целочисленный диапазон [low, high] для случайного поиска"""
+    low: int
+    high: int
+
+    def sample(self, rng: random.Random) -> int:
+        return rng.randint(self.low, self.high)
+
+
+def grid_configs(space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Все комбинации значений (значения - списки)"""
+    for name, values in space.items():
+        if isinstance(values, (Uniform, IntRange)):
+            raise ValueError(f"Сетка требует список значений: {name}")
+
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+
+def random_configs(
+    space: Dict[str, Union[Sequence[Any], Uniform, IntRange]],
+    n_samples: int,
+    seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Случайные конфигурации: списки - выбор значения, Uniform/IntRange - выборка из диапазона"""
+    rng = random.Random(seed)
+    configs = []
+
+    for _ in range(n_samples):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, (Uniform, IntRange)):
+                config[name] = values.sample(rng)
+            else:
+                config[name] = rng.choice(list(values))
+        configs.append(config)
+
+    return configs
+
+
+def split_params(params: Dict[str, Any]) -> tuple:
+    """
+    Разделить параметры на kwargs стратегии и конфиги анализаторов
+
+    Returns:
+        (strategy_kwargs, context_manager_config)
+    """
+    strategy_kwargs = {}
+    context_config: Dict[str, Dict[str, Any]] = {}
+
+    for name, value in params.items():
+        prefix, _, key = name.partition(".")
+        if key and prefix in ANALYZER_CONFIGS:
+            context_config.setdefault(ANALYZER_CONFIGS[prefix], {})[key] = value
+        elif key:
+            raise ValueError(f"Неизвестный префикс параметра: {name}")
+        else:
+            strategy_kwargs[name] = value
+
+    return strategy_kwargs, context_config
+
+
+# ==================== РАННЯЯ ОСТАНОВКА ====================
+
+@dataclass
+class EarlyStopping:
+    """
+    Правило ранней остановки явно плохих конфигураций
+
+    Проверяется во время реплея каждые check_every шагов:
+    - просадка больше max_drawdown % - стоп сразу
+    - после min_progress доли шагов PnL ниже min_pnl_percent - стоп
+    Если символ остановлен, остальные символы конфигурации не прогоняются.
+    """
+    max_drawdown: float = 30.0
+    min_pnl_percent: float = -15.0
+    min_progress: float = 0.25
+    check_every: int = 288  # сутки шагов 5m
+
+    def __call__(self, engine: ReplayBacktestEngine, progress: float) -> bool:
+        if engine.max_drawdown_pct > self.max_drawdown:
+            return True
+
+        if progress >= self.min_progress and len(engine.equity_curve):
+            equity = engine.equity_curve.last_equity
+            pnl_percent = (equity - engine.initial_capital) / engine.initial_capital * 100
+            if pnl_percent < self.min_pnl_percent:
+                return True
+
+        return False
+
+
+# ==================== ВОРКЕР ====================
+
+_WORKER_STORE: Optional[SharedCandleStore] = None
+
+# (store, символ, конфиги анализаторов, шаг) -> кэш контекстов процесса
+_CONTEXT_CACHES: Dict[tuple, ReplayContextCache] = {}
+
+
+def _init_worker(descriptor: Dict[str, Any], log_level: int):
+    """Инициализация процесса: подключение к общей памяти один раз"""
+    global _WORKER_STORE
+    logging.getLogger().setLevel(log_level)
+    _WORKER_STORE = SharedCandleStore.attach(descriptor)
+
+
+def _resolve_strategy(strategy: Union[str, type]) -> type:
+    """Класс стратегии по имени из пакета strategies"""
+    if isinstance(strategy, str):
+        return getattr(importlib.import_module("strategies"), strategy)
+    return strategy
+
+
+def _context_cache(
+    store: SharedCandleStore,
+    symbol: str,
+    context_config: Dict[str, Any],
+    task: Dict[str, Any]
+) -> Optional[ReplayContextCache]:
+    """Кэш контекстов процесса для символа и конфигов анализаторов"""
+    if not task.get("cache_contexts"):
+        return None
+
+    key = (
+        store.shm.name,
+        symbol,
+        json.dumps(context_config, sort_keys=True, default=str),
+        task["engine_params"].get("step_interval", "5m")
+    )
+    if key not in _CONTEXT_CACHES:
+        _CONTEXT_CACHES[key] = ReplayContextCache(max_entries=task.get("context_cache_entries"))
+    return _CONTEXT_CACHES[key]
+
+
+def clear_context_caches():
+    """Освободить кэши контекстов текущего процесса"""
+    _CONTEXT_CACHES.clear()
+
+
+async def _run_symbol(
+    store: SharedCandleStore,
+    symbol: str,
+    strategy_class: type,
+    strategy_kwargs: Dict[str, Any],
+    context_config: Dict[str, Any],
+    task: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Реплей одной конфигурации на одном символе"""
+    engine = ReplayBacktestEngine(context_manager_config=context_config, **task["engine_params"])
+    strategy = strategy_class(symbol=symbol, **strategy_kwargs)
+
+    early_stopping = task.get("early_stopping")
+    result = await engine.run_replay(
+        store.series(symbol),
+        [strategy],
+        symbol,
+        start=task.get("start"),
+        end=task.get("end"),
+        stop_check=early_stopping,
+        check_every=early_stopping.check_every if early_stopping else 288,
+        context_cache=_context_cache(store, symbol, context_config, task)
+    )
+
+    return {
+        "total_trades": result.total_trades,
+        "total_pnl_percent": result.total_pnl_percent,
+        "win_rate": result.win_rate,
+        "profit_factor": result.profit_factor,
+        "max_drawdown": result.max_drawdown,
+        "sharpe_ratio": result.metrics.get("sharpe_ratio", 0.0),
+        "steps": engine.stats["steps"],
+        "context_cache_hits": engine.stats["context_cache_hits"],
+        "stopped_early": bool(engine.stats["stopped_early"])
+    }
+
+
+def run_config(task: Dict[str, Any], store: Optional[SharedCandleStore] = None) -> Dict[str, Any]:
+    """
+    Прогнать одну конфигурацию по всем символам (выполняется в воркере)
+
+    Returns:
+        Строка таблицы результатов
+    """
+    store = store or _WORKER_STORE
+    started = time.perf_counter()
+
+    row: Dict[str, Any] = {"config_id": task["config_id"], **task["params"]}
+
+    try:
+        strategy_class = _resolve_strategy(task["strategy"])
+        strategy_kwargs, context_config = split_params({**task["base_params"], **task["params"]})
+
+        per_symbol = {}
+        for symbol in task["symbols"]:
+            per_symbol[symbol] = asyncio.run(
+                _run_symbol(store, symbol, strategy_class, strategy_kwargs, context_config, task)
+            )
+            if per_symbol[symbol]["stopped_early"]:
+                break
+
+        metrics = list(per_symbol.values())
+        row.update({
+            "symbols_run": len(metrics),
+            "total_trades": sum(m["total_trades"] for m in metrics),
+            "total_pnl_percent": sum(m["total_pnl_percent"] for m in metrics) / len(metrics),
+            "win_rate": sum(m["win_rate"] for m in metrics) / len(metrics),
+            "profit_factor": min(m["profit_factor"] for m in metrics),
+            "max_drawdown": max(m["max_drawdown"] for m in metrics),
+            "sharpe_ratio": sum(m["sharpe_ratio"] for m in metrics) / len(metrics),
+            "stopped_early": any(m["stopped_early"] for m in metrics),
+            "context_cache_hits": sum(m["context_cache_hits"] for m in metrics),
+            "error": None
+        })
+        for symbol, m in per_symbol.items():
+            row[f"{symbol}.total_pnl_percent"] = m["total_pnl_percent"]
+            row[f"{symbol}.total_trades"] = m["total_trades"]
+
+    except Exception as e:
+        logger.error(f"❌ Конфигурация {task['config_id']}: {e}")
+        row.update({"stopped_early": False, "error": str(e)})
+
+    row["elapsed_sec"] = time.perf_counter() - started
+    return row
+
+
+# ==================== РЕЗУЛЬТАТЫ ====================
+
+@dataclass
+class SweepResults:
+    """📋 Таблица результатов перебора (строка = конфигурация)"""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    metric: str = "total_pnl_percent"
+    elapsed_sec: float = 0.0
+
+    @property
+    def columns(self) -> List[str]:
+        """Все колонки в порядке появления"""
+        columns: Dict[str, None] = {}
+        for row in self.rows:
+            columns.update(dict.fromkeys(row))
+        return list(columns)
+
+    def completed(self) -> List[Dict[str, Any]]:
+        """Строки без ошибок и без ранней остановки"""
+        return [r for r in self.rows if not r.get("error") and not r.get("stopped_early")]
+
+    def top(self, n: int = 10, metric: Optional[str] = None, ascending: bool = False) -> List[Dict[str, Any]]:
+        """Лучшие n завершенных конфигураций по метрике"""
+        metric = metric or self.metric
+        rows = [r for r in self.completed() if r.get(metric) is not None]
+        return sorted(rows, key=lambda r: r[metric], reverse=not ascending)[:n]
+
+    def best(self, metric: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Лучшая конфигурация"""
+        top = self.top(1, metric)
+        return top[0] if top else None
+
+    def to_csv(self, path: str):
+        """Сохранить таблицу в CSV"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Сводка по перебору"""
+        return {
+            "configs": len(self.rows),
+            "completed": len(self.completed()),
+            "stopped_early": sum(1 for r in self.rows if r.get("stopped_early")),
+            "errors": sum(1 for r in self.rows if r.get("error")),
+            "elapsed_sec": self.elapsed_sec,
+            "configs_per_min": len(self.rows) / self.elapsed_sec * 60 if self.elapsed_sec else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# ==================== ПЕРЕБОР ====================
+
+class ParameterSweep:
+    """
+    🔬 Параллельный перебор параметров стратегии
+
+    Каждая конфигурация - независимая задача, воркеры делят свечи через
+    общую память, поэтому пропускная способность растет почти линейно с
+    числом ядер (ограничение - одна задача на процесс за раз).
+    """
+
+    def __init__(
+        self,
+        store: SharedCandleStore,
+        strategy: Union[str, type],
+        symbols: Optional[Sequence[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        base_params: Optional[Dict[str, Any]] = None,
+        engine_params: Optional[Dict[str, Any]] = None,
+        early_stopping: Optional[EarlyStopping] = None,
+        workers: Optional[int] = None,
+        metric: str = "total_pnl_percent",
+        worker_log_level: int = logging.WARNING,
+        cache_contexts: bool = True,
+        context_cache_entries: Optional[int] = 150_000
+    ):
+        """
+        Args:
+            store: Общая память со свечами
+            strategy: Класс стратегии или его имя в пакете strategies
+            symbols: Символы (None = все символы store)
+            start/end: Период реплея
+            base_params: Общие параметры для всех конфигураций
+            engine_params: Параметры ReplayBacktestEngine (капитал, комиссия, шаг)
+            early_stopping: Правило ранней остановки (None = без остановки)
+            workers: Число процессов (None = os.cpu_count(), 1 = в текущем процессе)
+            metric: Метрика для сортировки результатов
+            worker_log_level: Уровень логов в воркерах
+            cache_contexts: Переиспользовать контексты шагов между задачами воркера
+            context_cache_entries: Лимит снимков контекста на (символ, конфиги анализаторов)
+        """
+        self.store = store
+        self.strategy = strategy if isinstance(strategy, str) else strategy.__name__
+        self._strategy_class = _resolve_strategy(strategy)
+        self.symbols = [s.upper() for s in (symbols or store.symbols)]
+        self.start = start
+        self.end = end
+        self.base_params = base_params or {}
+        self.engine_params = engine_params or {}
+        self.early_stopping = early_stopping
+        self.workers = workers
+        self.metric = metric
+        self.worker_log_level = worker_log_level
+        self.cache_contexts = cache_contexts
+        self.context_cache_entries = context_cache_entries
+
+        self.stats = {
+            "runs": 0,
+            "configs_run": 0,
+            "configs_stopped_early": 0,
+            "configs_failed": 0
+        }
+
+    def build_tasks(
+        self,
+        configs: List[Dict[str, Any]],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        first_id: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Задачи воркерам: только параметры и границы, без свечей"""
+        return [
+            {
+                "config_id": first_id + i,
+                "params": params,
+                "strategy": self._strategy_class,
+                "symbols": self.symbols,
+                "start": start,
+                "end": end,
+                "base_params": self.base_params,
+                "engine_params": self.engine_params,
+                "early_stopping": self.early_stopping,
+                "cache_contexts": self.cache_contexts,
+                "context_cache_entries": self.context_cache_entries
+            }
+            for i, params in enumerate(configs)
+        ]
+
+    def open_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Пул воркеров, подключенных к общей памяти (None при workers=1)"""
+        if self.workers == 1:
+            return None
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.store.descriptor(), self.worker_log_level)
+        )
+
+    def execute(
+        self,
+        tasks: List[Dict[str, Any]],
+        pool: Optional[ProcessPoolExecutor] = None
+    ) -> SweepResults:
+        """
+        Выполнить готовые задачи в пуле (или в текущем процессе)
+
+        Пул можно переиспользовать между вызовами - кэши контекстов
+        воркеров сохраняются.
+        """
+        results = SweepResults(metric=self.metric)
+        started = time.perf_counter()
+
+        if pool is None:
+            for task in tasks:
+                self._collect(results, run_config(task, self.store), len(tasks))
+        else:
+            futures = [pool.submit(run_config, task) for task in tasks]
+            for future in as_completed(futures):
+                self._collect(results, future.result(), len(tasks))
+
+        results.rows.sort(key=lambda r: r["config_id"])
+        results.elapsed_sec = time.perf_counter() - started
+        return results
+
+    def run(
+        self,
+        configs: List[Dict[str, Any]],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> SweepResults:
+        """
+        Прогнать конфигурации (grid_configs / random_configs)
+
+        Args:
+            configs: Список словарей параметров
+            start/end: Период (None = период перебора)
+        """
+        tasks = self.build_tasks(configs, start or self.start, end or self.end)
+
+        logger.info(f"🔬 Перебор {self.strategy}: {len(tasks)} конфигураций × "
+                    f"{len(self.symbols)} символов, воркеров: {self.workers or 'auto'}")
+
+        pool = self.open_pool()
+        try:
+            results = self.execute(tasks, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stats["runs"] += 1
+
+        best = results.best()
+        logger.info(f"✅ Перебор завершен за {results.elapsed_sec:.1f}s: "
+                    f"{results.get_stats()['completed']}/{len(results)} завершено"
+                    + (f", лучший {self.metric}={best[self.metric]:+.2f}" if best else ""))
+
+        return results
+
+    def _collect(self, results: SweepResults, row: Dict[str, Any], total: int):
+        """Добавить строку результата и обновить статистику"""
+        results.rows.append(row)
+        self.stats["configs_run"] += 1
+        self.stats["configs_stopped_early"] += int(bool(row.get("stopped_early")))
+        self.stats["configs_failed"] += int(bool(row.get("error")))
+
+        logger.debug(f"📋 [{len(results.rows)}/{total}] config {row['config_id']}: "
+                     f"{self.metric}={row.get(self.metric)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика перебора"""
+        return {
+            **self.stats,
+            "strategy": self.strategy,
+            "symbols": self.symbols,
+            "workers": self.workers
+        }
+
+    def __repr__(self) -> str:
+        return f"ParameterSweep(strategy={self.strategy}, symbols={self.symbols})"
+
+
+# Export
+__all__ = [
+    "SharedCandleStore",
+    "ParameterSweep",
+    "SweepResults",
+    "EarlyStopping",
+    "Uniform",
+    "IntRange",
+    "grid_configs",
+    "random_configs",
+    "split_params",
+    "run_config",
+    "clear_context_caches"
+]
+
+logger.info("✅ Parameter sweep module loaded")
@@ -1,67 +1,271 @@
 # backtesting/performance_metrics.py
 
 import logging
-from typing import List, Dict, Any
+import math
+from collections import defaultdict
+from typing import List, Dict, Any, Union
+
+import numpy as np
+
+from .equity_curve import EquityCurve
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_YEAR = 365 * 24 * 3600  # Крипторынок торгуется круглосуточно
+
+# Кривые короче не аннуализируются: total ** (1 / years) на часах теста
+# переполняется (inf и RuntimeWarning), а экстраполяция бессмысленна
+MIN_ANNUALIZATION_DAYS = 30
+
+# Чисел в одной порции скользящей просадки (~8 MB float64 на промежуточный массив)
+ROLLING_CHUNK_ELEMENTS = 1 << 20
+
 
 class PerformanceMetrics:
     """Расчет метрик производительности стратегии"""
-    
+
     @staticmethod
-    def calculate(trades: List, equity_curve: List[Dict], 
+    def calculate(trades: List, equity_curve: Union[EquityCurve, List[Dict]],
                   initial_capital: float) -> Dict[str, Any]:
         """
         Вычисляет все метрики производительности
-        
+
+        Базовые поля (win_rate, profit_factor, max_drawdown, ...) совпадают
+        с прежним расчетом; кривая капитала обрабатывается векторно.
+
         Returns:
             Dict с метриками: win_rate, profit_factor, max_drawdown, etc
+            + sharpe/sortino/calmar, длительность просадки, экспозиция,
+            оборот, разбивки by_strategy/by_symbol
         """
-        if not trades:
-            return PerformanceMetrics._empty_metrics()
-        
-        winning_trades = [t for t in trades if t.pnl > 0]
-        losing_trades = [t for t in trades if t.pnl <= 0]
-        
-        total_wins = sum(t.pnl for t in winning_trades)
-        total_losses = abs(sum(t.pnl for t in losing_trades))
-        
+        curve = EquityCurve.ensure(equity_curve)
+
+        metrics = PerformanceMetrics._trade_metrics(trades) if trades else PerformanceMetrics._empty_metrics()
+        metrics["max_drawdown"] = PerformanceMetrics._calculate_max_drawdown(curve) if trades else 0
+
+        metrics.update(PerformanceMetrics._curve_metrics(curve, initial_capital))
+        metrics["turnover"] = PerformanceMetrics._calculate_turnover(trades, curve, initial_capital)
+        metrics["by_strategy"] = PerformanceMetrics.breakdown(trades, "strategy")
+        metrics["by_symbol"] = PerformanceMetrics.breakdown(trades, "symbol")
+
+        return metrics
+
+    @staticmethod
+    def _trade_metrics(trades: List) -> Dict[str, Any]:
+        """Метрики по закрытым сделкам"""
+        pnl = np.array([t.pnl for t in trades], dtype=np.float64)
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl <= 0]
+
+        # sum() по спискам - тот же порядок сложения, что и раньше
+        total_wins = sum(wins.tolist())
+        total_losses = abs(sum(losses.tolist()))
+
         profit_factor = (total_wins / total_losses) if total_losses > 0 else float('inf')
-        
-        max_drawdown = PerformanceMetrics._calculate_max_drawdown(equity_curve)
-        
+
         return {
-            "win_rate": (len(winning_trades) / len(trades)) * 100 if trades else 0,
+            "win_rate": (len(wins) / len(trades)) * 100 if trades else 0,
             "profit_factor": profit_factor,
-            "max_drawdown": max_drawdown,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
-            "avg_win": (total_wins / len(winning_trades)) if winning_trades else 0,
-            "avg_loss": (total_losses / len(losing_trades)) if losing_trades else 0,
-            "largest_win": max((t.pnl for t in winning_trades), default=0),
-            "largest_loss": min((t.pnl for t in losing_trades), default=0),
+            "winning_trades": len(wins),
+            "losing_trades": len(losses),
+            "avg_win": (total_wins / len(wins)) if len(wins) else 0,
+            "avg_loss": (total_losses / len(losses)) if len(losses) else 0,
+            "largest_win": float(wins.max()) if len(wins) else 0,
+            "largest_loss": float(losses.min()) if len(losses) else 0,
             "total_pnl": total_wins - total_losses
         }
-    
+
     @staticmethod
-    def _calculate_max_drawdown(equity_curve: List[Dict]) -> float:
+    def _drawdown_series(curve: EquityCurve) -> np.ndarray:
+        """Просадка в % от пика для каждой точки"""
+        equity = curve.equity
+        peak = np.maximum.accumulate(equity)
+        return (peak - equity) / peak * 100
+
+    @staticmethod
+    def _calculate_max_drawdown(equity_curve: Union[EquityCurve, List[Dict]]) -> float:
         """Вычисляет максимальную просадку"""
-        if not equity_curve:
+        curve = EquityCurve.ensure(equity_curve)
+        if not len(curve):
             return 0.0
-        
-        peak = equity_curve[0]["equity"]
-        max_dd = 0.0
-        
-        for point in equity_curve:
-            equity = point["equity"]
-            if equity > peak:
-                peak = equity
-            drawdown = ((peak - equity) / peak) * 100
-            max_dd = max(max_dd, drawdown)
-        
-        return max_dd
-    
+
+        return max(0.0, float(PerformanceMetrics._drawdown_series(curve).max()))
+
+    @staticmethod
+    def _periods_per_year(curve: EquityCurve) -> float:
+        """Число точек кривой в году (по медианному шагу времени)"""
+        if len(curve) < 2:
+            return 0.0
+        step_sec = float(np.median(np.diff(curve.timestamp))) / 1_000_000
+        return SECONDS_PER_YEAR / step_sec if step_sec > 0 else 0.0
+
+    @staticmethod
+    def _curve_metrics(curve: EquityCurve, initial_capital: float) -> Dict[str, Any]:
+        """Риск-метрики, длительность просадки и экспозиция по кривой капитала"""
+        result = {
+            "sharpe_ratio": 0.0,
+            "sortino_ratio": 0.0,
+            "calmar_ratio": 0.0,
+            "annualized_return": 0.0,
+            "annualized_volatility": 0.0,
+            "max_drawdown_duration_bars": 0,
+            "max_drawdown_duration_days": 0.0,
+            "exposure_pct": 0.0,
+            "avg_exposure": 0.0
+        }
+
+        n = len(curve)
+        if n < 2:
+            return result
+
+        equity = curve.equity
+        returns = np.diff(equity) / equity[:-1]
+        periods = PerformanceMetrics._periods_per_year(curve)
+
+        # Доходность и волатильность (годовые)
+        years = (curve.timestamp[-1] - curve.timestamp[0]) / 1_000_000 / SECONDS_PER_YEAR
+        total_return = equity[-1] / initial_capital if initial_capital else 0.0
+        if years * 365 >= MIN_ANNUALIZATION_DAYS and total_return > 0:
+            result["annualized_return"] = float((total_return ** (1 / years) - 1) * 100)
+        elif years > 0 and total_return > 0:
+            result["annualized_return"] = float((total_return - 1) * 100)  # за период, без аннуализации
+
+        std = float(returns.std(ddof=1)) if len(returns) > 1 else 0.0
+        mean = float(returns.mean())
+        result["annualized_volatility"] = std * math.sqrt(periods) * 100
+
+        if std > 0:
+            result["sharpe_ratio"] = mean / std * math.sqrt(periods)
+
+        downside = math.sqrt(float(np.mean(np.minimum(returns, 0.0) ** 2)))
+        if downside > 0:
+            result["sortino_ratio"] = mean / downside * math.sqrt(periods)
+
+        # Просадка: глубина и длительность (от пика до восстановления)
+        drawdown = PerformanceMetrics._drawdown_series(curve)
+        max_dd = float(drawdown.max())
+        if max_dd > 0:
+            result["calmar_ratio"] = result["annualized_return"] / max_dd
+
+        index = np.arange(n)
+        at_peak = drawdown <= 0
+        last_peak = np.maximum.accumulate(np.where(at_peak, index, 0))
+        duration_bars = index - last_peak
+        result["max_drawdown_duration_bars"] = int(duration_bars.max())
+        duration_us = curve.timestamp - curve.timestamp[last_peak]
+        result["max_drawdown_duration_days"] = float(duration_us.max()) / 1_000_000 / 86400
+
+        # Экспозиция: доля времени в рынке и средняя доля капитала в позиции
+        gross = np.abs(curve.exposure)
+        result["exposure_pct"] = float(np.count_nonzero(gross) / n * 100)
+        result["avg_exposure"] = float(gross.mean())
+
+        return result
+
+    @staticmethod
+    def _calculate_turnover(trades: List, curve: EquityCurve, initial_capital: float) -> float:
+        """Оборот: объем сделок (вход + выход) к среднему капиталу"""
+        if not trades:
+            return 0.0
+
+        notional = sum(
+            t.entry_price * t.quantity + (t.exit_price or 0.0) * t.quantity
+            for t in trades
+        )
+        avg_equity = float(curve.equity.mean()) if len(curve) else initial_capital
+        return notional / avg_equity if avg_equity else 0.0
+
+    @staticmethod
+    def breakdown(trades: List, attribute: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Метрики сделок в разрезе атрибута (strategy / symbol)
+
+        Returns:
+            {значение: {trades, win_rate, total_pnl, profit_factor, avg_pnl_percent}}
+        """
+        groups: Dict[str, List] = defaultdict(list)
+        for trade in trades:
+            groups[getattr(trade, attribute, None) or "unknown"].append(trade)
+
+        result = {}
+        for key, group in groups.items():
+            pnl = np.array([t.pnl for t in group], dtype=np.float64)
+            wins = float(pnl[pnl > 0].sum())
+            losses = float(-pnl[pnl <= 0].sum())
+
+            result[key] = {
+                "trades": len(group),
+                "win_rate": float(np.count_nonzero(pnl > 0) / len(group) * 100),
+                "total_pnl": float(pnl.sum()),
+                "profit_factor": wins / losses if losses > 0 else float('inf'),
+                "avg_pnl_percent": float(np.mean([t.pnl_percent for t in group]))
+            }
+
+        return result
+
+    @staticmethod
+    def rolling(equity_curve: Union[EquityCurve, List[Dict]], window: int) -> Dict[str, np.ndarray]:
+        """
+        Скользящие метрики по окну из window точек
+
+        Returns:
+            Массивы длины len(curve) - window + 1:
+            timestamp, return_pct, volatility_pct, sharpe (годовой), max_drawdown_pct
+        """
+        curve = EquityCurve.ensure(equity_curve)
+        n = len(curve)
+        if window < 2 or n < window:
+            empty = np.empty(0, dtype=np.float64)
+            return {"timestamp": np.empty(0, dtype=np.int64), "return_pct": empty,
+                    "volatility_pct": empty, "sharpe": empty, "max_drawdown_pct": empty}
+
+        equity = curve.equity
+        returns = np.diff(equity) / equity[:-1]
+
+        # Суммы по окну returns длины window - 1 через кумулятивные суммы
+        csum = np.concatenate(([0.0], np.cumsum(returns)))
+        csq = np.concatenate(([0.0], np.cumsum(returns ** 2)))
+        m = window - 1
+        sums = csum[m:] - csum[:-m]
+        sq = csq[m:] - csq[:-m]
+        mean = sums / m
+        var = np.maximum(sq - m * mean ** 2, 0.0) / max(m - 1, 1)
+        std = np.sqrt(var)
+
+        periods = PerformanceMetrics._periods_per_year(curve)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, mean / std * math.sqrt(periods), 0.0)
+
+        return {
+            "timestamp": curve.timestamp[window - 1:],
+            "return_pct": (equity[window - 1:] / equity[:n - window + 1] - 1) * 100,
+            "volatility_pct": std * math.sqrt(periods) * 100,
+            "sharpe": sharpe,
+            "max_drawdown_pct": PerformanceMetrics._rolling_max_drawdown(equity, window)
+        }
+
+    @staticmethod
+    def _rolling_max_drawdown(equity: np.ndarray, window: int,
+                              chunk_elements: int = ROLLING_CHUNK_ELEMENTS) -> np.ndarray:
+        """
+        Максимальная просадка (%) каждого окна из window точек
+
+        Просадка окна зависит от пика внутри него, поэтому окна считаются
+        матрицей view (окна x window), но порциями: в памяти одновременно
+        не больше chunk_elements чисел, а не n x window.
+        """
+        count = len(equity) - window + 1
+        windows = np.lib.stride_tricks.sliding_window_view(equity, window)
+        rows = max(1, chunk_elements // window)
+
+        max_dd = np.empty(count, dtype=np.float64)
+        for start in range(0, count, rows):
+            chunk = windows[start:start + rows]
+            peaks = np.maximum.accumulate(chunk, axis=1)
+            max_dd[start:start + rows] = ((peaks - chunk) / peaks).max(axis=1)
+
+        return max_dd * 100
+
     @staticmethod
     def _empty_metrics() -> Dict[str, Any]:
         """Метрики для пустого результата"""
@@ -0,0 +1,727 @@
+# backtesting/portfolio_engine.py
+
+"""
+Portfolio Backtest Engine - Портфельный реплей нескольких символов
+
+ReplayBacktestEngine прогоняет один символ с одной позицией и своим
+капиталом. В продакшене же три стратегии работают по всему списку символов,
+а SignalManager режет сигналы общими фильтрами (cooldown по символу+типу,
+max_signals_per_hour на все символы). Здесь это воспроизводится целиком:
+
+1. Шаги всех символов сливаются в одну очередь по времени (heapq): событие -
+   (время закрытия бара шага, порядковый номер символа). При одинаковом
+   времени символы идут в порядке списка, как в цикле StrategyOrchestrator
+2. Как в StrategyOrchestrator: у каждой пары (стратегия, символ) свое
+   StrategyState, сигнал проходит strategy.accept_signal(). Из принятых
+   берется самый сильный, прошедший настоящий SignalManager.check_filters();
+   record_signal() - только для него, со временем реплея вместо реального
+3. Общий кэш: позиции по разным символам открываются одновременно, на
+   каждую выделяется position_size_pct от equity (не больше свободных
+   денег и не больше max_positions позиций)
+4. Equity портфеля (кэш + маржа + нереализованный PnL) пишется на каждый
+   момент времени очереди
+
+Данные не загружаются заранее: по каждому символу в памяти живет только
+текущий сегмент (segment_days дней шагов + прогрев старших интервалов).
+Когда шаги сегмента заканчиваются, подгружается следующий - память
+ограничена числом символов, а не длиной периода.
+"""
+
+import heapq
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from strategies.strategy_state import StrategyStateStore
+
+from .backtest_engine import Trade
+from .equity_curve import EquityCurve
+from .replay_data import (
+    INTERVAL_SECONDS,
+    CandleSeries,
+    ReplayRepository,
+    from_epoch_us,
+    to_epoch_us
+)
+from .replay_engine import ReplayBacktestEngine, find_exit
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PortfolioBacktestResult:
+    """Результат портфельного бэктеста"""
+    trades: List[Trade]
+    symbols: List[str]
+    initial_capital: float
+    final_capital: float
+    total_pnl: float
+    total_pnl_percent: float
+    max_drawdown: float
+    total_trades: int
+    equity_curve: EquityCurve  # exposure - валовая доля капитала в позициях
+    start_time: datetime
+    end_time: datetime
+    duration_days: int
+    metrics: Dict[str, Any] = field(default_factory=dict)  # PerformanceMetrics + by_symbol/by_strategy
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+class _SymbolRouter:
+    """
+    Репозиторий для TechnicalAnalysisContextManager поверх реплеев символов
+
+    Один менеджер контекстов на портфель (как в продакшене): get_candles
+    направляется в ReplayRepository нужного символа с его часами.
+    """
+
+    def __init__(self):
+        self.replays: Dict[str, ReplayRepository] = {}
+
+    async def get_candles(self, symbol: str, interval: str, **kwargs):
+        replay = self.replays.get(symbol.upper())
+        if replay is None:
+            return []
+        return await replay.get_candles(symbol, interval, **kwargs)
+
+
+class _SymbolState:
+    """Состояние символа в портфельном реплее (текущий сегмент, позиция)"""
+
+    __slots__ = (
+        "symbol", "order", "replay", "series", "step_clocks", "step_pos",
+        "segment_start", "prev_clock_us", "pending", "trade", "margin",
+        "last_price", "d1_seen", "h1_seen", "context_warm"
+    )
+
+    def __init__(self, symbol: str, order: int, start: datetime):
+        self.symbol = symbol
+        self.order = order
+        self.replay: Optional[ReplayRepository] = None
+        self.series: Dict[str, CandleSeries] = {}
+        self.step_clocks = np.empty(0, dtype=np.int64)
+        self.step_pos = 0
+        self.segment_start = start
+        self.prev_clock_us: Optional[int] = None
+        self.pending: Optional[Dict[str, Any]] = None
+        self.trade: Optional[Trade] = None
+        self.margin = 0.0
+        self.last_price = 0.0
+        self.d1_seen = -1
+        self.h1_seen = -1
+        self.context_warm = False
+
+    @property
+    def m1(self) -> CandleSeries:
+        """Серия исполнения - самая младшая доступная"""
+        return min(self.series.values(), key=lambda s: INTERVAL_SECONDS[s.interval])
+
+    def loaded_bars(self) -> int:
+        return sum(len(s) for s in self.series.values())
+
+
+class PortfolioBacktestEngine:
+    """
+    💼 Портфельный бэктест: общий капитал, общие фильтры сигналов
+
+    Usage:
+        engine = PortfolioBacktestEngine(initial_capital=10000, max_positions=5)
+        result = await engine.run_from_repository(
+            repository,
+            symbols=["BTCUSDT", "ETHUSDT", "SOLUSDT"],
+            strategies=[BreakoutStrategy("PLACEHOLDER"), BounceStrategy("PLACEHOLDER")],
+            start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            end=datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+        print(result.metrics["by_symbol"])
+    """
+
+    def __init__(
+        self,
+        initial_capital: float = 10000.0,
+        commission_rate: float = 0.001,
+        position_size_pct: float = 0.2,
+        max_positions: int = 5,
+        step_interval: str = "5m",
+        signal_manager=None,
+        signal_manager_config: Optional[Dict[str, Any]] = None,
+        context_manager_config: Optional[Dict[str, Any]] = None,
+        segment_days: int = 30,
+        warmup_days: int = 180,
+        min_position_value: float = 10.0
+    ):
+        """
+        Args:
+            initial_capital: Начальный капитал портфеля ($)
+            commission_rate: Комиссия биржи (0.1% = 0.001)
+            position_size_pct: Доля equity на одну позицию (20% = 0.2)
+            max_positions: Максимум одновременно открытых позиций
+            step_interval: Шаг реплея каждого символа
+            signal_manager: Готовый SignalManager (его фильтры и история)
+            signal_manager_config: Параметры нового SignalManager (cooldown_minutes,
+                max_signals_per_hour, min_signal_strength), если signal_manager не задан
+            context_manager_config: Конфиги анализаторов для TechnicalAnalysisContextManager
+            segment_days: Дней шагов в одном загруженном сегменте символа
+            warmup_days: Дней истории 1h/1d до начала сегмента (уровни, ATR)
+            min_position_value: Минимальный размер позиции ($) - меньше не открываем
+        """
+        if step_interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Неизвестный интервал шага: {step_interval}")
+
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.position_size_pct = position_size_pct
+        self.max_positions = max_positions
+        self.step_interval = step_interval
+        self.signal_manager_config = signal_manager_config or {}
+        self.context_manager_config = context_manager_config or {}
+        self.segment_days = segment_days
+        self.warmup_days = warmup_days
+        self.min_position_value = min_position_value
+
+        self._given_signal_manager = signal_manager
+        self.signal_manager = signal_manager
+        self.context_manager = None
+        self.strategy_states = StrategyStateStore()  # (стратегия, символ), как в оркестраторе
+        self._router = _SymbolRouter()
+        self._context_as_of_us: int = 0
+
+        self.cash = initial_capital
+        self.trades: List[Trade] = []
+        self.equity_curve = EquityCurve()
+        self.states: List[_SymbolState] = []
+
+        self.stats = {
+            "events": 0,
+            "clock_points": 0,
+            "segments_loaded": 0,
+            "segments_empty": 0,
+            "max_loaded_bars": 0,
+            "strategy_calls": 0,
+            "strategy_errors": 0,
+            "context_errors": 0,
+            "levels_refreshes": 0,
+            "atr_refreshes": 0,
+            "signals_generated": 0,
+            "signals_filtered_by_strategy": 0,
+            "signals_filtered_strength": 0,
+            "signals_filtered_cooldown": 0,
+            "signals_filtered_rate_limit": 0,
+            "signals_sent": 0,
+            "signals_ignored_same_side": 0,
+            "signals_skipped_max_positions": 0,
+            "signals_skipped_capital": 0,
+            "reversals": 0,
+            "stop_loss_exits": 0,
+            "take_profit_exits": 0,
+            "max_concurrent_positions": 0
+        }
+
+        logger.info(f"💼 PortfolioBacktestEngine создан: капитал=${initial_capital:,.2f}, "
+                    f"позиция={position_size_pct * 100:.0f}%, макс. позиций={max_positions}")
+
+    # ==================== ЗАПУСК ====================
+
+    async def run_from_repository(
+        self,
+        repository,
+        symbols: List[str],
+        strategies: List[Any],
+        start: datetime,
+        end: datetime
+    ) -> PortfolioBacktestResult:
+        """
+        Прогнать портфельный реплей по истории из БД
+
+        Args:
+            repository: MarketDataRepository (или CachedCandleRepository)
+            symbols: Символы портфеля (порядок = порядок обработки в один момент)
+            strategies: Экземпляры стратегий, общие для всех символов
+            start/end: Период реплея
+        """
+        from core.signal_manager import SignalManager
+        from strategies.technical_analysis import TechnicalAnalysisContextManager
+
+        self._reset()
+
+        # Свой SignalManager создается заново на каждый прогон (чистая история)
+        self.signal_manager = self._given_signal_manager or SignalManager(
+            openai_analyzer=None, **self.signal_manager_config
+        )
+
+        symbols = [s.upper() for s in symbols]
+
+        # Контексты всех символов портфеля нужны на каждом шаге - не вытесняются
+        self.context_manager = TechnicalAnalysisContextManager(
+            repository=self._router,
+            auto_start_background_updates=False,
+            clock=self._context_clock,
+            **{"pinned_symbols": symbols, **self.context_manager_config}
+        )
+
+        self.states = [_SymbolState(symbol, i, start) for i, symbol in enumerate(symbols)]
+
+        logger.info(f"🚀 Портфельный реплей: {len(symbols)} символов, шаг {self.step_interval}, "
+                    f"стратегий: {len(strategies)}, сегменты по {self.segment_days} дн.")
+
+        # Очередь событий: (время шага, порядковый номер символа)
+        heap = []
+        for state in self.states:
+            clock_us = await self._advance(state, repository, end, first=True)
+            if clock_us is not None:
+                heap.append((clock_us, state.order))
+        heapq.heapify(heap)
+
+        current_us: Optional[int] = None
+
+        while heap:
+            clock_us, order = heapq.heappop(heap)
+
+            # Все символы момента current_us обработаны - фиксируем equity
+            if current_us is not None and clock_us != current_us:
+                self._mark_equity(current_us)
+            current_us = clock_us
+
+            state = self.states[order]
+            await self._step(state, clock_us, strategies)
+            self.stats["events"] += 1
+
+            next_us = await self._advance(state, repository, end)
+            if next_us is not None:
+                heapq.heappush(heap, (next_us, order))
+
+            if self.stats["events"] % 50000 == 0:
+                logger.info(f"📊 Портфельный реплей: {from_epoch_us(clock_us).isoformat()}, "
+                            f"событий: {self.stats['events']}, сделок: {len(self.trades)}")
+
+        if current_us is not None:
+            self._mark_equity(current_us)
+
+        # Закрываем открытые позиции по последним ценам
+        for state in self.states:
+            if state.trade is not None and state.last_price:
+                state.trade.exit_reason = "end_of_data"
+                self._close_position(state, state.last_price, from_epoch_us(state.prev_clock_us))
+            state.series = {}
+            state.replay = None
+
+        result = self._generate_result(symbols, start, end)
+
+        logger.info(f"✅ Портфельный реплей завершен: {result.total_trades} сделок, "
+                    f"PnL: {result.total_pnl_percent:+.2f}%, макс. просадка: {result.max_drawdown:.2f}%")
+
+        return result
+
+    def _context_clock(self) -> datetime:
+        """Время для расчетов контекста текущего символа"""
+        return from_epoch_us(self._context_as_of_us)
+
+    # ==================== ПОТОКОВАЯ ЗАГРУЗКА ====================
+
+    async def _advance(self, state: _SymbolState, repository, end: datetime,
+                       first: bool = False) -> Optional[int]:
+        """
+        Следующий шаг символа (подгружая следующий сегмент при необходимости)
+
+        Returns:
+            Время следующего шага (мкс) или None, если история символа закончилась
+        """
+        if not first:
+            state.step_pos += 1
+
+        while state.step_pos >= len(state.step_clocks):
+            if state.segment_start >= end:
+                state.series = {}
+                self._router.replays.pop(state.symbol, None)
+                return None
+            await self._load_segment(state, repository, end)
+
+        return int(state.step_clocks[state.step_pos])
+
+    async def _load_segment(self, state: _SymbolState, repository, end: datetime):
+        """Загрузить следующий сегмент символа вместо текущего"""
+        segment_start = state.segment_start
+        segment_end = min(segment_start + timedelta(days=self.segment_days), end)
+        state.segment_start = segment_end
+
+        # Старый сегмент освобождается до загрузки нового
+        state.series = {}
+        self._router.replays.pop(state.symbol, None)
+        state.step_clocks = np.empty(0, dtype=np.int64)
+        state.step_pos = 0
+
+        try:
+            series = await ReplayBacktestEngine.load_series(
+                repository, state.symbol, segment_start, segment_end,
+                warmup_days=self.warmup_days, chunk_days=self.segment_days
+            )
+        except ValueError as e:
+            self.stats["segments_empty"] += 1
+            logger.debug(f"⚠️ {state.symbol} {segment_start.date()}: {e}")
+            return
+
+        steps = series.get(self.step_interval)
+        if steps is None or not len(steps):
+            self.stats["segments_empty"] += 1
+            return
+
+        # Шаг = закрытие бара (close_time + 1s); последний сегмент включает end
+        clocks = steps.close_time + 1_000_000
+        lo = int(np.searchsorted(clocks, to_epoch_us(segment_start), side="left"))
+        hi = int(np.searchsorted(clocks, to_epoch_us(segment_end),
+                                 side="right" if segment_end >= end else "left"))
+
+        state.series = series
+        state.step_clocks = clocks[lo:hi]
+        state.replay = ReplayRepository(series)
+        self._router.replays[state.symbol] = state.replay
+
+        # Новые массивы - контекст пересчитывается полностью
+        state.context_warm = False
+
+        self.stats["segments_loaded"] += 1
+        loaded = sum(s.loaded_bars() for s in self.states)
+        self.stats["max_loaded_bars"] = max(self.stats["max_loaded_bars"], loaded)
+
+        logger.debug(f"📥 {state.symbol}: сегмент {segment_start.date()}..{segment_end.date()}, "
+                     f"{hi - lo} шагов")
+
+    # ==================== ШАГ СИМВОЛА ====================
+
+    async def _step(self, state: _SymbolState, clock_us: int, strategies: List[Any]):
+        """Исполнение, SL/TP, контекст и стратегии одного символа на момент clock_us"""
+        from strategies import FeatureCache, StrategyOrchestrator
+
+        clock = from_epoch_us(clock_us)
+        m1 = state.m1
+        prev_us = state.prev_clock_us if state.prev_clock_us is not None else clock_us
+        m1_start = m1.visible_end(prev_us)
+        m1_end = m1.visible_end(clock_us)
+
+        # 1. Отложенный сигнал по open следующего бара, затем SL/TP
+        if state.pending is not None:
+            if m1_start < len(m1):
+                self._fill_pending(state, m1, m1_start)
+            state.pending = None
+
+        if state.trade is not None:
+            exit_ = find_exit(state.trade, m1, m1_start, m1_end)
+            if exit_ is not None:
+                i, price, reason = exit_
+                state.trade.exit_reason = reason
+                self.stats[f"{reason}_exits"] += 1
+                self._close_position(state, price, from_epoch_us(m1.close_time[i]))
+
+        state.prev_clock_us = clock_us
+        if m1_end:
+            state.last_price = float(m1.close[m1_end - 1])
+
+        # 2. Контекст на момент clock (один менеджер на все символы)
+        state.replay.set_clock(clock_us)
+
+        d1 = state.series.get("1d")
+        h1 = state.series.get("1h")
+        d1_count = d1.visible_end(clock_us) if d1 is not None else 0
+        h1_count = h1.visible_end(clock_us) if h1 is not None else 0
+        self._context_as_of_us = int(d1.close_time[d1_count - 1]) + 1_000_000 if d1_count else clock_us
+
+        refresh_levels = not state.context_warm or d1_count != state.d1_seen
+        refresh_atr = refresh_levels or h1_count != state.h1_seen
+
+        try:
+            ta_context = await self.context_manager.refresh_context(
+                state.symbol,
+                levels=refresh_levels,
+                atr=refresh_atr,
+                candles=True,
+                market_conditions=True
+            )
+            self.stats["levels_refreshes"] += int(refresh_levels)
+            self.stats["atr_refreshes"] += int(refresh_atr)
+            state.d1_seen, state.h1_seen = d1_count, h1_count
+            state.context_warm = True
+        except Exception as e:
+            self.stats["context_errors"] += 1
+            state.context_warm = False
+            logger.debug(f"⚠️ {state.symbol} {clock.isoformat()}: контекст не обновлен: {e}")
+            ta_context = self.context_manager.contexts.get(state.symbol)
+
+        # 3. Стратегии и фильтры SignalManager
+        windows = {
+            interval: state.replay.visible(interval, limit)
+            for interval, limit in StrategyOrchestrator.MIN_CANDLES.items()
+        }
+        features = FeatureCache(
+            symbol=state.symbol,
+            candles_1m=windows["1m"],
+            candles_5m=windows["5m"],
+            candles_1h=windows["1h"],
+            candles_1d=windows["1d"],
+            ta_context=ta_context,
+            as_of=clock
+        )
+
+        candidates = []
+        for strategy in strategies:
+            signal = await self._run_strategy(strategy, state.symbol, windows, ta_context, features, clock)
+            if signal is not None:
+                candidates.append(signal)
+
+        chosen = self._select_signal(candidates, clock)
+        if chosen is not None:
+            self._queue_signal(state, chosen)
+
+    async def _run_strategy(self, strategy, symbol: str, windows: Dict[str, Any],
+                            ta_context, features, clock: datetime):
+        """analyze_with_data + accept_signal стратегии во времени реплея (порядок оркестратора)"""
+        self.stats["strategy_calls"] += 1
+
+        name = getattr(strategy, "name", strategy.__class__.__name__)
+        state = self.strategy_states.get(name, symbol)
+        state.last_analysis_time = clock
+        state.counters["analysis_calls"] += 1
+
+        try:
+            signal = await strategy.analyze_with_data(
+                symbol=symbol,
+                candles_1m=windows["1m"],
+                candles_5m=windows["5m"],
+                candles_1h=windows["1h"],
+                candles_1d=windows["1d"],
+                ta_context=ta_context,
+                features=features,
+                state=state
+            )
+        except Exception as e:
+            self.stats["strategy_errors"] += 1
+            logger.error(f"❌ {symbol}: ошибка в {strategy.__class__.__name__}: {e}")
+            return None
+
+        if signal is None:
+            return None
+
+        self.stats["signals_generated"] += 1
+
+        # Время сигнала - время реплея, а не реальное
+        lifetime = signal.expires_at - signal.timestamp if signal.expires_at else None
+        signal.timestamp = clock
+        if lifetime is not None:
+            signal.expires_at = clock + lifetime
+        signal.symbol = symbol
+        if not signal.strategy_name:
+            signal.strategy_name = name
+
+        # Cooldown / rate limit стратегии - по символу
+        if not strategy.accept_signal(signal, state, now=clock):
+            self.stats["signals_filtered_by_strategy"] += 1
+            return None
+
+        return signal
+
+    def _select_signal(self, candidates: List[Any], clock: datetime):
+        """
+        Самый сильный сигнал символа, прошедший фильтры SignalManager
+
+        В историю cooldown/rate limit записывается только выбранный сигнал:
+        отброшенные более слабые сигналы не отправляются и не должны
+        блокировать следующие.
+        """
+        # sorted стабилен: при равной силе побеждает стратегия, идущая раньше
+        for signal in sorted(candidates, key=lambda s: s.strength, reverse=True):
+            reason = self.signal_manager.check_filters(signal, now=clock)
+            if reason is not None:
+                self.stats[f"signals_filtered_{reason}"] += 1
+                continue
+
+            self.signal_manager.record_signal(signal, now=clock)
+            self.stats["signals_sent"] += 1
+            return signal
+
+        return None
+
+    def _queue_signal(self, state: _SymbolState, signal):
+        """Поставить сигнал символа на исполнение по open следующего бара"""
+        from strategies import SignalType
+
+        side = "BUY" if signal.signal_type in (SignalType.BUY, SignalType.STRONG_BUY) else "SELL"
+
+        if state.trade is not None and state.trade.side == side:
+            self.stats["signals_ignored_same_side"] += 1
+            return
+
+        state.pending = {"side": side, "signal": signal}
+
+    # ==================== ПОЗИЦИИ И КАПИТАЛ ====================
+
+    def _fill_pending(self, state: _SymbolState, m1: CandleSeries, index: int):
+        """Исполнить сигнал по open бара index: разворот встречной позиции, затем вход"""
+        price = float(m1.open[index])
+        timestamp = from_epoch_us(m1.open_time[index])
+        side = state.pending["side"]
+        signal = state.pending["signal"]
+
+        if state.trade is not None:
+            state.trade.exit_reason = "reverse"
+            self._close_position(state, price, timestamp)
+            self.stats["reversals"] += 1
+
+        open_positions = self.open_positions()
+        if open_positions >= self.max_positions:
+            self.stats["signals_skipped_max_positions"] += 1
+            return
+
+        position_value = min(self.equity() * self.position_size_pct, self.cash)
+        if position_value < self.min_position_value:
+            self.stats["signals_skipped_capital"] += 1
+            return
+
+        commission = position_value * self.commission_rate
+        quantity = (position_value - commission) / price
+
+        state.trade = Trade(
+            entry_time=timestamp,
+            entry_price=price,
+            side=side,
+            quantity=quantity,
+            signal_strength=signal.strength,
+            signal_reasons=signal.reasons.copy(),
+            symbol=state.symbol,
+            strategy=signal.strategy_name,
+            stop_loss=signal.stop_loss,
+            take_profit=signal.take_profit
+        )
+        state.margin = position_value - commission
+        state.last_price = price
+        self.cash -= position_value
+
+        self.stats["max_concurrent_positions"] = max(
+            self.stats["max_concurrent_positions"], open_positions + 1
+        )
+
+        logger.debug(f"📈 {state.symbol}: открыта {side} ${price:,.2f}, "
+                     f"размер ${position_value:,.2f}, кэш ${self.cash:,.2f}")
+
+    def _close_position(self, state: _SymbolState, price: float, timestamp: datetime):
+        """Закрыть позицию символа: маржа и PnL возвращаются в кэш"""
+        trade = state.trade
+        if trade is None:
+            return
+
+        if trade.side == "BUY":
+            pnl = (price - trade.entry_price) * trade.quantity
+        else:
+            pnl = (trade.entry_price - price) * trade.quantity
+        pnl -= price * trade.quantity * self.commission_rate
+
+        trade.exit_time = timestamp
+        trade.exit_price = price
+        trade.pnl = pnl
+        trade.pnl_percent = (pnl / (trade.entry_price * trade.quantity)) * 100
+        trade.is_open = False
+
+        self.cash += state.margin + pnl
+        self.trades.append(trade)
+        state.trade = None
+        state.margin = 0.0
+
+        logger.debug(f"📉 {state.symbol}: закрыта позиция PnL={pnl:+.2f} ({trade.pnl_percent:+.2f}%)")
+
+    @staticmethod
+    def _unrealized_pnl(state: _SymbolState) -> float:
+        trade = state.trade
+        if trade is None or not state.last_price:
+            return 0.0
+        if trade.side == "BUY":
+            return (state.last_price - trade.entry_price) * trade.quantity
+        return (trade.entry_price - state.last_price) * trade.quantity
+
+    def open_positions(self) -> int:
+        """Число открытых позиций"""
+        return sum(1 for state in self.states if state.trade is not None)
+
+    def equity(self) -> float:
+        """Equity портфеля: кэш + маржа + нереализованный PnL по последним ценам"""
+        return self.cash + sum(
+            state.margin + self._unrealized_pnl(state)
+            for state in self.states if state.trade is not None
+        )
+
+    def _mark_equity(self, clock_us: int):
+        """Точка кривой капитала портфеля на момент clock_us"""
+        equity = self.equity()
+        gross = sum(
+            state.trade.quantity * state.last_price
+            for state in self.states if state.trade is not None
+        )
+        # У портфеля нет одной цены - колонка price не используется
+        self.equity_curve.append(clock_us, equity, 0.0, gross / equity if equity > 0 else 0.0)
+        self.stats["clock_points"] += 1
+
+    # ==================== РЕЗУЛЬТАТ ====================
+
+    def _generate_result(self, symbols: List[str], start: datetime, end: datetime) -> PortfolioBacktestResult:
+        """Итог портфеля с метриками (в т.ч. разбивки по символам и стратегиям)"""
+        from .performance_metrics import PerformanceMetrics
+
+        metrics = PerformanceMetrics.calculate(
+            trades=self.trades,
+            equity_curve=self.equity_curve,
+            initial_capital=self.initial_capital
+        )
+
+        final_capital = self.cash
+        return PortfolioBacktestResult(
+            trades=self.trades,
+            symbols=symbols,
+            initial_capital=self.initial_capital,
+            final_capital=final_capital,
+            total_pnl=final_capital - self.initial_capital,
+            total_pnl_percent=(final_capital - self.initial_capital) / self.initial_capital * 100,
+            max_drawdown=metrics["max_drawdown"],
+            total_trades=len(self.trades),
+            equity_curve=self.equity_curve,
+            start_time=start,
+            end_time=end,
+            duration_days=(end - start).days,
+            metrics=metrics,
+            stats=self.get_stats()
+        )
+
+    def _reset(self):
+        """Сброс состояния перед новым прогоном"""
+        self.cash = self.initial_capital
+        self.trades = []
+        self.equity_curve = EquityCurve()
+        self.states = []
+        self._router = _SymbolRouter()
+        self.strategy_states = StrategyStateStore()
+        for key in self.stats:
+            self.stats[key] = 0
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика последнего прогона"""
+        return {
+            **self.stats,
+            "step_interval": self.step_interval,
+            "symbols": len(self.states),
+            "trades": len(self.trades),
+            "open_positions": self.open_positions(),
+            "strategy_states": self.strategy_states.get_stats(),
+            "signal_manager": self.signal_manager.get_stats() if self.signal_manager else None,
+            "context_manager": self.context_manager.get_stats() if self.context_manager else None
+        }
+
+    def __repr__(self) -> str:
+        return (f"PortfolioBacktestEngine(symbols={len(self.states)}, "
+                f"events={self.stats['events']}, trades={len(self.trades)})")
+
+
+# Export
+__all__ = ["PortfolioBacktestEngine", "PortfolioBacktestResult"]
+
+logger.info("✅ Portfolio backtest engine module loaded")
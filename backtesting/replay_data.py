@@ -0,0 +1,477 @@
+# backtesting/replay_data.py
+
+"""
+Replay Data - Колоночные исторические свечи для реплея бэктеста
+
+Свечи каждого таймфрейма загружаются из БД один раз (порциями по времени)
+в NumPy массивы. Скользящие окна - это views на эти массивы (CandleWindow),
+а не срезы списков словарей, поэтому шаг реплея не копирует историю.
+
+Компоненты:
+- CandleSeries: колонки одного (символ, интервал), загрузка и ресемплинг
+- CandleWindow: окно свечей как последовательность словарей (без копий)
+- CandleRow: свеча-словарь поверх колонок (значения читаются лениво)
+- ReplayRepository: get_candles() как у MarketDataRepository, но только
+  по закрытым на момент часов реплея барам (без заглядывания вперед)
+"""
+
+import logging
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Iterator, Union
+
+import numpy as np
+
+from strategies.technical_analysis.vectorized_patterns import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "3m": 180,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+    "6h": 21600,
+    "12h": 43200,
+    "1d": 86400,
+    "1w": 604800
+}
+
+_US = 1_000_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_us(value: Union[datetime, str], naive_utc: bool = True) -> int:
+    """
+    datetime / ISO строка -> микросекунды epoch
+
+    naive время - UTC (как в БД); naive_utc=False - локальное время,
+    как datetime.now() в сигналах живого бота
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc) if naive_utc else value.astimezone(timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int) -> datetime:
+    """Микросекунды epoch -> datetime UTC"""
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+# ==================== КОЛОНКИ ====================
+
+@dataclass
+class CandleSeries:
+    """
+    Колоночные свечи одного символа и интервала
+
+    open_time/close_time - int64 микросекунды epoch (UTC), close_time по
+    конвенции БД: open_time + интервал - 1 секунда.
+    """
+    symbol: str
+    interval: str
+    open_time: np.ndarray   # int64, мкс
+    close_time: np.ndarray  # int64, мкс
+    open: np.ndarray        # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def empty(cls, symbol: str, interval: str) -> "CandleSeries":
+        """Пустая серия"""
+        times = np.empty(0, dtype=np.int64)
+        values = np.empty(0, dtype=np.float64)
+        return cls(symbol, interval, times, times.copy(), values, values.copy(),
+                   values.copy(), values.copy(), values.copy())
+
+    @classmethod
+    def from_candles(cls, candles: List[Dict], symbol: str, interval: str) -> "CandleSeries":
+        """
+        Построить серию из списка свечей
+
+        Принимает формат MarketDataRepository (open_price/high_price/...,
+        datetime в open_time) и формат отчетов (open/high/..., ISO строка).
+        """
+        n = len(candles)
+        if n == 0:
+            return cls.empty(symbol, interval)
+
+        period_us = INTERVAL_SECONDS[interval] * _US
+        open_time = np.empty(n, dtype=np.int64)
+        close_time = np.empty(n, dtype=np.int64)
+        data = np.empty((5, n), dtype=np.float64)
+
+        for i, c in enumerate(candles):
+            open_time[i] = to_epoch_us(c['open_time'])
+            close_time[i] = (to_epoch_us(c['close_time']) if c.get('close_time')
+                             else open_time[i] + period_us - _US)
+            data[0, i] = float(c['open_price'] if 'open_price' in c else c['open'])
+            data[1, i] = float(c['high_price'] if 'high_price' in c else c['high'])
+            data[2, i] = float(c['low_price'] if 'low_price' in c else c['low'])
+            data[3, i] = float(c['close_price'] if 'close_price' in c else c['close'])
+            data[4, i] = float(c.get('volume') or 0.0)
+
+        series = cls(symbol, interval, open_time, close_time,
+                     data[0], data[1], data[2], data[3], data[4])
+        return series._normalized()
+
+    @classmethod
+    def concat(cls, parts: List["CandleSeries"], symbol: str, interval: str) -> "CandleSeries":
+        """Склеить порции в одну серию (сортировка и дедупликация по open_time)"""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty(symbol, interval)
+
+        series = cls(
+            symbol, interval,
+            *(np.concatenate([getattr(p, name) for p in parts]) for name in
+              ("open_time", "close_time", "open", "high", "low", "close", "volume"))
+        )
+        return series._normalized()
+
+    def _normalized(self) -> "CandleSeries":
+        """Отсортировать по open_time и убрать дубликаты (последний выигрывает)"""
+        if len(self) < 2 or np.all(np.diff(self.open_time) > 0):
+            return self
+
+        order = np.argsort(self.open_time, kind="stable")
+        times = self.open_time[order]
+        keep = np.append(times[1:] != times[:-1], True)
+        index = order[keep]
+
+        return CandleSeries(
+            self.symbol, self.interval,
+            self.open_time[index], self.close_time[index],
+            self.open[index], self.high[index], self.low[index],
+            self.close[index], self.volume[index]
+        )
+
+    @classmethod
+    async def load(
+        cls,
+        repository,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        chunk_days: int = 30
+    ) -> "CandleSeries":
+        """
+        Загрузить свечи [start, end) из MarketDataRepository порциями
+
+        Каждая порция сразу переводится в колонки, так что в памяти
+        одновременно живет не больше chunk_days словарей. Репозиторий с
+        локальным кэшем (CachedCandleRepository) отдает колонки напрямую
+        из memmap-файлов.
+        """
+        load_cached = getattr(repository, "load_candle_series", None)
+        if load_cached is not None:
+            series = await load_cached(symbol, interval, start, end)
+            logger.info(f"💾 {symbol} {interval}: {len(series)} свечей из кэша")
+            return series
+
+        parts = []
+        chunk = timedelta(days=chunk_days)
+        chunk_start = start
+
+        while chunk_start < end:
+            chunk_end = min(chunk_start + chunk, end)
+
+            candles = await repository.get_candles(
+                symbol=symbol,
+                interval=interval,
+                start_time=chunk_start,
+                end_time=chunk_end - timedelta(microseconds=1)
+            )
+            parts.append(cls.from_candles(candles, symbol, interval))
+
+            chunk_start = chunk_end
+
+        series = cls.concat(parts, symbol, interval)
+        logger.info(f"📥 {symbol} {interval}: загружено {len(series)} свечей")
+        return series
+
+    def resample(self, interval: str) -> "CandleSeries":
+        """
+        Агрегировать в более старший интервал (бакеты от epoch, UTC)
+
+        Незавершенный последний бакет тоже строится; ReplayRepository
+        покажет его только после close_time.
+        """
+        period_us = INTERVAL_SECONDS[interval] * _US
+        if len(self) == 0:
+            return CandleSeries.empty(self.symbol, interval)
+
+        bucket = self.open_time // period_us * period_us
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+        ends = np.append(starts[1:], len(self)) - 1
+
+        open_time = bucket[starts]
+
+        return CandleSeries(
+            self.symbol, interval,
+            open_time,
+            open_time + period_us - _US,
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends],
+            np.add.reduceat(self.volume, starts)
+        )
+
+    def visible_end(self, clock_us: int) -> int:
+        """Число баров, закрытых к моменту clock_us (close_time <= clock)"""
+        return int(np.searchsorted(self.close_time, clock_us, side="right"))
+
+    def window(self, start: int, stop: int) -> "CandleWindow":
+        """Окно баров [start, stop) без копирования"""
+        return CandleWindow(self, start, stop)
+
+    def to_report_candles(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Свечи в формате ReportGenerator (open/high/low/close, ISO open_time)"""
+        stop = len(self) if stop is None else stop
+        return [
+            {
+                "symbol": self.symbol,
+                "interval": self.interval,
+                "open_time": from_epoch_us(self.open_time[i]).isoformat(),
+                "open": float(self.open[i]),
+                "high": float(self.high[i]),
+                "low": float(self.low[i]),
+                "close": float(self.close[i]),
+                "volume": float(self.volume[i])
+            }
+            for i in range(start, stop)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(symbol={self.symbol}, interval={self.interval}, bars={len(self)})"
+
+
+# ==================== ОКНА ====================
+
+class CandleRow(Mapping):
+    """
+    Свеча-словарь поверх колонок CandleSeries
+
+    Ключи как у MarketDataRepository.get_candles(); значения читаются из
+    массивов при обращении. Две строки равны, если указывают на один бар.
+    """
+
+    __slots__ = ("_series", "_index")
+
+    KEYS = ("symbol", "interval", "open_time", "close_time", "open_price",
+            "high_price", "low_price", "close_price", "volume")
+
+    def __init__(self, series: CandleSeries, index: int):
+        self._series = series
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        series, i = self._series, self._index
+
+        if key == "open_price":
+            return float(series.open[i])
+        if key == "high_price":
+            return float(series.high[i])
+        if key == "low_price":
+            return float(series.low[i])
+        if key == "close_price":
+            return float(series.close[i])
+        if key == "volume":
+            return float(series.volume[i])
+        if key == "open_time":
+            return from_epoch_us(series.open_time[i])
+        if key == "close_time":
+            return from_epoch_us(series.close_time[i])
+        if key == "symbol":
+            return series.symbol
+        if key == "interval":
+            return series.interval
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, CandleRow):
+            return self._series is other._series and self._index == other._index
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"CandleRow({dict(self)})"
+
+
+class CandleWindow(Sequence):
+    """
+    Окно [start, stop) серии как последовательность свечей-словарей
+
+    Срезы возвращают новые окна (views), поэтому стратегии и анализаторы
+    работают с ним как со списком из MarketDataRepository без копирования.
+    """
+
+    __slots__ = ("series", "start", "stop")
+
+    def __init__(self, series: CandleSeries, start: int, stop: int):
+        self.series = series
+        self.start = start
+        self.stop = max(start, stop)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return CandleWindow(self.series, self.start + start, self.start + stop)
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CandleWindow index out of range")
+        return CandleRow(self.series, self.start + index)
+
+    def __iter__(self) -> Iterator[CandleRow]:
+        for i in range(self.start, self.stop):
+            yield CandleRow(self.series, i)
+
+    def to_candle_arrays(self) -> CandleArrays:
+        """Колоночное представление окна для VectorizedPatternDetector (views)"""
+        s, e = self.start, self.stop
+        return CandleArrays(
+            open_time=self.series.open_time[s:e].view("datetime64[us]"),
+            open=self.series.open[s:e],
+            high=self.series.high[s:e],
+            low=self.series.low[s:e],
+            close=self.series.close[s:e],
+            volume=self.series.volume[s:e],
+            source=self
+        )
+
+    def __repr__(self) -> str:
+        return (f"CandleWindow({self.series.symbol} {self.series.interval}, "
+                f"[{self.start}:{self.stop}])")
+
+
+# ==================== РЕПОЗИТОРИЙ РЕПЛЕЯ ====================
+
+class ReplayRepository:
+    """
+    🕰️ Репозиторий исторических свечей с часами реплея
+
+    Повторяет интерфейс MarketDataRepository.get_candles(), но видит только
+    бары, закрытые к текущему времени реплея. С limit возвращает последние N
+    видимых баров (то, что видел бы бот в этот момент).
+    """
+
+    def __init__(self, series: Optional[Dict[str, CandleSeries]] = None):
+        """
+        Args:
+            series: Серии по интервалам одного символа {"1m": CandleSeries, ...}
+        """
+        self.series: Dict[str, CandleSeries] = dict(series or {})
+        self.clock_us: int = 0
+
+        self.stats = {
+            "queries": 0,
+            "bars_served": 0,
+            "missing_series": 0
+        }
+
+    def add_series(self, series: CandleSeries):
+        """Добавить/заменить серию интервала"""
+        self.series[series.interval] = series
+
+    def set_clock(self, clock: Union[datetime, int]):
+        """Установить время реплея (datetime или мкс epoch)"""
+        self.clock_us = clock if isinstance(clock, (int, np.integer)) else to_epoch_us(clock)
+
+    def now(self) -> datetime:
+        """Текущее время реплея"""
+        return from_epoch_us(self.clock_us)
+
+    def visible(self, interval: str, limit: Optional[int] = None) -> CandleWindow:
+        """Последние limit закрытых баров интервала (пустое окно, если серии нет)"""
+        series = self.series.get(interval) or CandleSeries.empty("", interval)
+        stop = series.visible_end(self.clock_us)
+        start = max(0, stop - limit) if limit else 0
+        return CandleWindow(series, start, stop)
+
+    async def get_candles(
+        self,
+        symbol: str,
+        interval: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        order_desc: bool = False
+    ) -> Union[CandleWindow, List[CandleRow]]:
+        """Свечи как у MarketDataRepository, но не позже часов реплея"""
+        self.stats["queries"] += 1
+
+        series = self.series.get(interval)
+        if series is None or series.symbol.upper() != symbol.upper():
+            self.stats["missing_series"] += 1
+            return []
+
+        stop = series.visible_end(self.clock_us)
+        if end_time is not None:
+            stop = min(stop, int(np.searchsorted(series.open_time, to_epoch_us(end_time), side="right")))
+
+        start = 0
+        if start_time is not None:
+            start = int(np.searchsorted(series.open_time, to_epoch_us(start_time), side="left"))
+        if limit:
+            start = max(start, stop - limit)
+
+        window = CandleWindow(series, start, stop)
+        self.stats["bars_served"] += len(window)
+
+        if order_desc:
+            return list(reversed(window))
+        return window
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика репозитория"""
+        return {
+            **self.stats,
+            "clock": self.now().isoformat() if self.clock_us else None,
+            "series": {interval: len(s) for interval, s in self.series.items()}
+        }
+
+    def __repr__(self) -> str:
+        return f"ReplayRepository(series={list(self.series)}, clock={self.now().isoformat()})"
+
+
+# Export
+__all__ = [
+    "INTERVAL_SECONDS",
+    "CandleSeries",
+    "CandleWindow",
+    "CandleRow",
+    "ReplayRepository",
+    "to_epoch_us",
+    "from_epoch_us"
+]
+
+logger.info("✅ Replay data module loaded")
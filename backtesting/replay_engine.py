@@ -0,0 +1,656 @@
+# backtesting/replay_engine.py
+
+"""
+Replay Backtest Engine - Мультитаймфреймовый реплей истории
+
+Прогоняет живые стратегии (analyze_with_data) по истории так, как их видел
+бы бот в реальном времени:
+1. Свечи 1m/5m/1h/1d загружаются из БД один раз в колонки (CandleSeries),
+   30m/4h (и отсутствующие интервалы) строятся ресемплингом
+2. Часы реплея идут по закрытию баров step_interval (по умолчанию 5m)
+3. На каждом шаге ReplayRepository отдает только закрытые к этому моменту
+   бары - окна являются views на массивы, без копирования списков
+4. TechnicalAnalysisContext пересобирается "как на тот момент": уровни - при
+   новом D1 баре, ATR - при новом H1 баре, свечи и условия - каждый шаг.
+   Контекст шага зависит только от времени и конфигов анализаторов, поэтому
+   его можно переиспользовать между прогонами через ReplayContextCache
+5. Как в StrategyOrchestrator, у стратегии свое StrategyState на символ:
+   сигнал проходит strategy.accept_signal() (сила, cooldown, rate limit)
+   со временем реплея
+6. Сигнал исполняется по open следующего 1m бара, SL/TP проверяются по
+   high/low последующих 1m баров (SL первым, если оба в одном баре).
+   Без 1m данных исполнение идет по самому младшему доступному интервалу
+"""
+
+import copy
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+
+from strategies.strategy_state import StrategyStateStore
+
+from .backtest_engine import BacktestEngine, BacktestResult
+from .replay_data import (
+    INTERVAL_SECONDS,
+    CandleSeries,
+    ReplayRepository,
+    from_epoch_us,
+    to_epoch_us
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Интервалы контекста и стратегий (порядок - от младшего к старшему)
+REPLAY_INTERVALS = ("1m", "5m", "30m", "1h", "4h", "1d")
+
+# Интервалы, которые загружаются из БД (остальные - ресемплинг)
+LOADED_INTERVALS = ("1m", "5m", "1h", "1d")
+
+
+def find_exit(trade, m1: CandleSeries, start: int, stop: int) -> Optional[Tuple[int, float, str]]:
+    """
+    Первый бар [start, stop) серии исполнения, задевший SL/TP сделки
+
+    SL проверяется первым, если оба уровня в одном баре; при гэпе за стоп
+    исполнение идет по open бара.
+
+    Returns:
+        (индекс бара, цена выхода, "stop_loss" | "take_profit") или None
+    """
+    if start >= stop or (not trade.stop_loss and not trade.take_profit):
+        return None
+
+    opens = m1.open[start:stop]
+    highs = m1.high[start:stop]
+    lows = m1.low[start:stop]
+    no_hit = np.zeros(stop - start, dtype=bool)
+
+    if trade.side == "BUY":
+        sl_hit = lows <= trade.stop_loss if trade.stop_loss else no_hit
+        tp_hit = highs >= trade.take_profit if trade.take_profit else no_hit
+    else:
+        sl_hit = highs >= trade.stop_loss if trade.stop_loss else no_hit
+        tp_hit = lows <= trade.take_profit if trade.take_profit else no_hit
+
+    hits = sl_hit | tp_hit
+    if not hits.any():
+        return None
+
+    k = int(np.argmax(hits))
+
+    if sl_hit[k]:
+        if trade.side == "BUY":
+            price = min(trade.stop_loss, float(opens[k]))
+        else:
+            price = max(trade.stop_loss, float(opens[k]))
+        return start + k, float(price), "stop_loss"
+
+    return start + k, float(trade.take_profit), "take_profit"
+
+
+class ReplayContextCache:
+    """
+    🗃️ Снимки TechnicalAnalysisContext по времени шага реплея
+
+    Контекст на шаге определяется только закрытыми барами и конфигами
+    анализаторов - не параметрами стратегий. Поэтому один кэш на
+    (символ, конфиги анализаторов, шаг) переиспользуется всеми прогонами,
+    чьи периоды пересекаются (перебор параметров, окна walk-forward).
+    Снимки - поверхностные копии, стратегии их не изменяют.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 150_000):
+        """
+        Args:
+            max_entries: Лимит снимков (None = без лимита; вытесняются старейшие)
+        """
+        self.max_entries = max_entries
+        self._snapshots: Dict[int, Any] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def get(self, clock_us: int) -> Optional[Any]:
+        """Снимок контекста на момент шага"""
+        snapshot = self._snapshots.get(clock_us)
+        if snapshot is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return snapshot
+
+    def put(self, clock_us: int, context: Any):
+        """Сохранить снимок (поверхностную копию) контекста"""
+        self._snapshots[clock_us] = copy.copy(context)
+
+        if self.max_entries is not None and len(self._snapshots) > self.max_entries:
+            del self._snapshots[next(iter(self._snapshots))]
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._snapshots),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+class ReplayBacktestEngine(BacktestEngine):
+    """
+    🕰️ Бэктест живых стратегий на реплее истории без заглядывания вперед
+
+    Usage:
+        engine = ReplayBacktestEngine(initial_capital=10000)
+        result = await engine.run_from_repository(
+            repository, "BTCUSDT",
+            strategies=[BreakoutStrategy("BTCUSDT"), BounceStrategy("BTCUSDT")],
+            start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            end=datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+    """
+
+    def __init__(
+        self,
+        initial_capital: float = 10000.0,
+        commission_rate: float = 0.001,
+        position_size_pct: float = 0.95,
+        step_interval: str = "5m",
+        context_manager_config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            initial_capital: Начальный капитал ($)
+            commission_rate: Комиссия биржи (0.1% = 0.001)
+            position_size_pct: Размер позиции от капитала (95% = 0.95)
+            step_interval: Шаг реплея (интервал, по закрытию которого запускаются стратегии)
+            context_manager_config: Конфиги анализаторов для TechnicalAnalysisContextManager
+        """
+        super().__init__(
+            initial_capital=initial_capital,
+            commission_rate=commission_rate,
+            position_size_pct=position_size_pct
+        )
+
+        if step_interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Неизвестный интервал шага: {step_interval}")
+
+        self.step_interval = step_interval
+        self.context_manager_config = context_manager_config or {}
+
+        self.repository: Optional[ReplayRepository] = None
+        self.context_manager = None
+        self._pending: Optional[Dict[str, Any]] = None
+        self.strategy_states = StrategyStateStore()  # cooldown/rate limit стратегий, как в оркестраторе
+        self._context_as_of_us: int = 0
+
+        # Пик equity и максимальная просадка по ходу реплея (для ранней остановки)
+        self.peak_equity = initial_capital
+        self.max_drawdown_pct = 0.0
+
+        self.stats = {
+            "steps": 0,
+            "strategy_calls": 0,
+            "signals_generated": 0,
+            "signals_filtered_by_strategy": 0,
+            "signals_ignored_same_side": 0,
+            "levels_refreshes": 0,
+            "atr_refreshes": 0,
+            "context_errors": 0,
+            "context_cache_hits": 0,
+            "strategy_errors": 0,
+            "stop_loss_exits": 0,
+            "take_profit_exits": 0,
+            "reversals": 0,
+            "stopped_early": 0
+        }
+
+    # ==================== ЗАГРУЗКА ДАННЫХ ====================
+
+    @staticmethod
+    def complete_series(
+        series: Dict[str, CandleSeries],
+        symbol: str
+    ) -> Dict[str, CandleSeries]:
+        """
+        Дополнить недостающие интервалы ресемплингом младшего доступного
+
+        Интервалы младше самого младшего загруженного остаются пустыми.
+
+        Raises:
+            ValueError: Если нет ни одной серии со свечами
+        """
+        series = {interval: s for interval, s in series.items() if len(s)}
+
+        if not series:
+            raise ValueError(f"Нет свечей для {symbol}: реплей невозможен")
+
+        for interval in REPLAY_INTERVALS:
+            if interval in series:
+                continue
+
+            period = INTERVAL_SECONDS[interval]
+            sources = [
+                s for name, s in series.items()
+                if INTERVAL_SECONDS[name] < period and period % INTERVAL_SECONDS[name] == 0
+            ]
+            if not sources:
+                continue
+
+            source = max(sources, key=lambda s: INTERVAL_SECONDS[s.interval])
+            series[interval] = source.resample(interval)
+
+            logger.debug(f"🔁 {symbol} {interval}: ресемплинг из {source.interval} "
+                         f"({len(series[interval])} баров)")
+
+        return series
+
+    @classmethod
+    async def load_series(
+        cls,
+        repository,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        warmup_days: int = 180,
+        chunk_days: int = 30
+    ) -> Dict[str, CandleSeries]:
+        """
+        Загрузить историю символа из MarketDataRepository
+
+        Args:
+            repository: MarketDataRepository
+            symbol: Торговый символ
+            start/end: Период реплея
+            warmup_days: Дней истории до start (уровни D1 строятся по 180 барам)
+            chunk_days: Размер порции загрузки
+        """
+        load_start = start - timedelta(days=warmup_days)
+
+        series = {}
+        for interval in LOADED_INTERVALS:
+            # Младшие интервалы до start нужны только для окон стратегий
+            interval_start = load_start if interval in ("1h", "1d") else start - timedelta(days=2)
+            series[interval] = await CandleSeries.load(
+                repository, symbol, interval, interval_start, end, chunk_days=chunk_days
+            )
+
+        return cls.complete_series(series, symbol)
+
+    # ==================== ЗАПУСК ====================
+
+    async def run_from_repository(
+        self,
+        repository,
+        symbol: str,
+        strategies: List[Any],
+        start: datetime,
+        end: datetime,
+        warmup_days: int = 180
+    ) -> BacktestResult:
+        """Загрузить историю из БД и прогнать реплей"""
+        series = await self.load_series(repository, symbol, start, end, warmup_days=warmup_days)
+        return await self.run_replay(series, strategies, symbol, start=start, end=end)
+
+    async def run_replay(
+        self,
+        series: Dict[str, CandleSeries],
+        strategies: List[Any],
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        stop_check: Optional[Callable[["ReplayBacktestEngine", float], bool]] = None,
+        check_every: int = 288,
+        context_cache: Optional[ReplayContextCache] = None
+    ) -> BacktestResult:
+        """
+        Прогнать реплей по предзагруженным сериям
+
+        Args:
+            series: Серии по интервалам (недостающие будут построены ресемплингом)
+            strategies: Экземпляры стратегий с analyze_with_data()
+            symbol: Торговый символ
+            start: Начало реплея (None = когда накопится минимум D1 баров)
+            end: Конец реплея (None = до конца данных)
+            stop_check: Ранняя остановка: (движок, доля пройденных шагов) -> True = стоп
+            check_every: Как часто (в шагах) вызывать stop_check
+            context_cache: Кэш контекстов (только для тех же серий и конфигов анализаторов)
+        """
+        from strategies import FeatureCache, StrategyOrchestrator
+        from strategies.technical_analysis import TechnicalAnalysisContextManager
+
+        symbol = symbol.upper()
+        series = self.complete_series(series, symbol)
+        self._reset()
+
+        self.repository = ReplayRepository(series)
+        self.context_manager = TechnicalAnalysisContextManager(
+            repository=self.repository,
+            auto_start_background_updates=False,
+            clock=self._context_clock,
+            **self.context_manager_config
+        )
+
+        min_candles = StrategyOrchestrator.MIN_CANDLES
+        # Серия исполнения сделок - самая младшая доступная (обычно 1m)
+        m1 = min(series.values(), key=lambda s: INTERVAL_SECONDS[s.interval])
+        d1 = series.get("1d", CandleSeries.empty(symbol, "1d"))
+        h1 = series.get("1h", CandleSeries.empty(symbol, "1h"))
+
+        if self.step_interval not in series:
+            raise ValueError(f"Нет свечей шага {self.step_interval} для {symbol}")
+        steps = series[self.step_interval]
+
+        # Часы шага = момент закрытия бара (close_time + 1s по конвенции БД)
+        step_clocks = steps.close_time + 1_000_000
+
+        if start is None:
+            if len(d1) < min_candles["1d"]:
+                raise ValueError(f"Недостаточно D1 свечей для {symbol}: {len(d1)}")
+            start_us = int(d1.close_time[min_candles["1d"] - 1]) + 1_000_000
+        else:
+            start_us = to_epoch_us(start)
+        end_us = to_epoch_us(end) if end is not None else int(step_clocks[-1])
+
+        first = int(np.searchsorted(step_clocks, start_us, side="left"))
+        last = int(np.searchsorted(step_clocks, end_us, side="right"))
+
+        if first >= last:
+            raise ValueError(f"Нет шагов {self.step_interval} в периоде реплея {symbol}")
+
+        logger.info(f"🚀 Реплей {symbol}: {last - first} шагов {self.step_interval}, "
+                    f"стратегий: {len(strategies)}")
+
+        m1_cursor = m1.visible_end(int(step_clocks[first]))
+        d1_seen = -1
+        h1_seen = -1
+        # Контекст менеджера соответствует прошлому шагу (иначе - полный пересчет)
+        context_warm = False
+
+        for k in range(first, last):
+            clock_us = int(step_clocks[k])
+            clock = from_epoch_us(clock_us)
+            m1_end = m1.visible_end(clock_us)
+
+            # 1. Исполнение сигнала прошлого шага и выходы по SL/TP
+            if self._pending is not None:
+                if m1_cursor < len(m1):
+                    self._fill_pending(m1, m1_cursor, symbol)
+                self._pending = None
+
+            self._check_exits(m1, m1_cursor, m1_end)
+            m1_cursor = m1_end
+
+            # 2. Контекст на момент clock
+            self.repository.set_clock(clock_us)
+
+            d1_count = d1.visible_end(clock_us)
+            h1_count = h1.visible_end(clock_us)
+
+            # Уровни считаются на момент закрытия последнего D1 бара -
+            # одинаково при непрерывном реплее и при пересчете после кэша
+            self._context_as_of_us = int(d1.close_time[d1_count - 1]) + 1_000_000 if d1_count else clock_us
+
+            ta_context = context_cache.get(clock_us) if context_cache is not None else None
+
+            if ta_context is not None:
+                self.stats["context_cache_hits"] += 1
+                context_warm = False
+            else:
+                refresh_levels = not context_warm or d1_count != d1_seen
+                refresh_atr = refresh_levels or h1_count != h1_seen
+
+                try:
+                    ta_context = await self.context_manager.refresh_context(
+                        symbol,
+                        levels=refresh_levels,
+                        atr=refresh_atr,
+                        candles=True,
+                        market_conditions=True
+                    )
+                    self.stats["levels_refreshes"] += int(refresh_levels)
+                    self.stats["atr_refreshes"] += int(refresh_atr)
+                    d1_seen, h1_seen = d1_count, h1_count
+                    context_warm = True
+
+                    if context_cache is not None:
+                        context_cache.put(clock_us, ta_context)
+                except Exception as e:
+                    self.stats["context_errors"] += 1
+                    context_warm = False
+                    logger.debug(f"⚠️ {symbol} {clock.isoformat()}: контекст не обновлен: {e}")
+                    ta_context = self.context_manager.contexts.get(symbol)
+
+            # 3. Стратегии на окнах закрытых баров
+            windows = {
+                interval: self.repository.visible(interval, limit)
+                for interval, limit in min_candles.items()
+            }
+
+            features = FeatureCache(
+                symbol=symbol,
+                candles_1m=windows["1m"],
+                candles_5m=windows["5m"],
+                candles_1h=windows["1h"],
+                candles_1d=windows["1d"],
+                ta_context=ta_context,
+                as_of=clock
+            )
+
+            best = None
+            for strategy in strategies:
+                signal = await self._run_strategy(strategy, symbol, windows, ta_context, features, clock)
+                if signal is not None and (best is None or signal.strength > best.strength):
+                    best = signal
+
+            if best is not None:
+                self._queue_signal(best)
+
+            # 4. Equity (mark-to-market по close последнего закрытого 1m бара)
+            price = float(m1.close[m1_end - 1]) if m1_end else 0.0
+            equity = self.current_capital + self._unrealized_pnl(price)
+            self.equity_curve.append(clock_us, equity, price, self._exposure(price, equity))
+
+            if equity > self.peak_equity:
+                self.peak_equity = equity
+            elif self.peak_equity > 0:
+                self.max_drawdown_pct = max(
+                    self.max_drawdown_pct, (self.peak_equity - equity) / self.peak_equity * 100
+                )
+
+            self.stats["steps"] += 1
+
+            if stop_check is not None and self.stats["steps"] % check_every == 0:
+                if stop_check(self, self.stats["steps"] / (last - first)):
+                    self.stats["stopped_early"] = 1
+                    logger.info(f"⏹️ Реплей {symbol} остановлен досрочно на {clock.isoformat()}")
+                    break
+            if self.stats["steps"] % 10000 == 0:
+                logger.info(f"📊 Реплей {symbol}: {self.stats['steps']}/{last - first} шагов")
+
+        # Закрываем открытую позицию по последнему видимому 1m close
+        if self.current_trade and self.current_trade.is_open and m1_cursor:
+            self.current_trade.exit_reason = "end_of_data"
+            self._close_trade(float(m1.close[m1_cursor - 1]), from_epoch_us(m1.close_time[m1_cursor - 1]))
+
+        candles_data = steps.to_report_candles(first, first + max(self.stats["steps"], 1))
+        result = self._generate_result(candles_data, symbol)
+
+        logger.info(f"✅ Реплей {symbol} завершен: {result.total_trades} сделок, "
+                    f"PnL: {result.total_pnl_percent:+.2f}%")
+
+        return result
+
+    def _context_clock(self) -> datetime:
+        """Время для расчетов контекста (давность касаний уровней)"""
+        return from_epoch_us(self._context_as_of_us)
+
+    # ==================== СТРАТЕГИИ И СИГНАЛЫ ====================
+
+    async def _run_strategy(
+        self,
+        strategy,
+        symbol: str,
+        windows: Dict[str, Any],
+        ta_context,
+        features,
+        clock: datetime
+    ):
+        """
+        analyze_with_data + accept_signal стратегии во времени реплея
+
+        Порядок как в StrategyOrchestrator._analyze_symbol: состояние пары
+        (стратегия, символ) -> анализ -> фильтры стратегии (сила, cooldown,
+        rate limit), которые записывают принятый сигнал в это состояние.
+        """
+        self.stats["strategy_calls"] += 1
+
+        name = getattr(strategy, "name", strategy.__class__.__name__)
+        state = self.strategy_states.get(name, symbol)
+        state.last_analysis_time = clock
+        state.counters["analysis_calls"] += 1
+
+        try:
+            signal = await strategy.analyze_with_data(
+                symbol=symbol,
+                candles_1m=windows["1m"],
+                candles_5m=windows["5m"],
+                candles_1h=windows["1h"],
+                candles_1d=windows["1d"],
+                ta_context=ta_context,
+                features=features,
+                state=state
+            )
+        except Exception as e:
+            self.stats["strategy_errors"] += 1
+            logger.error(f"❌ {symbol}: ошибка в {strategy.__class__.__name__}: {e}")
+            return None
+
+        if signal is None:
+            return None
+
+        self.stats["signals_generated"] += 1
+
+        # Время сигнала - время реплея, а не реальное
+        lifetime = signal.expires_at - signal.timestamp if signal.expires_at else None
+        signal.timestamp = clock
+        if lifetime is not None:
+            signal.expires_at = clock + lifetime
+
+        if not signal.strategy_name:
+            signal.strategy_name = name
+
+        if not strategy.accept_signal(signal, state, now=clock):
+            self.stats["signals_filtered_by_strategy"] += 1
+            return None
+
+        return signal
+
+    def _queue_signal(self, signal):
+        """Поставить сигнал на исполнение по open следующего 1m бара"""
+        from strategies import SignalType
+
+        side = "BUY" if signal.signal_type in (SignalType.BUY, SignalType.STRONG_BUY) else "SELL"
+
+        if self.current_trade and self.current_trade.is_open and self.current_trade.side == side:
+            self.stats["signals_ignored_same_side"] += 1
+            return
+
+        self._pending = {"side": side, "signal": signal}
+
+    # ==================== ИСПОЛНЕНИЕ ====================
+
+    def _fill_pending(self, m1: CandleSeries, index: int, symbol: str):
+        """Исполнить отложенный сигнал по open 1m бара index (разворот при встречной позиции)"""
+        price = float(m1.open[index])
+        timestamp = from_epoch_us(m1.open_time[index])
+        side = self._pending["side"]
+        signal = self._pending["signal"]
+
+        if self.current_trade and self.current_trade.is_open:
+            self.current_trade.exit_reason = "reverse"
+            self._close_trade(price, timestamp)
+            self.stats["reversals"] += 1
+
+        self._open_trade(side, price, timestamp, signal)
+
+        trade = self.current_trade
+        trade.symbol = symbol
+        trade.strategy = signal.strategy_name
+        trade.stop_loss = signal.stop_loss
+        trade.take_profit = signal.take_profit
+
+    def _check_exits(self, m1: CandleSeries, start: int, stop: int):
+        """Выход по SL/TP на 1m барах [start, stop) - первый бар с касанием"""
+        trade = self.current_trade
+        if not trade or not trade.is_open:
+            return
+
+        exit_ = find_exit(trade, m1, start, stop)
+        if exit_ is None:
+            return
+
+        i, price, reason = exit_
+        trade.exit_reason = reason
+        self.stats[f"{reason}_exits"] += 1
+        self._close_trade(price, from_epoch_us(m1.close_time[i]))
+
+    def _unrealized_pnl(self, price: float) -> float:
+        """Нереализованный PnL открытой позиции"""
+        trade = self.current_trade
+        if not trade or not trade.is_open or not price:
+            return 0.0
+        if trade.side == "BUY":
+            return (price - trade.entry_price) * trade.quantity
+        return (trade.entry_price - price) * trade.quantity
+
+    def _exposure(self, price: float, equity: float) -> float:
+        """Доля капитала в позиции со знаком (+ long, - short)"""
+        trade = self.current_trade
+        if not trade or not trade.is_open or equity <= 0:
+            return 0.0
+        notional = trade.quantity * price / equity
+        return notional if trade.side == "BUY" else -notional
+
+    def _reset(self):
+        """Сброс состояния перед новым реплеем"""
+        super()._reset()
+        self._pending = None
+        self.strategy_states = StrategyStateStore()
+        self.peak_equity = self.initial_capital
+        self.max_drawdown_pct = 0.0
+        for key in self.stats:
+            self.stats[key] = 0
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика последнего реплея"""
+        return {
+            **self.stats,
+            "step_interval": self.step_interval,
+            "trades": len(self.trades),
+            "strategy_states": self.strategy_states.get_stats(),
+            "repository": self.repository.get_stats() if self.repository else None,
+            "context_manager": self.context_manager.get_stats() if self.context_manager else None
+        }
+
+    def __repr__(self) -> str:
+        return (f"ReplayBacktestEngine(step={self.step_interval}, "
+                f"steps={self.stats['steps']}, trades={len(self.trades)})")
+
+
+# Export
+__all__ = ["ReplayBacktestEngine", "ReplayContextCache", "find_exit", "REPLAY_INTERVALS", "LOADED_INTERVALS"]
+
+logger.info("✅ Replay backtest engine module loaded")
@@ -7,12 +7,30 @@ from plotly.subplots import make_subplots
 from datetime import datetime
 import json
 
+import numpy as np
+
+from .downsampling import (
+    rolling_mean,
+    ema,
+    ohlc_buckets,
+    minmax_indices,
+    lttb_indices,
+    take
+)
+from .equity_curve import EquityCurve
+from .replay_data import to_epoch_us, from_epoch_us
+
 logger = logging.getLogger(__name__)
 
 
 class ReportGenerator:
     """Генератор интерактивных HTML отчетов с SPA архитектурой"""
     
+    # Лимит точек на ряд графика (обзор и детализация)
+    DEFAULT_MAX_POINTS = 2000
+    # Свечей в одном чанке детализации
+    DEFAULT_CHUNK_SIZE = 5000
+    
     # 📈 Криптовалюты (Bybit)
     CRYPTO_SYMBOLS = [
         "BTCUSDT",
@@ -72,7 +90,16 @@ class ReportGenerator:
     
     @staticmethod
     def generate_dashboard_html() -> str:
-        """Генерирует HTML страницу с интерактивным дашбордом"""
+        """
+        Генерирует HTML страницу с интерактивным дашбордом
+
+        Страница ходит на сервер, который ее отдает:
+            POST /backtest/run   - параметры формы -> generate_backtest_json()
+            POST /backtest/chunk - тело /backtest/run + start/end/max_points
+                                   -> handle_chunk_request() для того же
+                                   BacktestResult
+        Без /backtest/chunk зум остается на прореженном обзоре.
+        """
         logger.info("📊 Генерация расширенного дашборда...")
         
         # Генерация опций
@@ -800,6 +827,8 @@ class ReportGenerator:
     <script>
         let currentBacktestData = null;
         let priceChartInstance = null;
+        let lastBacktestRequest = null;
+        let detailRequestSeq = 0;
         
         const ASSET_CONFIG = {{
             crypto: {{
@@ -884,16 +913,17 @@ class ReportGenerator:
             document.getElementById('shareBtn').disabled = true;
             
             try {{
+                const request = {{
+                    asset_type: assetType,
+                    symbol: symbol,
+                    interval: interval,
+                    strategy: strategy,
+                    initial_capital: capital
+                }};
                 const response = await fetch('/backtest/run', {{
                     method: 'POST',
                     headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{
-                        asset_type: assetType,
-                        symbol: symbol,
-                        interval: interval,
-                        strategy: strategy,
-                        initial_capital: capital
-                    }})
+                    body: JSON.stringify(request)
                 }});
                 
                 if (!response.ok) {{
@@ -903,6 +933,8 @@ class ReportGenerator:
                 
                 const data = await response.json();
                 currentBacktestData = data;
+                lastBacktestRequest = request;
+                detailRequestSeq++;
                 
                 displayResults(data);
                 updateURL(assetType, symbol, interval, strategy, capital);
@@ -1016,7 +1048,7 @@ class ReportGenerator:
             document.getElementById('resultsContainer').scrollIntoView({{ behavior: 'smooth', block: 'start' }});
         }}
         
-        function renderPriceChart(data) {{
+        function renderPriceChart(data, xRange) {{
             const traces = [];
             
             // Candlesticks
@@ -1126,10 +1158,62 @@ class ReportGenerator:
                 margin: {{ t: 20, b: 50, l: 60, r: 20 }}
             }};
             
+            if (xRange) {{
+                layout.xaxis.range = xRange;
+            }}
+            
             const config = {{ displayModeBar: true, displaylogo: false }};
             
             Plotly.newPlot('priceChart', traces, layout, config);
             priceChartInstance = {{ data: traces, layout: layout }};
+            
+            // Обзор прорежен: при зуме подгружаем детализацию диапазона
+            const chart = document.getElementById('priceChart');
+            if (chart.removeAllListeners) {{
+                chart.removeAllListeners('plotly_relayout');
+            }}
+            if (data.chunking && data.chunking.downsampled) {{
+                chart.on('plotly_relayout', loadDetailRange);
+            }}
+        }}
+        
+        async function loadDetailRange(event) {{
+            if (!currentBacktestData || !lastBacktestRequest) return;
+            
+            const seq = ++detailRequestSeq;
+            
+            if (event['xaxis.autorange']) {{
+                renderPriceChart(currentBacktestData);
+                updateChartVisibility();
+                return;
+            }}
+            
+            const range = event['xaxis.range'] || [event['xaxis.range[0]'], event['xaxis.range[1]']];
+            if (range[0] === undefined || range[1] === undefined) return;
+            
+            try {{
+                const response = await fetch('/backtest/chunk', {{
+                    method: 'POST',
+                    headers: {{ 'Content-Type': 'application/json' }},
+                    body: JSON.stringify(Object.assign({{}}, lastBacktestRequest, {{
+                        start: String(range[0]),
+                        end: String(range[1]),
+                        max_points: currentBacktestData.chunking.max_points
+                    }}))
+                }});
+                
+                if (!response.ok) return;
+                
+                const detail = await response.json();
+                if (seq !== detailRequestSeq) return;
+                
+                // Маркеры сделок остаются из обзора - они точные
+                renderPriceChart(Object.assign({{}}, currentBacktestData, detail), range);
+                updateChartVisibility();
+                
+            }} catch (error) {{
+                console.error('Detail error:', error);
+            }}
         }}
         
         function updateChartVisibility() {{
@@ -1351,21 +1435,24 @@ class ReportGenerator:
         return html
     
     @staticmethod
-    def generate_backtest_json(result) -> Dict[str, Any]:
-        """Генерирует JSON данные для клиента с расширенными метриками"""
+    def generate_backtest_json(result, max_points: Optional[int] = None,
+                               chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Генерирует JSON данные для клиента с расширенными метриками
+
+        Ряды цены, индикаторов, equity и просадки прореживаются до
+        max_points точек (обзор всего периода). Маркеры сделок, таблица
+        сделок и распределение PnL всегда точные. Блок "chunking"
+        описывает диапазоны детализации: при зуме дашборд запрашивает
+        generate_backtest_chunk() за видимый интервал.
+        """
         logger.info("📊 Генерация расширенных JSON данных...")
         
         try:
-            # OHLC данные
-            price_times = [c["open_time"] for c in result.candles_data]
-            candles_open = [float(c["open"]) for c in result.candles_data]
-            candles_high = [float(c["high"]) for c in result.candles_data]
-            candles_low = [float(c["low"]) for c in result.candles_data]
-            candles_close = [float(c["close"]) for c in result.candles_data]
-            
-            # Индикаторы MA(20) и EMA(50)
-            ma20 = ReportGenerator._calculate_ma(candles_close, 20)
-            ema50 = ReportGenerator._calculate_ema(candles_close, 50)
+            max_points = max_points or ReportGenerator.DEFAULT_MAX_POINTS
+            chunk_size = chunk_size or ReportGenerator.DEFAULT_CHUNK_SIZE
+            series = ReportGenerator._report_series(result)
+            candles_close = series["close"]
             
             # Торговые сигналы
             buy_entries = []
@@ -1408,29 +1495,17 @@ class ReportGenerator:
                         "duration": f"{duration:.1f}h"
                     })
             
-            # Equity curve
-            equity_times = [e["timestamp"] for e in result.equity_curve]
-            equity_values = [e["equity"] for e in result.equity_curve]
-            
             # Buy & Hold расчет
-            initial_price = candles_close[0]
-            final_price = candles_close[-1]
+            initial_price = float(candles_close[0])
+            final_price = float(candles_close[-1])
             buy_hold_final = result.initial_capital * (final_price / initial_price)
             buy_hold_pnl = buy_hold_final - result.initial_capital
             buy_hold_pnl_percent = (buy_hold_pnl / result.initial_capital) * 100
             
-            buy_hold_times = price_times
-            buy_hold_values = [result.initial_capital * (price / initial_price) for price in candles_close]
-            
-            # Drawdown расчет
-            drawdown_times = equity_times
-            drawdown_values = []
-            peak = equity_values[0]
-            for equity in equity_values:
-                if equity > peak:
-                    peak = equity
-                dd = ((peak - equity) / peak) * 100 if peak > 0 else 0
-                drawdown_values.append(-dd)
+            # Прореженные ряды всего периода
+            overview = ReportGenerator._series_payload(
+                series, 0, len(candles_close), 0, len(series["equity"]), max_points
+            )
             
             json_data = {
                 "status": "success",
@@ -1460,35 +1535,25 @@ class ReportGenerator:
                 # Buy & Hold метрики
                 "buy_hold_pnl": float(buy_hold_pnl),
                 "buy_hold_pnl_percent": float(buy_hold_pnl_percent),
-                "buy_hold_times": buy_hold_times,
-                "buy_hold_values": buy_hold_values,
                 
-                # OHLC + индикаторы
-                "price_times": price_times,
-                "candles_open": candles_open,
-                "candles_high": candles_high,
-                "candles_low": candles_low,
-                "candles_close": candles_close,
-                "ma20": ma20,
-                "ema50": ema50,
-                
-                # Торговые сигналы
+                # Торговые сигналы (всегда точные)
                 "buy_entries": buy_entries,
                 "sell_entries": sell_entries,
                 "winning_exits": winning_exits,
                 "losing_exits": losing_exits,
                 
                 # Дополнительные данные
-                "equity_times": equity_times,
-                "equity_values": equity_values,
-                "drawdown_times": drawdown_times,
-                "drawdown_values": drawdown_values,
                 "pnl_distribution": pnl_distribution,
-                "trades_list": trades_list
+                "trades_list": trades_list,
+                
+                # Детализация по диапазонам
+                "chunking": ReportGenerator._chunking_info(series, max_points, chunk_size)
             }
+            # OHLC + индикаторы, equity, buy & hold, просадка
+            json_data.update(overview)
             
             logger.info("✅ Расширенные JSON данные готовы")
-            logger.debug(f"   • Свечей: {len(candles_close)}")
+            logger.debug(f"   • Свечей: {len(candles_close)} (в обзоре: {len(overview['price_times'])})")
             logger.debug(f"   • Сделок: {len(trades_list)}")
             logger.debug(f"   • Buy&Hold PnL: {buy_hold_pnl_percent:+.2f}%")
             
@@ -1499,36 +1564,201 @@ class ReportGenerator:
             raise
     
     @staticmethod
-    def _calculate_ma(prices: List[float], period: int) -> List[float]:
-        """Рассчитывает простую скользящую среднюю (MA)"""
-        ma = []
-        for i in range(len(prices)):
-            if i < period - 1:
-                ma.append(None)
-            else:
-                ma.append(sum(prices[i-period+1:i+1]) / period)
-        return ma
+    def generate_backtest_chunk(result, start=None, end=None, chunk: Optional[int] = None,
+                                max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ряды графиков за диапазон времени (детализация при зуме)
+
+        Args:
+            result: BacktestResult (тот же, что отдан generate_backtest_json)
+            start, end: Границы диапазона (datetime или ISO строка, naive = UTC);
+                None - от начала / до конца
+            chunk: Номер чанка из "chunking.chunks" вместо start/end
+            max_points: Лимит точек на ряд (по умолчанию как в обзоре)
+
+        Returns:
+            Словарь с теми же ключами рядов, что и generate_backtest_json
+            (price_times, candles_*, ma20, ema50, equity_*, buy_hold_*,
+            drawdown_*), плюс "range". Индикаторы и просадка считаются по
+            всей истории, поэтому на границах чанка значения не "прогреваются"
+            заново.
+        """
+        max_points = max_points or ReportGenerator.DEFAULT_MAX_POINTS
+        series = ReportGenerator._report_series(result)
+        n = len(series["close"])
+        
+        if chunk is not None:
+            chunk_size = ReportGenerator.DEFAULT_CHUNK_SIZE
+            lo = min(max(int(chunk), 0) * chunk_size, n)
+            hi = min(lo + chunk_size, n)
+        else:
+            lo = 0 if start is None else int(np.searchsorted(
+                series["time_us"], ReportGenerator._parse_bound(start), side="left"))
+            hi = n if end is None else int(np.searchsorted(
+                series["time_us"], ReportGenerator._parse_bound(end), side="right"))
+        
+        if lo < hi:
+            eq_lo = int(np.searchsorted(series["equity_us"], series["time_us"][lo], side="left"))
+            eq_hi = int(np.searchsorted(series["equity_us"], series["time_us"][hi - 1], side="right"))
+        else:
+            eq_lo = eq_hi = 0
+        
+        payload = ReportGenerator._series_payload(series, lo, hi, eq_lo, eq_hi, max_points)
+        payload["status"] = "success"
+        logger.debug(f"🔍 Детализация: свечи [{lo}, {hi}) -> {len(payload['price_times'])} точек")
+        return payload
     
     @staticmethod
-    def _calculate_ema(prices: List[float], period: int) -> List[float]:
-        """Рассчитывает экспоненциальную скользящую среднюю (EMA)"""
-        ema = []
-        multiplier = 2 / (period + 1)
-        
-        # Первое значение EMA = SMA
-        sma = sum(prices[:period]) / period
-        ema.append(None if len(prices) < period else sma)
-        
-        for i in range(1, len(prices)):
-            if i < period - 1:
-                ema.append(None)
-            elif i == period - 1:
-                ema.append(sma)
-            else:
-                ema_value = (prices[i] - ema[i-1]) * multiplier + ema[i-1]
-                ema.append(ema_value)
-        
-        return ema
+    def handle_chunk_request(result, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Обработчик POST /backtest/chunk дашборда
+
+        Тело запроса - параметры /backtest/run (по ним сервер находит
+        BacktestResult) плюс "start"/"end" видимой области оси или "chunk",
+        и "max_points". Ошибки разбора возвращаются как status="error".
+        """
+        try:
+            max_points = body.get("max_points")
+            return ReportGenerator.generate_backtest_chunk(
+                result,
+                start=body.get("start"),
+                end=body.get("end"),
+                chunk=body.get("chunk"),
+                max_points=int(max_points) if max_points else None
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Некорректный запрос детализации: {e}")
+            return {"status": "error", "message": str(e)}
+    
+    # ==================== РЯДЫ ДЛЯ ГРАФИКОВ ====================
+    
+    @staticmethod
+    def _report_series(result) -> Dict[str, Any]:
+        """
+        Колонки результата для графиков (считаются один раз на результат)
+
+        Детализация при зуме вызывается многократно на одном BacktestResult,
+        поэтому подготовленные массивы кешируются на самом результате.
+        """
+        cached = getattr(result, "_report_series_cache", None)
+        if cached is not None:
+            return cached
+        
+        candles = result.candles_data
+        times = [c["open_time"] for c in candles]
+        close = np.fromiter((float(c["close"]) for c in candles), dtype=np.float64, count=len(candles))
+        
+        curve = EquityCurve.ensure(result.equity_curve)
+        equity = curve.equity.copy()
+        peak = np.maximum.accumulate(equity) if len(equity) else equity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown = np.where(peak > 0, (equity - peak) / peak * 100, 0.0)
+        
+        series = {
+            "times": times,
+            "time_us": np.array([to_epoch_us(t) for t in times], dtype=np.int64),
+            "open": np.fromiter((float(c["open"]) for c in candles), dtype=np.float64, count=len(candles)),
+            "high": np.fromiter((float(c["high"]) for c in candles), dtype=np.float64, count=len(candles)),
+            "low": np.fromiter((float(c["low"]) for c in candles), dtype=np.float64, count=len(candles)),
+            "close": close,
+            "ma20": rolling_mean(close, 20),
+            "ema50": ema(close, 50),
+            "buy_hold": result.initial_capital * (close / close[0]) if len(close) else close,
+            "equity_us": curve.timestamp.copy(),
+            "equity": equity,
+            "drawdown": drawdown
+        }
+        try:
+            result._report_series_cache = series
+        except AttributeError:
+            pass
+        return series
+    
+    @staticmethod
+    def _series_payload(series: Dict[str, Any], lo: int, hi: int,
+                        eq_lo: int, eq_hi: int, max_points: int) -> Dict[str, Any]:
+        """
+        Прореженные ряды графиков для свечей [lo, hi) и точек equity [eq_lo, eq_hi)
+
+        Свечи агрегируются корзинами OHLC (индикаторы берутся на последней
+        свече корзины - там же, где ее close), equity и buy & hold
+        прореживаются LTTB, просадка - min/max по корзинам.
+        """
+        times = series["times"]
+        buckets = ohlc_buckets(
+            series["open"][lo:hi], series["high"][lo:hi],
+            series["low"][lo:hi], series["close"][lo:hi], max_points
+        )
+        starts = buckets["start"] + lo
+        ends = buckets["end"] + lo
+        
+        bh_idx = lttb_indices(series["time_us"][lo:hi], series["buy_hold"][lo:hi], max_points) + lo
+        eq_idx = lttb_indices(series["equity_us"][eq_lo:eq_hi], series["equity"][eq_lo:eq_hi], max_points) + eq_lo
+        dd_idx = minmax_indices(series["drawdown"][eq_lo:eq_hi], max_points) + eq_lo
+        
+        def eq_times(idx: np.ndarray) -> List[str]:
+            return [from_epoch_us(t).isoformat() for t in series["equity_us"][idx].tolist()]
+        
+        candles_total = hi - lo
+        return {
+            "price_times": take(times, starts),
+            "candles_open": buckets["open"].tolist(),
+            "candles_high": buckets["high"].tolist(),
+            "candles_low": buckets["low"].tolist(),
+            "candles_close": buckets["close"].tolist(),
+            "ma20": take(series["ma20"], ends),
+            "ema50": take(series["ema50"], ends),
+            "buy_hold_times": take(times, bh_idx),
+            "buy_hold_values": take(series["buy_hold"], bh_idx),
+            "equity_times": eq_times(eq_idx),
+            "equity_values": take(series["equity"], eq_idx),
+            "drawdown_times": eq_times(dd_idx),
+            "drawdown_values": take(series["drawdown"], dd_idx),
+            "range": {
+                "start": times[lo] if candles_total > 0 else None,
+                "end": times[hi - 1] if candles_total > 0 else None,
+                "candles": candles_total,
+                "points": len(starts),
+                "downsampled": bool(len(starts) < candles_total or len(eq_idx) < eq_hi - eq_lo)
+            }
+        }
+    
+    @staticmethod
+    def _chunking_info(series: Dict[str, Any], max_points: int, chunk_size: int) -> Dict[str, Any]:
+        """Описание чанков детализации для дашборда"""
+        times = series["times"]
+        n = len(times)
+        return {
+            "downsampled": n > max_points or len(series["equity"]) > max_points,
+            "max_points": max_points,
+            "chunk_size": chunk_size,
+            "total_candles": n,
+            "total_equity_points": len(series["equity"]),
+            "chunks": [
+                {
+                    "index": i,
+                    "start": times[lo],
+                    "end": times[min(lo + chunk_size, n) - 1],
+                    "candles": min(chunk_size, n - lo)
+                }
+                for i, lo in enumerate(range(0, n, chunk_size))
+            ]
+        }
+    
+    @staticmethod
+    def _parse_bound(value) -> int:
+        """
+        Граница диапазона -> мкс epoch
+
+        Plotly отдает диапазон оси как "2024-01-05 12:30:15.5" (без зоны,
+        с произвольным числом знаков дробной части) - дробь нормализуется
+        до микросекунд.
+        """
+        if isinstance(value, str) and "." in value:
+            head, frac = value.split(".", 1)
+            digits = "".join(ch for ch in frac if ch.isdigit())
+            value = f"{head}.{(digits + '000000')[:6]}{frac[len(digits):]}"
+        return to_epoch_us(value)
     
     @staticmethod
     def generate_html_report(result, current_params: Optional[Dict[str, Any]] = None) -> str:
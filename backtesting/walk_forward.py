@@ -0,0 +1,325 @@
+# backtesting/walk_forward.py
+
+"""
+Walk-Forward - Оптимизация на скользящих окнах с out-of-sample проверкой
+
+Для каждого окна:
+1. Train: перебор конфигураций (ParameterSweep) на обучающем периоде
+2. Выбор лучшей конфигурации по метрике (с минимумом сделок)
+3. Test: прогон лучшей конфигурации на следующем периоде (out-of-sample)
+
+Режимы окон:
+- rolling: обучающее окно фиксированной длины сдвигается на step_days
+- anchored: начало обучения фиксировано, окно растет
+
+Все окна и конфигурации - задачи одного пула процессов. Воркеры держат
+ReplayContextCache, поэтому уровни/ATR/рыночные условия на пересекающихся
+участках окон считаются один раз на процесс, а не заново для каждого окна.
+"""
+
+import logging
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Union, Sequence
+
+from .parameter_sweep import (
+    ParameterSweep,
+    SharedCandleStore,
+    SweepResults,
+    EarlyStopping
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== ОКНА ====================
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    """Пара train/test периодов"""
+    index: int
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def build_windows(
+    start: datetime,
+    end: datetime,
+    train_days: int,
+    test_days: int,
+    mode: str = "rolling",
+    step_days: Optional[int] = None
+) -> List[WalkForwardWindow]:
+    """
+    Построить окна walk-forward
+
+    Args:
+        start/end: Полный период
+        train_days: Длина обучения (в anchored - начальная длина)
+        test_days: Длина out-of-sample периода
+        mode: "rolling" или "anchored"
+        step_days: Сдвиг между окнами (None = test_days, OOS без пересечений)
+    """
+    if mode not in ("rolling", "anchored"):
+        raise ValueError(f"Неизвестный режим walk-forward: {mode}")
+
+    step = timedelta(days=step_days or test_days)
+    train = timedelta(days=train_days)
+    test = timedelta(days=test_days)
+
+    windows = []
+    train_start = start
+    train_end = start + train
+
+    while train_end + test <= end:
+        windows.append(WalkForwardWindow(
+            index=len(windows),
+            train_start=train_start,
+            train_end=train_end,
+            test_start=train_end,
+            test_end=train_end + test
+        ))
+
+        train_end += step
+        if mode == "rolling":
+            train_start += step
+
+    return windows
+
+
+# ==================== РЕЗУЛЬТАТЫ ====================
+
+@dataclass
+class WalkForwardResult:
+    """📈 Результаты walk-forward: строка на окно + агрегированная OOS статистика"""
+    windows: List[Dict[str, Any]] = field(default_factory=list)
+    metric: str = "total_pnl_percent"
+    elapsed_sec: float = 0.0
+
+    def oos_stats(self) -> Dict[str, Any]:
+        """Агрегированная out-of-sample статистика по окнам с результатом"""
+        rows = [w for w in self.windows if w.get("test") and not w["test"].get("error")]
+        if not rows:
+            return {"windows": len(self.windows), "evaluated": 0}
+
+        tests = [w["test"] for w in rows]
+        trades = sum(t["total_trades"] for t in tests)
+
+        # Сквозная доходность: окна OOS идут подряд, капитал переносится
+        compounded = 1.0
+        for t in tests:
+            compounded *= 1 + t["total_pnl_percent"] / 100
+
+        train_metric = sum(w["train"][self.metric] for w in rows) / len(rows)
+        test_metric = sum(t[self.metric] for t in tests) / len(tests)
+
+        return {
+            "windows": len(self.windows),
+            "evaluated": len(rows),
+            "total_trades": trades,
+            "compounded_pnl_percent": (compounded - 1) * 100,
+            "mean_pnl_percent": sum(t["total_pnl_percent"] for t in tests) / len(tests),
+            "positive_windows_pct": sum(1 for t in tests if t["total_pnl_percent"] > 0) / len(tests) * 100,
+            "win_rate": (sum(t["win_rate"] * t["total_trades"] for t in tests) / trades) if trades else 0.0,
+            "worst_drawdown": max(t["max_drawdown"] for t in tests),
+            f"mean_train_{self.metric}": train_metric,
+            f"mean_test_{self.metric}": test_metric,
+            # OOS / IS: близко к 1 - параметры не переобучены.
+            # При train <= 0 отношение не имеет смысла (знаки путают оценку) - None
+            "walk_forward_efficiency": test_metric / train_metric if train_metric > 0 else None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Сводка"""
+        return {**self.oos_stats(), "elapsed_sec": self.elapsed_sec}
+
+
+# ==================== ОПТИМИЗАТОР ====================
+
+class WalkForwardOptimizer:
+    """
+    🚶 Walk-forward оптимизация поверх ReplayBacktestEngine
+
+    Usage:
+        store = await SharedCandleStore.load(repository, ["BTCUSDT"], start, end)
+        wfo = WalkForwardOptimizer(store, "BounceStrategy", configs, train_days=90, test_days=30)
+        result = wfo.run(start, end)
+        print(result.oos_stats())
+    """
+
+    def __init__(
+        self,
+        store: SharedCandleStore,
+        strategy: Union[str, type],
+        configs: List[Dict[str, Any]],
+        train_days: int,
+        test_days: int,
+        mode: str = "rolling",
+        step_days: Optional[int] = None,
+        symbols: Optional[Sequence[str]] = None,
+        base_params: Optional[Dict[str, Any]] = None,
+        engine_params: Optional[Dict[str, Any]] = None,
+        early_stopping: Optional[EarlyStopping] = None,
+        workers: Optional[int] = None,
+        metric: str = "total_pnl_percent",
+        min_trades: int = 1
+    ):
+        """
+        Args:
+            store: Общая память со свечами
+            strategy: Класс стратегии или его имя в пакете strategies
+            configs: Конфигурации для оптимизации (grid_configs / random_configs)
+            train_days/test_days: Длины обучения и out-of-sample
+            mode: "rolling" или "anchored"
+            step_days: Сдвиг окон (None = test_days)
+            symbols/base_params/engine_params/early_stopping/workers: как у ParameterSweep
+            metric: Метрика выбора лучшей конфигурации
+            min_trades: Минимум сделок на train, чтобы конфигурация могла быть выбрана
+        """
+        self.configs = configs
+        self.train_days = train_days
+        self.test_days = test_days
+        self.mode = mode
+        self.step_days = step_days
+        self.metric = metric
+        self.min_trades = min_trades
+
+        self.sweep = ParameterSweep(
+            store,
+            strategy,
+            symbols=symbols,
+            base_params=base_params,
+            engine_params=engine_params,
+            early_stopping=early_stopping,
+            workers=workers,
+            metric=metric,
+            cache_contexts=True
+        )
+
+        self.stats = {
+            "runs": 0,
+            "windows": 0,
+            "train_tasks": 0,
+            "test_tasks": 0,
+            "windows_without_best": 0
+        }
+
+    def _select_best(self, results: SweepResults) -> Optional[Dict[str, Any]]:
+        """Лучшая завершенная конфигурация окна с достаточным числом сделок"""
+        candidates = [
+            row for row in results.top(len(results), self.metric)
+            if row.get("total_trades", 0) >= self.min_trades
+        ]
+        return candidates[0] if candidates else None
+
+    def run(self, start: datetime, end: datetime) -> WalkForwardResult:
+        """
+        Прогнать walk-forward на периоде
+
+        Train-задачи всех окон отправляются в пул одной волной, затем -
+        OOS-задачи лучших конфигураций. Пул (и кэши контекстов воркеров)
+        общий для обеих волн.
+        """
+        windows = build_windows(start, end, self.train_days, self.test_days, self.mode, self.step_days)
+        if not windows:
+            raise ValueError("Период слишком короткий для walk-forward окон")
+
+        logger.info(f"🚶 Walk-forward {self.sweep.strategy} ({self.mode}): {len(windows)} окон × "
+                    f"{len(self.configs)} конфигураций")
+
+        result = WalkForwardResult(metric=self.metric)
+        n_configs = len(self.configs)
+
+        pool = self.sweep.open_pool()
+        try:
+            # 1. Обучение: все окна параллельно
+            train_tasks = []
+            for window in windows:
+                train_tasks.extend(self.sweep.build_tasks(
+                    self.configs, window.train_start, window.train_end,
+                    first_id=window.index * n_configs
+                ))
+            train_results = self.sweep.execute(train_tasks, pool)
+
+            # 2. Лучшая конфигурация каждого окна
+            best_by_window = {}
+            for window in windows:
+                window_rows = SweepResults(
+                    rows=train_results.rows[window.index * n_configs:(window.index + 1) * n_configs],
+                    metric=self.metric
+                )
+                best = self._select_best(window_rows)
+                if best is None:
+                    self.stats["windows_without_best"] += 1
+                best_by_window[window.index] = best
+
+            # 3. Out-of-sample прогон лучших конфигураций
+            test_tasks = []
+            for window in windows:
+                best = best_by_window[window.index]
+                if best is None:
+                    continue
+                task = self.sweep.build_tasks(
+                    [self.configs[best["config_id"] - window.index * n_configs]],
+                    window.test_start, window.test_end, first_id=window.index
+                )[0]
+                task["early_stopping"] = None  # OOS прогоняется целиком
+                test_tasks.append(task)
+
+            test_results = self.sweep.execute(test_tasks, pool) if test_tasks else SweepResults()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        tests = {row["config_id"]: row for row in test_results.rows}
+
+        for window in windows:
+            best = best_by_window[window.index]
+            result.windows.append({
+                **asdict(window),
+                "params": self.configs[best["config_id"] - window.index * n_configs] if best else None,
+                "train": best,
+                "test": tests.get(window.index)
+            })
+
+        result.elapsed_sec = train_results.elapsed_sec + test_results.elapsed_sec
+
+        self.stats["runs"] += 1
+        self.stats["windows"] += len(windows)
+        self.stats["train_tasks"] += len(train_tasks)
+        self.stats["test_tasks"] += len(test_tasks)
+
+        oos = result.oos_stats()
+        logger.info(f"✅ Walk-forward завершен за {result.elapsed_sec:.1f}s: "
+                    f"OOS {oos.get('compounded_pnl_percent', 0.0):+.2f}% "
+                    f"({oos.get('evaluated', 0)}/{len(windows)} окон)")
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика оптимизатора"""
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "train_days": self.train_days,
+            "test_days": self.test_days,
+            "configs": len(self.configs),
+            "sweep": self.sweep.get_stats()
+        }
+
+    def __repr__(self) -> str:
+        return (f"WalkForwardOptimizer(strategy={self.sweep.strategy}, mode={self.mode}, "
+                f"train={self.train_days}d, test={self.test_days}d)")
+
+
+# Export
+__all__ = [
+    "WalkForwardOptimizer",
+    "WalkForwardWindow",
+    "WalkForwardResult",
+    "build_windows"
+]
+
+logger.info("✅ Walk-forward module loaded")
@@ -33,6 +33,7 @@ import traceback
 from config import Config
 from database import initialize_database, close_database, get_database_health
 from database.repositories import get_market_data_repository
+from backtesting.candle_cache import CachedCandleRepository
 
 # Стратегии
 from strategies import (
@@ -497,6 +498,7 @@ async def main():
   python check_signals.py --symbol BTCUSDT     # Проверка одного символа
   python check_signals.py --test-strategies    # Полное тестирование стратегий
   python check_signals.py --verbose            # Подробные логи
+  python check_signals.py --candle-cache ~/.cache/candles  # Свечи из локального кэша
         """
     )
     
@@ -518,6 +520,12 @@ async def main():
         help="Подробные логи (DEBUG)"
     )
     
+    parser.add_argument(
+        "--candle-cache",
+        type=str,
+        help="Директория локального кэша свечей (memmap, синхронизация с БД)"
+    )
+    
     args = parser.parse_args()
     
     # Настройка логирования
@@ -545,12 +553,18 @@ async def main():
         
         # Получаем repository
         repository = await get_market_data_repository()
+        if args.candle_cache:
+            repository = CachedCandleRepository(repository, args.candle_cache)
+            logger.info(f"💾 Свечи читаются из локального кэша: {args.candle_cache}")
         
         # Инициализируем TechnicalAnalysisContextManager
         logger.info("🧠 Инициализация технического анализа...")
         ta_context_manager = TechnicalAnalysisContextManager(
             repository=repository,
-            auto_start_background_updates=False
+            auto_start_background_updates=False,
+            max_contexts=Config.TA_MAX_CONTEXTS,
+            memory_budget_mb=Config.TA_MEMORY_BUDGET_MB,
+            pinned_symbols=Config.get_production_symbols()
         )
         
         # Определяем символы для проверки
@@ -1009,6 +1023,7 @@ async def main():
   python check_signals.py --symbol BTCUSDT     # Проверка одного символа
   python check_signals.py --test-strategies    # Полное тестирование стратегий
   python check_signals.py --verbose            # Подробные логи
+  python check_signals.py --candle-cache ~/.cache/candles  # Свечи из локального кэша
         """
     )
     
@@ -1030,6 +1045,12 @@ async def main():
         help="Подробные логи (DEBUG)"
     )
     
+    parser.add_argument(
+        "--candle-cache",
+        type=str,
+        help="Директория локального кэша свечей (memmap, синхронизация с БД)"
+    )
+    
     args = parser.parse_args()
     
     # Настройка логирования
@@ -1057,12 +1078,18 @@ async def main():
         
         # Получаем repository
         repository = await get_market_data_repository()
+        if args.candle_cache:
+            repository = CachedCandleRepository(repository, args.candle_cache)
+            logger.info(f"💾 Свечи читаются из локального кэша: {args.candle_cache}")
         
         # Инициализируем TechnicalAnalysisContextManager
         logger.info("🧠 Инициализация технического анализа...")
         ta_context_manager = TechnicalAnalysisContextManager(
             repository=repository,
-            auto_start_background_updates=False
+            auto_start_background_updates=False,
+            max_contexts=Config.TA_MAX_CONTEXTS,
+            memory_budget_mb=Config.TA_MEMORY_BUDGET_MB,
+            pinned_symbols=Config.get_production_symbols()
         )
         
         # Определяем символы для проверки
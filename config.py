@@ -129,6 +129,26 @@ class Config:
     REST_API_CACHE_MINUTES = int(os.getenv("REST_API_CACHE_MINUTES", "1"))
     REST_API_ENABLED = os.getenv("REST_API_ENABLED", "true").lower() == "true"
     
+    # ========== 🆕 TECHNICAL ANALYSIS CONTEXT CACHE ==========
+    
+    # LRU кэш контекстов: лимит количества и бюджет памяти (оценка), MB.
+    # Продакшн-символы (get_production_symbols) закреплены и не вытесняются
+    TA_MAX_CONTEXTS = int(os.getenv("TA_MAX_CONTEXTS", "200"))
+    TA_MEMORY_BUDGET_MB = float(os.getenv("TA_MEMORY_BUDGET_MB", "256"))
+    
+    # ========== 🆕 SHARDING (MULTI-NODE ORCHESTRATION) ==========
+    
+    # Включение шардирования символов между несколькими узлами.
+    # Координатор для оркестратора: ShardCoordinator.from_config(db_manager)
+    SHARDING_ENABLED = os.getenv("SHARDING_ENABLED", "false").lower() == "true"
+    
+    # Уникальный ID узла (пусто = hostname-pid)
+    SHARD_NODE_ID = os.getenv("SHARD_NODE_ID") or None
+    
+    SHARD_HEARTBEAT_SECONDS = int(os.getenv("SHARD_HEARTBEAT_SECONDS", "10"))
+    SHARD_LEASE_TTL_SECONDS = int(os.getenv("SHARD_LEASE_TTL_SECONDS", "30"))
+    SHARD_VIRTUAL_NODES = int(os.getenv("SHARD_VIRTUAL_NODES", "64"))
+    
     # ========== HELPER METHODS ==========
     
     @classmethod
@@ -209,6 +229,11 @@ class Config:
             "futures": cls.get_yfinance_symbols()
         }
     
+    @classmethod
+    def get_production_symbols(cls) -> List[str]:
+        """🆕 Продакшн-символы одним списком (крипто + фьючерсы)"""
+        return cls.get_bybit_symbols() + cls.get_yfinance_symbols()
+    
     @classmethod
     def validate_yfinance_symbols(cls) -> bool:
         """🆕 Валидация символов YFinance"""
@@ -256,7 +281,14 @@ class Config:
             "websocket_max_reconnects": cls.WEBSOCKET_MAX_RECONNECT_ATTEMPTS,
             
             "rest_api_enabled": cls.REST_API_ENABLED,
-            "rest_cache_minutes": cls.REST_API_CACHE_MINUTES
+            "rest_cache_minutes": cls.REST_API_CACHE_MINUTES,
+            
+            "ta_max_contexts": cls.TA_MAX_CONTEXTS,
+            "ta_memory_budget_mb": cls.TA_MEMORY_BUDGET_MB,
+            
+            "sharding_enabled": cls.SHARDING_ENABLED,
+            "shard_node_id": cls.SHARD_NODE_ID,
+            "shard_lease_ttl_seconds": cls.SHARD_LEASE_TTL_SECONDS
         }
     
     @classmethod
@@ -291,6 +323,9 @@ class Config:
             elif not cls.validate_yfinance_symbols():
                 issues.append("❌ Invalid YFinance symbols detected")
         
+        if cls.SHARDING_ENABLED and cls.SHARD_LEASE_TTL_SECONDS <= cls.SHARD_HEARTBEAT_SECONDS:
+            issues.append("❌ SHARD_LEASE_TTL_SECONDS must be greater than SHARD_HEARTBEAT_SECONDS")
+        
         if cls.WEBSOCKET_RECONNECT_ENABLED:
             if cls.WEBSOCKET_MAX_RECONNECT_ATTEMPTS < 1:
                 issues.append("⚠️ WEBSOCKET_MAX_RECONNECT_ATTEMPTS should be >= 1")
@@ -0,0 +1,419 @@
+"""
+Level Watch Engine - Слежение за взаимодействием цены с уровнями D1
+
+Оркестратор замечает пробой или ложный пробой только на минутном цикле.
+Движок проверяет уровни на каждом обновлении цены (close 1m свечи или
+тик WebSocket) и сразу сообщает о событиях:
+
+- approach: цена вошла в зону подхода к уровню (±approach_pct)
+- cross:    цена перешла уровень - с одной стороны полосы допуска
+            (±tolerance_pct) на другую
+- retest:   после пересечения цена вернулась в полосу допуска
+            с новой стороны (в пределах retest_window)
+
+Уровни символа хранятся отсортированными по цене вместе с границами
+полос. Границы - доли цены уровня, поэтому монотонны и тоже
+отсортированы: уровни, чьи полосы задевает движение цены p0 -> p1,
+находятся двумя бинарными поисками (O(log L) + число таких уровней),
+остальные уровни не трогаются.
+
+Слушатели (async callback(symbol, events)) получают события пачкой на
+обновление цены - StrategyOrchestrator запускает по ним анализ только
+этого символа.
+
+Usage:
+    watch = LevelWatchEngine()
+    watch.sync_levels(ta_context_manager.contexts)
+    watch.add_listener(orchestrator.on_level_events)
+
+    candle_sync.add_candle_listener(watch.on_candles)
+    await watch.on_price("BTCUSDT", 64250.5)   # тик
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from backtesting.replay_data import to_epoch_us
+
+logger = logging.getLogger(__name__)
+
+
+# Типы событий
+EVENT_APPROACH = "approach"
+EVENT_CROSS = "cross"
+EVENT_RETEST = "retest"
+
+_MINUTE_US = 60_000_000
+
+
+@dataclass
+class LevelEvent:
+    """Событие взаимодействия цены с уровнем"""
+    symbol: str
+    event_type: str         # approach / cross / retest
+    direction: str          # up / down - куда движется цена относительно уровня
+    level_price: float
+    level_type: str         # support / resistance
+    level_strength: float
+    price: float
+    timestamp: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "event_type": self.event_type,
+            "direction": self.direction,
+            "level_price": self.level_price,
+            "level_type": self.level_type,
+            "level_strength": self.level_strength,
+            "price": self.price,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+
+# ==================== ПОЛОСЫ УРОВНЕЙ СИМВОЛА ====================
+
+class LevelBands:
+    """
+    📏 Уровни одного символа, отсортированные по цене, с полосами и состоянием
+
+    side: +1 выше полосы допуска, -1 ниже, 0 внутри.
+    last_side: последняя сторона вне полосы (по ней определяется пересечение).
+    """
+
+    __slots__ = (
+        "source", "levels", "prices", "approach_lo", "approach_hi", "tolerance_lo",
+        "tolerance_hi", "side", "last_side", "near", "crossed_dir", "crossed_us",
+        "approach_us", "initialized"
+    )
+
+    def __init__(self, levels: List[Any], approach_pct: float, tolerance_pct: float, source: Any = None):
+        self.source = source  # список уровней контекста, из которого построено
+        self.levels = sorted(levels, key=lambda level: level.price)
+        self.prices = [float(level.price) for level in self.levels]
+
+        approach, tolerance = approach_pct / 100, tolerance_pct / 100
+        self.approach_lo = [p * (1 - approach) for p in self.prices]
+        self.approach_hi = [p * (1 + approach) for p in self.prices]
+        self.tolerance_lo = [p * (1 - tolerance) for p in self.prices]
+        self.tolerance_hi = [p * (1 + tolerance) for p in self.prices]
+
+        n = len(self.levels)
+        self.side = [0] * n
+        self.last_side = [0] * n
+        self.near = [False] * n
+        self.crossed_dir = [0] * n
+        self.crossed_us = [0] * n
+        self.approach_us = [0] * n
+        self.initialized = False
+
+    def init(self, price: float):
+        """Начальное состояние по цене (без событий)"""
+        for i, level_price in enumerate(self.prices):
+            side = self._side(i, price)
+            self.side[i] = side
+            self.last_side[i] = side or (1 if price >= level_price else -1)
+            self.near[i] = self.approach_lo[i] <= price <= self.approach_hi[i]
+        self.initialized = True
+
+    def affected(self, previous: float, price: float) -> range:
+        """Индексы уровней, чьи зоны подхода задевает отрезок [previous, price]"""
+        lo, hi = min(previous, price), max(previous, price)
+        return range(bisect_left(self.approach_hi, lo), bisect_right(self.approach_lo, hi))
+
+    def _side(self, i: int, price: float) -> int:
+        if price > self.tolerance_hi[i]:
+            return 1
+        if price < self.tolerance_lo[i]:
+            return -1
+        return 0
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+# ==================== ДВИЖОК ====================
+
+class LevelWatchEngine:
+    """
+    👁️ Движок событий уровней по потоку цен всех символов
+
+    Повторная подача той же цены событий не дает. Первая цена символа
+    (и первая после перестроения уровней) только задает состояние.
+    Свечи старше последней обработанной (догрузка истории) пропускаются.
+    """
+
+    def __init__(
+        self,
+        approach_pct: float = 1.0,
+        tolerance_pct: float = 0.5,
+        retest_window_minutes: float = 240,
+        approach_cooldown_minutes: float = 15,
+        min_level_strength: float = 0.0,
+        interval: str = "1m"
+    ):
+        """
+        Args:
+            approach_pct: Зона подхода к уровню (% от цены уровня)
+            tolerance_pct: Полоса допуска уровня (%), как допуск 0.5% в стратегиях
+            retest_window_minutes: Сколько после пересечения ждать ретест
+            approach_cooldown_minutes: Не чаще одного approach на уровень за это время
+            min_level_strength: Уровни слабее не отслеживаются
+            interval: Интервал свечей для on_candles
+        """
+        if approach_pct < tolerance_pct:
+            raise ValueError(f"approach_pct ({approach_pct}) < tolerance_pct ({tolerance_pct})")
+
+        self.approach_pct = approach_pct
+        self.tolerance_pct = tolerance_pct
+        self.retest_window_us = int(retest_window_minutes * _MINUTE_US)
+        self.approach_cooldown_us = int(approach_cooldown_minutes * _MINUTE_US)
+        self.min_level_strength = min_level_strength
+        self.interval = interval
+
+        self._bands: Dict[str, LevelBands] = {}
+        self._last_price: Dict[str, float] = {}
+        self._last_bar: Dict[str, datetime] = {}  # open_time последнего бара символа
+        self.listeners: List[Callable] = []
+
+        self.stats = {
+            "prices_processed": 0,
+            "levels_checked": 0,
+            "levels_rebuilt": 0,
+            "events_approach": 0,
+            "events_cross": 0,
+            "events_retest": 0,
+            "bars_out_of_order": 0,
+            "listener_errors": 0
+        }
+
+        logger.info(f"👁️ LevelWatchEngine инициализирован (подход ±{approach_pct}%, "
+                    f"допуск ±{tolerance_pct}%, ретест {retest_window_minutes:.0f} мин)")
+
+    # ==================== УРОВНИ ====================
+
+    def set_levels(self, symbol: str, levels: List[Any], source: Any = None):
+        """
+        Заменить уровни символа
+
+        Args:
+            symbol: Символ
+            levels: Уровни с price, level_type, strength
+            source: Объект-источник (для проверки, изменились ли уровни)
+        """
+        symbol = symbol.upper()
+        selected = [level for level in levels if level.strength >= self.min_level_strength]
+        bands = LevelBands(selected, self.approach_pct, self.tolerance_pct, source=source)
+
+        price = self._last_price.get(symbol)
+        if price is not None:
+            bands.init(price)
+
+        self._bands[symbol] = bands
+        self.stats["levels_rebuilt"] += 1
+
+    def sync_levels(self, contexts: Dict[str, Any]) -> int:
+        """
+        Подтянуть уровни из контекстов TA (перестраиваются только изменившиеся)
+
+        Args:
+            contexts: TechnicalAnalysisContext по символу
+
+        Returns:
+            int: Количество перестроенных символов
+        """
+        rebuilt = 0
+        for symbol, context in contexts.items():
+            levels = getattr(context, "levels_d1", None)
+            if not levels:
+                continue
+            bands = self._bands.get(symbol.upper())
+            if bands is None or bands.source is not levels:
+                self.set_levels(symbol, levels, source=levels)
+                rebuilt += 1
+        return rebuilt
+
+    def drop_symbol(self, symbol: str):
+        """Перестать следить за символом"""
+        symbol = symbol.upper()
+        self._bands.pop(symbol, None)
+        self._last_price.pop(symbol, None)
+        self._last_bar.pop(symbol, None)
+
+    # ==================== ЦЕНЫ ====================
+
+    def process_price(self, symbol: str, price: float, timestamp: Optional[datetime] = None) -> List[LevelEvent]:
+        """
+        Обработать новую цену символа
+
+        Args:
+            symbol: Символ
+            price: Цена
+            timestamp: Время цены (None = сейчас)
+
+        Returns:
+            List[LevelEvent]: События этого обновления
+        """
+        symbol = symbol.upper()
+        price = float(price)
+        previous = self._last_price.get(symbol)
+        self._last_price[symbol] = price
+        self.stats["prices_processed"] += 1
+
+        bands = self._bands.get(symbol)
+        if not bands:
+            return []
+        if not bands.initialized:
+            bands.init(price)
+            return []
+        if price == previous:
+            return []
+
+        when = timestamp or datetime.now(timezone.utc)
+        now_us = to_epoch_us(when, naive_utc=False)
+        events: List[LevelEvent] = []
+
+        checked = bands.affected(previous, price)
+        self.stats["levels_checked"] += len(checked)
+
+        for i in checked:
+            side = bands._side(i, price)
+            near = bands.approach_lo[i] <= price <= bands.approach_hi[i]
+            last = bands.last_side[i]
+
+            if side and side != last:
+                # Пересечение: вышли из полосы допуска с другой стороны
+                bands.crossed_dir[i] = side
+                bands.crossed_us[i] = now_us
+                events.append(self._event(symbol, EVENT_CROSS, side, bands, i, price, when))
+            elif (not side and bands.side[i] and bands.side[i] == bands.crossed_dir[i]
+                  and now_us - bands.crossed_us[i] <= self.retest_window_us):
+                # Ретест: вернулись к уровню со стороны пробоя (один раз на пересечение)
+                bands.crossed_dir[i] = 0
+                events.append(self._event(symbol, EVENT_RETEST, -bands.side[i], bands, i, price, when))
+
+            if near and not bands.near[i] and now_us - bands.approach_us[i] >= self.approach_cooldown_us:
+                bands.approach_us[i] = now_us
+                events.append(self._event(symbol, EVENT_APPROACH, -last, bands, i, price, when))
+
+            bands.side[i] = side
+            bands.near[i] = near
+            if side:
+                bands.last_side[i] = side
+
+        for event in events:
+            self.stats[f"events_{event.event_type}"] += 1
+
+        return events
+
+    async def on_price(self, symbol: str, price: float, timestamp: Optional[datetime] = None) -> List[LevelEvent]:
+        """Тик цены: обработать и передать события слушателям"""
+        events = self.process_price(symbol, price, timestamp)
+        if events:
+            await self._notify_listeners(symbol.upper(), events)
+        return events
+
+    async def on_candles(self, symbol: str, interval: str, candles: List[Any]):
+        """
+        Слушатель синхронизатора свечей: close каждой свечи как обновление цены
+
+        Args:
+            symbol: Символ
+            interval: Интервал (другие интервалы игнорируются)
+            candles: MarketDataCandle или dict формата репозитория, по возрастанию времени
+        """
+        if interval != self.interval:
+            return
+
+        symbol = symbol.upper()
+        events: List[LevelEvent] = []
+        for candle in candles:
+            if isinstance(candle, dict):
+                open_time, close, close_time = (candle["open_time"], candle["close_price"],
+                                                candle.get("close_time"))
+            else:
+                open_time, close, close_time = (candle.open_time, candle.close_price,
+                                                getattr(candle, "close_time", None))
+
+            # Бар старше уже обработанного (догрузка истории): старая цена
+            # дала бы ложные пересечения туда и обратно
+            last = self._last_bar.get(symbol)
+            if last is not None and open_time < last:
+                self.stats["bars_out_of_order"] += 1
+                continue
+            self._last_bar[symbol] = open_time
+
+            events.extend(self.process_price(symbol, float(close), close_time))
+
+        if events:
+            await self._notify_listeners(symbol, events)
+
+    @staticmethod
+    def _event(symbol: str, event_type: str, direction: int, bands: LevelBands, i: int,
+               price: float, when: datetime) -> LevelEvent:
+        level = bands.levels[i]
+        return LevelEvent(
+            symbol=symbol,
+            event_type=event_type,
+            direction="up" if direction > 0 else "down",
+            level_price=bands.prices[i],
+            level_type=getattr(level, "level_type", "unknown"),
+            level_strength=float(getattr(level, "strength", 0.0)),
+            price=price,
+            timestamp=when
+        )
+
+    # ==================== СЛУШАТЕЛИ ====================
+
+    def add_listener(self, callback: Callable):
+        """
+        Добавить слушателя событий
+
+        Args:
+            callback: Async функция: async def callback(symbol: str, events: List[LevelEvent])
+        """
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+            logger.info(f"📡 Добавлен слушатель событий уровней (всего: {len(self.listeners)})")
+
+    async def _notify_listeners(self, symbol: str, events: List[LevelEvent]):
+        """Передать события слушателям (ошибка слушателя не ломает поток цен)"""
+        for callback in self.listeners:
+            try:
+                await callback(symbol, events)
+            except Exception as e:
+                self.stats["listener_errors"] += 1
+                logger.error(f"❌ Ошибка слушателя событий уровней [{symbol}]: {e}")
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика движка"""
+        prices = self.stats["prices_processed"]
+        return {
+            **self.stats,
+            "symbols": len(self._bands),
+            "levels": sum(len(b) for b in self._bands.values()),
+            "levels_checked_per_price": self.stats["levels_checked"] / prices if prices else 0.0
+        }
+
+    def __repr__(self) -> str:
+        return f"LevelWatchEngine(symbols={len(self._bands)}, prices={self.stats['prices_processed']})"
+
+
+__all__ = [
+    "LevelWatchEngine",
+    "LevelBands",
+    "LevelEvent",
+    "EVENT_APPROACH",
+    "EVENT_CROSS",
+    "EVENT_RETEST"
+]
+
+logger.info("✅ LevelWatchEngine module loaded")
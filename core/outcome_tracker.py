@@ -0,0 +1,592 @@
+"""
+Signal Outcome Tracker - Живой форвард-тест отправленных сигналов
+
+Каждый сигнал, прошедший SignalManager, несет уровень входа, Stop Loss
+и Take Profit. Трекер следит по потоку 1m свечей, чем он закончился:
+
+- entry: стоп/лимит вход стратегии (technical_indicators["entry_price"]);
+  не исполнен до signal.expires_at -> "not_filled"
+- после входа: касание SL -> "stop_loss", касание TP -> "take_profit",
+  позиция старше max_holding -> "expired" по close последнего бара
+
+Открытые уровни хранятся в ценовой книге символа - два отсортированных
+списка порогов: срабатывающие при high >= цена и при low <= цена.
+Новый бар находит сработавшие пороги бинарным поиском (O(log n) + число
+срабатываний), не перебирая все открытые сигналы.
+
+Исходы пишутся в таблицу signal_outcomes (SignalOutcomeRepository),
+по стратегиям считаются скользящие hit rate и expectancy.
+
+Usage:
+    tracker = SignalOutcomeTracker(repository=get_signal_outcome_repository())
+    await tracker.restore()
+
+    signal_manager = SignalManager(outcome_tracker=tracker)
+    candle_sync.add_candle_listener(tracker.on_candles)
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import heapq
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backtesting.replay_data import to_epoch_us, from_epoch_us
+
+logger = logging.getLogger(__name__)
+
+
+# Фазы открытого сигнала
+PHASE_ENTRY = "entry"      # ждет касания цены входа
+PHASE_LIVE = "live"        # вход исполнен, ждет SL/TP
+
+# Типы порогов в книге
+LEVEL_ENTRY = "entry"
+LEVEL_STOP = "stop_loss"
+LEVEL_TARGET = "take_profit"
+
+_MINUTE_US = 60_000_000
+
+
+# ==================== ЦЕНОВАЯ КНИГА ====================
+
+class PriceBook:
+    """
+    📚 Пороги открытых сигналов одного символа, отсортированные по цене
+
+    Элемент - (price, seq, level). above срабатывает при high >= price
+    (префикс списка), below - при low <= price (суффикс списка).
+    """
+
+    __slots__ = ("above", "below")
+
+    def __init__(self):
+        self.above: List[Tuple[float, int, str]] = []
+        self.below: List[Tuple[float, int, str]] = []
+
+    def add(self, direction: str, item: Tuple[float, int, str]):
+        insort(self.above if direction == "above" else self.below, item)
+
+    def remove(self, direction: str, item: Tuple[float, int, str]):
+        levels = self.above if direction == "above" else self.below
+        i = bisect_left(levels, item)
+        if i < len(levels) and levels[i] == item:
+            del levels[i]
+
+    def touched(self, high: float, low: float) -> List[Tuple[float, int, str]]:
+        """Пороги, задетые баром [low, high] (книга не меняется)"""
+        hit = self.above[:bisect_right(self.above, (high, float("inf"), ""))]
+        hit.extend(self.below[bisect_left(self.below, (low, -1, "")):])
+        return hit
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+
+class _OpenSignal:
+    """Открытый сигнал под наблюдением трекера"""
+
+    __slots__ = (
+        "seq", "signal_id", "symbol", "strategy", "side", "signal_type", "strength",
+        "entry_price", "stop_loss", "take_profit", "opened_us", "expires_us",
+        "filled_us", "phase", "levels"
+    )
+
+    def __init__(self, seq: int, outcome: Dict[str, Any]):
+        self.seq = seq
+        self.signal_id = outcome["signal_id"]
+        self.symbol = outcome["symbol"]
+        self.strategy = outcome["strategy"]
+        self.side = outcome["side"]
+        self.signal_type = outcome.get("signal_type")
+        self.strength = outcome.get("strength")
+        self.entry_price = float(outcome["entry_price"])
+        self.stop_loss = outcome.get("stop_loss")
+        self.take_profit = outcome.get("take_profit")
+        self.opened_us = to_epoch_us(outcome["opened_at"], naive_utc=False)
+        self.expires_us = to_epoch_us(outcome["expires_at"], naive_utc=False) if outcome.get("expires_at") else None
+        self.filled_us = to_epoch_us(outcome["filled_at"], naive_utc=False) if outcome.get("filled_at") else None
+        self.phase = PHASE_LIVE if self.filled_us is not None else PHASE_ENTRY
+        # Пороги сигнала, лежащие в книге: [(direction, item)]
+        self.levels: List[Tuple[str, Tuple[float, int, str]]] = []
+
+    @property
+    def is_long(self) -> bool:
+        return self.side == "BUY"
+
+
+class _StrategyWindow:
+    """Скользящее окно исходов стратегии с бегущими суммами"""
+
+    __slots__ = ("outcomes", "take_profit", "wins", "pnl_sum", "r_sum", "r_count",
+                 "total", "not_filled")
+
+    def __init__(self, size: int):
+        self.outcomes: deque = deque(maxlen=size)  # (status, pnl_percent, r_multiple)
+        self.take_profit = 0
+        self.wins = 0
+        self.pnl_sum = 0.0
+        self.r_sum = 0.0
+        self.r_count = 0
+        self.total = 0
+        self.not_filled = 0
+
+    def push(self, status: str, pnl: float, r: Optional[float]):
+        if len(self.outcomes) == self.outcomes.maxlen:
+            self._apply(*self.outcomes[0], sign=-1)
+        self.outcomes.append((status, pnl, r))
+        self._apply(status, pnl, r, sign=1)
+        self.total += 1
+
+    def _apply(self, status: str, pnl: float, r: Optional[float], sign: int):
+        self.take_profit += sign * (status == LEVEL_TARGET)
+        self.wins += sign * (pnl > 0)
+        self.pnl_sum += sign * pnl
+        if r is not None:
+            self.r_sum += sign * r
+            self.r_count += sign
+
+    def summary(self) -> Dict[str, Any]:
+        n = len(self.outcomes)
+        return {
+            "window": n,
+            "resolved_total": self.total,
+            "not_filled_total": self.not_filled,
+            "hit_rate": self.take_profit / n * 100 if n else 0.0,
+            "win_rate": self.wins / n * 100 if n else 0.0,
+            "expectancy_pct": self.pnl_sum / n if n else 0.0,
+            "expectancy_r": self.r_sum / self.r_count if self.r_count else None
+        }
+
+
+# ==================== ТРЕКЕР ====================
+
+class SignalOutcomeTracker:
+    """
+    🎯 Трекер исходов сигналов по потоку 1m свечей
+
+    Сигнал становится активным с первого бара, открытого не раньше
+    времени сигнала (более ранние бары содержат цены до сигнала).
+    Если SL и TP задеты одним баром - засчитывается SL (как в бэктесте);
+    на баре входа проверяется только SL. Повторная подача того же бара
+    (незакрытая свеча приходит несколько раз) безопасна; бары старше уже
+    обработанного (догрузка истории) отбрасываются.
+    """
+
+    def __init__(
+        self,
+        repository=None,  # SignalOutcomeRepository (опционально)
+        interval: str = "1m",
+        max_holding_hours: float = 24,
+        stats_window: int = 100
+    ):
+        """
+        Args:
+            repository: SignalOutcomeRepository для сохранения исходов
+            interval: Интервал свечей, по которым разрешаются исходы
+            max_holding_hours: Максимальное время удержания после входа
+            stats_window: Размер скользящего окна статистики стратегии
+        """
+        self.repository = repository
+        self.interval = interval
+        self.max_holding_us = timedelta(hours=max_holding_hours) // timedelta(microseconds=1)
+        self.stats_window = stats_window
+
+        self._seq = 0
+        self._open: Dict[int, _OpenSignal] = {}
+        self._ids: Dict[str, int] = {}
+        self._books: Dict[str, PriceBook] = defaultdict(PriceBook)
+        # (opened_us, seq): сигналы, чей первый бар еще не пришел
+        self._waiting: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        # (deadline_us, seq, phase): экспирация входа / удержания
+        self._deadlines: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
+        self._last_close: Dict[str, float] = {}
+        self._last_bar_us: Dict[str, int] = {}  # open_time последнего бара символа
+        self._windows: Dict[str, _StrategyWindow] = {}
+
+        self.stats = {
+            "signals_tracked": 0,
+            "signals_skipped": 0,
+            "signals_restored": 0,
+            "bars_processed": 0,
+            "bars_out_of_order": 0,
+            "entries_filled": 0,
+            "take_profit": 0,
+            "stop_loss": 0,
+            "expired": 0,
+            "not_filled": 0,
+            "persist_errors": 0
+        }
+
+        logger.info(f"🎯 SignalOutcomeTracker инициализирован "
+                    f"(holding: {max_holding_hours}h, окно: {stats_window})")
+
+    # ==================== СИГНАЛЫ ====================
+
+    async def track_signal(self, signal) -> Optional[str]:
+        """
+        Поставить отправленный сигнал под наблюдение
+
+        Args:
+            signal: TradingSignal
+
+        Returns:
+            Optional[str]: signal_id или None (сигнал без SL/TP или нейтральный)
+        """
+        side = self._signal_side(signal)
+        if side is None or (not signal.stop_loss and not signal.take_profit):
+            self.stats["signals_skipped"] += 1
+            return None
+
+        opened_at = signal.timestamp
+        if opened_at.tzinfo is None:
+            opened_at = opened_at.astimezone(timezone.utc)
+        expires_at = signal.expires_at
+        if expires_at is not None and expires_at.tzinfo is None:
+            expires_at = expires_at.astimezone(timezone.utc)
+
+        strategy = signal.strategy_name or "unknown"
+        entry = self._entry_price(signal)
+        outcome = {
+            "signal_id": f"{signal.symbol}:{strategy}:{to_epoch_us(opened_at, naive_utc=False)}",
+            "symbol": signal.symbol.upper(),
+            "strategy": strategy,
+            "side": side,
+            "signal_type": signal.signal_type.value,
+            "strength": signal.strength,
+            "entry_price": entry,
+            "stop_loss": signal.stop_loss,
+            "take_profit": signal.take_profit,
+            "opened_at": opened_at,
+            "expires_at": expires_at,
+            # Вход по текущей цене исполняется сразу
+            "filled_at": opened_at if entry == signal.price else None
+        }
+
+        if outcome["signal_id"] in self._ids:
+            return outcome["signal_id"]
+
+        self._add(outcome)
+        self.stats["signals_tracked"] += 1
+
+        if self.repository:
+            await self.repository.insert_open(outcome)
+
+        logger.debug(f"🎯 {outcome['symbol']}: сигнал {strategy} {side} под наблюдением "
+                     f"(entry {entry}, SL {signal.stop_loss}, TP {signal.take_profit})")
+        return outcome["signal_id"]
+
+    async def restore(self, symbols: Optional[List[str]] = None) -> int:
+        """Загрузить открытые сигналы из БД после перезапуска"""
+        if not self.repository:
+            return 0
+
+        rows = await self.repository.get_open_outcomes(symbols)
+        restored = 0
+        for row in rows:
+            if row["signal_id"] not in self._ids:
+                self._add(row)
+                restored += 1
+
+        self.stats["signals_restored"] += restored
+        logger.info(f"🔄 Восстановлено открытых сигналов: {restored}")
+        return restored
+
+    def _add(self, outcome: Dict[str, Any]):
+        self._seq += 1
+        record = _OpenSignal(self._seq, outcome)
+        self._open[record.seq] = record
+        self._ids[record.signal_id] = record.seq
+        heapq.heappush(self._waiting[record.symbol], (record.opened_us, record.seq))
+
+    @staticmethod
+    def _signal_side(signal) -> Optional[str]:
+        value = signal.signal_type.value
+        if value in ("BUY", "STRONG_BUY"):
+            return "BUY"
+        if value in ("SELL", "STRONG_SELL"):
+            return "SELL"
+        return None
+
+    @staticmethod
+    def _entry_price(signal) -> float:
+        """Цена входа ордера стратегии (стоп/лимит), иначе цена сигнала"""
+        indicator = signal.technical_indicators.get("entry_price")
+        if isinstance(indicator, dict):
+            indicator = indicator.get("value")
+        try:
+            return float(indicator) if indicator else float(signal.price)
+        except (TypeError, ValueError):
+            return float(signal.price)
+
+    # ==================== СВЕЧИ ====================
+
+    async def on_candles(self, symbol: str, interval: str, candles: List[Any]):
+        """
+        Слушатель синхронизатора свечей: разрешить исходы по новым барам
+
+        Args:
+            symbol: Символ
+            interval: Интервал (бары других интервалов игнорируются)
+            candles: MarketDataCandle или dict формата репозитория, по возрастанию времени
+        """
+        if interval != self.interval:
+            return
+
+        fills: List[Dict[str, Any]] = []
+        resolved: List[Dict[str, Any]] = []
+        for candle in candles:
+            self.process_bar(symbol, candle, fills, resolved)
+
+        await self._persist(fills, resolved)
+
+    def process_bar(
+        self,
+        symbol: str,
+        candle: Any,
+        fills: Optional[List[Dict[str, Any]]] = None,
+        resolved: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Обработать один бар символа
+
+        Args:
+            symbol: Символ
+            candle: MarketDataCandle или dict с open_time/open_price/high_price/low_price/close_price
+            fills: Список для накопления исполненных входов
+            resolved: Список для накопления исходов
+
+        Returns:
+            List[Dict]: Исходы, разрешенные этим баром
+        """
+        symbol = symbol.upper()
+        fills = fills if fills is not None else []
+        resolved = resolved if resolved is not None else []
+        first_resolved = len(resolved)
+
+        bar_us, open_, high, low, close = self._bar_values(candle)
+
+        # Время бара не идет назад: старые бары дали бы исход раньше сигнала
+        if bar_us < self._last_bar_us.get(symbol, bar_us):
+            self.stats["bars_out_of_order"] += 1
+            return []
+        self._last_bar_us[symbol] = bar_us
+        self.stats["bars_processed"] += 1
+
+        self._expire(symbol, bar_us, resolved)
+        self._activate(symbol, bar_us, open_)
+
+        book = self._books.get(symbol)
+        if book:
+            exits: Dict[int, List[str]] = defaultdict(list)
+
+            for price, seq, level in book.touched(high, low):
+                record = self._open.get(seq)
+                if record is None or bar_us < record.opened_us:
+                    continue
+                if level == LEVEL_ENTRY:
+                    # Вход и SL одним баром -> SL; TP бара входа не засчитывается
+                    self._fill(record, bar_us, fills)
+                    if self._stop_touched(record, high, low):
+                        self._resolve(record, LEVEL_STOP, self._stop_price(record, open_),
+                                      bar_us, resolved)
+                elif record.filled_us < bar_us or level == LEVEL_STOP:
+                    exits[seq].append(level)
+
+            for seq, levels in exits.items():
+                record = self._open.get(seq)
+                if record is None:
+                    continue
+                if LEVEL_STOP in levels:
+                    self._resolve(record, LEVEL_STOP, self._stop_price(record, open_), bar_us, resolved)
+                else:
+                    self._resolve(record, LEVEL_TARGET, float(record.take_profit), bar_us, resolved)
+
+        self._last_close[symbol] = close
+        return resolved[first_resolved:]
+
+    @staticmethod
+    def _bar_values(candle: Any) -> Tuple[int, float, float, float, float]:
+        if isinstance(candle, dict):
+            get = candle.get
+        else:
+            def get(name):
+                return getattr(candle, name)
+        return (
+            to_epoch_us(get("open_time"), naive_utc=False),
+            float(get("open_price")),
+            float(get("high_price")),
+            float(get("low_price")),
+            float(get("close_price"))
+        )
+
+    def _activate(self, symbol: str, bar_us: int, open_: float):
+        """Перенести в книгу сигналы, для которых начался первый бар"""
+        waiting = self._waiting.get(symbol)
+        while waiting and waiting[0][0] <= bar_us:
+            _, seq = heapq.heappop(waiting)
+            record = self._open.get(seq)
+            if record is None:
+                continue
+
+            if record.phase == PHASE_LIVE:
+                self._add_exit_levels(record)
+                self._push_deadline(record, record.filled_us + self.max_holding_us, PHASE_LIVE)
+                continue
+
+            # Стоп-вход выше/ниже текущей цены, лимитный - с другой стороны;
+            # сторону порога задает последний close (или open первого бара)
+            last = self._last_close.get(symbol, open_)
+            direction = "above" if record.entry_price >= last else "below"
+            item = (record.entry_price, seq, LEVEL_ENTRY)
+            self._books[symbol].add(direction, item)
+            record.levels.append((direction, item))
+            if record.expires_us is not None:
+                self._push_deadline(record, record.expires_us, PHASE_ENTRY)
+
+    def _fill(self, record: _OpenSignal, bar_us: int, fills: List):
+        self._clear_levels(record)
+        record.phase = PHASE_LIVE
+        record.filled_us = bar_us
+        self._add_exit_levels(record)
+        self._push_deadline(record, bar_us + self.max_holding_us, PHASE_LIVE)
+
+        self.stats["entries_filled"] += 1
+        fills.append({"signal_id": record.signal_id, "filled_at": from_epoch_us(bar_us)})
+
+    def _add_exit_levels(self, record: _OpenSignal):
+        book = self._books[record.symbol]
+        levels = []
+        if record.stop_loss:
+            levels.append(("below" if record.is_long else "above", LEVEL_STOP, record.stop_loss))
+        if record.take_profit:
+            levels.append(("above" if record.is_long else "below", LEVEL_TARGET, record.take_profit))
+        for direction, level, price in levels:
+            item = (float(price), record.seq, level)
+            book.add(direction, item)
+            record.levels.append((direction, item))
+
+    def _clear_levels(self, record: _OpenSignal):
+        book = self._books[record.symbol]
+        for direction, item in record.levels:
+            book.remove(direction, item)
+        record.levels = []
+
+    def _push_deadline(self, record: _OpenSignal, deadline_us: int, phase: str):
+        heapq.heappush(self._deadlines[record.symbol], (deadline_us, record.seq, phase))
+
+    def _expire(self, symbol: str, bar_us: int, resolved: List):
+        """Разрешить сигналы, чей срок истек к началу бара"""
+        deadlines = self._deadlines.get(symbol)
+        while deadlines and deadlines[0][0] <= bar_us:
+            deadline_us, seq, phase = heapq.heappop(deadlines)
+            record = self._open.get(seq)
+            if record is None or record.phase != phase:
+                continue
+            if phase == PHASE_ENTRY:
+                self._resolve(record, "not_filled", None, deadline_us, resolved)
+            else:
+                self._resolve(record, "expired", self._last_close.get(symbol, record.entry_price),
+                              deadline_us, resolved)
+
+    @staticmethod
+    def _stop_touched(record: _OpenSignal, high: float, low: float) -> bool:
+        if not record.stop_loss:
+            return False
+        return low <= record.stop_loss if record.is_long else high >= record.stop_loss
+
+    @staticmethod
+    def _stop_price(record: _OpenSignal, open_: float) -> float:
+        """Цена стопа; при гэпе за стоп - open бара"""
+        if record.is_long:
+            return min(float(record.stop_loss), open_)
+        return max(float(record.stop_loss), open_)
+
+    def _resolve(
+        self,
+        record: _OpenSignal,
+        status: str,
+        exit_price: Optional[float],
+        resolved_us: int,
+        resolved: List
+    ):
+        self._clear_levels(record)
+        del self._open[record.seq]
+        del self._ids[record.signal_id]
+
+        window = self._windows.get(record.strategy)
+        if window is None:
+            window = self._windows[record.strategy] = _StrategyWindow(self.stats_window)
+
+        pnl = r = bars_held = None
+        if status == "not_filled":
+            window.not_filled += 1
+        else:
+            direction = 1 if record.is_long else -1
+            pnl = (exit_price - record.entry_price) / record.entry_price * 100 * direction
+            if record.stop_loss and record.stop_loss != record.entry_price:
+                risk = abs(record.entry_price - float(record.stop_loss))
+                r = (exit_price - record.entry_price) * direction / risk
+            # Бар выхода SL/TP включается в удержание
+            bars_held = (resolved_us - record.filled_us) // _MINUTE_US + (status != "expired")
+            window.push(status, pnl, r)
+
+        self.stats[status] += 1
+        resolved.append({
+            "signal_id": record.signal_id,
+            "symbol": record.symbol,
+            "strategy": record.strategy,
+            "status": status,
+            "exit_price": exit_price,
+            "resolved_at": from_epoch_us(resolved_us),
+            "pnl_percent": pnl,
+            "r_multiple": r,
+            "bars_held": bars_held
+        })
+
+        logger.info(f"🎯 {record.symbol} {record.strategy} {record.side}: {status}"
+                    + (f" ({pnl:+.2f}%)" if pnl is not None else ""))
+
+    async def _persist(self, fills: List[Dict[str, Any]], resolved: List[Dict[str, Any]]):
+        if not self.repository or not (fills or resolved):
+            return
+        try:
+            # Вход и исход одного пакета: сначала filled_at, затем статус
+            await self.repository.mark_filled_many(fills)
+            await self.repository.resolve_many(resolved)
+        except Exception as e:
+            self.stats["persist_errors"] += 1
+            logger.error(f"❌ Ошибка сохранения исходов сигналов: {e}")
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_strategy_stats(self, strategy: Optional[str] = None) -> Dict[str, Any]:
+        """Скользящие hit rate / win rate / expectancy по стратегиям"""
+        if strategy is not None:
+            window = self._windows.get(strategy)
+            return window.summary() if window else _StrategyWindow(self.stats_window).summary()
+        return {name: window.summary() for name, window in self._windows.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика трекера"""
+        pending = sum(1 for r in self._open.values() if r.phase == PHASE_ENTRY)
+        return {
+            **self.stats,
+            "open_signals": len(self._open),
+            "pending_entries": pending,
+            "book_levels": sum(len(book) for book in self._books.values()),
+            "strategies": self.get_strategy_stats()
+        }
+
+    def __repr__(self) -> str:
+        return (f"SignalOutcomeTracker(open={len(self._open)}, "
+                f"tp={self.stats['take_profit']}, sl={self.stats['stop_loss']})")
+
+
+__all__ = ["SignalOutcomeTracker", "PriceBook"]
+
+logger.info("✅ Signal Outcome Tracker module loaded")
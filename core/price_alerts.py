@@ -0,0 +1,479 @@
+"""
+Price Alert Engine - Пользовательские ценовые алерты (/alert)
+
+Пользователь Telegram задает алерт на символ:
+- price: порог цены - "выше X" или "ниже X"
+- level: подход к ближайшему уровню D1 на distance_percent; при создании
+  сводится к обычному порогу с нужной стороны уровня
+
+Любой алерт хранится как один порог. Активные пороги символа лежат в
+двух отсортированных массивах (AlertBook):
+- above: срабатывают при high >= порог, ключ -порог по возрастанию
+- below: срабатывают при low <= порог, ключ порог по возрастанию
+
+Сработавшие пороги в обоих массивах - хвост, поэтому обновление цены -
+один bisect и срез на каждый массив: O(log n + k) для n алертов символа
+и k сработавших, без перебора всех алертов. Сработавшие алерты одной
+пачкой деактивируются в БД (PriceAlertRepository) и уходят пользователям
+одним сообщением на пользователя через notifier (TelegramBot.send_to_users).
+
+Usage:
+    alerts = PriceAlertEngine(repository=await get_price_alert_repository())
+    await alerts.load()
+
+    bot = TelegramBot(token, repository, ta_manager, alert_engine=alerts)
+    alerts.notifier = bot.send_to_users
+    candle_sync.add_candle_listener(alerts.on_candles)
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+DIRECTION_ABOVE = "above"
+DIRECTION_BELOW = "below"
+
+ALERT_PRICE = "price"
+ALERT_LEVEL = "level"
+
+
+# ==================== КНИГА АЛЕРТОВ СИМВОЛА ====================
+
+class AlertBook:
+    """
+    📒 Активные пороги одного символа
+
+    Параллельные массивы ключей и id. Ключи above - отрицательные пороги,
+    поэтому в обоих массивах сработавшие элементы образуют хвост.
+    """
+
+    __slots__ = ("above_keys", "above_ids", "below_keys", "below_ids")
+
+    def __init__(self):
+        self.above_keys: List[float] = []
+        self.above_ids: List[int] = []
+        self.below_keys: List[float] = []
+        self.below_ids: List[int] = []
+
+    def _arrays(self, direction: str, price: float) -> Tuple[List[float], List[int], float]:
+        if direction == DIRECTION_ABOVE:
+            return self.above_keys, self.above_ids, -price
+        return self.below_keys, self.below_ids, price
+
+    def add(self, direction: str, price: float, alert_id: int):
+        keys, ids, key = self._arrays(direction, price)
+        i = bisect_right(keys, key)
+        keys.insert(i, key)
+        ids.insert(i, alert_id)
+
+    def load(self, direction: str, items: List[Tuple[float, int]]):
+        """Массовая загрузка (price, id) к имеющимся: одна сортировка вместо n вставок"""
+        keys, ids, _ = self._arrays(direction, 0.0)
+        sign = -1 if direction == DIRECTION_ABOVE else 1
+        merged = sorted(list(zip(keys, ids)) + [(sign * p, alert_id) for p, alert_id in items])
+        keys[:] = [k for k, _ in merged]
+        ids[:] = [alert_id for _, alert_id in merged]
+
+    def remove(self, direction: str, price: float, alert_id: int) -> bool:
+        keys, ids, key = self._arrays(direction, price)
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i] == key:
+            if ids[i] == alert_id:
+                del keys[i]
+                del ids[i]
+                return True
+            i += 1
+        return False
+
+    def pop_crossed(self, high: float, low: float) -> List[int]:
+        """Забрать id порогов, задетых диапазоном [low, high]"""
+        i = bisect_left(self.above_keys, -high)
+        fired = self.above_ids[i:]
+        del self.above_keys[i:], self.above_ids[i:]
+
+        j = bisect_left(self.below_keys, low)
+        fired.extend(self.below_ids[j:])
+        del self.below_keys[j:], self.below_ids[j:]
+        return fired
+
+    def __len__(self) -> int:
+        return len(self.above_ids) + len(self.below_ids)
+
+
+# ==================== ДВИЖОК ====================
+
+class PriceAlertEngine:
+    """
+    🔔 Индексированная проверка пользовательских алертов на каждом обновлении цены
+
+    Алерт одноразовый: сработал - деактивирован. Уведомления отправляются
+    в фоне, чтобы поток цен не ждал Telegram. Цены, которые были до
+    создания алерта (бар закрылся не позже created_at, бар старше уже
+    обработанного), его не задевают.
+    """
+
+    def __init__(
+        self,
+        repository=None,  # PriceAlertRepository (опционально)
+        notifier: Optional[Callable] = None,
+        interval: str = "1m",
+        max_alerts_per_user: int = 20
+    ):
+        """
+        Args:
+            repository: PriceAlertRepository для хранения алертов
+            notifier: Async функция: async def notifier(messages: Dict[int, str])
+            interval: Интервал свечей для on_candles
+            max_alerts_per_user: Лимит активных алертов на пользователя
+        """
+        self.repository = repository
+        self.notifier = notifier
+        self.interval = interval
+        self.max_alerts_per_user = max_alerts_per_user
+
+        self._alerts: Dict[int, Dict[str, Any]] = {}
+        self._books: Dict[str, AlertBook] = defaultdict(AlertBook)
+        self._by_user: Dict[int, Set[int]] = defaultdict(set)
+        self._local_id = 0  # id алертов без репозитория (отрицательные)
+        self._notify_tasks: set = set()
+        self._last_bar: Dict[str, datetime] = {}  # open_time последнего бара символа
+
+        self.stats = {
+            "alerts_loaded": 0,
+            "alerts_created": 0,
+            "alerts_deleted": 0,
+            "alerts_triggered": 0,
+            "prices_processed": 0,
+            "bars_out_of_order": 0,
+            "notifications_sent": 0,
+            "persist_errors": 0,
+            "notify_errors": 0
+        }
+
+        logger.info(f"🔔 PriceAlertEngine инициализирован (лимит {max_alerts_per_user} на пользователя)")
+
+    # ==================== АЛЕРТЫ ====================
+
+    async def load(self, symbols: Optional[List[str]] = None) -> int:
+        """Загрузить активные алерты из БД (одна сортировка на массив)"""
+        if not self.repository:
+            return 0
+
+        rows = await self.repository.get_active_alerts(symbols)
+
+        grouped: Dict[Tuple[str, str], List[Tuple[float, int]]] = defaultdict(list)
+        for alert in rows:
+            if alert["id"] in self._alerts:
+                continue
+            self._index(alert)
+            grouped[(alert["symbol"], alert["direction"])].append((alert["threshold_price"], alert["id"]))
+
+        for (symbol, direction), items in grouped.items():
+            self._books[symbol].load(direction, items)
+
+        loaded = sum(len(items) for items in grouped.values())
+        self.stats["alerts_loaded"] += loaded
+        logger.info(f"🔄 Загружено активных алертов: {loaded} ({len(grouped)} книг)")
+        return loaded
+
+    async def add_alert(
+        self,
+        user_id: int,
+        symbol: str,
+        direction: str,
+        threshold_price: float,
+        alert_type: str = ALERT_PRICE,
+        level_price: Optional[float] = None,
+        distance_percent: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Создать алерт
+
+        Raises:
+            ValueError: Неверные параметры или превышен лимит пользователя
+        """
+        if direction not in (DIRECTION_ABOVE, DIRECTION_BELOW):
+            raise ValueError(f"Unknown direction: {direction}")
+        if threshold_price <= 0:
+            raise ValueError(f"Invalid threshold price: {threshold_price}")
+        if len(self._by_user.get(user_id, ())) >= self.max_alerts_per_user:
+            raise ValueError(f"Alert limit reached: {self.max_alerts_per_user}")
+
+        alert = {
+            "user_id": user_id,
+            "symbol": symbol.upper(),
+            "alert_type": alert_type,
+            "direction": direction,
+            "threshold_price": float(threshold_price),
+            "level_price": level_price,
+            "distance_percent": distance_percent
+        }
+
+        if self.repository:
+            alert = await self.repository.create_alert(alert)
+        else:
+            self._local_id -= 1
+            alert.update(id=self._local_id, is_active=True, created_at=datetime.now(timezone.utc))
+
+        self._index(alert)
+        self._books[alert["symbol"]].add(direction, alert["threshold_price"], alert["id"])
+        self.stats["alerts_created"] += 1
+
+        logger.debug(f"🔔 Алерт #{alert['id']} {alert['symbol']} {direction} "
+                     f"{alert['threshold_price']} (пользователь {user_id})")
+        return alert
+
+    async def add_level_alert(
+        self,
+        user_id: int,
+        symbol: str,
+        current_price: float,
+        levels: List[Any],
+        distance_percent: float = 0.5
+    ) -> Dict[str, Any]:
+        """
+        Алерт на подход к ближайшему уровню D1
+
+        Raises:
+            ValueError: Нет уровня вне зоны distance_percent
+        """
+        direction, threshold, level_price = self.resolve_level_threshold(
+            current_price, levels, distance_percent
+        )
+        return await self.add_alert(
+            user_id, symbol, direction, threshold,
+            alert_type=ALERT_LEVEL, level_price=level_price, distance_percent=distance_percent
+        )
+
+    @staticmethod
+    def resolve_level_threshold(
+        current_price: float,
+        levels: List[Any],
+        distance_percent: float
+    ) -> Tuple[str, float, float]:
+        """
+        Порог для алерта на уровень: граница зоны ±distance_percent со стороны цены
+
+        Returns:
+            Tuple[direction, threshold_price, level_price]
+        """
+        band = distance_percent / 100
+        best = None
+        for level in levels:
+            price = float(level.price)
+            if current_price > price * (1 + band):
+                candidate = (current_price - price * (1 + band), DIRECTION_BELOW, price * (1 + band), price)
+            elif current_price < price * (1 - band):
+                candidate = (price * (1 - band) - current_price, DIRECTION_ABOVE, price * (1 - band), price)
+            else:
+                continue  # цена уже в зоне уровня
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+
+        if best is None:
+            raise ValueError("No level outside the proximity band")
+        return best[1], best[2], best[3]
+
+    async def remove_alert(self, user_id: int, alert_id: int) -> bool:
+        """Удалить алерт пользователя"""
+        alert = self._alerts.get(alert_id)
+        if alert is None or alert["user_id"] != user_id:
+            return False
+
+        if self.repository and alert_id > 0:
+            await self.repository.delete_alert(user_id, alert_id)
+
+        self._books[alert["symbol"]].remove(alert["direction"], alert["threshold_price"], alert_id)
+        self._unindex(alert)
+        self.stats["alerts_deleted"] += 1
+        return True
+
+    def user_alerts(self, user_id: int) -> List[Dict[str, Any]]:
+        """Активные алерты пользователя (по символу и порогу)"""
+        alerts = [self._alerts[i] for i in self._by_user.get(user_id, ())]
+        return sorted(alerts, key=lambda a: (a["symbol"], a["threshold_price"]))
+
+    def _index(self, alert: Dict[str, Any]):
+        self._alerts[alert["id"]] = alert
+        self._by_user[alert["user_id"]].add(alert["id"])
+
+    def _unindex(self, alert: Dict[str, Any]):
+        self._alerts.pop(alert["id"], None)
+        user_ids = self._by_user.get(alert["user_id"])
+        if user_ids is not None:
+            user_ids.discard(alert["id"])
+            if not user_ids:
+                del self._by_user[alert["user_id"]]
+
+    # ==================== ЦЕНЫ ====================
+
+    def process_price(
+        self,
+        symbol: str,
+        high: float,
+        low: Optional[float] = None,
+        timestamp: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Забрать алерты, сработавшие на обновлении цены
+
+        Args:
+            symbol: Символ
+            high: Цена (тик) или high бара
+            low: low бара (None = тик, low = high)
+            timestamp: Время обновления (для бара - close_time; None = сейчас).
+                       Алерты, созданные не раньше timestamp, не срабатывают
+
+        Returns:
+            List[Dict]: Сработавшие алерты с triggered_at / triggered_price
+        """
+        self.stats["prices_processed"] += 1
+        book = self._books.get(symbol.upper())
+        if not book:
+            return []
+
+        high = float(high)
+        low = high if low is None else float(low)
+        when = timestamp or datetime.now(timezone.utc)
+
+        fired = []
+        for alert_id in book.pop_crossed(high, low):
+            alert = self._alerts.get(alert_id)
+            if alert is None:
+                continue
+            created_at = alert.get("created_at")
+            if timestamp is not None and created_at is not None and timestamp <= created_at:
+                # Цена до создания алерта - порог остается в книге
+                book.add(alert["direction"], alert["threshold_price"], alert_id)
+                continue
+            self._unindex(alert)
+            alert["is_active"] = False
+            alert["triggered_at"] = when
+            alert["triggered_price"] = alert["threshold_price"]
+            fired.append(alert)
+
+        self.stats["alerts_triggered"] += len(fired)
+        return fired
+
+    async def on_price(self, symbol: str, price: float, timestamp: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Тик цены: проверить алерты и разослать сработавшие"""
+        fired = self.process_price(symbol, price, timestamp=timestamp)
+        if fired:
+            await self._dispatch(fired)
+        return fired
+
+    async def on_candles(self, symbol: str, interval: str, candles: List[Any]):
+        """
+        Слушатель синхронизатора свечей: high/low бара задевают пороги внутри бара
+
+        Args:
+            symbol: Символ
+            interval: Интервал (другие интервалы игнорируются)
+            candles: MarketDataCandle или dict формата репозитория, по возрастанию времени
+        """
+        if interval != self.interval:
+            return
+
+        symbol = symbol.upper()
+        fired: List[Dict[str, Any]] = []
+        for candle in candles:
+            if isinstance(candle, dict):
+                open_time, high, low, when = (candle["open_time"], candle["high_price"],
+                                              candle["low_price"], candle.get("close_time"))
+            else:
+                open_time, high, low, when = (candle.open_time, candle.high_price,
+                                              candle.low_price, getattr(candle, "close_time", None))
+
+            # Бар старше уже обработанного (догрузка истории) - цены из прошлого
+            last = self._last_bar.get(symbol)
+            if last is not None and open_time < last:
+                self.stats["bars_out_of_order"] += 1
+                continue
+            self._last_bar[symbol] = open_time
+
+            fired.extend(self.process_price(symbol, float(high), float(low), when))
+
+        if fired:
+            await self._dispatch(fired)
+
+    # ==================== УВЕДОМЛЕНИЯ ====================
+
+    async def _dispatch(self, fired: List[Dict[str, Any]]):
+        """Деактивировать сработавшие алерты в БД и разослать уведомления в фоне"""
+        if self.repository:
+            try:
+                await self.repository.mark_triggered_many([a for a in fired if a["id"] > 0])
+            except Exception as e:
+                self.stats["persist_errors"] += 1
+                logger.error(f"❌ Ошибка сохранения сработавших алертов: {e}")
+
+        if not self.notifier:
+            return
+
+        by_user: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for alert in fired:
+            by_user[alert["user_id"]].append(alert)
+        messages = {user_id: self.format_message(alerts) for user_id, alerts in by_user.items()}
+
+        task = asyncio.create_task(self._notify(messages))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, messages: Dict[int, str]):
+        try:
+            await self.notifier(messages)
+            self.stats["notifications_sent"] += len(messages)
+        except Exception as e:
+            self.stats["notify_errors"] += 1
+            logger.error(f"❌ Ошибка отправки уведомлений алертов: {e}")
+
+    @staticmethod
+    def format_alert(alert: Dict[str, Any]) -> str:
+        """Одна строка описания алерта"""
+        sign = "≥" if alert["direction"] == DIRECTION_ABOVE else "≤"
+        text = f"#{alert['id']} {alert['symbol']} {sign} {alert['threshold_price']:.6g}"
+        if alert["alert_type"] == ALERT_LEVEL and alert.get("level_price"):
+            text += f" (уровень {alert['level_price']:.6g} ±{alert['distance_percent']:g}%)"
+        return text
+
+    @classmethod
+    def format_message(cls, alerts: List[Dict[str, Any]]) -> str:
+        """Сообщение пользователю о сработавших алертах (HTML)"""
+        lines = ["🔔 <b>Сработали алерты</b>", ""]
+        lines.extend(f"• {cls.format_alert(alert)}" for alert in alerts)
+        return "\n".join(lines)
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика движка"""
+        return {
+            **self.stats,
+            "active_alerts": len(self._alerts),
+            "users": len(self._by_user),
+            "symbols": sum(1 for book in self._books.values() if book)
+        }
+
+    def __repr__(self) -> str:
+        return f"PriceAlertEngine(alerts={len(self._alerts)}, users={len(self._by_user)})"
+
+
+__all__ = [
+    "PriceAlertEngine",
+    "AlertBook",
+    "DIRECTION_ABOVE",
+    "DIRECTION_BELOW",
+    "ALERT_PRICE",
+    "ALERT_LEVEL"
+]
+
+logger.info("✅ PriceAlertEngine module loaded")
@@ -0,0 +1,436 @@
+"""
+Shard Coordinator - Шардирование символов между несколькими узлами
+
+Позволяет запускать несколько экземпляров StrategyOrchestrator против
+одной PostgreSQL базы так, чтобы каждый символ анализировался ровно
+одним узлом:
+- Членство узлов через heartbeat в таблице orchestrator_nodes
+- Распределение символов через consistent hashing (виртуальные узлы)
+- Эксклюзивность через lease в таблице symbol_leases
+- Автоматическая ребалансировка при подключении/падении узла
+
+Lease символов продлеваются каждым heartbeat, а не раз за цикл анализа,
+поэтому TTL не зависит от интервала анализа: пока узел жив, его символы
+не может захватить никто, даже если кольцо другого узла на время
+расходится с его кольцом.
+
+Шардируется только анализ. Синхронизация свечей (SimpleCandleSync,
+SimpleFuturesSync) по-прежнему идет на каждом узле по всем символам:
+слушатели свечей (водяные знаки контекстов, алерты, исходы сигналов)
+нужны каждому узлу, а запись свечей идемпотентна (ON CONFLICT).
+
+Проверка: test_shard_coordinator.py (несколько процессов против одной
+БД из DATABASE_URL) - каждый получает свою часть символов, после
+остановки одного процесса его символы переходят к остальным через
+SHARD_LEASE_TTL_SECONDS.
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ConsistentHashRing:
+    """
+    🔁 Кольцо consistent hashing с виртуальными узлами
+
+    При добавлении/удалении узла перемещается только ~1/N символов.
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, virtual_nodes: int = 64):
+        """
+        Args:
+            nodes: Начальный список узлов
+            virtual_nodes: Количество виртуальных точек на узел
+        """
+        self.virtual_nodes = virtual_nodes
+        self._hashes: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: Set[str] = set()
+
+        if nodes:
+            self.set_nodes(nodes)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """Стабильный (между процессами) хэш ключа"""
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def set_nodes(self, nodes: List[str]):
+        """Перестроить кольцо для нового набора узлов"""
+        points = []
+        for node in set(nodes):
+            for i in range(self.virtual_nodes):
+                points.append((self._hash(f"{node}#{i}"), node))
+
+        points.sort()
+        self._hashes = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+        self.nodes = set(nodes)
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Узел-владелец ключа (первая точка кольца по часовой стрелке)"""
+        if not self._hashes:
+            return None
+
+        index = bisect.bisect_right(self._hashes, self._hash(key))
+        if index == len(self._hashes):
+            index = 0
+        return self._owners[index]
+
+    def get_assignment(self, keys: List[str]) -> Dict[str, List[str]]:
+        """Распределение ключей по узлам"""
+        assignment: Dict[str, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.get_node(key)
+            if node is not None:
+                assignment[node].append(key)
+        return assignment
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+class ShardCoordinator:
+    """
+    🧩 Координатор шардирования символов v1.0
+
+    Каждый узел:
+    1. Периодически продлевает свой lease в orchestrator_nodes
+       и lease своих символов в symbol_leases
+    2. Читает список живых узлов и строит ConsistentHashRing
+    3. Перед каждым циклом анализа захватывает lease на свои символы
+       в symbol_leases (INSERT ... ON CONFLICT DO UPDATE WHERE истёк/свой)
+    4. Освобождает символы, которые по кольцу принадлежат другим узлам
+
+    Символ анализируется только узлом, который и владеет им по кольцу,
+    и удерживает его lease - поэтому при ребалансировке два узла
+    никогда не анализируют один символ одновременно.
+
+    Usage:
+        coordinator = ShardCoordinator(db_manager, node_id="node-a")
+        await coordinator.start()
+
+        owned = await coordinator.claim_symbols(all_symbols)
+
+        # Из настроек SHARD_* (None, если SHARDING_ENABLED выключен)
+        orchestrator = StrategyOrchestrator(
+            ..., shard_coordinator=ShardCoordinator.from_config(db_manager)
+        )
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        node_id: Optional[str] = None,
+        heartbeat_interval_seconds: int = 10,
+        lease_ttl_seconds: int = 30,
+        virtual_nodes: int = 64
+    ):
+        """
+        Args:
+            db_manager: PostgreSQLManager
+            node_id: Уникальный ID узла (None = hostname-pid)
+            heartbeat_interval_seconds: Интервал heartbeat
+            lease_ttl_seconds: Время жизни lease узла и символов
+            virtual_nodes: Виртуальных точек на узел в кольце
+        """
+        if lease_ttl_seconds <= heartbeat_interval_seconds:
+            raise ValueError("lease_ttl_seconds должен быть больше heartbeat_interval_seconds")
+
+        self.db = db_manager
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval_seconds
+        self.lease_ttl = lease_ttl_seconds
+
+        self.ring = ConsistentHashRing(virtual_nodes=virtual_nodes)
+        self.alive_nodes: List[str] = []
+        self.owned_symbols: Set[str] = set()
+
+        # Статус
+        self.is_running = False
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        # Статистика
+        self.stats = {
+            "heartbeats": 0,
+            "heartbeat_errors": 0,
+            "rebalances": 0,
+            "claims": 0,
+            "claim_errors": 0,
+            "symbols_claimed": 0,
+            "symbols_released": 0,
+            "symbols_contended": 0,
+            "symbols_renewed": 0,
+            "symbols_lost": 0,
+            "last_heartbeat": None,
+            "last_rebalance": None
+        }
+
+        logger.info(f"🧩 ShardCoordinator инициализирован (node_id={self.node_id})")
+        logger.info(f"   • Heartbeat: {heartbeat_interval_seconds}s, lease TTL: {lease_ttl_seconds}s")
+        logger.info(f"   • Виртуальных узлов: {virtual_nodes}")
+
+    @classmethod
+    def from_config(cls, db_manager, config=None) -> Optional["ShardCoordinator"]:
+        """
+        Координатор из настроек SHARDING_ENABLED / SHARD_*
+
+        Args:
+            db_manager: PostgreSQLManager
+            config: Класс настроек (None = config.Config)
+
+        Returns:
+            ShardCoordinator или None, если шардирование выключено
+            (оркестратор анализирует все символы на этом узле)
+        """
+        if config is None:
+            from config import Config as config
+
+        if not config.SHARDING_ENABLED:
+            return None
+
+        return cls(
+            db_manager,
+            node_id=config.SHARD_NODE_ID,
+            heartbeat_interval_seconds=config.SHARD_HEARTBEAT_SECONDS,
+            lease_ttl_seconds=config.SHARD_LEASE_TTL_SECONDS,
+            virtual_nodes=config.SHARD_VIRTUAL_NODES
+        )
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        """Зарегистрировать узел и запустить heartbeat"""
+        if self.is_running:
+            logger.warning("⚠️ ShardCoordinator уже запущен")
+            return
+
+        await self._heartbeat()
+
+        self.is_running = True
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+        logger.info(f"✅ ShardCoordinator запущен: {len(self.alive_nodes)} живых узлов")
+
+    async def stop(self):
+        """Остановить heartbeat и освободить все lease узла"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+
+        try:
+            await self.db.execute("DELETE FROM symbol_leases WHERE node_id = $1", self.node_id)
+            await self.db.execute("DELETE FROM orchestrator_nodes WHERE node_id = $1", self.node_id)
+        except Exception as e:
+            logger.error(f"❌ Ошибка освобождения lease узла {self.node_id}: {e}")
+
+        self.owned_symbols.clear()
+        logger.info(f"🛑 ShardCoordinator остановлен (node_id={self.node_id})")
+
+    async def _heartbeat_loop(self):
+        """Фоновое продление lease узла и его символов"""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.heartbeat_interval)
+                await self._heartbeat()
+                await self._renew_symbol_leases()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.stats["heartbeat_errors"] += 1
+                logger.error(f"❌ Ошибка heartbeat ({self.node_id}): {e}")
+
+    async def _heartbeat(self):
+        """Продлить lease узла и обновить кольцо по живым узлам"""
+        await self.db.execute(
+            """
+            INSERT INTO orchestrator_nodes
+                (node_id, hostname, process_id, last_heartbeat, lease_expires_at)
+            VALUES ($1, $2, $3, NOW(), NOW() + $4 * INTERVAL '1 second')
+            ON CONFLICT (node_id) DO UPDATE SET
+                last_heartbeat = NOW(),
+                lease_expires_at = EXCLUDED.lease_expires_at
+            """,
+            self.node_id, socket.gethostname(), os.getpid(), float(self.lease_ttl)
+        )
+
+        rows = await self.db.fetch(
+            "SELECT node_id FROM orchestrator_nodes WHERE lease_expires_at > NOW() ORDER BY node_id"
+        )
+        alive = [row["node_id"] for row in rows]
+
+        if self.node_id not in alive:
+            alive.append(self.node_id)
+
+        if set(alive) != self.ring.nodes:
+            previous = sorted(self.ring.nodes)
+            self.ring.set_nodes(alive)
+            self.stats["rebalances"] += 1
+            self.stats["last_rebalance"] = datetime.now(timezone.utc)
+            logger.info(f"🔁 Ребалансировка шардов: {previous} → {sorted(alive)}")
+
+        self.alive_nodes = sorted(alive)
+        self.stats["heartbeats"] += 1
+        self.stats["last_heartbeat"] = datetime.now(timezone.utc)
+
+    async def _renew_symbol_leases(self):
+        """
+        Продлить lease удерживаемых символов
+
+        Символы, ушедшие по кольцу другому узлу, продлеваются до
+        следующего claim_symbols (идущий цикл анализа их еще обрабатывает)
+        и там освобождаются. Lease, который узел успел потерять
+        (истек во время недоступности БД), из owned_symbols удаляется.
+        """
+        if not self.owned_symbols:
+            return
+
+        owned = sorted(self.owned_symbols)
+        rows = await self.db.fetch(
+            """
+            UPDATE symbol_leases
+            SET lease_expires_at = NOW() + $3 * INTERVAL '1 second',
+                updated_at = NOW()
+            WHERE node_id = $1 AND symbol = ANY($2::text[])
+            RETURNING symbol
+            """,
+            self.node_id, owned, float(self.lease_ttl)
+        )
+
+        renewed = {row["symbol"] for row in rows}
+        lost = self.owned_symbols - renewed
+        if lost:
+            logger.warning(f"⚠️ {self.node_id}: потеряны lease символов {sorted(lost)}")
+            self.stats["symbols_lost"] += len(lost)
+
+        self.owned_symbols = renewed & self.owned_symbols
+        self.stats["symbols_renewed"] += len(renewed)
+
+    # ==================== OWNERSHIP ====================
+
+    def owns(self, symbol: str) -> bool:
+        """Принадлежит ли символ этому узлу по кольцу"""
+        return self.ring.get_node(symbol) == self.node_id
+
+    def get_assigned_symbols(self, symbols: List[str]) -> List[str]:
+        """Символы, назначенные узлу по кольцу (без захвата lease)"""
+        return [s for s in symbols if self.owns(s)]
+
+    async def claim_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Захватить lease на назначенные символы и освободить чужие
+
+        Вызывается перед каждым циклом анализа. Символ возвращается
+        только если lease свободен, истёк или уже принадлежит узлу.
+
+        Args:
+            symbols: Полный список символов системы
+
+        Returns:
+            List[str]: Символы, которые узел должен анализировать в этом цикле
+        """
+        assigned = self.get_assigned_symbols(symbols)
+
+        try:
+            # Освобождаем символы, ушедшие другим узлам после ребалансировки
+            released = await self.db.fetch(
+                """
+                DELETE FROM symbol_leases
+                WHERE node_id = $1 AND NOT (symbol = ANY($2::text[]))
+                RETURNING symbol
+                """,
+                self.node_id, assigned
+            )
+            self.stats["symbols_released"] += len(released)
+
+            if not assigned:
+                self.owned_symbols = set()
+                return []
+
+            rows = await self.db.fetch(
+                """
+                INSERT INTO symbol_leases (symbol, node_id, lease_expires_at)
+                SELECT s, $2, NOW() + $3 * INTERVAL '1 second'
+                FROM unnest($1::text[]) AS s
+                ON CONFLICT (symbol) DO UPDATE SET
+                    node_id = EXCLUDED.node_id,
+                    lease_expires_at = EXCLUDED.lease_expires_at,
+                    acquired_at = CASE
+                        WHEN symbol_leases.node_id = EXCLUDED.node_id THEN symbol_leases.acquired_at
+                        ELSE NOW()
+                    END,
+                    updated_at = NOW()
+                WHERE symbol_leases.node_id = EXCLUDED.node_id
+                   OR symbol_leases.lease_expires_at < NOW()
+                RETURNING symbol
+                """,
+                assigned, self.node_id, float(self.lease_ttl)
+            )
+
+            claimed = {row["symbol"] for row in rows}
+            newly_claimed = claimed - self.owned_symbols
+
+            self.stats["claims"] += 1
+            self.stats["symbols_claimed"] += len(newly_claimed)
+            self.stats["symbols_contended"] += len(assigned) - len(claimed)
+
+            if newly_claimed:
+                logger.info(f"🧩 {self.node_id}: захвачены символы {sorted(newly_claimed)}")
+
+            self.owned_symbols = claimed
+            return [s for s in assigned if s in claimed]
+
+        except Exception as e:
+            self.stats["claim_errors"] += 1
+            logger.error(f"❌ Ошибка захвата lease символов ({self.node_id}): {e}")
+            # Без подтверждённых lease не анализируем ничего - безопаснее пропустить цикл
+            self.owned_symbols = set()
+            return []
+
+    # ==================== STATS ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Получить статистику координатора"""
+        return {
+            **self.stats,
+            "node_id": self.node_id,
+            "is_running": self.is_running,
+            "alive_nodes": list(self.alive_nodes),
+            "alive_nodes_count": len(self.alive_nodes),
+            "owned_symbols": sorted(self.owned_symbols),
+            "owned_symbols_count": len(self.owned_symbols),
+            "lease_ttl_seconds": self.lease_ttl,
+            "heartbeat_interval_seconds": self.heartbeat_interval
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"ShardCoordinator(node_id={self.node_id}, "
+            f"nodes={len(self.alive_nodes)}, "
+            f"owned={len(self.owned_symbols)})"
+        )
+
+
+# Export
+__all__ = ["ShardCoordinator", "ConsistentHashRing"]
+
+logger.info("✅ ShardCoordinator v1.0 loaded - consistent hashing + Postgres leases")
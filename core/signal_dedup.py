@@ -0,0 +1,257 @@
+"""
+Signal Dedup Store - Кулдауны и rate limit сигналов, общие для инстансов
+
+SignalManager не должен слать один и тот же сигнал дважды: ни после
+рестарта, ни когда работают несколько инстансов бота. Источник истины -
+таблица signal_claims с уникальным ключом (symbol, signal_type, bucket),
+где bucket - время, округленное вниз до кулдауна:
+
+- claim = INSERT ... ON CONFLICT DO NOTHING: ровно один инстанс получает
+  строку и рассылает сигнал, остальные видят "занято"
+- вставка также не проходит, если по ключу уже есть claim моложе
+  кулдауна (сигнал на границе соседних bucket); claims одного ключа
+  сериализуются pg_advisory_xact_lock, чтобы эта проверка видела
+  параллельный claim другого инстанса
+
+Перед БД стоит память процесса:
+- последний claim по ключу -> проверка кулдауна O(1)
+- deque времен отправки длиной max_signals_per_hour -> rate limit O(1):
+  лимит исчерпан, если самый старый из последних N моложе часа
+
+На старте память прогревается из signal_claims за последний час, так что
+кулдауны и лимит переживают рестарт. Без репозитория (бэктест, тесты)
+стор работает только в памяти. Ошибка БД не блокирует рассылку:
+решение принимается по памяти.
+
+Usage:
+    store = SignalDedupStore(repository=await get_signal_claim_repository())
+    await store.warm_load()
+
+    if store.cooldown_remaining(key, now) is None and not store.is_rate_limited(now):
+        if await store.claim(signal, now):
+            ...  # рассылаем
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+import os
+import socket
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SignalDedupStore:
+    """
+    🧷 Дедупликация сигналов: память процесса + атомарный claim в Postgres
+    """
+
+    def __init__(
+        self,
+        repository=None,  # SignalClaimRepository (опционально)
+        cooldown_minutes: int = 5,
+        max_signals_per_hour: int = 12,
+        node_id: Optional[str] = None,
+        retention_hours: int = 24
+    ):
+        """
+        Args:
+            repository: SignalClaimRepository (None = только память)
+            cooldown_minutes: Кулдаун и размер bucket ключа дедупликации
+            max_signals_per_hour: Лимит отправок за скользящий час
+            node_id: ID инстанса в claim (None = hostname-pid)
+            retention_hours: Сколько хранить claims в БД
+        """
+        self.repository = repository
+        self.cooldown = timedelta(minutes=cooldown_minutes)
+        self.max_signals_per_hour = max_signals_per_hour
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.retention = timedelta(hours=retention_hours)
+
+        self.rate_window = timedelta(hours=1)
+        self._last_sent: Dict[str, datetime] = {}  # key -> время последнего claim
+        self._sent_times: Deque[datetime] = deque(maxlen=max(max_signals_per_hour, 1))
+        self._last_prune: Optional[datetime] = None
+
+        self.stats = {
+            "claims_won": 0,
+            "claims_lost": 0,
+            "claims_local": 0,
+            "warm_loaded": 0,
+            "db_errors": 0,
+            "pruned": 0
+        }
+
+    # ==================== КЛЮЧИ ====================
+
+    @staticmethod
+    def key(symbol: str, signal_type: str) -> str:
+        return f"{symbol}_{signal_type}"
+
+    def bucket_start(self, when: datetime) -> datetime:
+        """Время, округленное вниз до кулдауна (UTC)"""
+        step = self.cooldown.total_seconds()
+        ts = when.timestamp()
+        return datetime.fromtimestamp(ts - ts % step, tz=timezone.utc)
+
+    # ==================== ПРОВЕРКИ (ПАМЯТЬ) ====================
+
+    def cooldown_remaining(self, key: str, now: datetime) -> Optional[timedelta]:
+        """
+        Время с последней отправки ключа, если кулдаун еще идет
+
+        Returns:
+            Optional[timedelta]: Прошедшее время или None, если кулдауна нет
+        """
+        last = self._last_sent.get(key)
+        if last is None:
+            return None
+        elapsed = now - last
+        return elapsed if elapsed < self.cooldown else None
+
+    def window_count(self, now: datetime) -> int:
+        """Отправок за последний час (не больше max_signals_per_hour)"""
+        cutoff = now - self.rate_window
+        while self._sent_times and self._sent_times[0] <= cutoff:
+            self._sent_times.popleft()
+        return len(self._sent_times)
+
+    def is_rate_limited(self, now: datetime) -> bool:
+        """Исчерпан ли лимит: самая старая из последних N отправок моложе часа"""
+        if len(self._sent_times) < self.max_signals_per_hour:
+            return False
+        return not self._sent_times or now - self._sent_times[0] < self.rate_window
+
+    def record(self, key: str, when: datetime):
+        """Учесть отправку в памяти (кулдаун + окно rate limit)"""
+        last = self._last_sent.get(key)
+        if last is None or when > last:
+            self._last_sent[key] = when
+        self._sent_times.append(when)
+
+    # ==================== CLAIM ====================
+
+    async def claim(self, signal, now: Optional[datetime] = None) -> bool:
+        """
+        Занять право разослать сигнал
+
+        Без репозитория (или при ошибке БД) решает память процесса.
+        Проигранный claim тоже учитывается в памяти: сигнал уже разослал
+        другой инстанс, кулдаун для этого ключа идет.
+
+        Args:
+            signal: TradingSignal
+            now: Время отправки (None = реальное)
+
+        Returns:
+            bool: True если сигнал должен разослать этот инстанс
+        """
+        now = now or datetime.now(timezone.utc)
+        key = self.key(signal.symbol, signal.signal_type.value)
+
+        won = await self._claim_in_db(signal, now) if self.repository else None
+
+        if won is None:
+            # Память: повторная проверка на случай параллельного process_signal
+            if self.cooldown_remaining(key, now) is not None:
+                self.stats["claims_lost"] += 1
+                return False
+            self.stats["claims_local"] += 1
+            won = True
+        elif won:
+            self.stats["claims_won"] += 1
+        else:
+            self.stats["claims_lost"] += 1
+            if self.cooldown_remaining(key, now) is not None:
+                return False  # отправка уже учтена в памяти
+
+        self.record(key, now)
+        return won
+
+    async def _claim_in_db(self, signal, now: datetime) -> Optional[bool]:
+        """Claim в signal_claims (None = БД недоступна)"""
+        try:
+            won = await self.repository.try_claim({
+                "symbol": signal.symbol,
+                "signal_type": signal.signal_type.value,
+                "bucket_start": self.bucket_start(now),
+                "cooldown_start": now - self.cooldown,
+                "claimed_at": now,
+                "strategy": signal.strategy_name,
+                "strength": round(float(signal.strength), 4),
+                "node_id": self.node_id
+            })
+        except Exception as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"⚠️ Claim сигнала {signal.symbol} без БД (решает память): {e}")
+            return None
+
+        await self._maybe_prune(now)
+        return won
+
+    # ==================== ПРОГРЕВ И ОЧИСТКА ====================
+
+    async def warm_load(self, now: Optional[datetime] = None) -> int:
+        """
+        Загрузить claims за последний час/кулдаун из БД в память
+
+        Returns:
+            int: Количество загруженных claims
+        """
+        if not self.repository:
+            return 0
+
+        now = now or datetime.now(timezone.utc)
+        since = now - max(self.rate_window, self.cooldown)
+
+        try:
+            claims = await self.repository.get_claims_since(since)
+        except Exception as e:
+            self.stats["db_errors"] += 1
+            logger.error(f"❌ Прогрев дедупликации сигналов не удался: {e}")
+            return 0
+
+        for claim in claims:
+            self.record(self.key(claim["symbol"], claim["signal_type"]), claim["claimed_at"])
+
+        self.stats["warm_loaded"] += len(claims)
+        logger.info(f"🧷 Дедупликация сигналов: загружено {len(claims)} недавних сигналов")
+
+        await self._maybe_prune(now)
+        return len(claims)
+
+    async def _maybe_prune(self, now: datetime):
+        """Удалять старые claims не чаще раза в час"""
+        if self._last_prune is not None and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+
+        try:
+            self.stats["pruned"] += await self.repository.delete_older_than(now - self.retention)
+        except Exception as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"⚠️ Очистка signal_claims не удалась: {e}")
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика стора"""
+        return {
+            **self.stats,
+            "persistent": self.repository is not None,
+            "node_id": self.node_id,
+            "tracked_keys": len(self._last_sent)
+        }
+
+    def __repr__(self) -> str:
+        return (f"SignalDedupStore(persistent={self.repository is not None}, "
+                f"keys={len(self._last_sent)}, won={self.stats['claims_won']})")
+
+
+__all__ = ["SignalDedupStore"]
+
+logger.info("✅ SignalDedupStore module loaded")
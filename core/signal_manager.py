@@ -2,7 +2,7 @@
 Signal Manager v3.0 - Упрощенная версия
 
 Управляет торговыми сигналами:
-- Фильтрация дубликатов
+- Фильтрация дубликатов (опционально общая для инстансов через signal_claims)
 - Управление кулдаунами
 - Рассылка подписчикам
 - Опциональное AI обогащение через OpenAI
@@ -17,6 +17,8 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Callable, Dict, Any, Optional, Set
 from collections import defaultdict
 
+from core.signal_dedup import SignalDedupStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,17 +32,21 @@ class SignalManager:
     Features:
     - Фильтрация дубликатов по symbol + type
     - Cooldown между сигналами (по умолчанию 5 минут)
+    - Кулдауны и rate limit переживают рестарт и общие для инстансов,
+      если передан claim_repository (SignalDedupStore)
     - Подписчики через callback функции
     - Опциональное AI обогащение через OpenAI
+    - Опциональный форвард-тест исходов (SignalOutcomeTracker)
     - Статистика и мониторинг
     
     Usage:
         signal_manager = SignalManager(
-            openai_analyzer=openai_analyzer
+            openai_analyzer=openai_analyzer,
+            claim_repository=await get_signal_claim_repository()
         )
         
-        # Добавляем подписчика (например TelegramBot)
-        signal_manager.add_subscriber(bot.broadcast_signal)
+        # Добавляем подписчика (например TelegramBot: сам сигнал нужен для фильтров подписок)
+        signal_manager.add_subscriber(bot.broadcast_signal, with_signal=True)
         
         # Запускаем
         await signal_manager.start()
@@ -55,7 +61,10 @@ class SignalManager:
         cooldown_minutes: int = 5,
         max_signals_per_hour: int = 12,
         enable_ai_enrichment: bool = True,
-        min_signal_strength: float = 0.5
+        min_signal_strength: float = 0.5,
+        outcome_tracker=None,  # SignalOutcomeTracker (опционально)
+        claim_repository=None,  # SignalClaimRepository (опционально)
+        node_id: Optional[str] = None
     ):
         """
         Args:
@@ -64,19 +73,29 @@ class SignalManager:
             max_signals_per_hour: Максимум сигналов в час
             enable_ai_enrichment: Включить AI обогащение сигналов
             min_signal_strength: Минимальная сила сигнала для отправки
+            outcome_tracker: SignalOutcomeTracker для форвард-теста отправленных сигналов
+            claim_repository: SignalClaimRepository - дедупликация через БД
+                             (None = только память процесса)
+            node_id: ID инстанса в claims (None = hostname-pid)
         """
         self.openai_analyzer = openai_analyzer
         self.cooldown_minutes = cooldown_minutes
         self.max_signals_per_hour = max_signals_per_hour
         self.enable_ai_enrichment = enable_ai_enrichment and openai_analyzer is not None
         self.min_signal_strength = min_signal_strength
+        self.outcome_tracker = outcome_tracker
         
         # Подписчики (callback функции)
         self.subscribers: List[Callable] = []
+        self._signal_subscribers: List[Callable] = []  # получают (message, signal)
         
-        # История сигналов для фильтрации
-        self.last_signals: Dict[str, datetime] = {}  # key = f"{symbol}_{signal_type}"
-        self.signals_history: List[Dict] = []  # Последние сигналы
+        # Кулдауны и rate limit (память + signal_claims)
+        self.dedup = SignalDedupStore(
+            repository=claim_repository,
+            cooldown_minutes=cooldown_minutes,
+            max_signals_per_hour=max_signals_per_hour,
+            node_id=node_id
+        )
         
         # Статус
         self.is_running = False
@@ -89,9 +108,11 @@ class SignalManager:
             "signals_filtered_strength": 0,
             "signals_filtered_cooldown": 0,
             "signals_filtered_rate_limit": 0,
+            "signals_filtered_duplicate": 0,
             "ai_enrichments": 0,
             "ai_enrichment_errors": 0,
             "broadcast_errors": 0,
+            "outcome_tracking_errors": 0,
             "start_time": None
         }
         
@@ -102,6 +123,8 @@ class SignalManager:
         logger.info(f"   • Max signals/hour: {max_signals_per_hour}")
         logger.info(f"   • Min strength: {min_signal_strength}")
         logger.info(f"   • AI enrichment: {'✅' if self.enable_ai_enrichment else '❌'}")
+        logger.info(f"   • Outcome tracking: {'✅' if outcome_tracker else '❌'}")
+        logger.info(f"   • Persistent dedup: {'✅' if claim_repository else '❌'}")
         logger.info("=" * 70)
     
     async def start(self):
@@ -114,6 +137,9 @@ class SignalManager:
         self.start_time = datetime.now(timezone.utc)
         self.stats["start_time"] = self.start_time
         
+        # Кулдауны и лимит с прошлого запуска / других инстансов
+        await self.dedup.warm_load()
+        
         logger.info("✅ SignalManager запущен")
     
     async def stop(self):
@@ -135,27 +161,34 @@ class SignalManager:
         logger.info(f"   • Сигналов отправлено: {self.stats['signals_sent']}")
         logger.info(f"   • Отфильтровано по силе: {self.stats['signals_filtered_strength']}")
         logger.info(f"   • Отфильтровано по cooldown: {self.stats['signals_filtered_cooldown']}")
+        logger.info(f"   • Отправлено другим инстансом: {self.stats['signals_filtered_duplicate']}")
         logger.info(f"   • AI обогащений: {self.stats['ai_enrichments']}")
         logger.info("=" * 70)
         
         logger.info("✅ SignalManager остановлен")
     
-    def add_subscriber(self, callback: Callable):
+    def add_subscriber(self, callback: Callable, with_signal: bool = False):
         """
         Добавить подписчика на сигналы
         
         Args:
             callback: Async функция для отправки сигнала
                      Сигнатура: async def callback(message: str)
+            with_signal: Передавать и сам сигнал (для фильтрации получателей)
+                     Сигнатура: async def callback(message: str, signal: TradingSignal)
         """
         if callback not in self.subscribers:
             self.subscribers.append(callback)
+            if with_signal:
+                self._signal_subscribers.append(callback)
             logger.info(f"📡 Добавлен подписчик (всего: {len(self.subscribers)})")
     
     def remove_subscriber(self, callback: Callable):
         """Удалить подписчика"""
         if callback in self.subscribers:
             self.subscribers.remove(callback)
+            if callback in self._signal_subscribers:
+                self._signal_subscribers.remove(callback)
             logger.info(f"📡 Удален подписчик (осталось: {len(self.subscribers)})")
     
     async def process_signal(self, signal) -> bool:
@@ -176,42 +209,14 @@ class SignalManager:
                 logger.warning("⚠️ SignalManager не запущен, сигнал пропущен")
                 return False
             
-            # Фильтр 1: Минимальная сила сигнала
-            if signal.strength < self.min_signal_strength:
-                self.stats["signals_filtered_strength"] += 1
-                logger.debug(
-                    f"🔇 Сигнал отфильтрован по силе: {signal.symbol} "
-                    f"{signal.signal_type.value} (strength={signal.strength:.2f})"
-                )
+            # Фильтры: сила, cooldown, rate limit
+            if self.check_filters(signal) is not None:
                 return False
             
-            # Фильтр 2: Cooldown
-            signal_key = f"{signal.symbol}_{signal.signal_type.value}"
-            
-            if signal_key in self.last_signals:
-                time_since_last = datetime.now(timezone.utc) - self.last_signals[signal_key]
-                cooldown_delta = timedelta(minutes=self.cooldown_minutes)
-                
-                if time_since_last < cooldown_delta:
-                    self.stats["signals_filtered_cooldown"] += 1
-                    logger.debug(
-                        f"⏰ Сигнал в cooldown: {signal.symbol} {signal.signal_type.value} "
-                        f"(прошло {time_since_last.total_seconds():.0f}s)"
-                    )
-                    return False
-            
-            # Фильтр 3: Rate limit (максимум сигналов в час)
-            one_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
-            recent_signals = [
-                s for s in self.signals_history 
-                if s['timestamp'] > one_hour_ago
-            ]
-            
-            if len(recent_signals) >= self.max_signals_per_hour:
-                self.stats["signals_filtered_rate_limit"] += 1
-                logger.warning(
-                    f"🚦 Превышен лимит сигналов: {len(recent_signals)}/{self.max_signals_per_hour}"
-                )
+            # Атомарный claim: сигнал уже разослан (другим инстансом или параллельно)
+            if not await self.dedup.claim(signal):
+                self.stats["signals_filtered_duplicate"] += 1
+                logger.debug(f"🧷 Сигнал уже разослан: {signal.symbol} {signal.signal_type.value}")
                 return False
             
             # Формируем базовое сообщение
@@ -228,24 +233,19 @@ class SignalManager:
                     logger.error(f"❌ Ошибка AI обогащения: {e}")
                     self.stats["ai_enrichment_errors"] += 1
             
-            # Отправляем подписчикам
-            await self._broadcast_to_subscribers(message)
-            
-            # Обновляем историю
-            self.last_signals[signal_key] = datetime.now(timezone.utc)
-            self.signals_history.append({
-                'symbol': signal.symbol,
-                'type': signal.signal_type.value,
-                'timestamp': datetime.now(timezone.utc),
-                'strength': signal.strength
-            })
-            
-            # Ограничиваем размер истории
-            if len(self.signals_history) > 100:
-                self.signals_history = self.signals_history[-100:]
+            # Отправляем подписчикам (claim уже записал сигнал в историю)
+            await self._broadcast_to_subscribers(message, signal)
             
             self.stats["signals_sent"] += 1
             
+            # Форвард-тест: исход сигнала по живым свечам
+            if self.outcome_tracker:
+                try:
+                    await self.outcome_tracker.track_signal(signal)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка постановки сигнала на отслеживание: {e}")
+                    self.stats["outcome_tracking_errors"] += 1
+            
             logger.info(
                 f"✅ Сигнал отправлен: {signal.symbol} {signal.signal_type.value} "
                 f"(сила: {signal.strength:.2f}, уверенность: {signal.confidence:.2f})"
@@ -259,6 +259,63 @@ class SignalManager:
             logger.error(traceback.format_exc())
             return False
     
+    def check_filters(self, signal, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Проверить сигнал фильтрами менеджера
+        
+        Args:
+            signal: TradingSignal
+            now: Текущее время (None = реальное; бэктест передает время реплея)
+            
+        Returns:
+            Optional[str]: Причина отсева ("strength", "cooldown", "rate_limit")
+                          или None, если сигнал проходит
+        """
+        now = now or datetime.now(timezone.utc)
+        
+        # Фильтр 1: Минимальная сила сигнала
+        if signal.strength < self.min_signal_strength:
+            self.stats["signals_filtered_strength"] += 1
+            logger.debug(
+                f"🔇 Сигнал отфильтрован по силе: {signal.symbol} "
+                f"{signal.signal_type.value} (strength={signal.strength:.2f})"
+            )
+            return "strength"
+        
+        # Фильтр 2: Cooldown
+        signal_key = self.dedup.key(signal.symbol, signal.signal_type.value)
+        time_since_last = self.dedup.cooldown_remaining(signal_key, now)
+        
+        if time_since_last is not None:
+            self.stats["signals_filtered_cooldown"] += 1
+            logger.debug(
+                f"⏰ Сигнал в cooldown: {signal.symbol} {signal.signal_type.value} "
+                f"(прошло {time_since_last.total_seconds():.0f}s)"
+            )
+            return "cooldown"
+        
+        # Фильтр 3: Rate limit (максимум сигналов в скользящий час)
+        if self.dedup.is_rate_limited(now):
+            self.stats["signals_filtered_rate_limit"] += 1
+            logger.warning(
+                f"🚦 Превышен лимит сигналов: {self.max_signals_per_hour}/{self.max_signals_per_hour} за час"
+            )
+            return "rate_limit"
+        
+        return None
+    
+    def record_signal(self, signal, now: Optional[datetime] = None):
+        """
+        Записать отправленный сигнал в историю (для cooldown и rate limit)
+        
+        Args:
+            signal: TradingSignal
+            now: Время отправки (None = реальное)
+        """
+        now = now or datetime.now(timezone.utc)
+        
+        self.dedup.record(self.dedup.key(signal.symbol, signal.signal_type.value), now)
+    
     def _format_signal_message(self, signal) -> str:
         """
         Форматировать сообщение о сигнале
@@ -374,12 +431,13 @@ class SignalManager:
             logger.error(f"❌ Ошибка AI обогащения: {e}")
             return None
     
-    async def _broadcast_to_subscribers(self, message: str):
+    async def _broadcast_to_subscribers(self, message: str, signal=None):
         """
         Отправить сообщение всем подписчикам
         
         Args:
             message: Сообщение для рассылки
+            signal: Исходный TradingSignal (для подписчиков with_signal)
         """
         if not self.subscribers:
             logger.warning("⚠️ Нет подписчиков для рассылки сигнала")
@@ -390,7 +448,7 @@ class SignalManager:
         # Отправляем параллельно всем подписчикам
         tasks = []
         for callback in self.subscribers:
-            tasks.append(self._safe_call_subscriber(callback, message))
+            tasks.append(self._safe_call_subscriber(callback, message, signal))
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -403,19 +461,23 @@ class SignalManager:
         if error_count > 0:
             self.stats["broadcast_errors"] += error_count
     
-    async def _safe_call_subscriber(self, callback: Callable, message: str) -> bool:
+    async def _safe_call_subscriber(self, callback: Callable, message: str, signal=None) -> bool:
         """
         Безопасный вызов подписчика с обработкой ошибок
         
         Args:
             callback: Async функция подписчика
             message: Сообщение
+            signal: TradingSignal (передается подписчикам with_signal)
             
         Returns:
             bool: True если успешно
         """
         try:
-            await callback(message)
+            if callback in self._signal_subscribers:
+                await callback(message, signal)
+            else:
+                await callback(message)
             return True
         except Exception as e:
             logger.error(f"❌ Ошибка вызова подписчика: {e}")
@@ -432,19 +494,27 @@ class SignalManager:
             filtered_total = (
                 self.stats["signals_filtered_strength"] +
                 self.stats["signals_filtered_cooldown"] +
-                self.stats["signals_filtered_rate_limit"]
+                self.stats["signals_filtered_rate_limit"] +
+                self.stats["signals_filtered_duplicate"]
             )
             filter_rate = (filtered_total / self.stats["signals_received"]) * 100
         
-        return {
+        stats = {
             **self.stats,
             "is_running": self.is_running,
             "uptime_seconds": uptime,
             "subscribers_count": len(self.subscribers),
-            "recent_signals_count": len(self.signals_history),
+            "recent_signals_count": self.dedup.window_count(datetime.now(timezone.utc)),
+            "dedup": self.dedup.get_stats(),
             "filter_rate_percent": filter_rate,
             "signals_per_hour": (self.stats["signals_sent"] / (uptime / 3600)) if uptime > 0 else 0
         }
+        
+        # Живые hit rate / expectancy по стратегиям
+        if self.outcome_tracker:
+            stats["outcomes"] = self.outcome_tracker.get_stats()
+        
+        return stats
     
     def get_health_status(self) -> Dict[str, Any]:
         """Проверка здоровья"""
@@ -464,7 +534,8 @@ class SignalManager:
             "signals_filtered": (
                 self.stats["signals_filtered_strength"] +
                 self.stats["signals_filtered_cooldown"] +
-                self.stats["signals_filtered_rate_limit"]
+                self.stats["signals_filtered_rate_limit"] +
+                self.stats["signals_filtered_duplicate"]
             ),
             "uptime_seconds": stats["uptime_seconds"]
         }
@@ -0,0 +1,223 @@
+"""
+Subscription Index - Подписки пользователей на сигналы
+
+Пользователь может ограничить рассылку символами, стратегиями и
+минимальной силой сигнала (/subscribe). Пустое ограничение = все.
+
+Инвертированный индекс по каждому измерению:
+- символ -> пользователи, выбравшие символ (+ множество "все символы")
+- стратегия -> пользователи, выбравшие стратегию (+ "все стратегии")
+
+Получатели сигнала - пересечение двух множеств, затем отсев по силе
+только среди пользователей с ненулевым порогом. Изменение настроек
+одного пользователя обновляет только его записи в индексе.
+
+Usage:
+    index = SubscriptionIndex()
+    index.set_user(42, symbols=["BTCUSDT"], strategies=["breakout"], min_strength=0.6)
+
+    recipients = index.recipients("BTCUSDT", "BreakoutStrategy", 0.72)
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_strategy(name: str) -> str:
+    """'FalseBreakoutStrategy' / 'false_breakout' / 'False Breakout' -> 'false_breakout'"""
+    name = re.sub(r"strategy$", "", name.strip(), flags=re.IGNORECASE)
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name)
+    return re.sub(r"[\s\-]+", "_", name).lower().strip("_")
+
+
+@dataclass(frozen=True)
+class UserPreferences:
+    """Настройки рассылки пользователя (None = без ограничения)"""
+    symbols: Optional[FrozenSet[str]] = None
+    strategies: Optional[FrozenSet[str]] = None
+    min_strength: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbols": sorted(self.symbols) if self.symbols is not None else None,
+            "strategies": sorted(self.strategies) if self.strategies is not None else None,
+            "min_strength": self.min_strength
+        }
+
+
+class SubscriptionIndex:
+    """
+    🗂️ Инвертированный индекс подписок: (символ, стратегия) -> пользователи
+    """
+
+    def __init__(self):
+        self._prefs: Dict[int, UserPreferences] = {}
+        self._by_symbol: Dict[str, Set[int]] = defaultdict(set)
+        self._any_symbol: Set[int] = set()
+        self._by_strategy: Dict[str, Set[int]] = defaultdict(set)
+        self._any_strategy: Set[int] = set()
+        self._with_min_strength: Set[int] = set()
+
+        self.stats = {
+            "updates": 0,
+            "lookups": 0,
+            "recipients_total": 0,
+            "filtered_total": 0
+        }
+
+    # ==================== ОБНОВЛЕНИЕ ====================
+
+    def set_user(
+        self,
+        user_id: int,
+        symbols: Optional[Iterable[str]] = None,
+        strategies: Optional[Iterable[str]] = None,
+        min_strength: float = 0.0
+    ) -> UserPreferences:
+        """
+        Задать настройки пользователя (заменяют прежние)
+
+        Args:
+            user_id: ID пользователя Telegram
+            symbols: Символы (None или пусто = все)
+            strategies: Стратегии в любом написании (None или пусто = все)
+            min_strength: Минимальная сила сигнала
+
+        Returns:
+            UserPreferences: Сохраненные настройки
+        """
+        symbol_set = frozenset(s.upper() for s in symbols or ())
+        strategy_set = frozenset(normalize_strategy(s) for s in strategies or ())
+        prefs = UserPreferences(
+            symbols=symbol_set or None,
+            strategies=strategy_set or None,
+            min_strength=float(min_strength or 0.0)
+        )
+
+        if self._prefs.get(user_id) == prefs:
+            return prefs
+
+        self.remove_user(user_id)
+        self._prefs[user_id] = prefs
+
+        if prefs.symbols is None:
+            self._any_symbol.add(user_id)
+        else:
+            for symbol in prefs.symbols:
+                self._by_symbol[symbol].add(user_id)
+
+        if prefs.strategies is None:
+            self._any_strategy.add(user_id)
+        else:
+            for strategy in prefs.strategies:
+                self._by_strategy[strategy].add(user_id)
+
+        if prefs.min_strength > 0:
+            self._with_min_strength.add(user_id)
+
+        self.stats["updates"] += 1
+        return prefs
+
+    def ensure_user(self, user_id: int) -> UserPreferences:
+        """Добавить пользователя с настройками по умолчанию, если его нет"""
+        prefs = self._prefs.get(user_id)
+        return prefs if prefs is not None else self.set_user(user_id)
+
+    def remove_user(self, user_id: int):
+        """Удалить пользователя из индекса"""
+        prefs = self._prefs.pop(user_id, None)
+        if prefs is None:
+            return
+
+        if prefs.symbols is None:
+            self._any_symbol.discard(user_id)
+        else:
+            for symbol in prefs.symbols:
+                self._discard(self._by_symbol, symbol, user_id)
+
+        if prefs.strategies is None:
+            self._any_strategy.discard(user_id)
+        else:
+            for strategy in prefs.strategies:
+                self._discard(self._by_strategy, strategy, user_id)
+
+        self._with_min_strength.discard(user_id)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, user_id: int):
+        users = postings.get(key)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del postings[key]
+
+    # ==================== ПОИСК ====================
+
+    def recipients(self, symbol: str, strategy: Optional[str], strength: float) -> Set[int]:
+        """
+        Пользователи, которым нужно отправить сигнал
+
+        Args:
+            symbol: Символ сигнала
+            strategy: Имя стратегии сигнала (None = подходит только "все стратегии")
+            strength: Сила сигнала
+
+        Returns:
+            Set[int]: ID пользователей
+        """
+        by_symbol = self._by_symbol.get(symbol.upper())
+        symbol_users = self._any_symbol | by_symbol if by_symbol else self._any_symbol
+
+        by_strategy = self._by_strategy.get(normalize_strategy(strategy)) if strategy else None
+        strategy_users = self._any_strategy | by_strategy if by_strategy else self._any_strategy
+
+        if len(symbol_users) > len(strategy_users):
+            symbol_users, strategy_users = strategy_users, symbol_users
+        users = symbol_users & strategy_users
+
+        weak = {
+            user_id for user_id in users & self._with_min_strength
+            if self._prefs[user_id].min_strength > strength
+        }
+        users -= weak
+
+        self.stats["lookups"] += 1
+        self.stats["recipients_total"] += len(users)
+        self.stats["filtered_total"] += len(self._prefs) - len(users)
+        return users
+
+    def get_user(self, user_id: int) -> Optional[UserPreferences]:
+        """Настройки пользователя"""
+        return self._prefs.get(user_id)
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика индекса"""
+        return {
+            **self.stats,
+            "users": len(self._prefs),
+            "users_all_symbols": len(self._any_symbol),
+            "users_all_strategies": len(self._any_strategy),
+            "symbol_keys": len(self._by_symbol),
+            "strategy_keys": len(self._by_strategy)
+        }
+
+    def __len__(self) -> int:
+        return len(self._prefs)
+
+    def __repr__(self) -> str:
+        return f"SubscriptionIndex(users={len(self._prefs)}, symbols={len(self._by_symbol)})"
+
+
+__all__ = ["SubscriptionIndex", "UserPreferences", "normalize_strategy"]
+
+logger.info("✅ SubscriptionIndex module loaded")
@@ -106,12 +106,14 @@ async def get_database_health() -> Dict[str, Any]:
 try:
     from .models.market_data import MarketDataCandle, CandleInterval
     from .repositories.market_data_repository import MarketDataRepository
+    from .repositories.signal_outcome_repository import SignalOutcomeRepository
+    from .repositories.price_alert_repository import PriceAlertRepository
+    from .repositories.signal_claim_repository import SignalClaimRepository
     
     # ✅ Алиас для обратной совместимости
     CandleRepository = MarketDataRepository
     
     # Future imports will be added here as modules are created
-    # from .repositories.signal_repository import SignalRepository
     # from .repositories.user_repository import UserRepository
     
     __all__ = [
@@ -131,6 +133,9 @@ try:
         # Repositories  
         "MarketDataRepository",
         "CandleRepository",  # ✅ Алиас для обратной совместимости
+        "SignalOutcomeRepository",
+        "PriceAlertRepository",
+        "SignalClaimRepository",
         
         # Connection management
         "PostgreSQLManager"
@@ -0,0 +1,40 @@
+-- Description: Create orchestrator_nodes and symbol_leases tables for sharded multi-node strategy orchestration
+-- Version: 1.0.0
+-- Author: Trading Bot Team
+-- Created: 2025-01-15
+
+-- Registry of live orchestrator nodes (heartbeat-based membership)
+CREATE TABLE IF NOT EXISTS orchestrator_nodes (
+    node_id VARCHAR(128) PRIMARY KEY,
+    hostname VARCHAR(255),
+    process_id INTEGER,
+
+    -- Lease timestamps
+    started_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    last_heartbeat TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    lease_expires_at TIMESTAMPTZ NOT NULL,
+
+    -- Metadata
+    metadata JSONB
+);
+
+COMMENT ON TABLE orchestrator_nodes IS 'Live StrategyOrchestrator nodes; a node is alive while lease_expires_at > NOW()';
+COMMENT ON COLUMN orchestrator_nodes.lease_expires_at IS 'Node is considered dead after this timestamp unless it renews its heartbeat';
+
+CREATE INDEX IF NOT EXISTS idx_orchestrator_nodes_lease_expires_at
+    ON orchestrator_nodes (lease_expires_at);
+
+-- Per-symbol ownership leases (guarantees a symbol is analyzed by a single node)
+CREATE TABLE IF NOT EXISTS symbol_leases (
+    symbol VARCHAR(20) PRIMARY KEY,
+    node_id VARCHAR(128) NOT NULL,
+    lease_expires_at TIMESTAMPTZ NOT NULL,
+    acquired_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+COMMENT ON TABLE symbol_leases IS 'Symbol ownership leases for sharded orchestration (consistent hashing + lease)';
+COMMENT ON COLUMN symbol_leases.node_id IS 'Owner node (orchestrator_nodes.node_id)';
+
+CREATE INDEX IF NOT EXISTS idx_symbol_leases_node_id
+    ON symbol_leases (node_id);
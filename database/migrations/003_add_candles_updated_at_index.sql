@@ -0,0 +1,9 @@
+-- Description: Index market_data_candles by (symbol, interval, updated_at) for incremental cache sync
+-- Version: 1.0.0
+-- Author: Trading Bot Team
+-- Created: 2025-02-10
+
+-- Watermark queries of the local candle cache (backtesting/candle_cache.py):
+-- MAX(updated_at) and rows changed since the last sync per symbol/interval
+CREATE INDEX IF NOT EXISTS idx_candles_symbol_interval_updated_at
+    ON market_data_candles (symbol, interval, updated_at);
@@ -0,0 +1,56 @@
+-- Description: Create signal_outcomes table for live forward-test tracking of sent signals
+-- Version: 1.0.0
+-- Author: Trading Bot Team
+-- Created: 2025-02-20
+
+-- One row per signal sent by SignalManager: opened with status 'open',
+-- filled when a 1m bar reaches the entry price, resolved by core/outcome_tracker.py
+-- when a later bar touches SL/TP or the signal expires
+CREATE TABLE IF NOT EXISTS signal_outcomes (
+    id BIGSERIAL PRIMARY KEY,
+    signal_id VARCHAR(96) NOT NULL UNIQUE,
+
+    -- Signal
+    symbol VARCHAR(20) NOT NULL,
+    strategy VARCHAR(64) NOT NULL,
+    side VARCHAR(4) NOT NULL CHECK (side IN ('BUY', 'SELL')),
+    signal_type VARCHAR(16),
+    strength DECIMAL(6,4),
+    entry_price DECIMAL(20,8) NOT NULL,
+    stop_loss DECIMAL(20,8),
+    take_profit DECIMAL(20,8),
+    opened_at TIMESTAMPTZ NOT NULL,
+    expires_at TIMESTAMPTZ,
+
+    -- Outcome
+    status VARCHAR(16) NOT NULL DEFAULT 'open'
+        CHECK (status IN ('open', 'take_profit', 'stop_loss', 'expired', 'not_filled')),
+    filled_at TIMESTAMPTZ,
+    exit_price DECIMAL(20,8),
+    resolved_at TIMESTAMPTZ,
+    pnl_percent DECIMAL(12,6),
+    r_multiple DECIMAL(12,6),
+    bars_held INTEGER,
+
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+COMMENT ON TABLE signal_outcomes IS 'Live outcomes of sent signals (hit SL, hit TP, expired or never filled)';
+COMMENT ON COLUMN signal_outcomes.filled_at IS 'Open time of the 1m bar that reached entry_price (NULL = entry pending)';
+COMMENT ON COLUMN signal_outcomes.r_multiple IS 'Result in units of initial risk |entry - stop_loss|';
+
+-- Open signals are reloaded on restart
+CREATE INDEX IF NOT EXISTS idx_signal_outcomes_open
+    ON signal_outcomes (symbol)
+    WHERE status = 'open';
+
+-- Per-strategy performance queries
+CREATE INDEX IF NOT EXISTS idx_signal_outcomes_strategy_resolved
+    ON signal_outcomes (strategy, resolved_at DESC);
+
+DROP TRIGGER IF EXISTS tr_signal_outcomes_updated_at ON signal_outcomes;
+CREATE TRIGGER tr_signal_outcomes_updated_at
+    BEFORE UPDATE ON signal_outcomes
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
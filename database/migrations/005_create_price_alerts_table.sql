@@ -0,0 +1,49 @@
+-- Description: Create price_alerts table for user-defined Telegram price alerts
+-- Version: 1.0.0
+-- Author: Trading Bot Team
+-- Created: 2025-03-04
+
+-- One row per /alert set by a bot user. Every alert is stored as a single
+-- threshold: 'above' fires when price >= threshold_price, 'below' when
+-- price <= threshold_price. Level-proximity alerts keep the D1 level they
+-- were derived from in level_price. Active alerts are loaded into
+-- core/price_alerts.py at startup and deactivated once triggered.
+CREATE TABLE IF NOT EXISTS price_alerts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL,
+    symbol VARCHAR(20) NOT NULL,
+
+    -- Alert definition
+    alert_type VARCHAR(8) NOT NULL CHECK (alert_type IN ('price', 'level')),
+    direction VARCHAR(5) NOT NULL CHECK (direction IN ('above', 'below')),
+    threshold_price DECIMAL(20,8) NOT NULL CHECK (threshold_price > 0),
+    level_price DECIMAL(20,8),
+    distance_percent DECIMAL(8,4),
+
+    -- State
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    triggered_at TIMESTAMPTZ,
+    triggered_price DECIMAL(20,8),
+
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+COMMENT ON TABLE price_alerts IS 'User price alerts: a price threshold or proximity to a D1 level';
+COMMENT ON COLUMN price_alerts.level_price IS 'D1 level the alert was derived from (alert_type = level)';
+COMMENT ON COLUMN price_alerts.distance_percent IS 'Proximity band around level_price in percent (alert_type = level)';
+
+-- Active alerts are loaded on startup
+CREATE INDEX IF NOT EXISTS idx_price_alerts_active
+    ON price_alerts (symbol)
+    WHERE is_active = TRUE;
+
+-- /alert list per user
+CREATE INDEX IF NOT EXISTS idx_price_alerts_user
+    ON price_alerts (user_id, is_active);
+
+DROP TRIGGER IF EXISTS tr_price_alerts_updated_at ON price_alerts;
+CREATE TRIGGER tr_price_alerts_updated_at
+    BEFORE UPDATE ON price_alerts
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,39 @@
+-- Description: Create signal_claims table for persistent, multi-instance signal deduplication
+-- Version: 1.0.0
+-- Author: Trading Bot Team
+-- Created: 2025-03-11
+
+-- One row per (symbol, signal_type, cooldown bucket) that some bot instance
+-- broadcast. bucket_start is claimed_at floored to the SignalManager cooldown,
+-- so INSERT ... ON CONFLICT DO NOTHING is an atomic claim: exactly one
+-- instance gets the row and sends the signal, the others skip it.
+-- core/signal_dedup.py warm-loads recent rows on start so cooldowns and the
+-- hourly rate limit survive restarts.
+CREATE TABLE IF NOT EXISTS signal_claims (
+    id BIGSERIAL PRIMARY KEY,
+    symbol VARCHAR(20) NOT NULL,
+    signal_type VARCHAR(16) NOT NULL,
+    bucket_start TIMESTAMPTZ NOT NULL,
+
+    -- Claim
+    claimed_at TIMESTAMPTZ NOT NULL,
+    strategy VARCHAR(64),
+    strength DECIMAL(6,4),
+    node_id VARCHAR(128) NOT NULL,
+
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+
+    CONSTRAINT uq_signal_claims_bucket UNIQUE (symbol, signal_type, bucket_start)
+);
+
+COMMENT ON TABLE signal_claims IS 'Broadcast signals claimed per (symbol, signal_type, cooldown bucket) across bot instances';
+COMMENT ON COLUMN signal_claims.bucket_start IS 'claimed_at floored to the cooldown window (dedup key)';
+COMMENT ON COLUMN signal_claims.node_id IS 'Instance that won the claim and broadcast the signal';
+
+-- Warm load on start and retention cleanup
+CREATE INDEX IF NOT EXISTS idx_signal_claims_claimed_at
+    ON signal_claims (claimed_at DESC);
+
+-- Cooldown guard in the claim insert (same key, claimed_at > cooldown start)
+CREATE INDEX IF NOT EXISTS idx_signal_claims_key_time
+    ON signal_claims (symbol, signal_type, claimed_at DESC);
@@ -10,11 +10,17 @@ import logging
 from typing import Optional
 
 from .market_data_repository import MarketDataRepository
+from .signal_outcome_repository import SignalOutcomeRepository
+from .price_alert_repository import PriceAlertRepository
+from .signal_claim_repository import SignalClaimRepository
 
 logger = logging.getLogger(__name__)
 
 # Global repository instances (singleton pattern)
 _market_data_repo: Optional[MarketDataRepository] = None
+_signal_outcome_repo: Optional[SignalOutcomeRepository] = None
+_price_alert_repo: Optional[PriceAlertRepository] = None
+_signal_claim_repo: Optional[SignalClaimRepository] = None
 
 async def get_market_data_repository() -> MarketDataRepository:
     """
@@ -35,16 +41,76 @@ async def get_market_data_repository() -> MarketDataRepository:
     
     return _market_data_repo
 
+async def get_signal_outcome_repository() -> SignalOutcomeRepository:
+    """
+    Get or create signal outcome repository instance
+    
+    Returns:
+        SignalOutcomeRepository: Repository instance
+        
+    Raises:
+        RuntimeError: If database is not initialized
+    """
+    global _signal_outcome_repo
+    
+    if _signal_outcome_repo is None:
+        from ..connections import get_connection_manager
+        connection_manager = await get_connection_manager()
+        _signal_outcome_repo = SignalOutcomeRepository(connection_manager)
+    
+    return _signal_outcome_repo
+
+async def get_price_alert_repository() -> PriceAlertRepository:
+    """
+    Get or create price alert repository instance
+    
+    Returns:
+        PriceAlertRepository: Repository instance
+        
+    Raises:
+        RuntimeError: If database is not initialized
+    """
+    global _price_alert_repo
+    
+    if _price_alert_repo is None:
+        from ..connections import get_connection_manager
+        connection_manager = await get_connection_manager()
+        _price_alert_repo = PriceAlertRepository(connection_manager)
+    
+    return _price_alert_repo
+
+async def get_signal_claim_repository() -> SignalClaimRepository:
+    """
+    Get or create signal claim repository instance
+    
+    Returns:
+        SignalClaimRepository: Repository instance
+        
+    Raises:
+        RuntimeError: If database is not initialized
+    """
+    global _signal_claim_repo
+    
+    if _signal_claim_repo is None:
+        from ..connections import get_connection_manager
+        connection_manager = await get_connection_manager()
+        _signal_claim_repo = SignalClaimRepository(connection_manager)
+    
+    return _signal_claim_repo
+
 def close_repositories():
     """Close and cleanup all repository instances"""
-    global _market_data_repo
+    global _market_data_repo, _signal_outcome_repo, _price_alert_repo, _signal_claim_repo
     
-    if _market_data_repo is not None:
+    if (_market_data_repo is not None or _signal_outcome_repo is not None
+            or _price_alert_repo is not None or _signal_claim_repo is not None):
         _market_data_repo = None
+        _signal_outcome_repo = None
+        _price_alert_repo = None
+        _signal_claim_repo = None
         logger.info("Repositories closed and cleaned up")
 
 # Future repository getters will be added here:
-# async def get_signal_repository() -> SignalRepository:
 # async def get_user_repository() -> UserRepository:
 # async def get_strategy_repository() -> StrategyRepository:
 
@@ -52,9 +118,15 @@ def close_repositories():
 __all__ = [
     # Repository classes
     "MarketDataRepository",
+    "SignalOutcomeRepository",
+    "PriceAlertRepository",
+    "SignalClaimRepository",
     
     # Repository getters
     "get_market_data_repository",
+    "get_signal_outcome_repository",
+    "get_price_alert_repository",
+    "get_signal_claim_repository",
     
     # Management functions
     "close_repositories"
@@ -220,26 +220,7 @@ class MarketDataRepository:
             results = await self.db.fetch(query, *params)
             
             # ✅ ИСПРАВЛЕНО: Правильные ключи для анализаторов
-            candles = []
-            for row in results:
-                candles.append({
-                    'id': row['id'],
-                    'symbol': row['symbol'],
-                    'interval': row['interval'],
-                    'open_time': row['open_time'],  # ✅ datetime объект (не string)
-                    'close_time': row['close_time'],  # ✅ datetime объект
-                    'open_price': float(row['open_price']),  # ✅ Правильный ключ
-                    'high_price': float(row['high_price']),  # ✅ Правильный ключ
-                    'low_price': float(row['low_price']),    # ✅ Правильный ключ
-                    'close_price': float(row['close_price']),  # ✅ Правильный ключ
-                    'volume': float(row['volume']),
-                    'quote_volume': float(row['quote_volume']) if row['quote_volume'] else 0,
-                    'number_of_trades': row['number_of_trades'],
-                    'taker_buy_base_volume': float(row['taker_buy_base_volume']) if row['taker_buy_base_volume'] else 0,
-                    'taker_buy_quote_volume': float(row['taker_buy_quote_volume']) if row['taker_buy_quote_volume'] else 0,
-                    'data_source': row['data_source'],
-                    'created_at': row['created_at']  # ✅ datetime объект
-                })
+            candles = [self._row_to_candle(row) for row in results]
             
             self.stats["candles_queried"] += len(candles)
             
@@ -251,6 +232,81 @@ class MarketDataRepository:
             logger.error(f"Failed to get candles: {e}")
             raise QueryError(f"Failed to retrieve candles: {e}")
     
+    async def get_candles_multi(self, symbols: List[str], interval: str,
+                                limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Последние limit свечей интервала для набора символов одним запросом
+
+        Зачем: Фоновый планировщик контекстов обновляет все символы, у которых
+        подошел срок, одним запросом на интервал вместо запроса на символ
+
+        Args:
+            symbols: Trading symbols
+            interval: Candle interval
+            limit: Свечей на символ
+
+        Returns:
+            Dict[str, List[Dict]]: symbol -> свечи по возрастанию open_time
+                                   (формат get_candles; символы без свечей - пустой список)
+        """
+        if not symbols:
+            return {}
+
+        try:
+            # LATERAL: по одному index scan (symbol, interval, open_time DESC) на символ
+            query = """
+                SELECT c.*
+                FROM unnest($1::text[]) AS s(symbol)
+                CROSS JOIN LATERAL (
+                    SELECT
+                        id, symbol, interval, open_time, close_time,
+                        open_price, high_price, low_price, close_price, volume,
+                        quote_volume, number_of_trades, taker_buy_base_volume,
+                        taker_buy_quote_volume, data_source, created_at
+                    FROM market_data_candles
+                    WHERE symbol = s.symbol AND interval = $2
+                    ORDER BY open_time DESC
+                    LIMIT $3
+                ) c
+                ORDER BY c.symbol, c.open_time ASC
+            """
+            upper = [s.upper() for s in symbols]
+            results = await self.db.fetch(query, upper, interval, limit)
+
+            candles: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in upper}
+            for row in results:
+                candles[row['symbol']].append(self._row_to_candle(row))
+
+            self.stats["candles_queried"] += len(results)
+            return candles
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка пакетной загрузки свечей {interval} ({len(symbols)} символов): {e}")
+            raise QueryError(f"Failed to retrieve candles for multiple symbols: {e}")
+
+    @staticmethod
+    def _row_to_candle(row) -> Dict[str, Any]:
+        """Строка market_data_candles -> dict с ключами анализаторов"""
+        return {
+            'id': row['id'],
+            'symbol': row['symbol'],
+            'interval': row['interval'],
+            'open_time': row['open_time'],  # ✅ datetime объект (не string)
+            'close_time': row['close_time'],  # ✅ datetime объект
+            'open_price': float(row['open_price']),  # ✅ Правильный ключ
+            'high_price': float(row['high_price']),  # ✅ Правильный ключ
+            'low_price': float(row['low_price']),    # ✅ Правильный ключ
+            'close_price': float(row['close_price']),  # ✅ Правильный ключ
+            'volume': float(row['volume']),
+            'quote_volume': float(row['quote_volume']) if row['quote_volume'] else 0,
+            'number_of_trades': row['number_of_trades'],
+            'taker_buy_base_volume': float(row['taker_buy_base_volume']) if row['taker_buy_base_volume'] else 0,
+            'taker_buy_quote_volume': float(row['taker_buy_quote_volume']) if row['taker_buy_quote_volume'] else 0,
+            'data_source': row['data_source'],
+            'created_at': row['created_at']  # ✅ datetime объект
+        }
+    
     async def get_latest_candle(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
         """
         Get the most recent candle for symbol/interval
@@ -537,6 +593,167 @@ class MarketDataRepository:
             logger.error(f"❌ Ошибка получения последней свечи: {e}")
             return None
 
+    async def get_latest_prices(self, symbols: List[str], interval: str = "1m") -> Dict[str, float]:
+        """
+        Цена закрытия последней свечи для набора символов одним запросом
+
+        Зачем: Предварительный скрининг цикла сравнивает цены всех символов
+        с уровнями без отдельного запроса на символ
+
+        Args:
+            symbols: Trading symbols
+            interval: Candle interval
+
+        Returns:
+            Dict[str, float]: symbol -> close_price (символы без свечей отсутствуют)
+        """
+        if not symbols:
+            return {}
+
+        try:
+            # LATERAL: по одному index scan (symbol, interval, open_time DESC) на символ
+            query = """
+                SELECT s.symbol, c.close_price
+                FROM unnest($1::text[]) AS s(symbol)
+                CROSS JOIN LATERAL (
+                    SELECT close_price
+                    FROM market_data_candles
+                    WHERE symbol = s.symbol AND interval = $2
+                    ORDER BY open_time DESC
+                    LIMIT 1
+                ) c
+            """
+            results = await self.db.fetch(query, [s.upper() for s in symbols], interval)
+
+            self.stats["candles_queried"] += len(results)
+            return {row['symbol']: float(row['close_price']) for row in results}
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка получения последних цен ({len(symbols)} символов): {e}")
+            raise QueryError(f"Failed to get latest prices: {e}")
+
+    async def get_latest_open_times(self, symbols: List[str], interval: str) -> Dict[str, datetime]:
+        """
+        open_time последней свечи для набора символов одним запросом
+
+        Зачем: Восстановленный из снапшота контекст сверяет водяной знак
+        своих входных данных с БД и пересчитывается, только если он сдвинулся
+
+        Args:
+            symbols: Trading symbols
+            interval: Candle interval
+
+        Returns:
+            Dict[str, datetime]: symbol -> open_time (символы без свечей отсутствуют)
+        """
+        if not symbols:
+            return {}
+
+        try:
+            query = """
+                SELECT s.symbol, c.open_time
+                FROM unnest($1::text[]) AS s(symbol)
+                CROSS JOIN LATERAL (
+                    SELECT open_time
+                    FROM market_data_candles
+                    WHERE symbol = s.symbol AND interval = $2
+                    ORDER BY open_time DESC
+                    LIMIT 1
+                ) c
+            """
+            results = await self.db.fetch(query, [s.upper() for s in symbols], interval)
+            return {row['symbol']: row['open_time'] for row in results}
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка получения последних свечей ({len(symbols)} символов): {e}")
+            raise QueryError(f"Failed to get latest open times: {e}")
+
+    async def get_candles_watermark(self, symbol: str, interval: str) -> Dict[str, Any]:
+        """
+        Водяной знак свечей символа/интервала
+
+        Зачем: Локальный кэш свечей сравнивает его со своим и решает,
+        нужно ли догружать новые или исправленные бары
+
+        Args:
+            symbol: Trading symbol
+            interval: Candle interval
+
+        Returns:
+            Dict: count, earliest_open_time, latest_open_time, latest_updated_at
+        """
+        try:
+            query = """
+                SELECT
+                    COUNT(*) as count,
+                    MIN(open_time) as earliest_open_time,
+                    MAX(open_time) as latest_open_time,
+                    MAX(updated_at) as latest_updated_at
+                FROM market_data_candles
+                WHERE symbol = $1 AND interval = $2
+            """
+            result = await self.db.fetchrow(query, symbol.upper(), interval)
+
+            return {
+                'count': result['count'] if result else 0,
+                'earliest_open_time': result['earliest_open_time'] if result else None,
+                'latest_open_time': result['latest_open_time'] if result else None,
+                'latest_updated_at': result['latest_updated_at'] if result else None
+            }
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка водяного знака {symbol} {interval}: {e}")
+            raise QueryError(f"Failed to get candles watermark: {e}")
+
+    async def get_candles_updated_since(self, symbol: str, interval: str,
+                                        since: datetime) -> List[Dict[str, Any]]:
+        """
+        Свечи, вставленные или измененные после since (по updated_at)
+
+        Args:
+            symbol: Trading symbol
+            interval: Candle interval
+            since: Граница updated_at (исключительно)
+
+        Returns:
+            List[Dict]: OHLCV свечи по возрастанию open_time + updated_at
+        """
+        try:
+            query = """
+                SELECT
+                    open_time, close_time, open_price, high_price,
+                    low_price, close_price, volume, updated_at
+                FROM market_data_candles
+                WHERE symbol = $1 AND interval = $2 AND updated_at > $3
+                ORDER BY open_time ASC
+            """
+            results = await self.db.fetch(query, symbol.upper(), interval, since)
+
+            candles = [
+                {
+                    'open_time': row['open_time'],
+                    'close_time': row['close_time'],
+                    'open_price': float(row['open_price']),
+                    'high_price': float(row['high_price']),
+                    'low_price': float(row['low_price']),
+                    'close_price': float(row['close_price']),
+                    'volume': float(row['volume']),
+                    'updated_at': row['updated_at']
+                }
+                for row in results
+            ]
+
+            self.stats["candles_queried"] += len(candles)
+            return candles
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка получения измененных свечей {symbol} {interval}: {e}")
+            raise QueryError(f"Failed to get updated candles: {e}")
+
     async def check_data_gaps(self, symbol: str, interval: str, 
                              expected_end: datetime) -> Optional[Dict[str, Any]]:
         """
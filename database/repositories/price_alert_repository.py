@@ -0,0 +1,228 @@
+"""
+Price Alert Repository
+
+Repository for the price_alerts table: user-defined alerts on a price
+threshold or on proximity to a D1 level, set via the /alert command.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+from ..connections.postgres import PostgreSQLManager, QueryError
+
+logger = logging.getLogger(__name__)
+
+
+class PriceAlertRepository:
+    """
+    Repository for user price alerts
+
+    Alerts are created active, deactivated in batches when the alert
+    engine fires them, or deleted by their owner.
+    """
+
+    _COLUMNS = """
+        id, user_id, symbol, alert_type, direction, threshold_price,
+        level_price, distance_percent, is_active, triggered_at,
+        triggered_price, created_at
+    """
+
+    def __init__(self, connection_manager: PostgreSQLManager):
+        """
+        Initialize repository with connection manager
+
+        Args:
+            connection_manager: Database connection manager
+        """
+        self.db = connection_manager
+        self.stats = {
+            "alerts_created": 0,
+            "alerts_triggered": 0,
+            "alerts_deleted": 0,
+            "alerts_loaded": 0,
+            "query_errors": 0
+        }
+
+        logger.info("PriceAlertRepository initialized")
+
+    async def create_alert(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a new active alert
+
+        Args:
+            alert: user_id, symbol, alert_type, direction, threshold_price,
+                   level_price, distance_percent
+
+        Returns:
+            Dict: Stored alert including id and created_at
+        """
+        try:
+            query = f"""
+                INSERT INTO price_alerts
+                (user_id, symbol, alert_type, direction, threshold_price,
+                 level_price, distance_percent)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                RETURNING {self._COLUMNS}
+            """
+
+            row = await self.db.fetchrow(
+                query,
+                alert["user_id"], alert["symbol"].upper(), alert["alert_type"],
+                alert["direction"], alert["threshold_price"],
+                alert.get("level_price"), alert.get("distance_percent")
+            )
+
+            self.stats["alerts_created"] += 1
+            return self._row_to_alert(row)
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка создания алерта: {e}")
+            raise QueryError(f"Failed to create price alert: {e}")
+
+    async def get_active_alerts(self, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Active alerts (loaded into the alert engine at startup)
+
+        Args:
+            symbols: Restrict to these symbols (None = all)
+
+        Returns:
+            List[Dict]: Active alerts ordered by id
+        """
+        try:
+            query = f"SELECT {self._COLUMNS} FROM price_alerts WHERE is_active = TRUE"
+            params = []
+            if symbols:
+                query += " AND symbol = ANY($1)"
+                params.append([s.upper() for s in symbols])
+            query += " ORDER BY id ASC"
+
+            rows = await self.db.fetch(query, *params)
+            alerts = [self._row_to_alert(row) for row in rows]
+
+            self.stats["alerts_loaded"] += len(alerts)
+            return alerts
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка загрузки активных алертов: {e}")
+            raise QueryError(f"Failed to load active price alerts: {e}")
+
+    async def get_user_alerts(self, user_id: int, active_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Alerts of one user
+
+        Args:
+            user_id: Telegram user id
+            active_only: Skip triggered alerts
+
+        Returns:
+            List[Dict]: Alerts ordered by symbol, threshold
+        """
+        try:
+            query = f"""
+                SELECT {self._COLUMNS}
+                FROM price_alerts
+                WHERE user_id = $1 AND ($2 = FALSE OR is_active = TRUE)
+                ORDER BY symbol, threshold_price
+            """
+            rows = await self.db.fetch(query, user_id, active_only)
+            return [self._row_to_alert(row) for row in rows]
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка загрузки алертов пользователя {user_id}: {e}")
+            raise QueryError(f"Failed to load user price alerts: {e}")
+
+    async def mark_triggered_many(self, triggered: List[Dict[str, Any]]) -> int:
+        """
+        Deactivate fired alerts in one batch
+
+        Args:
+            triggered: id, triggered_at, triggered_price
+
+        Returns:
+            int: Number of alerts submitted
+        """
+        if not triggered:
+            return 0
+
+        try:
+            query = """
+                UPDATE price_alerts
+                SET is_active = FALSE, triggered_at = $2, triggered_price = $3
+                WHERE id = $1 AND is_active = TRUE
+            """
+
+            await self.db.executemany(query, [
+                (t["id"], t["triggered_at"], t["triggered_price"]) for t in triggered
+            ])
+
+            self.stats["alerts_triggered"] += len(triggered)
+            return len(triggered)
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка сохранения сработавших алертов: {e}")
+            raise QueryError(f"Failed to mark price alerts triggered: {e}")
+
+    async def delete_alert(self, user_id: int, alert_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Delete an alert owned by user_id
+
+        Args:
+            user_id: Telegram user id (owner check)
+            alert_id: Alert id
+
+        Returns:
+            Optional[Dict]: Deleted alert or None if not found
+        """
+        try:
+            query = f"""
+                DELETE FROM price_alerts
+                WHERE id = $1 AND user_id = $2
+                RETURNING {self._COLUMNS}
+            """
+            row = await self.db.fetchrow(query, alert_id, user_id)
+            if row is None:
+                return None
+
+            self.stats["alerts_deleted"] += 1
+            return self._row_to_alert(row)
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка удаления алерта {alert_id}: {e}")
+            raise QueryError(f"Failed to delete price alert: {e}")
+
+    @staticmethod
+    def _row_to_alert(row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "user_id": row["user_id"],
+            "symbol": row["symbol"],
+            "alert_type": row["alert_type"],
+            "direction": row["direction"],
+            "threshold_price": float(row["threshold_price"]),
+            "level_price": float(row["level_price"]) if row["level_price"] is not None else None,
+            "distance_percent": float(row["distance_percent"]) if row["distance_percent"] is not None else None,
+            "is_active": row["is_active"],
+            "triggered_at": row["triggered_at"],
+            "triggered_price": float(row["triggered_price"]) if row["triggered_price"] is not None else None,
+            "created_at": row["created_at"]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get repository statistics"""
+        return dict(self.stats)
+
+    def __repr__(self) -> str:
+        """String representation for debugging"""
+        return (f"PriceAlertRepository(created={self.stats['alerts_created']}, "
+                f"triggered={self.stats['alerts_triggered']}, errors={self.stats['query_errors']})")
+
+
+# Export main components
+__all__ = ["PriceAlertRepository"]
@@ -0,0 +1,180 @@
+"""
+Signal Claim Repository
+
+Repository for the signal_claims table: one row per broadcast signal per
+(symbol, signal_type, cooldown bucket). The unique key turns an insert
+into an atomic claim shared by every bot instance.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Dict, Any
+
+from ..connections.postgres import PostgreSQLManager, QueryError
+
+logger = logging.getLogger(__name__)
+
+
+class SignalClaimRepository:
+    """
+    Repository for signal deduplication claims
+
+    Rows are only inserted (claim) and read back on start (warm load);
+    old rows are removed by retention cleanup.
+    """
+
+    def __init__(self, connection_manager: PostgreSQLManager):
+        """
+        Initialize repository with connection manager
+
+        Args:
+            connection_manager: Database connection manager
+        """
+        self.db = connection_manager
+        self.stats = {
+            "claims_won": 0,
+            "claims_lost": 0,
+            "claims_loaded": 0,
+            "claims_deleted": 0,
+            "query_errors": 0
+        }
+
+        logger.info("SignalClaimRepository initialized")
+
+    async def try_claim(self, claim: Dict[str, Any]) -> bool:
+        """
+        Atomically claim a (symbol, signal_type, bucket_start) slot
+
+        The unique key makes concurrent claims of one bucket race-free.
+        The NOT EXISTS guard also rejects a claim when the same key was
+        claimed after cooldown_start, i.e. in the previous bucket but
+        still within the cooldown.
+
+        Under READ COMMITTED the guard alone does not see a concurrent,
+        uncommitted claim of the neighbouring bucket (two instances on
+        either side of a bucket boundary would both win). Claims of one
+        (symbol, signal_type) therefore take a transaction-scoped advisory
+        lock first: the insert runs after the other claim has committed
+        and its snapshot includes that row.
+
+        Args:
+            claim: symbol, signal_type, bucket_start, cooldown_start,
+                   claimed_at, strategy, strength, node_id
+
+        Returns:
+            bool: True if this call inserted the row, False if the slot
+                  was already claimed (by any instance)
+        """
+        try:
+            query = """
+                INSERT INTO signal_claims
+                (symbol, signal_type, bucket_start, claimed_at, strategy, strength, node_id)
+                SELECT $1, $2, $3, $4, $5, $6, $7
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM signal_claims
+                    WHERE symbol = $1 AND signal_type = $2 AND claimed_at > $8
+                )
+                ON CONFLICT (symbol, signal_type, bucket_start) DO NOTHING
+                RETURNING id
+            """
+
+            async with self.db.get_transaction() as conn:
+                await conn.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext('signal_claims'), hashtext($1 || ':' || $2))",
+                    claim["symbol"], claim["signal_type"]
+                )
+                claim_id = await conn.fetchval(
+                    query,
+                    claim["symbol"], claim["signal_type"], claim["bucket_start"],
+                    claim["claimed_at"], claim.get("strategy"), claim.get("strength"),
+                    claim["node_id"], claim["cooldown_start"]
+                )
+
+            if claim_id is None:
+                self.stats["claims_lost"] += 1
+                return False
+
+            self.stats["claims_won"] += 1
+            return True
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка захвата сигнала {claim.get('symbol')}: {e}")
+            raise QueryError(f"Failed to claim signal: {e}")
+
+    async def get_claims_since(self, since: datetime) -> List[Dict[str, Any]]:
+        """
+        Claims made after a point in time (warm load)
+
+        Args:
+            since: Lower bound for claimed_at
+
+        Returns:
+            List[Dict]: Claims ordered by claimed_at ascending
+        """
+        try:
+            query = """
+                SELECT symbol, signal_type, bucket_start, claimed_at, strategy, strength, node_id
+                FROM signal_claims
+                WHERE claimed_at >= $1
+                ORDER BY claimed_at ASC
+            """
+
+            rows = await self.db.fetch(query, since)
+            claims = [
+                {
+                    "symbol": row["symbol"],
+                    "signal_type": row["signal_type"],
+                    "bucket_start": row["bucket_start"],
+                    "claimed_at": row["claimed_at"],
+                    "strategy": row["strategy"],
+                    "strength": float(row["strength"]) if row["strength"] is not None else None,
+                    "node_id": row["node_id"]
+                }
+                for row in rows
+            ]
+
+            self.stats["claims_loaded"] += len(claims)
+            return claims
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка загрузки недавних сигналов: {e}")
+            raise QueryError(f"Failed to load signal claims: {e}")
+
+    async def delete_older_than(self, cutoff: datetime) -> int:
+        """
+        Retention cleanup
+
+        Args:
+            cutoff: Delete claims with claimed_at before this time
+
+        Returns:
+            int: Number of deleted rows
+        """
+        try:
+            result = await self.db.execute(
+                "DELETE FROM signal_claims WHERE claimed_at < $1", cutoff
+            )
+            deleted = int(result.split()[-1]) if result else 0
+
+            self.stats["claims_deleted"] += deleted
+            return deleted
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка очистки старых сигналов: {e}")
+            raise QueryError(f"Failed to delete old signal claims: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get repository statistics"""
+        return dict(self.stats)
+
+    def __repr__(self) -> str:
+        """String representation for debugging"""
+        return (f"SignalClaimRepository(won={self.stats['claims_won']}, "
+                f"lost={self.stats['claims_lost']}, errors={self.stats['query_errors']})")
+
+
+# Export main components
+__all__ = ["SignalClaimRepository"]
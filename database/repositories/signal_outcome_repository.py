@@ -0,0 +1,271 @@
+"""
+Signal Outcome Repository
+
+Repository for the signal_outcomes table: sent signals with their
+SL/TP levels and the live outcome resolved from subsequent 1m candles.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Dict, Any
+
+from ..connections.postgres import PostgreSQLManager, QueryError
+
+logger = logging.getLogger(__name__)
+
+
+class SignalOutcomeRepository:
+    """
+    Repository for live signal outcomes
+
+    Rows are inserted as 'open' when a signal is sent, get filled_at when
+    a bar reaches the entry price and are updated once when the outcome
+    tracker resolves them (take_profit / stop_loss / expired / not_filled).
+    """
+
+    def __init__(self, connection_manager: PostgreSQLManager):
+        """
+        Initialize repository with connection manager
+
+        Args:
+            connection_manager: Database connection manager
+        """
+        self.db = connection_manager
+        self.stats = {
+            "outcomes_opened": 0,
+            "outcomes_filled": 0,
+            "outcomes_resolved": 0,
+            "outcomes_queried": 0,
+            "query_errors": 0
+        }
+
+        logger.info("SignalOutcomeRepository initialized")
+
+    async def insert_open(self, outcome: Dict[str, Any]) -> bool:
+        """
+        Insert an open signal (idempotent by signal_id)
+
+        Args:
+            outcome: signal_id, symbol, strategy, side, signal_type, strength,
+                     entry_price, stop_loss, take_profit, opened_at, expires_at,
+                     filled_at
+
+        Returns:
+            bool: True if stored successfully
+        """
+        try:
+            query = """
+                INSERT INTO signal_outcomes
+                (signal_id, symbol, strategy, side, signal_type, strength,
+                 entry_price, stop_loss, take_profit, opened_at, expires_at, filled_at)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                ON CONFLICT (signal_id) DO NOTHING
+            """
+
+            await self.db.execute(
+                query,
+                outcome["signal_id"], outcome["symbol"], outcome["strategy"],
+                outcome["side"], outcome.get("signal_type"), outcome.get("strength"),
+                outcome["entry_price"], outcome.get("stop_loss"), outcome.get("take_profit"),
+                outcome["opened_at"], outcome.get("expires_at"), outcome.get("filled_at")
+            )
+
+            self.stats["outcomes_opened"] += 1
+            return True
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка сохранения открытого сигнала: {e}")
+            return False
+
+    async def mark_filled_many(self, fills: List[Dict[str, Any]]) -> int:
+        """
+        Store entry fills in one batch
+
+        Args:
+            fills: signal_id, filled_at
+
+        Returns:
+            int: Number of fills submitted
+        """
+        if not fills:
+            return 0
+
+        try:
+            query = """
+                UPDATE signal_outcomes
+                SET filled_at = $2
+                WHERE signal_id = $1 AND status = 'open' AND filled_at IS NULL
+            """
+
+            await self.db.executemany(query, [(f["signal_id"], f["filled_at"]) for f in fills])
+
+            self.stats["outcomes_filled"] += len(fills)
+            return len(fills)
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка сохранения входов сигналов: {e}")
+            raise QueryError(f"Failed to mark signal outcomes filled: {e}")
+
+    async def resolve_many(self, outcomes: List[Dict[str, Any]]) -> int:
+        """
+        Store resolved outcomes in one batch
+
+        Only rows still 'open' are updated, so a repeated resolve is a no-op.
+
+        Args:
+            outcomes: signal_id, status, exit_price, resolved_at,
+                      pnl_percent, r_multiple, bars_held
+
+        Returns:
+            int: Number of outcomes submitted
+        """
+        if not outcomes:
+            return 0
+
+        try:
+            query = """
+                UPDATE signal_outcomes
+                SET status = $2,
+                    exit_price = $3,
+                    resolved_at = $4,
+                    pnl_percent = $5,
+                    r_multiple = $6,
+                    bars_held = $7
+                WHERE signal_id = $1 AND status = 'open'
+            """
+
+            await self.db.executemany(query, [
+                (
+                    o["signal_id"], o["status"], o["exit_price"], o["resolved_at"],
+                    o["pnl_percent"], o.get("r_multiple"), o.get("bars_held")
+                )
+                for o in outcomes
+            ])
+
+            self.stats["outcomes_resolved"] += len(outcomes)
+            return len(outcomes)
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка сохранения исходов сигналов: {e}")
+            raise QueryError(f"Failed to resolve signal outcomes: {e}")
+
+    async def get_open_outcomes(self, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Open signals (restored into the tracker after restart)
+
+        Args:
+            symbols: Restrict to these symbols (None = all)
+
+        Returns:
+            List[Dict]: Open rows ordered by opened_at
+        """
+        try:
+            query = """
+                SELECT signal_id, symbol, strategy, side, signal_type, strength,
+                       entry_price, stop_loss, take_profit, opened_at, expires_at,
+                       filled_at
+                FROM signal_outcomes
+                WHERE status = 'open'
+            """
+            params = []
+            if symbols:
+                query += " AND symbol = ANY($1)"
+                params.append([s.upper() for s in symbols])
+            query += " ORDER BY opened_at ASC"
+
+            rows = await self.db.fetch(query, *params)
+
+            outcomes = [
+                {
+                    "signal_id": row["signal_id"],
+                    "symbol": row["symbol"],
+                    "strategy": row["strategy"],
+                    "side": row["side"],
+                    "signal_type": row["signal_type"],
+                    "strength": float(row["strength"]) if row["strength"] is not None else None,
+                    "entry_price": float(row["entry_price"]),
+                    "stop_loss": float(row["stop_loss"]) if row["stop_loss"] is not None else None,
+                    "take_profit": float(row["take_profit"]) if row["take_profit"] is not None else None,
+                    "opened_at": row["opened_at"],
+                    "expires_at": row["expires_at"],
+                    "filled_at": row["filled_at"]
+                }
+                for row in rows
+            ]
+
+            self.stats["outcomes_queried"] += len(outcomes)
+            return outcomes
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка загрузки открытых сигналов: {e}")
+            raise QueryError(f"Failed to load open signal outcomes: {e}")
+
+    async def get_strategy_summary(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Aggregated resolved outcomes per strategy
+
+        Args:
+            since: Only outcomes resolved after this time (None = all time)
+
+        Returns:
+            List[Dict]: strategy, resolved, take_profit, stop_loss, expired,
+                        not_filled, hit_rate, avg_pnl_percent, avg_r_multiple
+                        (hit rate and averages over filled signals only)
+        """
+        try:
+            query = """
+                SELECT
+                    strategy,
+                    COUNT(*) AS resolved,
+                    COUNT(*) FILTER (WHERE status = 'take_profit') AS take_profit,
+                    COUNT(*) FILTER (WHERE status = 'stop_loss') AS stop_loss,
+                    COUNT(*) FILTER (WHERE status = 'expired') AS expired,
+                    COUNT(*) FILTER (WHERE status = 'not_filled') AS not_filled,
+                    AVG(pnl_percent) AS avg_pnl_percent,
+                    AVG(r_multiple) AS avg_r_multiple
+                FROM signal_outcomes
+                WHERE status <> 'open' AND ($1::timestamptz IS NULL OR resolved_at > $1)
+                GROUP BY strategy
+                ORDER BY strategy
+            """
+            rows = await self.db.fetch(query, since)
+
+            return [
+                {
+                    "strategy": row["strategy"],
+                    "resolved": row["resolved"],
+                    "take_profit": row["take_profit"],
+                    "stop_loss": row["stop_loss"],
+                    "expired": row["expired"],
+                    "not_filled": row["not_filled"],
+                    "hit_rate": (
+                        row["take_profit"] / (row["resolved"] - row["not_filled"]) * 100
+                        if row["resolved"] > row["not_filled"] else 0.0
+                    ),
+                    "avg_pnl_percent": float(row["avg_pnl_percent"] or 0),
+                    "avg_r_multiple": float(row["avg_r_multiple"]) if row["avg_r_multiple"] is not None else None
+                }
+                for row in rows
+            ]
+
+        except Exception as e:
+            self.stats["query_errors"] += 1
+            logger.error(f"❌ Ошибка сводки исходов по стратегиям: {e}")
+            raise QueryError(f"Failed to get strategy outcome summary: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get repository statistics"""
+        return dict(self.stats)
+
+    def __repr__(self) -> str:
+        """String representation for debugging"""
+        return (f"SignalOutcomeRepository(opened={self.stats['outcomes_opened']}, "
+                f"resolved={self.stats['outcomes_resolved']}, errors={self.stats['query_errors']})")
+
+
+# Export main components
+__all__ = ["SignalOutcomeRepository"]
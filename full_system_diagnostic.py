@@ -32,6 +32,7 @@ sys.path.insert(0, '/opt/render/project/src')
 from config import Config
 from database import initialize_database, close_database
 from database.repositories import get_market_data_repository
+from backtesting.candle_cache import CachedCandleRepository
 
 # Стратегии
 from strategies import (
@@ -54,9 +55,10 @@ logger = logging.getLogger(__name__)
 class SystemDiagnostics:
     """🔬 Полная диагностика торговой системы"""
     
-    def __init__(self):
+    def __init__(self, candle_cache_dir: Optional[str] = None):
         self.repository = None
         self.ta_context_manager = None
+        self.candle_cache_dir = candle_cache_dir
         
         # Статистика
         self.stats = {
@@ -91,13 +93,19 @@ class SystemDiagnostics:
             # Repository
             print("\n📦 Создание Repository...")
             self.repository = await get_market_data_repository()
+            if self.candle_cache_dir:
+                self.repository = CachedCandleRepository(self.repository, self.candle_cache_dir)
+                print(f"💾 Свечи читаются из локального кэша: {self.candle_cache_dir}")
             print("✅ Repository создан")
             
             # TechnicalAnalysisContextManager
             print("\n📈 Инициализация TechnicalAnalysisContextManager...")
             self.ta_context_manager = TechnicalAnalysisContextManager(
                 repository=self.repository,
-                auto_start_background_updates=False  # Без фона для теста
+                auto_start_background_updates=False,  # Без фона для теста
+                max_contexts=Config.TA_MAX_CONTEXTS,
+                memory_budget_mb=Config.TA_MEMORY_BUDGET_MB,
+                pinned_symbols=Config.get_production_symbols()
             )
             print("✅ TechnicalAnalysisContextManager создан")
             
@@ -515,6 +523,7 @@ async def main():
     parser.add_argument("--quick", action="store_true", help="Быстрый тест (5 символов)")
     parser.add_argument("--symbol", type=str, help="Тест одного символа")
     parser.add_argument("--cycles", type=int, default=1, help="Количество циклов")
+    parser.add_argument("--candle-cache", type=str, help="Директория локального кэша свечей")
     
     args = parser.parse_args()
     
@@ -526,7 +535,7 @@ async def main():
         symbols = Config.get_bybit_symbols()[:5]
     
     # Запускаем диагностику
-    diagnostics = SystemDiagnostics()
+    diagnostics = SystemDiagnostics(candle_cache_dir=args.candle_cache)
     await diagnostics.run_full_diagnostic(symbols=symbols, cycles=args.cycles)
 
 
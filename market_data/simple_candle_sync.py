@@ -19,7 +19,7 @@ Version: 2.0 - Улучшенная догрузка истории
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass
 import traceback
 
@@ -96,6 +96,9 @@ class SimpleCandleSync:
         self.sync_tasks: List[asyncio.Task] = []
         self.is_running = False
         
+        # Слушатели новых свечей (например SignalOutcomeTracker)
+        self.candle_listeners: List[Callable] = []
+        
         # Статистика
         self.stats = {
             "start_time": None,
@@ -560,7 +563,7 @@ class SimpleCandleSync:
                 if response.get('result', {}).get('list'):
                     raw_candles = response['result']['list']
                     saved = await self._save_candles_batch(
-                        symbol, interval, raw_candles
+                        symbol, interval, raw_candles, notify_listeners=True
                     )
                     
                     if saved > 0:
@@ -578,7 +581,7 @@ class SimpleCandleSync:
         return synced_count
     
     async def _save_candles_batch(self, symbol: str, interval: str, 
-                                  raw_candles: List) -> int:
+                                  raw_candles: List, notify_listeners: bool = False) -> int:
         """
         Парсит и сохраняет батч свечей
         
@@ -586,6 +589,8 @@ class SimpleCandleSync:
             symbol: Символ
             interval: Интервал
             raw_candles: Сырые данные от Bybit
+            notify_listeners: Передать свечи слушателям (только живая синхронизация;
+                              история и заполнение пропусков идут от новых к старым)
             
         Returns:
             Количество сохраненных свечей
@@ -594,6 +599,7 @@ class SimpleCandleSync:
             from database.models.market_data import MarketDataCandle
             
             saved_count = 0
+            saved_candles = []
             
             for raw_candle in raw_candles:
                 try:
@@ -609,17 +615,45 @@ class SimpleCandleSync:
                     
                     if success:
                         saved_count += 1
+                        saved_candles.append(candle)
                     
                 except Exception as e:
                     logger.warning(f"⚠️ Ошибка парсинга свечи [{symbol}] {interval}: {e}")
                     continue
             
+            # Bybit отдает свечи от новой к старой
+            if notify_listeners and saved_candles and self.candle_listeners:
+                saved_candles.sort(key=lambda c: c.open_time)
+                await self._notify_candle_listeners(symbol, interval, saved_candles)
+            
             return saved_count
             
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения батча: {e}")
             return 0
     
+    def add_candle_listener(self, callback: Callable):
+        """
+        Добавить слушателя сохраненных свечей
+        
+        Args:
+            callback: Async функция, вызывается после сохранения свечей живой синхронизации
+                     Сигнатура: async def callback(symbol: str, interval: str, candles: List[MarketDataCandle])
+                     (свечи по возрастанию времени, последняя может быть незакрытой;
+                     загрузка истории и заполнение пропусков слушателям не передаются)
+        """
+        if callback not in self.candle_listeners:
+            self.candle_listeners.append(callback)
+            logger.info(f"📡 Добавлен слушатель свечей (всего: {len(self.candle_listeners)})")
+    
+    async def _notify_candle_listeners(self, symbol: str, interval: str, candles: List):
+        """Передать сохраненные свечи слушателям (ошибка слушателя не ломает синхронизацию)"""
+        for callback in self.candle_listeners:
+            try:
+                await callback(symbol, interval, candles)
+            except Exception as e:
+                logger.error(f"❌ Ошибка слушателя свечей [{symbol}] {interval}: {e}")
+    
     async def stop(self):
         """Остановка всех задач синхронизации"""
         try:
@@ -20,7 +20,7 @@ Version: 2.0 - Улучшенная догрузка истории
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from dataclasses import dataclass
 from enum import Enum
 
@@ -135,6 +135,9 @@ class SimpleFuturesSync:
         self._sync_task: Optional[asyncio.Task] = None
         self._tasks: List[asyncio.Task] = []
         
+        # Слушатели новых свечей (например SignalOutcomeTracker)
+        self.candle_listeners: List[Callable] = []
+        
         # Расписание синхронизации для разных интервалов
         self.schedule: List[FuturesSyncSchedule] = [
             FuturesSyncSchedule(interval="1m", sync_period_minutes=1, lookback_candles=500),
@@ -622,6 +625,11 @@ class SimpleFuturesSync:
                 
                 total_saved = inserted + updated
                 logger.info(f"✅ {symbol} {interval}: синхронизировано {total_saved} свечей (insert={inserted}, update={updated})")
+                
+                if self.candle_listeners:
+                    candle_objects.sort(key=lambda c: c.open_time)
+                    await self._notify_candle_listeners(symbol, interval, candle_objects)
+                
                 return total_saved
             
             return 0
@@ -630,6 +638,28 @@ class SimpleFuturesSync:
             logger.error(f"❌ Ошибка синхронизации {symbol} {interval}: {e}")
             raise
     
+    def add_candle_listener(self, callback: Callable):
+        """
+        Добавить слушателя сохраненных свечей
+        
+        Args:
+            callback: Async функция, вызывается после сохранения свечей живой синхронизации
+                     Сигнатура: async def callback(symbol: str, interval: str, candles: List[MarketDataCandle])
+                     (свечи по возрастанию времени; загрузка истории и заполнение
+                     пропусков слушателям не передаются)
+        """
+        if callback not in self.candle_listeners:
+            self.candle_listeners.append(callback)
+            logger.info(f"📡 Добавлен слушатель свечей (всего: {len(self.candle_listeners)})")
+    
+    async def _notify_candle_listeners(self, symbol: str, interval: str, candles: List):
+        """Передать сохраненные свечи слушателям (ошибка слушателя не ломает синхронизацию)"""
+        for callback in self.candle_listeners:
+            try:
+                await callback(symbol, interval, candles)
+            except Exception as e:
+                logger.error(f"❌ Ошибка слушателя свечей [{symbol}] {interval}: {e}")
+    
     async def _fetch_yfinance_data(
         self, 
         symbol: str, 
@@ -16,6 +16,9 @@
 - BreakoutStrategy: Стратегия торговли пробоев уровней
 - BounceStrategy: Стратегия торговли отбоев от уровней (БСУ-БПУ модель)
 - FalseBreakoutStrategy: Стратегия торговли ложных пробоев
+- FeatureCache: Общий кэш признаков (символ, цикл) для всех стратегий
+- StrategyState: Состояние стратегии на символ (cooldown, история, счетчики)
+- SymbolScreen: Векторизованный отбор символов у уровней перед анализом
 - StrategyOrchestrator: Координатор выполнения всех стратегий
 
 Планируется:
@@ -38,6 +41,15 @@ from .breakout_strategy import BreakoutStrategy
 from .bounce_strategy import BounceStrategy
 from .false_breakout_strategy import FalseBreakoutStrategy
 
+# Общий кэш признаков цикла
+from .feature_cache import FeatureCache
+
+# Состояние стратегий по символам
+from .strategy_state import StrategyState, StrategyStateStore
+
+# Предварительный скрининг символов
+from .symbol_screen import SymbolScreen, ScreenResult
+
 # Координатор стратегий
 from .strategy_orchestrator import StrategyOrchestrator
 
@@ -60,6 +72,17 @@ __all__ = [
     "BounceStrategy",
     "FalseBreakoutStrategy",
     
+    # Кэш признаков
+    "FeatureCache",
+    
+    # Состояние стратегий
+    "StrategyState",
+    "StrategyStateStore",
+    
+    # Скрининг символов
+    "SymbolScreen",
+    "ScreenResult",
+    
     # Координатор
     "StrategyOrchestrator",
     
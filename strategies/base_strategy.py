@@ -20,6 +20,8 @@ from enum import Enum
 from dataclasses import dataclass, field
 import traceback
 
+from .strategy_state import StrategyState
+
 logger = logging.getLogger(__name__)
 
 
@@ -206,6 +208,12 @@ class BaseStrategy(ABC):
     1. Orchestrator получает данные из БД (1 раз для всех стратегий)
     2. Orchestrator вызывает analyze_with_data() для каждой стратегии
     3. Стратегия анализирует готовые данные и возвращает сигнал
+    4. Orchestrator фильтрует сигнал через accept_signal() (cooldown, rate limit)
+    
+    Экземпляр стратегии - вычислитель без состояния символа: cooldown,
+    история и счетчики живут в StrategyState, которое оркестратор держит
+    на каждую пару (стратегия, символ). Один экземпляр можно вызывать
+    для разных символов параллельно.
     
     Example:
         ```python
@@ -217,7 +225,9 @@ class BaseStrategy(ABC):
                 candles_5m: List[Dict],
                 candles_1h: List[Dict],
                 candles_1d: List[Dict],
-                ta_context: Optional[TechnicalAnalysisContext] = None
+                ta_context: Optional[TechnicalAnalysisContext] = None,
+                features: Optional[FeatureCache] = None,
+                state: Optional[StrategyState] = None
             ) -> Optional[TradingSignal]:
                 # Анализируем готовые данные
                 if not candles_1m:
@@ -231,7 +241,8 @@ class BaseStrategy(ABC):
                         strength=0.8,
                         confidence=0.7,
                         current_price=current_price,
-                        reasons=["Reason 1", "Reason 2"]
+                        reasons=["Reason 1", "Reason 2"],
+                        symbol=symbol
                     )
                 
                 return None
@@ -272,9 +283,9 @@ class BaseStrategy(ABC):
         self.max_signals_per_hour = max_signals_per_hour
         self.enable_risk_management = enable_risk_management
         
-        # История сигналов и управление частотой
-        self.signal_history: List[TradingSignal] = []
-        self.last_signals_by_type: Dict[SignalType, datetime] = {}
+        # История сигналов и cooldown для прямых вызовов (run_analysis);
+        # оркестратор передает свое StrategyState на каждый символ
+        self.default_state = StrategyState(strategy_name=name, symbol=self.symbol)
         
         # Статистика стратегии
         self.stats = {
@@ -313,7 +324,9 @@ class BaseStrategy(ABC):
         candles_5m: List[Dict],
         candles_1h: List[Dict],
         candles_1d: List[Dict],
-        ta_context: Optional[Any] = None
+        ta_context: Optional[Any] = None,
+        features: Optional[Any] = None,
+        state: Optional[StrategyState] = None
     ) -> Optional[TradingSignal]:
         """
         🔥 НОВЫЙ МЕТОД v3.0 - Анализ с готовыми данными
@@ -328,20 +341,24 @@ class BaseStrategy(ABC):
             candles_1h: Часовые свечи (последние 24)
             candles_1d: Дневные свечи (последние 180)
             ta_context: Технический контекст (кэшированный)
+            features: FeatureCache символа на текущий цикл - общий для всех
+                стратегий, признаки считаются один раз (None = прямой вызов)
+            state: StrategyState пары (стратегия, символ) - сюда пишутся
+                счетчики анализа (None = счетчики экземпляра, прямой вызов)
+            
+        Метод не должен менять атрибуты экземпляра: символ берется из
+        аргумента symbol, изменяемые данные - из state.
             
         Returns:
             TradingSignal если есть сигнал, иначе None
             
         Example:
             ```python
-            async def analyze_with_data(self, symbol, candles_1m, ...):
+            async def analyze_with_data(self, symbol, candles_1m, ..., state=None):
                 # Проверяем минимум данных
                 if not candles_1m or len(candles_1m) < 10:
                     return None
                 
-                # Обновляем symbol (если был PLACEHOLDER)
-                self.symbol = symbol
-                
                 # Берем последнюю свечу
                 latest = candles_1m[-1]
                 current_price = float(latest['close'])
@@ -356,7 +373,8 @@ class BaseStrategy(ABC):
                         strength=0.8,
                         confidence=0.7,
                         current_price=current_price,
-                        reasons=[f"Изменение {change:.2f}%"]
+                        reasons=[f"Изменение {change:.2f}%"],
+                        symbol=symbol
                     )
                 
                 return None
@@ -441,7 +459,42 @@ class BaseStrategy(ABC):
     
     # ==================== ФИЛЬТРАЦИЯ И ВАЛИДАЦИЯ ====================
     
-    def _should_send_signal(self, signal: TradingSignal) -> bool:
+    def accept_signal(
+        self,
+        signal: TradingSignal,
+        state: StrategyState,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """
+        Пропустить сигнал через фильтры стратегии по состоянию символа
+        
+        Вызывается оркестратором после analyze_with_data(). Прошедший
+        сигнал записывается в историю state (cooldown, rate limit).
+        Risk management здесь не применяется - SL/TP считают сами стратегии.
+        
+        Args:
+            signal: Сигнал из analyze_with_data()
+            state: StrategyState пары (стратегия, символ)
+            now: Текущее время (None = datetime.now())
+            
+        Returns:
+            bool: True если сигнал можно отправлять
+        """
+        state.counters["signals_generated"] += 1
+        
+        if not self._should_send_signal(signal, state, now):
+            return False
+        
+        self._add_signal_to_history(signal, state)
+        state.counters["signals_sent"] += 1
+        return True
+    
+    def _should_send_signal(
+        self,
+        signal: TradingSignal,
+        state: Optional[StrategyState] = None,
+        now: Optional[datetime] = None
+    ) -> bool:
         """
         Проверяет, должен ли быть отправлен сигнал
         
@@ -450,31 +503,43 @@ class BaseStrategy(ABC):
         2. Cooldown между сигналами
         3. Rate limiting (макс. сигналов в час)
         4. Валидность сигнала
+        
+        Args:
+            signal: Проверяемый сигнал
+            state: Состояние символа (None = default_state, счетчики в self.stats)
+            now: Текущее время (None = datetime.now())
         """
+        counters = self.stats if state is None else state.counters
+        state = state or self.default_state
+        
         try:
             # Проверка силы сигнала
             if signal.strength < self.min_signal_strength:
-                self.stats["signals_filtered_by_strength"] += 1
+                counters["signals_filtered_by_strength"] += 1
                 if self.debug_mode:
                     logger.debug(f"🔇 Сигнал отфильтрован по силе: {signal.strength:.2f} < {self.min_signal_strength}")
                 return False
             
             # Проверка cooldown
-            if not self._check_cooldown(signal.signal_type):
-                self.stats["signals_filtered_by_cooldown"] += 1
+            if not self._check_cooldown(signal.signal_type, state, now):
+                counters["signals_filtered_by_cooldown"] += 1
                 if self.debug_mode:
                     logger.debug(f"⏰ Сигнал в cooldown: {signal.signal_type.value}")
                 return False
             
             # Проверка rate limit
-            if not self._check_rate_limit():
-                self.stats["signals_filtered_by_rate_limit"] += 1
+            if not self._check_rate_limit(state, now):
+                counters["signals_filtered_by_rate_limit"] += 1
                 if self.debug_mode:
                     logger.debug(f"🚦 Превышен лимит сигналов в час")
                 return False
             
-            # Проверка валидности и экспирации
-            if not signal.is_valid or signal.is_expired:
+            # Проверка валидности и экспирации (в бэктесте - на время реплея)
+            if now is None:
+                expired = signal.is_expired
+            else:
+                expired = signal.expires_at is not None and now > signal.expires_at
+            if not signal.is_valid or expired:
                 if self.debug_mode:
                     logger.debug(f"❌ Сигнал невалиден или истек")
                 return False
@@ -485,28 +550,35 @@ class BaseStrategy(ABC):
             logger.error(f"❌ Ошибка проверки сигнала: {e}")
             return False
     
-    def _check_cooldown(self, signal_type: SignalType) -> bool:
-        """Проверка cooldown между сигналами одного типа"""
-        last_signal_time = self.last_signals_by_type.get(signal_type)
+    def _check_cooldown(
+        self,
+        signal_type: SignalType,
+        state: Optional[StrategyState] = None,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """Проверка cooldown между сигналами одного типа (в пределах символа state)"""
+        state = state or self.default_state
+        last_signal_time = state.last_signals_by_type.get(signal_type)
         
         if last_signal_time is None:
             return True
         
-        time_since_last = datetime.now() - last_signal_time
+        time_since_last = (now or datetime.now()) - last_signal_time
         return time_since_last >= self.signal_cooldown
     
-    def _check_rate_limit(self) -> bool:
-        """Проверка лимита сигналов в час"""
+    def _check_rate_limit(
+        self,
+        state: Optional[StrategyState] = None,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """Проверка лимита сигналов в час (в пределах символа state)"""
         if self.max_signals_per_hour <= 0:
             return True  # Без ограничений
         
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        recent_signals = [
-            s for s in self.signal_history 
-            if s.timestamp > one_hour_ago
-        ]
+        state = state or self.default_state
+        one_hour_ago = (now or datetime.now()) - timedelta(hours=1)
         
-        return len(recent_signals) < self.max_signals_per_hour
+        return state.signals_since(one_hour_ago) < self.max_signals_per_hour
     
     # ==================== RISK MANAGEMENT ====================
     
@@ -556,20 +628,24 @@ class BaseStrategy(ABC):
     
     # ==================== ИСТОРИЯ И СТАТИСТИКА ====================
     
-    def _add_signal_to_history(self, signal: TradingSignal):
-        """Добавляет сигнал в историю"""
-        self.signal_history.append(signal)
-        self.last_signals_by_type[signal.signal_type] = signal.timestamp
-        
-        # Ограничиваем размер истории
-        max_history = 100
-        if len(self.signal_history) > max_history:
-            self.signal_history = self.signal_history[-max_history:]
+    @property
+    def signal_history(self):
+        """История сигналов прямых вызовов (ограничена MAX_SIGNAL_HISTORY)"""
+        return self.default_state.signal_history
+    
+    @property
+    def last_signals_by_type(self) -> Dict[SignalType, datetime]:
+        """Время последнего сигнала по типу для прямых вызовов"""
+        return self.default_state.last_signals_by_type
+    
+    def _add_signal_to_history(self, signal: TradingSignal, state: Optional[StrategyState] = None):
+        """Добавляет сигнал в историю (история ограничена размером deque)"""
+        (state or self.default_state).record_signal(signal)
     
     def _update_signal_stats(self, signal: TradingSignal):
         """Обновляет статистику сигналов"""
         # Вычисляем скользящие средние
-        recent_signals = self.signal_history[-20:]  # Последние 20 сигналов
+        recent_signals = list(self.signal_history)[-20:]  # Последние 20 сигналов
         
         if recent_signals:
             self.stats["average_signal_strength"] = sum(s.strength for s in recent_signals) / len(recent_signals)
@@ -585,7 +661,8 @@ class BaseStrategy(ABC):
         current_price: float,
         reasons: List[str] = None,
         technical_indicators: Dict[str, Any] = None,
-        market_conditions: Dict[str, Any] = None
+        market_conditions: Dict[str, Any] = None,
+        symbol: Optional[str] = None
     ) -> TradingSignal:
         """
         Помощник для создания торговых сигналов
@@ -598,6 +675,7 @@ class BaseStrategy(ABC):
             reasons: Список причин
             technical_indicators: Технические индикаторы
             market_conditions: Условия рынка
+            symbol: Символ анализа (None = self.symbol экземпляра)
             
         Returns:
             Новый торговый сигнал
@@ -609,7 +687,7 @@ class BaseStrategy(ABC):
             price=current_price,
             timestamp=datetime.now(),
             strategy_name=self.name,
-            symbol=self.symbol,
+            symbol=symbol or self.symbol,
             reasons=reasons or [],
             technical_indicators=technical_indicators or {},
             market_conditions=market_conditions or {}
@@ -728,8 +806,7 @@ class BaseStrategy(ABC):
         }
         
         # Очищаем историю
-        self.signal_history.clear()
-        self.last_signals_by_type.clear()
+        self.default_state.reset()
     
     def __str__(self):
         """Строковое представление стратегии"""
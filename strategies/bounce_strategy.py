@@ -32,6 +32,8 @@ from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 
 from .base_strategy import BaseStrategy, TradingSignal, SignalType, SignalStrength
+from .feature_cache import FeatureCache
+from .strategy_state import StrategyState
 
 logger = logging.getLogger(__name__)
 
@@ -194,7 +196,9 @@ class BounceStrategy(BaseStrategy):
         candles_5m: List[Dict],
         candles_1h: List[Dict],
         candles_1d: List[Dict],
-        ta_context: Optional[Any] = None
+        ta_context: Optional[Any] = None,
+        features: Optional[FeatureCache] = None,
+        state: Optional[StrategyState] = None
     ) -> Optional[TradingSignal]:
         """
         🎯 Анализ с готовыми данными (v3.0)
@@ -215,13 +219,19 @@ class BounceStrategy(BaseStrategy):
             candles_1h: Часовые свечи (последние 24)
             candles_1d: Дневные свечи (последние 180)
             ta_context: Технический контекст
+            features: Общий кэш признаков цикла (None = локальный)
+            state: Состояние пары (стратегия, символ) для счетчиков (None = счетчики экземпляра)
             
         Returns:
             TradingSignal или None
         """
         try:
-            # Обновляем symbol (если был PLACEHOLDER)
-            self.symbol = symbol
+            # Счетчики символа (оркестратор) или экземпляра (прямой вызов)
+            counters = self.strategy_stats if state is None else state.counters
+            
+            # Общий кэш признаков цикла (или локальный при прямом вызове)
+            if features is None:
+                features = FeatureCache(symbol, candles_1m, candles_5m, candles_1h, candles_1d, ta_context)
             
             # Проверка минимальных данных
             if not candles_1h or len(candles_1h) < 10:
@@ -235,8 +245,8 @@ class BounceStrategy(BaseStrategy):
                 return None
             
             # ✅ ИСПРАВЛЕНО: используем 'close_price' вместо 'close'
-            current_price = float(candles_1h[-1]['close_price'])
-            current_time = datetime.now()
+            current_price = features.last_close("1h")
+            current_time = features.now
             
             # Шаг 1: Проверка технического контекста
             if ta_context is None:
@@ -252,19 +262,20 @@ class BounceStrategy(BaseStrategy):
             
             # Шаг 2: Поиск ближайшего сильного уровня
             nearest_level, direction = self._find_nearest_level_for_bounce(
-                ta_context=ta_context,
+                features=features,
                 current_price=current_price
             )
             
             if not nearest_level:
                 return None
             
-            self.strategy_stats["levels_analyzed"] += 1
+            counters["levels_analyzed"] += 1
             
             # Шаг 3: Проверка БСУ для уровня (упрощенная версия)
             has_bsu = self._check_bsu_simple(
                 level=nearest_level,
-                candles_1d=candles_1d
+                candles_1d=candles_1d,
+                now=current_time
             )
             
             if not has_bsu:
@@ -272,12 +283,12 @@ class BounceStrategy(BaseStrategy):
                     logger.debug(f"⚠️ {symbol}: БСУ не найден для уровня {nearest_level.price:.2f}")
                 return None
             
-            self.strategy_stats["bsu_found"] += 1
+            counters["bsu_found"] += 1
             
             # Шаг 4: Проверка БПУ паттернов (упрощенная версия)
             has_bpu_pattern = self._check_bpu_pattern_simple(
                 level=nearest_level,
-                candles_1h=candles_1h,
+                features=features,
                 current_price=current_price
             )
             
@@ -286,15 +297,15 @@ class BounceStrategy(BaseStrategy):
                     logger.debug(f"⚠️ {symbol}: БПУ паттерн не найден")
                 return None
             
-            self.strategy_stats["bpu_patterns_found"] += 1
+            counters["bpu_patterns_found"] += 1
             
             # Шаг 5: Проверка предпосылок для отбоя
             bounce_score, bounce_details = self._check_bounce_preconditions(
                 level=nearest_level,
                 ta_context=ta_context,
-                candles_1h=candles_1h,
-                candles_1d=candles_1d,
-                current_price=current_price
+                features=features,
+                current_price=current_price,
+                counters=counters
             )
             
             if bounce_score < 2:  # Минимум 2 предпосылки
@@ -302,7 +313,7 @@ class BounceStrategy(BaseStrategy):
                     logger.debug(f"⚠️ {symbol}: недостаточно предпосылок: {bounce_score}/5")
                 return None
             
-            self.strategy_stats["setups_found"] += 1
+            counters["setups_found"] += 1
             logger.info(f"✅ {symbol}: Предпосылки для отбоя: {bounce_score}/5")
             
             # Шаг 6: Расчет параметров ордера
@@ -325,10 +336,11 @@ class BounceStrategy(BaseStrategy):
                 direction=direction,
                 order_params=order_params,
                 bounce_details=bounce_details,
-                current_price=current_price
+                current_price=current_price,
+                symbol=symbol
             )
             
-            self.strategy_stats["signals_generated"] += 1
+            counters["signals_generated"] += 1
             
             logger.info(f"✅ {symbol}: Сигнал отбоя создан: {direction} от {nearest_level.price:.2f}")
             
@@ -344,7 +356,7 @@ class BounceStrategy(BaseStrategy):
     
     def _find_nearest_level_for_bounce(
         self,
-        ta_context: Any,
+        features: FeatureCache,
         current_price: float
     ) -> Tuple[Optional[Any], str]:
         """
@@ -356,7 +368,7 @@ class BounceStrategy(BaseStrategy):
         - Близко к текущей цене (< 1%)
         
         Args:
-            ta_context: Технический контекст
+            features: Кэш признаков цикла
             current_price: Текущая цена
             
         Returns:
@@ -364,38 +376,26 @@ class BounceStrategy(BaseStrategy):
         """
         try:
             # Фильтруем по силе и касаниям
-            suitable_levels = [
-                level for level in ta_context.levels_d1
-                if level.strength >= self.min_level_strength and
-                   level.touches >= self.min_level_touches
-            ]
-            
-            if not suitable_levels:
+            if not features.filtered_levels(self.min_level_strength, self.min_level_touches):
                 return None, None
             
-            # Ищем поддержку ниже цены (отбой вверх)
-            supports = [
-                level for level in suitable_levels
-                if level.level_type == "support" and level.price < current_price
-            ]
-            
-            # Ищем сопротивление выше цены (отбой вниз)
-            resistances = [
-                level for level in suitable_levels
-                if level.level_type == "resistance" and level.price > current_price
-            ]
+            # Поддержка ниже цены (отбой вверх), сопротивление выше цены (отбой вниз)
+            nearest_support = features.nearest_level(
+                current_price, "support", self.min_level_strength, self.min_level_touches
+            )
+            nearest_resistance = features.nearest_level(
+                current_price, "resistance", self.min_level_strength, self.min_level_touches
+            )
             
             # Определяем ближайший
             candidates = []
             
-            if supports:
-                nearest_support = min(supports, key=lambda l: abs(l.price - current_price))
+            if nearest_support:
                 distance = abs(nearest_support.price - current_price) / current_price
                 if distance <= self.max_distance_to_level:
                     candidates.append((nearest_support, "up", distance))
             
-            if resistances:
-                nearest_resistance = min(resistances, key=lambda l: abs(l.price - current_price))
+            if nearest_resistance:
                 distance = abs(nearest_resistance.price - current_price) / current_price
                 if distance <= self.max_distance_to_level:
                     candidates.append((nearest_resistance, "down", distance))
@@ -422,7 +422,8 @@ class BounceStrategy(BaseStrategy):
     def _check_bsu_simple(
         self,
         level: Any,
-        candles_1d: List[Dict]
+        candles_1d: List[Dict],
+        now: datetime
     ) -> bool:
         """
         Упрощенная проверка наличия БСУ
@@ -433,6 +434,7 @@ class BounceStrategy(BaseStrategy):
         Args:
             level: Уровень
             candles_1d: Дневные свечи
+            now: Момент анализа
             
         Returns:
             True если БСУ валиден
@@ -440,7 +442,7 @@ class BounceStrategy(BaseStrategy):
         try:
             # Проверяем возраст уровня
             if hasattr(level, 'first_touch') and level.first_touch:
-                age_days = (datetime.now() - level.first_touch).days
+                age_days = (now - level.first_touch).days
                 
                 if age_days <= self.bsu_max_age_days:
                     logger.debug(f"✅ БСУ валиден: возраст {age_days} дней")
@@ -466,7 +468,7 @@ class BounceStrategy(BaseStrategy):
     def _check_bpu_pattern_simple(
         self,
         level: Any,
-        candles_1h: List[Dict],
+        features: FeatureCache,
         current_price: float
     ) -> bool:
         """
@@ -479,35 +481,16 @@ class BounceStrategy(BaseStrategy):
         
         Args:
             level: Уровень
-            candles_1h: Часовые свечи
+            features: Кэш признаков цикла
             current_price: Текущая цена
             
         Returns:
             True если паттерн найден
         """
         try:
-            level_price = level.price
-            
-            # Ищем касания уровня в последних 50 часах
-            touches = []
-            
-            for i, candle in enumerate(candles_1h[-50:]):
-                # ✅ ИСПРАВЛЕНО: используем 'high_price', 'low_price', 'close_price'
-                high = float(candle['high_price'])
-                low = float(candle['low_price'])
-                close = float(candle['close_price'])
-                
-                # Проверяем касание уровня (допуск self.bpu_touch_tolerance)
-                distance_high = abs(high - level_price) / level_price
-                distance_low = abs(low - level_price) / level_price
-                distance_close = abs(close - level_price) / level_price
-                
-                if min(distance_high, distance_low, distance_close) <= self.bpu_touch_tolerance:
-                    touches.append({
-                        'index': i,
-                        'time': candle.get('close_time', datetime.now()),
-                        'close': close
-                    })
+            # Касания уровня в последних 50 часах (допуск self.bpu_touch_tolerance)
+            recent_h1 = features.candles("1h")[-50:]
+            touches = features.level_touches("1h", level.price, self.bpu_touch_tolerance, 50)
             
             # Нужно минимум 2 касания для БПУ-1 и БПУ-2
             if len(touches) < 2:
@@ -516,7 +499,7 @@ class BounceStrategy(BaseStrategy):
             
             # Проверяем что последнее касание недавнее (БПУ-2)
             last_touch = touches[-1]
-            if last_touch['index'] < len(candles_1h[-50:]) - 3:  # Не в последних 3 свечах
+            if last_touch < len(recent_h1) - 3:  # Не в последних 3 свечах
                 logger.debug("⚠️ Последнее касание не недавнее")
                 return False
             
@@ -525,7 +508,7 @@ class BounceStrategy(BaseStrategy):
                 prev_touch = touches[-2]
                 
                 # Расстояние между касаниями в барах
-                bars_between = last_touch['index'] - prev_touch['index']
+                bars_between = last_touch - prev_touch
                 
                 # Должно быть не слишком далеко (в пределах 20 баров)
                 if bars_between <= 20:
@@ -546,9 +529,9 @@ class BounceStrategy(BaseStrategy):
         self,
         level: Any,
         ta_context: Any,
-        candles_1h: List[Dict],
-        candles_1d: List[Dict],
-        current_price: float
+        features: FeatureCache,
+        current_price: float,
+        counters: Optional[Dict[str, int]] = None
     ) -> Tuple[int, Dict[str, Any]]:
         """
         Проверка предпосылок для отбоя
@@ -563,13 +546,13 @@ class BounceStrategy(BaseStrategy):
         Args:
             level: Уровень
             ta_context: Технический контекст
-            candles_1h: Часовые свечи
-            candles_1d: Дневные свечи
+            features: Кэш признаков цикла
             current_price: Текущая цена
             
         Returns:
             Tuple[score (0-5), детали]
         """
+        counters = self.strategy_stats if counters is None else counters
         try:
             score = 0
             details = {}
@@ -586,30 +569,26 @@ class BounceStrategy(BaseStrategy):
                     
                     if atr_exhausted:
                         score += 1
-                        self.strategy_stats["atr_exhausted_entries"] += 1
+                        counters["atr_exhausted_entries"] += 1
                         logger.debug(f"✅ ATR исчерпан: {atr_used*100:.1f}%")
             
             # 2. Дальний ретест (>1 месяца)
             far_retest = False
             if hasattr(level, 'last_touch') and level.last_touch:
-                days_since = (datetime.now() - level.last_touch).days
+                days_since = (features.now - level.last_touch).days
                 far_retest = days_since >= self.far_retest_min_days
                 details["days_since_touch"] = days_since
                 details["far_retest"] = far_retest
                 
                 if far_retest:
                     score += 1
-                    self.strategy_stats["far_retests"] += 1
+                    counters["far_retests"] += 1
                     logger.debug(f"✅ Дальний ретест: {days_since} дней")
             
             # 3. Подход большими барами (проверка по H1)
             big_bars_approach = False
-            if len(candles_1h) >= 5:
-                recent = candles_1h[-5:]
-                
-                # ✅ ИСПРАВЛЕНО: используем 'high_price' и 'low_price'
-                ranges = [float(c['high_price']) - float(c['low_price']) for c in recent]
-                avg_range = sum(ranges) / len(ranges)
+            if len(features.candles("1h")) >= 5:
+                avg_range = features.avg_range("1h", 5)
                 
                 # Получаем ATR для сравнения
                 atr = current_price * 0.02  # По умолчанию 2%
@@ -628,11 +607,8 @@ class BounceStrategy(BaseStrategy):
             
             # 4. Закрытие далеко от уровня
             close_far_from_level = False
-            if candles_1h:
-                # ✅ ИСПРАВЛЕНО: используем 'close_price'
-                last_close = float(candles_1h[-1]['close_price'])
-                distance = abs(last_close - level.price)
-                distance_percent = distance / level.price * 100
+            if features.candles("1h"):
+                distance_percent = features.close_distance_percent("1h", level.price)
                 
                 # Далеко если > 0.3%
                 close_far_from_level = distance_percent > 0.3
@@ -645,6 +621,7 @@ class BounceStrategy(BaseStrategy):
             
             # 5. Сильное предшествующее движение (проверка по D1)
             strong_move = False
+            candles_1d = features.candles("1d")
             if len(candles_1d) >= 2:
                 # ✅ ИСПРАВЛЕНО: используем 'close_price'
                 current = float(candles_1d[-1]['close_price'])
@@ -792,7 +769,8 @@ class BounceStrategy(BaseStrategy):
         direction: str,
         order_params: Dict[str, float],
         bounce_details: Dict[str, Any],
-        current_price: float
+        current_price: float,
+        symbol: Optional[str] = None
     ) -> TradingSignal:
         """
         Создание торгового сигнала отбоя
@@ -803,6 +781,7 @@ class BounceStrategy(BaseStrategy):
             order_params: Параметры ордера
             bounce_details: Детали предпосылок
             current_price: Текущая цена
+            symbol: Символ анализа
             
         Returns:
             TradingSignal
@@ -842,7 +821,8 @@ class BounceStrategy(BaseStrategy):
                 strength=strength,
                 confidence=confidence,
                 current_price=current_price,
-                reasons=reasons
+                reasons=reasons,
+                symbol=symbol
             )
             
             # Параметры ордера
@@ -893,7 +873,8 @@ class BounceStrategy(BaseStrategy):
                 strength=0.5,
                 confidence=0.5,
                 current_price=current_price,
-                reasons=["Отбой от уровня"]
+                reasons=["Отбой от уровня"],
+                symbol=symbol
             )
     
     def _calculate_signal_strength(
@@ -32,6 +32,8 @@ from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta, timezone
 
 from .base_strategy import BaseStrategy, TradingSignal, SignalType, SignalStrength
+from .feature_cache import FeatureCache
+from .strategy_state import StrategyState
 
 logger = logging.getLogger(__name__)
 
@@ -168,7 +170,9 @@ class BreakoutStrategy(BaseStrategy):
         candles_5m: List[Dict],
         candles_1h: List[Dict],
         candles_1d: List[Dict],
-        ta_context: Optional[Any] = None
+        ta_context: Optional[Any] = None,
+        features: Optional[FeatureCache] = None,
+        state: Optional[StrategyState] = None
     ) -> Optional[TradingSignal]:
         """
         🎯 Анализ с готовыми данными (v3.0)
@@ -182,8 +186,12 @@ class BreakoutStrategy(BaseStrategy):
         6. Генерация сигнала
         """
         try:
-            # Обновляем symbol (если был PLACEHOLDER)
-            self.symbol = symbol
+            # Счетчики символа (оркестратор) или экземпляра (прямой вызов)
+            counters = self.strategy_stats if state is None else state.counters
+            
+            # Общий кэш признаков цикла (или локальный при прямом вызове)
+            if features is None:
+                features = FeatureCache(symbol, candles_1m, candles_5m, candles_1h, candles_1d, ta_context)
             
             # Проверка минимальных данных
             if not candles_5m or len(candles_5m) < 20:
@@ -196,7 +204,7 @@ class BreakoutStrategy(BaseStrategy):
                     logger.debug(f"⚠️ {symbol}: недостаточно D1 свечей")
                 return None
             
-            current_price = float(candles_5m[-1]['close_price'])
+            current_price = features.last_close("5m")
             
             # Шаг 1: Проверка технического контекста
             if ta_context is None:
@@ -212,39 +220,38 @@ class BreakoutStrategy(BaseStrategy):
             
             # Шаг 2: Проверка ATR (не должен быть исчерпан)
             if hasattr(ta_context, 'atr_data') and ta_context.atr_data:
-                atr_used = ta_context.atr_data.current_range_used if hasattr(ta_context.atr_data, 'current_range_used') else 0
+                atr_used = features.atr_used
                 if atr_used > self.atr_exhaustion_threshold:
-                    self.strategy_stats["setups_filtered_by_atr"] += 1
+                    counters["setups_filtered_by_atr"] += 1
                     if self.debug_mode:
                         logger.debug(f"⚠️ {symbol}: ATR исчерпан: {atr_used*100:.1f}%")
                     return None
             
             # Шаг 3: Поиск ближайшего уровня
             nearest_level, direction = self._find_nearest_level_for_breakout(
-                ta_context=ta_context,
+                features=features,
                 current_price=current_price
             )
             
             if not nearest_level:
                 return None
             
-            self.strategy_stats["levels_analyzed"] += 1
+            counters["levels_analyzed"] += 1
             
             # Шаг 4: Проверка всех условий входа
             setup_valid, setup_details = self._validate_breakout_setup(
                 level=nearest_level,
                 direction=direction,
                 ta_context=ta_context,
-                candles_5m=candles_5m,
-                candles_1h=candles_1h,
-                candles_1d=candles_1d,
-                current_price=current_price
+                features=features,
+                current_price=current_price,
+                counters=counters
             )
             
             if not setup_valid:
                 return None
             
-            self.strategy_stats["setups_found"] += 1
+            counters["setups_found"] += 1
             
             # Шаг 5: Расчет параметров ордера
             order_params = self._calculate_order_parameters(
@@ -266,10 +273,11 @@ class BreakoutStrategy(BaseStrategy):
                 direction=direction,
                 order_params=order_params,
                 setup_details=setup_details,
-                current_price=current_price
+                current_price=current_price,
+                symbol=symbol
             )
             
-            self.strategy_stats["signals_generated"] += 1
+            counters["signals_generated"] += 1
             
             logger.info(f"✅ {symbol}: Сигнал пробоя создан: {direction} через {nearest_level.price:.2f}")
             
@@ -285,7 +293,7 @@ class BreakoutStrategy(BaseStrategy):
     
     def _find_nearest_level_for_breakout(
         self,
-        ta_context: Any,
+        features: FeatureCache,
         current_price: float
     ) -> Tuple[Optional[Any], str]:
         """
@@ -297,32 +305,27 @@ class BreakoutStrategy(BaseStrategy):
         - Правильно определяем направление
         
         Args:
-            ta_context: Технический контекст
+            features: Кэш признаков цикла
             current_price: Текущая цена
             
         Returns:
             Tuple[уровень, направление ("up"/"down")]
         """
         try:
-            # Фильтруем уровни по силе
-            strong_levels = [
-                level for level in ta_context.levels_d1
-                if level.strength >= self.min_level_strength
-            ]
+            # Сильные уровни в пределах max_distance, от ближнего к дальнему
+            nearby_levels = features.levels_by_distance(
+                price=current_price,
+                min_strength=self.min_level_strength,
+                max_distance=self.max_distance_to_level
+            )
             
-            if not strong_levels:
+            if not nearby_levels:
                 return None, None
             
             candidates = []
             
             # ✅ ИСПРАВЛЕНО: Ищем уровни РЯДОМ с ценой, а не строго выше/ниже
-            for level in strong_levels:
-                distance_percent = abs(level.price - current_price) / current_price
-                
-                # Уровень должен быть в пределах max_distance
-                if distance_percent > self.max_distance_to_level:
-                    continue
-                
+            for level, distance_percent in nearby_levels:
                 # Определяем направление пробоя
                 if level.level_type == "resistance":
                     # Для сопротивления:
@@ -367,10 +370,9 @@ class BreakoutStrategy(BaseStrategy):
         level: Any,
         direction: str,
         ta_context: Any,
-        candles_5m: List[Dict],
-        candles_1h: List[Dict],
-        candles_1d: List[Dict],
-        current_price: float
+        features: FeatureCache,
+        current_price: float,
+        counters: Optional[Dict[str, int]] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """
         Валидация всех условий для пробоя
@@ -383,6 +385,7 @@ class BreakoutStrategy(BaseStrategy):
         5. ✅ Закрытие под Hi/Low без отката
         6. ✅ ATR не исчерпан (проверено выше)
         """
+        counters = self.strategy_stats if counters is None else counters
         try:
             details = {
                 "level_price": level.price,
@@ -396,23 +399,20 @@ class BreakoutStrategy(BaseStrategy):
             
             # УСЛОВИЕ 1: Поджатие (проверка по M5)
             has_compression = False
-            if self.require_compression and len(candles_5m) >= 20:
-                recent_m5 = candles_5m[-20:]
-                
-                avg_size = sum(abs(float(c['high_price']) - float(c['low_price'])) for c in recent_m5) / len(recent_m5)
+            if self.require_compression and len(features.candles("5m")) >= 20:
+                avg_size = features.avg_range("5m", 20)
                 
                 # Последние 3 свечи должны быть меньше среднего
-                last_3_sizes = [abs(float(c['high_price']) - float(c['low_price'])) for c in recent_m5[-3:]]
-                avg_last_3 = sum(last_3_sizes) / len(last_3_sizes)
+                avg_last_3 = features.avg_range("5m", 3)
                 
                 has_compression = avg_last_3 < avg_size * 0.8  # На 20% меньше среднего
                 
                 if has_compression:
                     score += 1
-                    self.strategy_stats["compressions_found"] += 1
+                    counters["compressions_found"] += 1
                     logger.debug("✅ Поджатие обнаружено")
                 elif self.require_compression:
-                    self.strategy_stats["setups_filtered_by_compression"] += 1
+                    counters["setups_filtered_by_compression"] += 1
                     logger.debug("❌ Нет поджатия")
                     return False, details
             
@@ -421,7 +421,7 @@ class BreakoutStrategy(BaseStrategy):
             # УСЛОВИЕ 2: Ближний ретест
             is_near_retest = False
             if hasattr(level, 'last_touch') and level.last_touch:
-                days_since_touch = (datetime.now(timezone.utc) - level.last_touch).days
+                days_since_touch = (features.now - level.last_touch).days
                 is_near_retest = days_since_touch <= self.near_retest_max_days
                 
                 if is_near_retest:
@@ -434,9 +434,8 @@ class BreakoutStrategy(BaseStrategy):
             
             # УСЛОВИЕ 3: Закрытие вблизи уровня
             close_near_level = False
-            if candles_5m:
-                last_close = float(candles_5m[-1]['close_price'])
-                distance = abs(last_close - level.price) / level.price * 100
+            if features.candles("5m"):
+                distance = features.close_distance_percent("5m", level.price)
                 
                 close_near_level = distance <= self.close_near_level_tolerance
                 
@@ -450,14 +449,11 @@ class BreakoutStrategy(BaseStrategy):
             
             # УСЛОВИЕ 4: Консолидация (по H1)
             has_consolidation = False
-            if self.require_consolidation and len(candles_1h) >= 10:
-                recent_h1 = candles_1h[-10:]
-                
-                highs = [float(c['high_price']) for c in recent_h1]
-                lows = [float(c['low_price']) for c in recent_h1]
+            if self.require_consolidation and len(features.candles("1h")) >= 10:
+                max_high, min_low = features.high_low("1h", 10)
                 
-                price_range = max(highs) - min(lows)
-                avg_price = (max(highs) + min(lows)) / 2
+                price_range = max_high - min_low
+                avg_price = (max_high + min_low) / 2
                 
                 # Диапазон меньше 2% от средней цены = консолидация
                 range_percent = price_range / avg_price * 100
@@ -465,10 +461,10 @@ class BreakoutStrategy(BaseStrategy):
                 
                 if has_consolidation:
                     score += 1
-                    self.strategy_stats["consolidations_found"] += 1
+                    counters["consolidations_found"] += 1
                     logger.debug(f"✅ Консолидация: диапазон {range_percent:.2f}%")
                 elif self.require_consolidation:
-                    self.strategy_stats["setups_filtered_by_energy"] += 1
+                    counters["setups_filtered_by_energy"] += 1
                     logger.debug(f"❌ Нет консолидации: диапазон {range_percent:.2f}%")
                     return False, details
                 
@@ -478,14 +474,14 @@ class BreakoutStrategy(BaseStrategy):
             
             # УСЛОВИЕ 5: Закрытие под Hi/Low без отката
             close_near_extreme = False
-            if candles_5m:
-                last_candle = candles_5m[-1]
+            if features.candles("5m"):
+                shape = features.candle_shape("5m")
                 
-                high = float(last_candle['high_price'])
-                low = float(last_candle['low_price'])
-                close = float(last_candle['close_price'])
+                high = shape["high"]
+                low = shape["low"]
+                close = shape["close"]
                 
-                candle_size = high - low
+                candle_size = shape["range"]
                 
                 if direction == "up":
                     # Для пробоя вверх: закрытие должно быть у High
@@ -631,7 +627,8 @@ class BreakoutStrategy(BaseStrategy):
         direction: str,
         order_params: Dict[str, float],
         setup_details: Dict[str, Any],
-        current_price: float
+        current_price: float,
+        symbol: Optional[str] = None
     ) -> TradingSignal:
         """Создание торгового сигнала пробоя"""
         try:
@@ -669,7 +666,8 @@ class BreakoutStrategy(BaseStrategy):
                 strength=strength,
                 confidence=confidence,
                 current_price=current_price,
-                reasons=reasons
+                reasons=reasons,
+                symbol=symbol
             )
             
             # Добавляем параметры ордера
@@ -715,7 +713,8 @@ class BreakoutStrategy(BaseStrategy):
                 strength=0.5,
                 confidence=0.5,
                 current_price=current_price,
-                reasons=["Пробой уровня"]
+                reasons=["Пробой уровня"],
+                symbol=symbol
             )
     
     def _calculate_signal_strength(
@@ -32,6 +32,8 @@ from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 
 from .base_strategy import BaseStrategy, TradingSignal, SignalType, SignalStrength
+from .feature_cache import FeatureCache
+from .strategy_state import StrategyState
 
 logger = logging.getLogger(__name__)
 
@@ -187,7 +189,9 @@ class FalseBreakoutStrategy(BaseStrategy):
         candles_5m: List[Dict],
         candles_1h: List[Dict],
         candles_1d: List[Dict],
-        ta_context: Optional[Any] = None
+        ta_context: Optional[Any] = None,
+        features: Optional[FeatureCache] = None,
+        state: Optional[StrategyState] = None
     ) -> Optional[TradingSignal]:
         """
         🎯 Анализ с готовыми данными (v3.0)
@@ -208,13 +212,19 @@ class FalseBreakoutStrategy(BaseStrategy):
             candles_1h: Часовые свечи (последние 24)
             candles_1d: Дневные свечи (последние 180)
             ta_context: Технический контекст
+            features: Общий кэш признаков цикла (None = локальный)
+            state: Состояние пары (стратегия, символ) для счетчиков (None = счетчики экземпляра)
             
         Returns:
             TradingSignal или None
         """
         try:
-            # Обновляем symbol (если был PLACEHOLDER)
-            self.symbol = symbol
+            # Счетчики символа (оркестратор) или экземпляра (прямой вызов)
+            counters = self.strategy_stats if state is None else state.counters
+            
+            # Общий кэш признаков цикла (или локальный при прямом вызове)
+            if features is None:
+                features = FeatureCache(symbol, candles_1m, candles_5m, candles_1h, candles_1d, ta_context)
             
             # Проверка минимальных данных
             if not candles_5m or len(candles_5m) < 10:
@@ -228,8 +238,8 @@ class FalseBreakoutStrategy(BaseStrategy):
                 return None
             
             # ✅ ИСПРАВЛЕНО: используем 'close_price' вместо 'close'
-            current_price = float(candles_5m[-1]['close_price'])
-            current_time = datetime.now()
+            current_price = features.last_close("5m")
+            current_time = features.now
             
             # Шаг 1: Проверка технического контекста
             if ta_context is None:
@@ -245,7 +255,7 @@ class FalseBreakoutStrategy(BaseStrategy):
             
             # Шаг 2: Поиск ближайших уровней
             nearest_levels = self._find_nearest_levels(
-                ta_context=ta_context,
+                features=features,
                 current_price=current_price
             )
             
@@ -254,7 +264,7 @@ class FalseBreakoutStrategy(BaseStrategy):
             
             # Шаг 3: Анализ каждого уровня на наличие ЛП
             for level in nearest_levels:
-                self.strategy_stats["levels_analyzed"] += 1
+                counters["levels_analyzed"] += 1
                 
                 # Анализируем пробой
                 is_false_breakout, fb_details = self._detect_false_breakout_simple(
@@ -268,14 +278,14 @@ class FalseBreakoutStrategy(BaseStrategy):
                 if not is_false_breakout:
                     continue
                 
-                self.strategy_stats["false_breakouts_detected"] += 1
+                counters["false_breakouts_detected"] += 1
                 
                 # Определяем тип ЛП
                 fb_type = fb_details.get("type", "simple")
                 if fb_type == "simple":
-                    self.strategy_stats["false_breakouts_simple"] += 1
+                    counters["false_breakouts_simple"] += 1
                 else:
-                    self.strategy_stats["false_breakouts_strong"] += 1
+                    counters["false_breakouts_strong"] += 1
                 
                 direction = fb_details.get("direction", "unknown")
                 
@@ -297,16 +307,16 @@ class FalseBreakoutStrategy(BaseStrategy):
                     )
                     
                     if not confirmed:
-                        self.strategy_stats["filtered_by_confirmation"] += 1
+                        counters["filtered_by_confirmation"] += 1
                         if self.debug_mode:
                             logger.debug(f"⚠️ {symbol}: нет подтверждения разворота")
                         continue
                     
-                    self.strategy_stats["confirmations_passed"] += 1
+                    counters["confirmations_passed"] += 1
                 
                 # Шаг 6: Проверка времени после пробоя
                 if not self._check_timing(fb_details, current_time):
-                    self.strategy_stats["filtered_by_time"] += 1
+                    counters["filtered_by_time"] += 1
                     if self.debug_mode:
                         logger.debug(f"⚠️ {symbol}: слишком много времени прошло после ЛП")
                     continue
@@ -314,7 +324,7 @@ class FalseBreakoutStrategy(BaseStrategy):
                 # Шаг 7: Проверка силы уровня
                 if self.prefer_strong_levels:
                     if level.strength < self.min_level_strength:
-                        self.strategy_stats["filtered_by_level_strength"] += 1
+                        counters["filtered_by_level_strength"] += 1
                         if self.debug_mode:
                             logger.debug(f"⚠️ {symbol}: слабый уровень: {level.strength:.2f}")
                         continue
@@ -332,10 +342,11 @@ class FalseBreakoutStrategy(BaseStrategy):
                     level=level,
                     fb_details=fb_details,
                     order_params=order_params,
-                    current_price=current_price
+                    current_price=current_price,
+                    symbol=symbol
                 )
                 
-                self.strategy_stats["signals_generated"] += 1
+                counters["signals_generated"] += 1
                 
                 logger.info(f"✅ {symbol}: Сигнал ЛП создан: {signal.signal_type.value} @ {current_price:.2f}")
                 
@@ -354,7 +365,7 @@ class FalseBreakoutStrategy(BaseStrategy):
     
     def _find_nearest_levels(
         self,
-        ta_context: Any,
+        features: FeatureCache,
         current_price: float
     ) -> List[Any]:
         """
@@ -363,38 +374,23 @@ class FalseBreakoutStrategy(BaseStrategy):
         Ищем уровни в обе стороны от цены (support и resistance)
         
         Args:
-            ta_context: Технический контекст
+            features: Кэш признаков цикла
             current_price: Текущая цена
             
         Returns:
             Список подходящих уровней
         """
         try:
-            # Фильтруем по силе и касаниям
-            suitable_levels = [
-                level for level in ta_context.levels_d1
-                if level.strength >= self.min_level_strength and
-                   level.touches >= self.min_level_touches
-            ]
-            
-            if not suitable_levels:
-                return []
-            
-            # Ищем ближайшие уровни в обе стороны
-            candidates = []
-            
-            for level in suitable_levels:
-                distance = abs(level.price - current_price)
-                distance_percent = distance / current_price
-                
-                if distance_percent <= self.max_distance_to_level:
-                    candidates.append(level)
-            
-            # Сортируем по расстоянию
-            candidates.sort(key=lambda l: abs(l.price - current_price))
+            # Уровни по силе и касаниям в обе стороны, отсортированные по расстоянию
+            candidates = features.levels_by_distance(
+                price=current_price,
+                min_strength=self.min_level_strength,
+                min_touches=self.min_level_touches,
+                max_distance=self.max_distance_to_level
+            )
             
             # Берем 2-3 ближайших
-            nearest = candidates[:3]
+            nearest = [level for level, _ in candidates[:3]]
             
             if nearest:
                 logger.debug(f"🎯 Найдено {len(nearest)} ближайших уровней для анализа ЛП")
@@ -737,7 +733,8 @@ class FalseBreakoutStrategy(BaseStrategy):
         level: Any,
         fb_details: Dict[str, Any],
         order_params: Dict[str, float],
-        current_price: float
+        current_price: float,
+        symbol: Optional[str] = None
     ) -> TradingSignal:
         """
         Создание торгового сигнала после ЛП
@@ -751,6 +748,7 @@ class FalseBreakoutStrategy(BaseStrategy):
             fb_details: Детали ЛП
             order_params: Параметры ордера
             current_price: Текущая цена
+            symbol: Символ анализа
             
         Returns:
             TradingSignal
@@ -801,7 +799,8 @@ class FalseBreakoutStrategy(BaseStrategy):
                 strength=strength,
                 confidence=confidence,
                 current_price=current_price,
-                reasons=reasons
+                reasons=reasons,
+                symbol=symbol
             )
             
             # Параметры ордера
@@ -860,7 +859,8 @@ class FalseBreakoutStrategy(BaseStrategy):
                 strength=0.5,
                 confidence=0.5,
                 current_price=current_price,
-                reasons=["Ложный пробой уровня"]
+                reasons=["Ложный пробой уровня"],
+                symbol=symbol
             )
     
     def _calculate_signal_strength(
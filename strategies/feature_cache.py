@@ -0,0 +1,358 @@
+"""
+Feature Cache - Общий кэш признаков на (символ, цикл)
+
+StrategyOrchestrator создает один FeatureCache на символ в каждом цикле
+и передает его всем стратегиям. Признаки считаются лениво при первом
+запросе и переиспользуются остальными стратегиями:
+- Отфильтрованные уровни и уровни по расстоянию до цены
+- Ближайшие поддержка/сопротивление
+- Диапазоны последних N баров, High/Low окна
+- Форма свечи (тело/тени)
+- Касания уровня
+
+Статистика (computed/hits) показывает, сколько пересчетов сэкономлено;
+compute_time_ms - время вычислений верхнего уровня (вложенные признаки
+входят во время родителя).
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureCache:
+    """
+    🗂️ Ленивый кэш признаков для одного символа в одном цикле
+
+    Все значения неизменяемы в пределах цикла: свечи и контекст
+    фиксируются при создании. Ключ признака включает параметры запроса,
+    поэтому стратегии с разными порогами получают свои значения.
+
+    Usage:
+        features = FeatureCache(symbol, candles_1m, candles_5m, candles_1h, candles_1d, ta_context)
+
+        price = features.last_close("5m")
+        levels = features.levels_by_distance(price, min_strength=0.5, max_distance=0.015)
+        avg_range = features.avg_range("1h", 5)
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        candles_1m: List[Dict],
+        candles_5m: List[Dict],
+        candles_1h: List[Dict],
+        candles_1d: List[Dict],
+        ta_context: Optional[Any] = None,
+        as_of: Optional[datetime] = None
+    ):
+        """
+        Args:
+            symbol: Торговый символ
+            candles_1m/5m/1h/1d: Свечи цикла
+            ta_context: Технический контекст символа
+            as_of: Момент анализа (None = сейчас; бэктест передает время реплея)
+        """
+        self.symbol = symbol
+        self.now = as_of or datetime.now(timezone.utc)
+        self.ta_context = ta_context
+
+        self._candles: Dict[str, List[Dict]] = {
+            "1m": candles_1m or [],
+            "5m": candles_5m or [],
+            "1h": candles_1h or [],
+            "1d": candles_1d or []
+        }
+        self._values: Dict[Tuple, Any] = {}
+        # Глубина вложенных вычислений: время считается только на верхнем уровне,
+        # иначе признак, вычисленный внутри другого, учитывается дважды
+        self._depth = 0
+
+        self.stats = {
+            "requests": 0,
+            "computed": 0,
+            "hits": 0,
+            "compute_time_ms": 0.0,
+            "by_feature": defaultdict(lambda: {"computed": 0, "hits": 0})
+        }
+
+    # ==================== ЯДРО КЭША ====================
+
+    def _get(self, key: Tuple, factory: Callable[[], Any]) -> Any:
+        """Значение признака: из кэша или вычислить один раз"""
+        self.stats["requests"] += 1
+        feature = self.stats["by_feature"][key[0]]
+
+        if key in self._values:
+            self.stats["hits"] += 1
+            feature["hits"] += 1
+            return self._values[key]
+
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            value = factory()
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.stats["compute_time_ms"] += (time.perf_counter() - started) * 1000
+
+        self.stats["computed"] += 1
+        feature["computed"] += 1
+        self._values[key] = value
+        return value
+
+    def candles(self, interval: str) -> List[Dict]:
+        """Свечи интервала"""
+        return self._candles.get(interval, [])
+
+    # ==================== ЦЕНЫ И ATR ====================
+
+    def last_close(self, interval: str) -> Optional[float]:
+        """Close последней свечи интервала"""
+        def compute():
+            candles = self.candles(interval)
+            return float(candles[-1]['close_price']) if candles else None
+
+        return self._get(("last_close", interval), compute)
+
+    @property
+    def atr(self) -> Optional[float]:
+        """Рассчитанный ATR из контекста"""
+        atr_data = getattr(self.ta_context, 'atr_data', None)
+        return getattr(atr_data, 'calculated_atr', None) if atr_data else None
+
+    @property
+    def atr_used(self) -> float:
+        """Доля ATR, пройденная сегодня (0 если нет данных)"""
+        atr_data = getattr(self.ta_context, 'atr_data', None)
+        return getattr(atr_data, 'current_range_used', 0) if atr_data else 0
+
+    # ==================== УРОВНИ ====================
+
+    def _level_index(self) -> Optional[Any]:
+        """Индекс уровней по цене из контекста (None для контекстов без индекса)"""
+        if hasattr(self.ta_context, 'get_level_index'):
+            return self.ta_context.get_level_index()
+        return None
+
+    def filtered_levels(self, min_strength: float, min_touches: int = 0) -> List[Any]:
+        """Уровни D1 с strength >= min_strength и touches >= min_touches (порядок контекста)"""
+        def compute():
+            levels = getattr(self.ta_context, 'levels_d1', None) or []
+            return [
+                level for level in levels
+                if level.strength >= min_strength and level.touches >= min_touches
+            ]
+
+        return self._get(("filtered_levels", min_strength, min_touches), compute)
+
+    def levels_by_distance(
+        self,
+        price: float,
+        min_strength: float,
+        min_touches: int = 0,
+        max_distance: Optional[float] = None
+    ) -> List[Tuple[Any, float]]:
+        """
+        Отфильтрованные уровни, отсортированные по расстоянию до цены
+
+        Сортировка стабильная: при равном расстоянии сохраняется порядок
+        контекста (как у min()/sort() в стратегиях).
+
+        Returns:
+            List[(уровень, расстояние в долях цены)]
+        """
+        def compute():
+            index = self._level_index()
+
+            if index is not None and max_distance is not None:
+                # bisect по цене, затем фильтры - исходный порядок сохраняется
+                levels = [
+                    level for level in index.within(price, max_distance)
+                    if level.strength >= min_strength and level.touches >= min_touches
+                ]
+            else:
+                levels = self.filtered_levels(min_strength, min_touches)
+
+            items = []
+            for level in levels:
+                distance = abs(level.price - price) / price
+                if max_distance is None or distance <= max_distance:
+                    items.append((level, distance))
+            items.sort(key=lambda item: abs(item[0].price - price))
+            return items
+
+        return self._get(("levels_by_distance", price, min_strength, min_touches, max_distance), compute)
+
+    def nearest_level(
+        self,
+        price: float,
+        level_type: str,
+        min_strength: float,
+        min_touches: int = 0
+    ) -> Optional[Any]:
+        """Ближайшая поддержка ниже цены / сопротивление выше цены среди отфильтрованных"""
+        def compute():
+            index = self._level_index()
+
+            if index is not None:
+                def passes(level):
+                    return level.strength >= min_strength and level.touches >= min_touches
+
+                if level_type == "support":
+                    return index.nearest_below(price, "support", passes)
+                return index.nearest_above(price, "resistance", passes)
+
+            if level_type == "support":
+                candidates = [l for l in self.filtered_levels(min_strength, min_touches)
+                              if l.level_type == "support" and l.price < price]
+            else:
+                candidates = [l for l in self.filtered_levels(min_strength, min_touches)
+                              if l.level_type == "resistance" and l.price > price]
+
+            return min(candidates, key=lambda l: abs(l.price - price)) if candidates else None
+
+        return self._get(("nearest_level", price, level_type, min_strength, min_touches), compute)
+
+    def nearest_support(self, price: float) -> Optional[Any]:
+        """Ближайшая поддержка ниже цены (без фильтров)"""
+        return self.nearest_level(price, "support", min_strength=float("-inf"))
+
+    def nearest_resistance(self, price: float) -> Optional[Any]:
+        """Ближайшее сопротивление выше цены (без фильтров)"""
+        return self.nearest_level(price, "resistance", min_strength=float("-inf"))
+
+    def close_distance_percent(self, interval: str, level_price: float) -> Optional[float]:
+        """Расстояние последнего close интервала до уровня в %"""
+        def compute():
+            last_close = self.last_close(interval)
+            if last_close is None:
+                return None
+            return abs(last_close - level_price) / level_price * 100
+
+        return self._get(("close_distance_percent", interval, level_price), compute)
+
+    def level_touches(
+        self,
+        interval: str,
+        level_price: float,
+        tolerance: float,
+        lookback: int
+    ) -> List[int]:
+        """
+        Индексы баров (в окне последних lookback), касавшихся уровня
+
+        Касание: min(|high|, |low|, |close| - уровень) / уровень <= tolerance
+        """
+        def compute():
+            touches = []
+            for i, candle in enumerate(self.candles(interval)[-lookback:]):
+                distance_high = abs(float(candle['high_price']) - level_price) / level_price
+                distance_low = abs(float(candle['low_price']) - level_price) / level_price
+                distance_close = abs(float(candle['close_price']) - level_price) / level_price
+
+                if min(distance_high, distance_low, distance_close) <= tolerance:
+                    touches.append(i)
+            return touches
+
+        return self._get(("level_touches", interval, level_price, tolerance, lookback), compute)
+
+    # ==================== БАРЫ ====================
+
+    def ranges(self, interval: str, count: int) -> List[float]:
+        """|High - Low| последних count баров"""
+        def compute():
+            return [
+                abs(float(c['high_price']) - float(c['low_price']))
+                for c in self.candles(interval)[-count:]
+            ]
+
+        return self._get(("ranges", interval, count), compute)
+
+    def avg_range(self, interval: str, count: int) -> Optional[float]:
+        """Средний диапазон последних count баров"""
+        def compute():
+            values = self.ranges(interval, count)
+            return sum(values) / len(values) if values else None
+
+        return self._get(("avg_range", interval, count), compute)
+
+    def high_low(self, interval: str, count: int) -> Optional[Tuple[float, float]]:
+        """(max High, min Low) последних count баров"""
+        def compute():
+            recent = self.candles(interval)[-count:]
+            if not recent:
+                return None
+            return (
+                max(float(c['high_price']) for c in recent),
+                min(float(c['low_price']) for c in recent)
+            )
+
+        return self._get(("high_low", interval, count), compute)
+
+    def candle_shape(self, interval: str, index: int = -1) -> Optional[Dict[str, float]]:
+        """Форма свечи: OHLC, диапазон, тело, тени и их доли"""
+        def compute():
+            candles = self.candles(interval)
+            if not candles or not -len(candles) <= index < len(candles):
+                return None
+
+            candle = candles[index]
+            open_price = float(candle['open_price'])
+            high = float(candle['high_price'])
+            low = float(candle['low_price'])
+            close = float(candle['close_price'])
+
+            candle_range = high - low
+            body = abs(close - open_price)
+            upper_shadow = high - max(open_price, close)
+            lower_shadow = min(open_price, close) - low
+
+            return {
+                "open": open_price,
+                "high": high,
+                "low": low,
+                "close": close,
+                "range": candle_range,
+                "body": body,
+                "upper_shadow": upper_shadow,
+                "lower_shadow": lower_shadow,
+                "body_ratio": body / candle_range if candle_range > 0 else 0.0,
+                "upper_shadow_ratio": upper_shadow / candle_range if candle_range > 0 else 0.0,
+                "lower_shadow_ratio": lower_shadow / candle_range if candle_range > 0 else 0.0
+            }
+
+        return self._get(("candle_shape", interval, index), compute)
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика переиспользования признаков"""
+        requests = self.stats["requests"]
+        return {
+            "symbol": self.symbol,
+            "requests": requests,
+            "computed": self.stats["computed"],
+            "hits": self.stats["hits"],
+            "hit_rate": self.stats["hits"] / requests if requests else 0.0,
+            "compute_time_ms": self.stats["compute_time_ms"],
+            "by_feature": {name: dict(values) for name, values in self.stats["by_feature"].items()}
+        }
+
+    def __repr__(self) -> str:
+        return (f"FeatureCache(symbol={self.symbol}, computed={self.stats['computed']}, "
+                f"hits={self.stats['hits']})")
+
+
+# Export
+__all__ = ["FeatureCache"]
+
+logger.info("✅ FeatureCache module loaded")
@@ -19,11 +19,16 @@ Version: 3.1.2 - FIXED: Низкие пороги сигналов + подде
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .feature_cache import FeatureCache
+from .strategy_state import StrategyStateStore
+from .symbol_screen import SymbolScreen, ScreenResult
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +51,7 @@ class AnalysisResult:
     strategies_run: int
     execution_time: float
     error: Optional[str] = None
+    feature_stats: Optional[Dict[str, Any]] = None
     timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -59,6 +65,14 @@ class CycleStats:
     signals_count: int = 0
     errors_count: int = 0
     execution_time: float = 0.0
+    features_computed: int = 0
+    features_reused: int = 0
+    features_compute_time_ms: float = 0.0
+    symbols_screened_out: int = 0
+    strategies_screened_out: int = 0
+    screen_pass_rate: float = 100.0
+    screen_time_ms: float = 0.0
+    estimated_time_saved: float = 0.0
     
     def finalize(self):
         """Завершить цикл и рассчитать время"""
@@ -75,6 +89,9 @@ class StrategyOrchestrator:
     
     Features:
     - Параллельный анализ всех символов
+    - Состояние стратегий (cooldown, история, счетчики) отдельно на каждый символ
+    - Предварительный скрининг: свечи грузятся только для символов у уровней
+    - Внеочередной анализ символа по событиям уровней (LevelWatchEngine)
     - Кэширование технического контекста
     - Умное получение данных из БД
     - Обработка ошибок без остановки
@@ -99,6 +116,16 @@ class StrategyOrchestrator:
     # ✅ Задержка старта для синхронизации с data sync
     SYNC_START_SECOND = 40  # Запускаем анализ в :40 секунды каждой минуты
     
+    # Стратегии, которые проверяются по событию уровня (LevelWatchEngine)
+    EVENT_STRATEGIES = {
+        "approach": ["BounceStrategy", "BreakoutStrategy"],
+        "cross": ["BreakoutStrategy", "FalseBreakoutStrategy"],
+        "retest": ["BounceStrategy", "FalseBreakoutStrategy"]
+    }
+    
+    # Не чаще одного внеочередного анализа символа за этот интервал
+    TRIGGER_DEBOUNCE_SECONDS = 5
+    
     def __init__(
         self,
         repository,
@@ -106,7 +133,10 @@ class StrategyOrchestrator:
         signal_manager,
         symbols: List[str],
         analysis_interval_seconds: int = 60,
-        enabled_strategies: List[str] = None
+        enabled_strategies: List[str] = None,
+        shard_coordinator=None,
+        enable_prescreen: bool = True,
+        level_watch=None
     ):
         """
         Args:
@@ -116,12 +146,20 @@ class StrategyOrchestrator:
             symbols: Список символов для анализа
             analysis_interval_seconds: Интервал между циклами (секунды)
             enabled_strategies: Список включенных стратегий (None = все)
+            shard_coordinator: ShardCoordinator для multi-node режима (None = все символы на этом узле),
+                обычно ShardCoordinator.from_config(db_manager)
+            enable_prescreen: Отсеивать символы далеко от уровней до загрузки свечей
+            level_watch: LevelWatchEngine - анализ символа сразу по событию уровня (None = только цикл)
         """
         self.repository = repository
         self.ta_context_manager = ta_context_manager
         self.signal_manager = signal_manager
         self.symbols = symbols
         self.analysis_interval = analysis_interval_seconds
+        self.shard_coordinator = shard_coordinator
+        
+        # Символы, анализируемые этим узлом (при шардировании - подмножество)
+        self.active_symbols: List[str] = list(symbols)
         
         # Статус
         self.status = OrchestratorStatus.IDLE
@@ -134,6 +172,20 @@ class StrategyOrchestrator:
         # Инициализация стратегий
         self.strategies = self._initialize_strategies(enabled_strategies)
         
+        # Состояние (стратегия, символ): экземпляры стратегий его не хранят
+        self.strategy_states = StrategyStateStore()
+        
+        # Скрининг символов перед полным анализом (условия - из стратегий)
+        self.symbol_screen = SymbolScreen(self.strategies) if enable_prescreen and self.strategies else None
+        
+        # События уровней -> анализ одного символа вне цикла
+        self.level_watch = level_watch
+        self._triggered_tasks: set = set()
+        self._triggered_inflight: set = set()
+        self._last_triggered: Dict[str, float] = {}
+        if level_watch:
+            level_watch.add_listener(self.on_level_events)
+        
         # Статистика
         self.stats = {
             "total_cycles": 0,
@@ -143,6 +195,11 @@ class StrategyOrchestrator:
             "uptime_seconds": 0,
             "last_cycle_time": None,
             "average_cycle_time": 0.0,
+            "average_symbol_time": 0.0,
+            "total_time_saved": 0.0,
+            "triggered_analyses": 0,
+            "triggered_signals": 0,
+            "triggered_skipped": 0,
             "cycles_history": []
         }
         
@@ -160,6 +217,9 @@ class StrategyOrchestrator:
         logger.info(f"   • Repository: {'✅' if repository else '❌'}")
         logger.info(f"   • TA Manager: {'✅' if ta_context_manager else '❌'}")
         logger.info(f"   • Signal Manager: {'✅' if signal_manager else '❌'}")
+        logger.info(f"   • Шардирование: {'✅ ' + shard_coordinator.node_id if shard_coordinator else '❌'}")
+        logger.info(f"   • Скрининг символов: {'✅' if self.symbol_screen else '❌'}")
+        logger.info(f"   • События уровней: {'✅' if level_watch else '❌'}")
         logger.info("=" * 70)
         
         for strategy in self.strategies:
@@ -237,6 +297,9 @@ class StrategyOrchestrator:
             self.status = OrchestratorStatus.RUNNING
             self.start_time = datetime.now(timezone.utc)
             
+            if self.shard_coordinator and not self.shard_coordinator.is_running:
+                await self.shard_coordinator.start()
+            
             self._main_task = asyncio.create_task(self._main_loop())
             
             logger.info("✅ StrategyOrchestrator запущен успешно")
@@ -268,6 +331,14 @@ class StrategyOrchestrator:
             except asyncio.CancelledError:
                 pass
         
+        for task in list(self._triggered_tasks):
+            task.cancel()
+        if self._triggered_tasks:
+            await asyncio.gather(*self._triggered_tasks, return_exceptions=True)
+        
+        if self.shard_coordinator:
+            await self.shard_coordinator.stop()
+        
         uptime = (datetime.now(timezone.utc) - self.start_time).total_seconds()
         
         logger.info("=" * 70)
@@ -350,26 +421,46 @@ class StrategyOrchestrator:
                 start_time=datetime.now(timezone.utc)
             )
             
+            symbols = await self._get_cycle_symbols()
+            
+            if self.level_watch:
+                self.level_watch.sync_levels(getattr(self.ta_context_manager, "contexts", {}))
+            
             logger.info("=" * 70)
             logger.info(f"🔍 ЦИКЛ АНАЛИЗА #{cycle_stats.cycle_number}")
             logger.info("=" * 70)
-            logger.info(f"   • Символов: {len(self.symbols)}")
+            logger.info(f"   • Символов: {len(symbols)}/{len(self.symbols)}")
             logger.info(f"   • Стратегий: {len(self.strategies)}")
             
-            tasks = [self._analyze_symbol(symbol) for symbol in self.symbols]
+            # Скрининг: свечи и стратегии только для символов у уровней
+            screen = await self._screen_symbols(symbols)
+            targets = screen.candidates if screen else symbols
+            
+            tasks = [
+                self._analyze_symbol(symbol, screen.strategies_for(symbol) if screen else None)
+                for symbol in targets
+            ]
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
+            analysis_times = []
             for result in results:
                 if isinstance(result, AnalysisResult):
                     self.symbol_results[result.symbol] = result
                     cycle_stats.symbols_analyzed += 1
+                    if result.success:
+                        analysis_times.append(result.execution_time)
                     cycle_stats.signals_count += result.signals_count
+                    if result.feature_stats:
+                        cycle_stats.features_computed += result.feature_stats["computed"]
+                        cycle_stats.features_reused += result.feature_stats["hits"]
+                        cycle_stats.features_compute_time_ms += result.feature_stats["compute_time_ms"]
                     if not result.success:
                         cycle_stats.errors_count += 1
                 elif isinstance(result, Exception):
                     logger.error(f"❌ Необработанная ошибка в цикле: {result}")
                     cycle_stats.errors_count += 1
             
+            self._apply_screen_stats(cycle_stats, screen, analysis_times)
             cycle_stats.finalize()
             
             self.stats["total_cycles"] += 1
@@ -388,7 +479,11 @@ class StrategyOrchestrator:
                 "symbols": cycle_stats.symbols_analyzed,
                 "signals": cycle_stats.signals_count,
                 "errors": cycle_stats.errors_count,
-                "duration": cycle_stats.execution_time
+                "duration": cycle_stats.execution_time,
+                "features_computed": cycle_stats.features_computed,
+                "features_reused": cycle_stats.features_reused,
+                "screen_pass_rate": cycle_stats.screen_pass_rate,
+                "time_saved": cycle_stats.estimated_time_saved
             })
             
             if len(self.stats["cycles_history"]) > 100:
@@ -399,9 +494,17 @@ class StrategyOrchestrator:
             logger.info("=" * 70)
             logger.info(f"✅ ЦИКЛ #{cycle_stats.cycle_number} ЗАВЕРШЕН")
             logger.info("=" * 70)
-            logger.info(f"   • Проанализировано символов: {cycle_stats.symbols_analyzed}/{len(self.symbols)}")
+            logger.info(f"   • Проанализировано символов: {cycle_stats.symbols_analyzed}/{len(symbols)}")
+            if screen:
+                logger.info(f"   • Скрининг: прошло {len(screen.candidates)}/{screen.symbols_screened} "
+                           f"({cycle_stats.screen_pass_rate:.0f}%), пропущено стратегий "
+                           f"{cycle_stats.strategies_screened_out}, {cycle_stats.screen_time_ms:.1f}ms, "
+                           f"сэкономлено ~{cycle_stats.estimated_time_saved:.2f}s")
             logger.info(f"   • Сигналов сгенерировано: {cycle_stats.signals_count}")
             logger.info(f"   • Ошибок: {cycle_stats.errors_count}")
+            logger.info(f"   • Признаки: {cycle_stats.features_computed} вычислено, "
+                       f"{cycle_stats.features_reused} переиспользовано "
+                       f"({cycle_stats.features_compute_time_ms:.1f}ms)")
             logger.info(f"   • Время выполнения: {cycle_stats.execution_time:.2f}s")
             logger.info("=" * 70)
             
@@ -414,12 +517,140 @@ class StrategyOrchestrator:
             self.stats["total_errors"] += 1
             self.status = OrchestratorStatus.ERROR
     
-    async def _analyze_symbol(self, symbol: str) -> AnalysisResult:
+    async def _get_cycle_symbols(self) -> List[str]:
+        """
+        Символы для текущего цикла
+        
+        Без шардирования - все символы. С шардированием - только символы,
+        на которые узел удерживает lease. Контексты символов, ушедших
+        другим узлам, удаляются чтобы фоновые задачи TA их не обновляли.
+        """
+        if not self.shard_coordinator:
+            return self.symbols
+        
+        owned = await self.shard_coordinator.claim_symbols(self.symbols)
+        
+        lost = set(self.active_symbols) - set(owned)
+        for symbol in lost:
+            self.ta_context_manager.clear_context(symbol)
+            self.strategy_states.drop_symbol(symbol)
+            if self.level_watch:
+                self.level_watch.drop_symbol(symbol)
+        
+        if lost:
+            logger.info(f"🧩 Символы переданы другим узлам: {sorted(lost)}")
+        
+        self.active_symbols = owned
+        return owned
+    
+    async def on_level_events(self, symbol: str, events: List):
+        """
+        Слушатель LevelWatchEngine: внеочередной анализ символа
+        
+        Запускаются только стратегии, которым важны случившиеся события.
+        Анализ идет отдельной задачей (поток цен не ждет БД); пока анализ
+        символа выполняется или не прошел TRIGGER_DEBOUNCE_SECONDS,
+        новые события символа пропускаются - их подхватит минутный цикл.
+        """
+        if not self.is_running or symbol not in self.active_symbols:
+            return
+        
+        names = sorted({
+            name for event in events
+            for name in self.EVENT_STRATEGIES.get(event.event_type, [])
+        })
+        if not names:
+            return
+        
+        now = time.monotonic()
+        last = self._last_triggered.get(symbol)
+        if symbol in self._triggered_inflight or (last and now - last < self.TRIGGER_DEBOUNCE_SECONDS):
+            self.stats["triggered_skipped"] += 1
+            return
+        
+        self._last_triggered[symbol] = now
+        self._triggered_inflight.add(symbol)
+        task = asyncio.create_task(self._run_triggered_analysis(symbol, names, events))
+        self._triggered_tasks.add(task)
+        task.add_done_callback(self._triggered_tasks.discard)
+    
+    async def _run_triggered_analysis(self, symbol: str, strategy_names: List[str], events: List):
+        """Анализ символа по событиям уровней"""
+        try:
+            summary = ", ".join(f"{e.event_type} {e.level_type} {e.level_price:.4g}" for e in events)
+            logger.info(f"⚡ {symbol}: {summary} → {', '.join(strategy_names)}")
+            
+            result = await self._analyze_symbol(symbol, strategy_names)
+            self.symbol_results[symbol] = result
+            self.stats["triggered_analyses"] += 1
+            self.stats["triggered_signals"] += result.signals_count
+            
+        except Exception as e:
+            logger.error(f"❌ {symbol}: ошибка анализа по событию уровня: {e}")
+            self.stats["total_errors"] += 1
+        finally:
+            self._triggered_inflight.discard(symbol)
+    
+    async def _screen_symbols(self, symbols: List[str]) -> Optional[ScreenResult]:
+        """
+        Предварительный скрининг символов цикла
+        
+        Одна выборка последних цен M1 на все символы + уровни и ATR из уже
+        загруженных контекстов (без обновления). При ошибке получения цен
+        возвращает None - цикл идет без скрининга.
+        """
+        if not self.symbol_screen or not symbols:
+            return None
+        
+        try:
+            prices = await self.repository.get_latest_prices(symbols, interval="1m")
+        except Exception as e:
+            logger.warning(f"⚠️ Скрининг пропущен, нет последних цен: {e}")
+            return None
+        
+        contexts = getattr(self.ta_context_manager, "contexts", {})
+        return self.symbol_screen.run(symbols, prices, contexts)
+    
+    def _apply_screen_stats(
+        self,
+        cycle_stats: CycleStats,
+        screen: Optional[ScreenResult],
+        analysis_times: List[float]
+    ):
+        """
+        Статистика скрининга цикла
+        
+        Сэкономленное время - оценка: отсеянные символы × среднее время
+        полного анализа символа (суммарная работа, не wall-clock цикла).
         """
-        Анализ одного символа всеми стратегиями
+        if analysis_times:
+            cycle_avg = sum(analysis_times) / len(analysis_times)
+            previous = self.stats["average_symbol_time"]
+            self.stats["average_symbol_time"] = cycle_avg if not previous else previous * 0.8 + cycle_avg * 0.2
+        
+        if not screen:
+            return
+        
+        cycle_stats.symbols_screened_out = screen.skipped
+        cycle_stats.strategies_screened_out = screen.strategies_skipped
+        cycle_stats.screen_pass_rate = screen.pass_rate
+        cycle_stats.screen_time_ms = screen.screen_time_ms
+        cycle_stats.estimated_time_saved = max(
+            0.0, screen.skipped * self.stats["average_symbol_time"] - screen.screen_time_ms / 1000
+        )
+        self.stats["total_time_saved"] += cycle_stats.estimated_time_saved
+    
+    async def _analyze_symbol(
+        self,
+        symbol: str,
+        strategy_names: Optional[List[str]] = None
+    ) -> AnalysisResult:
+        """
+        Анализ одного символа стратегиями
         
         Args:
             symbol: Торговый символ (BTCUSDT, ETHUSDT, MCL, MGC, etc)
+            strategy_names: Стратегии, прошедшие скрининг (None = все)
             
         Returns:
             AnalysisResult: Результат анализа
@@ -500,21 +731,42 @@ class StrategyOrchestrator:
                     error=data_validation['error']
                 )
             
-            # ШАГ 3: Запускаем все стратегии
-            for strategy in self.strategies:
+            # ШАГ 3: Общий кэш признаков символа на этот цикл
+            features = FeatureCache(
+                symbol=symbol,
+                candles_1m=candles_1m,
+                candles_5m=candles_5m,
+                candles_1h=candles_1h,
+                candles_1d=candles_1d,
+                ta_context=ta_context
+            )
+            
+            # ШАГ 4: Запускаем стратегии (состояние - свое на символ)
+            strategies = [
+                s for s in self.strategies
+                if strategy_names is None or s.name in strategy_names
+            ]
+            for strategy in strategies:
                 try:
                     strategies_run += 1
                     
+                    state = self.strategy_states.get(strategy.name, symbol)
+                    state.last_analysis_time = now
+                    state.counters["analysis_calls"] += 1
+                    
                     signal = await strategy.analyze_with_data(
                         symbol=symbol,
                         candles_1m=candles_1m,
                         candles_5m=candles_5m,
                         candles_1h=candles_1h,
                         candles_1d=candles_1d,
-                        ta_context=ta_context
+                        ta_context=ta_context,
+                        features=features,
+                        state=state
                     )
                     
-                    if signal:
+                    # Cooldown / rate limit стратегии - по символу
+                    if signal and strategy.accept_signal(signal, state):
                         await self.signal_manager.process_signal(signal)
                         signals_count += 1
                         
@@ -534,7 +786,8 @@ class StrategyOrchestrator:
                 success=True,
                 signals_count=signals_count,
                 strategies_run=strategies_run,
-                execution_time=execution_time
+                execution_time=execution_time,
+                feature_stats=features.get_stats()
             )
             
         except Exception as e:
@@ -623,7 +876,12 @@ class StrategyOrchestrator:
             "uptime_seconds": uptime,
             "uptime_formatted": str(timedelta(seconds=int(uptime))),
             "symbols_count": len(self.symbols),
+            "active_symbols_count": len(self.active_symbols),
+            "sharding": self.shard_coordinator.get_stats() if self.shard_coordinator else None,
             "strategies_count": len(self.strategies),
+            "strategy_states": self.strategy_states.get_stats(),
+            "symbol_screen": self.symbol_screen.get_stats() if self.symbol_screen else None,
+            "level_watch": self.level_watch.get_stats() if self.level_watch else None,
             "analysis_interval": self.analysis_interval,
             "sync_start_second": self.SYNC_START_SECOND,
             "last_cycle": {
@@ -632,7 +890,15 @@ class StrategyOrchestrator:
                 "symbols_analyzed": self.last_cycle.symbols_analyzed if self.last_cycle else 0,
                 "signals_count": self.last_cycle.signals_count if self.last_cycle else 0,
                 "errors_count": self.last_cycle.errors_count if self.last_cycle else 0,
-                "execution_time": self.last_cycle.execution_time if self.last_cycle else 0
+                "execution_time": self.last_cycle.execution_time if self.last_cycle else 0,
+                "features_computed": self.last_cycle.features_computed,
+                "features_reused": self.last_cycle.features_reused,
+                "features_compute_time_ms": self.last_cycle.features_compute_time_ms,
+                "symbols_screened_out": self.last_cycle.symbols_screened_out,
+                "strategies_screened_out": self.last_cycle.strategies_screened_out,
+                "screen_pass_rate": self.last_cycle.screen_pass_rate,
+                "screen_time_ms": self.last_cycle.screen_time_ms,
+                "estimated_time_saved": self.last_cycle.estimated_time_saved
             } if self.last_cycle else None
         }
     
@@ -0,0 +1,145 @@
+"""
+Strategy State - Состояние стратегии для одного символа
+
+StrategyOrchestrator держит по одному экземпляру каждой стратегии на все
+символы. Всё, что меняется от вызова к вызову - cooldown по типам
+сигналов, история для rate limit, счетчики - вынесено сюда и хранится
+отдельно для каждой пары (стратегия, символ). Экземпляр стратегии
+остается неизменяемым вычислителем: его можно звать для разных символов
+параллельно, а cooldown одного символа не блокирует другие.
+
+Usage:
+    store = StrategyStateStore()
+
+    state = store.get(strategy.name, symbol)
+    signal = await strategy.analyze_with_data(symbol, ..., state=state)
+    if signal and strategy.accept_signal(signal, state):
+        await signal_manager.process_signal(signal)
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Сколько последних сигналов хранится для rate limit и средних
+MAX_SIGNAL_HISTORY = 100
+
+
+@dataclass
+class StrategyState:
+    """
+    Изменяемое состояние одной стратегии для одного символа
+
+    counters - счетчики стратегии (levels_analyzed, setups_found, ...)
+    и фильтров (signals_filtered_by_cooldown, ...); отсутствующий ключ = 0.
+    """
+    strategy_name: str
+    symbol: str
+    last_signals_by_type: Dict[Any, datetime] = field(default_factory=dict)  # SignalType -> время
+    signal_history: Deque[Any] = field(default_factory=lambda: deque(maxlen=MAX_SIGNAL_HISTORY))
+    counters: Counter = field(default_factory=Counter)
+    last_analysis_time: Optional[datetime] = None
+    last_signal_time: Optional[datetime] = None
+
+    def record_signal(self, signal):
+        """Запомнить отправленный сигнал (cooldown по типу + история)"""
+        self.signal_history.append(signal)
+        self.last_signals_by_type[signal.signal_type] = signal.timestamp
+        self.last_signal_time = signal.timestamp
+
+    def signals_since(self, since: datetime) -> int:
+        """Количество сигналов в истории после since"""
+        return sum(1 for s in self.signal_history if s.timestamp > since)
+
+    def reset(self):
+        """Очистить историю и счетчики"""
+        self.last_signals_by_type.clear()
+        self.signal_history.clear()
+        self.counters.clear()
+        self.last_analysis_time = None
+        self.last_signal_time = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сводка для статистики"""
+        return {
+            "strategy": self.strategy_name,
+            "symbol": self.symbol,
+            "counters": dict(self.counters),
+            "signals_in_history": len(self.signal_history),
+            "last_analysis_time": self.last_analysis_time.isoformat() if self.last_analysis_time else None,
+            "last_signal_time": self.last_signal_time.isoformat() if self.last_signal_time else None
+        }
+
+
+class StrategyStateStore:
+    """
+    🗄️ Состояния стратегий по ключу (стратегия, символ)
+
+    Создаются лениво при первом обращении. Состояния символа удаляются,
+    когда символ уходит с узла (шардирование), чтобы не копить память.
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], StrategyState] = {}
+
+    def get(self, strategy_name: str, symbol: str) -> StrategyState:
+        """Состояние пары (стратегия, символ), создается при первом обращении"""
+        key = (strategy_name, symbol.upper())
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = StrategyState(strategy_name=strategy_name, symbol=key[1])
+        return state
+
+    def for_symbol(self, symbol: str) -> List[StrategyState]:
+        """Все состояния символа"""
+        symbol = symbol.upper()
+        return [state for (_, sym), state in self._states.items() if sym == symbol]
+
+    def drop_symbol(self, symbol: str) -> int:
+        """Удалить состояния символа, вернуть их количество"""
+        symbol = symbol.upper()
+        keys = [key for key in self._states if key[1] == symbol]
+        for key in keys:
+            del self._states[key]
+        return len(keys)
+
+    def totals(self, strategy_name: Optional[str] = None) -> Dict[str, int]:
+        """Счетчики, просуммированные по символам (по одной стратегии или всем)"""
+        total: Counter = Counter()
+        for (name, _), state in self._states.items():
+            if strategy_name is None or name == strategy_name:
+                total.update(state.counters)
+        return dict(total)
+
+    def recent_signals(self, hours: int = 1) -> int:
+        """Сигналов за последние hours часов по всем парам"""
+        since = datetime.now() - timedelta(hours=hours)
+        return sum(state.signals_since(since) for state in self._states.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища: суммы по стратегиям"""
+        strategies = sorted({name for name, _ in self._states})
+        return {
+            "states": len(self._states),
+            "symbols": len({sym for _, sym in self._states}),
+            "by_strategy": {name: self.totals(name) for name in strategies}
+        }
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __repr__(self) -> str:
+        return f"StrategyStateStore(states={len(self._states)})"
+
+
+__all__ = ["StrategyState", "StrategyStateStore", "MAX_SIGNAL_HISTORY"]
+
+logger.info("✅ StrategyState module loaded")
@@ -0,0 +1,280 @@
+"""
+Symbol Screen - Векторизованный предварительный отбор символов
+
+Большинство символов в каждом цикле далеко от уровней D1: стратегии
+скачивают свечи, строят FeatureCache и только потом выясняют, что
+подходящего уровня в пределах max_distance_to_level нет. Скрининг
+делает эту проверку заранее - одним проходом по всем символам:
+
+1. Матрица цен уровней (символы × уровни, NaN = нет уровня) против
+   вектора последних цен
+2. Расстояние до ближайшего подходящего уровня (доля цены и ATR)
+3. Исчерпание ATR (current_range_used) - фильтр пробоя
+4. Режим волатильности по ATR% (пороги VolatilityLevel)
+
+Отбор консервативный: допуск расширен на distance_margin_atr × ATR
+(цена скрининга - последняя M1, стратегии смотрят на закрытие M5/H1),
+символ без контекста, уровней, ATR или цены проходит без проверки,
+режим extreme - тоже. Пропущенный скринингом символ не дал бы сигнала
+и при полном анализе.
+
+Usage:
+    screen = SymbolScreen(strategies)
+    result = screen.run(symbols, prices, ta_context_manager.contexts)
+
+    for symbol in result.candidates:
+        await analyze(symbol, strategies=result.strategies_for(symbol))
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Границы ATR% для режимов волатильности (как у VolatilityLevel)
+VOLATILITY_BOUNDS = [0.5, 1.0, 2.0, 4.0]
+VOLATILITY_REGIMES = ["very_low", "low", "normal", "high", "extreme"]
+
+
+@dataclass
+class StrategyGate:
+    """
+    Условие поиска уровня одной стратегии
+
+    Параметры берутся из экземпляра стратегии, поэтому скрининг совпадает
+    с её собственным фильтром в _find_nearest_level_*.
+    """
+    name: str
+    min_strength: float
+    min_touches: int
+    max_distance: Optional[float]           # доля цены, None = без скрининга
+    atr_exhaustion: Optional[float] = None  # порог current_range_used (пробой)
+
+    @classmethod
+    def from_strategy(cls, strategy) -> "StrategyGate":
+        """Условие из атрибутов стратегии (отсутствующие = не фильтровать)"""
+        return cls(
+            name=strategy.name,
+            min_strength=getattr(strategy, "min_level_strength", 0.0),
+            min_touches=getattr(strategy, "min_level_touches", 0),
+            max_distance=getattr(strategy, "max_distance_to_level", None),
+            atr_exhaustion=getattr(strategy, "atr_exhaustion_threshold", None)
+        )
+
+
+@dataclass
+class ScreenResult:
+    """Результат скрининга одного цикла"""
+    symbols_screened: int = 0
+    passthrough: List[str] = field(default_factory=list)           # без проверки
+    candidates: List[str] = field(default_factory=list)            # passthrough + прошедшие
+    strategies_by_symbol: Dict[str, List[str]] = field(default_factory=dict)
+    distance_atr: Dict[str, float] = field(default_factory=dict)   # до ближайшего уровня
+    regimes: Dict[str, int] = field(default_factory=dict)          # режим -> символов
+    strategies_skipped: int = 0
+    screen_time_ms: float = 0.0
+
+    @property
+    def skipped(self) -> int:
+        """Символов, отсеянных целиком"""
+        return self.symbols_screened - len(self.candidates)
+
+    @property
+    def pass_rate(self) -> float:
+        """Доля символов, дошедших до полного анализа (%)"""
+        if not self.symbols_screened:
+            return 100.0
+        return len(self.candidates) / self.symbols_screened * 100
+
+    def strategies_for(self, symbol: str) -> Optional[List[str]]:
+        """Стратегии-кандидаты символа (None = все)"""
+        return self.strategies_by_symbol.get(symbol)
+
+
+class SymbolScreen:
+    """
+    🔎 Предварительный отбор символов перед полным анализом стратегий
+
+    Работает только с тем, что уже в памяти (уровни и ATR контекста) и
+    одной ценой на символ, поэтому весь проход - несколько операций
+    numpy над матрицей символы × уровни.
+    """
+
+    def __init__(
+        self,
+        strategies: List[Any],
+        distance_margin_atr: float = 0.25,
+        passthrough_regimes: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            strategies: Экземпляры стратегий (условия берутся из их атрибутов)
+            distance_margin_atr: Запас к max_distance_to_level в единицах ATR
+            passthrough_regimes: Режимы волатильности без скрининга (по умолчанию extreme)
+        """
+        self.gates = [StrategyGate.from_strategy(s) for s in strategies]
+        self.distance_margin_atr = distance_margin_atr
+        self.passthrough_regimes = set(passthrough_regimes or ["extreme"])
+
+        self.stats = {
+            "screens_run": 0,
+            "symbols_screened": 0,
+            "symbols_passed": 0,
+            "symbols_passthrough": 0,
+            "strategies_skipped": 0,
+            "total_screen_time_ms": 0.0
+        }
+
+        logger.info(f"🔎 SymbolScreen: {len(self.gates)} стратегий, "
+                    f"запас {distance_margin_atr} ATR, без скрининга: {sorted(self.passthrough_regimes)}")
+
+    # ==================== СКРИНИНГ ====================
+
+    def run(
+        self,
+        symbols: List[str],
+        prices: Dict[str, float],
+        contexts: Dict[str, Any]
+    ) -> ScreenResult:
+        """
+        Отобрать символы и стратегии для полного анализа
+
+        Args:
+            symbols: Символы цикла
+            prices: Последняя цена символа
+            contexts: TechnicalAnalysisContext по символу (без обновления)
+
+        Returns:
+            ScreenResult
+        """
+        started = time.perf_counter()
+        result = ScreenResult(symbols_screened=len(symbols))
+
+        rows = []
+        for symbol in symbols:
+            row = self._extract_row(prices.get(symbol), contexts.get(symbol))
+            if row is None:
+                result.passthrough.append(symbol)
+            else:
+                rows.append((symbol, row))
+
+        if rows:
+            self._screen_rows(rows, result)
+
+        passed = set(result.passthrough) | set(result.strategies_by_symbol)
+        result.candidates = [s for s in symbols if s in passed]
+        result.screen_time_ms = (time.perf_counter() - started) * 1000
+
+        self.stats["screens_run"] += 1
+        self.stats["symbols_screened"] += result.symbols_screened
+        self.stats["symbols_passed"] += len(result.candidates)
+        self.stats["symbols_passthrough"] += len(result.passthrough)
+        self.stats["strategies_skipped"] += result.strategies_skipped
+        self.stats["total_screen_time_ms"] += result.screen_time_ms
+
+        return result
+
+    def _extract_row(self, price: Optional[float], context: Any) -> Optional[Dict[str, Any]]:
+        """Данные символа для матрицы (None = пропустить без проверки)"""
+        if not price or price <= 0 or context is None:
+            return None
+
+        levels = getattr(context, "levels_d1", None)
+        atr_data = getattr(context, "atr_data", None)
+        atr = getattr(atr_data, "calculated_atr", 0) if atr_data else 0
+        if not levels or not atr or atr <= 0:
+            return None
+
+        return {
+            "price": float(price),
+            "atr": float(atr),
+            "atr_used": float(getattr(atr_data, "current_range_used", 0) or 0),
+            "levels": [(lvl.price, lvl.strength, lvl.touches) for lvl in levels]
+        }
+
+    def _screen_rows(self, rows: List[tuple], result: ScreenResult):
+        """Векторный проход по символам с контекстом"""
+        n = len(rows)
+        width = max(len(row["levels"]) for _, row in rows)
+
+        level_price = np.full((n, width), np.nan)
+        level_strength = np.full((n, width), -np.inf)
+        level_touches = np.full((n, width), -1.0)
+        for i, (_, row) in enumerate(rows):
+            k = len(row["levels"])
+            data = np.asarray(row["levels"], dtype=float)
+            level_price[i, :k] = data[:, 0]
+            level_strength[i, :k] = data[:, 1]
+            level_touches[i, :k] = data[:, 2]
+
+        price = np.array([row["price"] for _, row in rows])
+        atr = np.array([row["atr"] for _, row in rows])
+        atr_used = np.array([row["atr_used"] for _, row in rows])
+
+        # Расстояние до уровней: доля цены; NaN (нет уровня) -> inf
+        distance = np.abs(level_price - price[:, None]) / price[:, None]
+        distance = np.where(np.isnan(distance), np.inf, distance)
+
+        atr_fraction = atr / price
+        margin = self.distance_margin_atr * atr_fraction
+
+        regime_index = np.digitize(atr_fraction * 100, VOLATILITY_BOUNDS)
+        regimes = np.array(VOLATILITY_REGIMES)[regime_index]
+        passthrough = np.isin(regimes, list(self.passthrough_regimes))
+
+        nearest_atr = distance.min(axis=1) / atr_fraction
+
+        passed = np.zeros((n, len(self.gates)), dtype=bool)
+        for j, gate in enumerate(self.gates):
+            if gate.max_distance is None:
+                passed[:, j] = True
+                continue
+
+            qualifies = (level_strength >= gate.min_strength) & (level_touches >= gate.min_touches)
+            nearest = np.where(qualifies, distance, np.inf).min(axis=1)
+            ok = nearest <= gate.max_distance + margin
+
+            if gate.atr_exhaustion is not None:
+                ok &= atr_used <= gate.atr_exhaustion
+
+            passed[:, j] = ok | passthrough
+
+        for i, (symbol, _) in enumerate(rows):
+            regime = str(regimes[i])
+            result.regimes[regime] = result.regimes.get(regime, 0) + 1
+            if np.isfinite(nearest_atr[i]):
+                result.distance_atr[symbol] = float(nearest_atr[i])
+
+            names = [gate.name for gate, ok in zip(self.gates, passed[i]) if ok]
+            result.strategies_skipped += len(self.gates) - len(names)
+            if names:
+                result.strategies_by_symbol[symbol] = names
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Накопленная статистика скрининга"""
+        screened = self.stats["symbols_screened"]
+        runs = self.stats["screens_run"]
+        return {
+            **self.stats,
+            "pass_rate": self.stats["symbols_passed"] / screened * 100 if screened else 100.0,
+            "average_screen_time_ms": self.stats["total_screen_time_ms"] / runs if runs else 0.0,
+            "gates": [gate.__dict__ for gate in self.gates]
+        }
+
+    def __repr__(self) -> str:
+        return f"SymbolScreen(gates={len(self.gates)}, runs={self.stats['screens_run']})"
+
+
+__all__ = ["SymbolScreen", "ScreenResult", "StrategyGate", "VOLATILITY_REGIMES"]
+
+logger.info("✅ SymbolScreen module loaded")
@@ -7,9 +7,14 @@ Technical Analysis Module
 Components:
 - TechnicalAnalysisContext: Кэшированный контекст технического анализа
 - TechnicalAnalysisContextManager: Менеджер автоматического обновления контекстов
+- ContextSnapshotStore: Снапшот контекстов для теплого старта
+- RefreshScheduler: Планировщик батчевых фоновых обновлений контекстов
+- ContextCache: LRU кэш контекстов с бюджетом памяти и закреплением символов
 - LevelAnalyzer: Анализатор уровней поддержки/сопротивления
+- IncrementalLevelTracker: Инкрементальный трекер уровней (скользящее окно D1)
 - ATRCalculator: Калькулятор ATR (Average True Range)
 - PatternDetector: Детектор паттернов БСУ-БПУ
+- VectorizedPatternDetector: Векторизованный (NumPy) детектор паттернов
 - BreakoutAnalyzer: Анализатор пробоев (истинных и ложных)
 - MarketConditionsAnalyzer: Анализатор рыночных условий
 
@@ -23,15 +28,19 @@ import logging
 from .context import (
     TechnicalAnalysisContext,
     SupportResistanceLevel,
+    LevelIndex,
     ATRData,
     MarketCondition,
     TrendDirection
 )
 
 from .context_manager import TechnicalAnalysisContextManager
+from .context_snapshot import ContextSnapshotStore
+from .refresh_scheduler import RefreshScheduler
+from .context_cache import ContextCache
 
 # ==================== ANALYZERS ====================
-from .level_analyzer import LevelAnalyzer, LevelCandidate
+from .level_analyzer import LevelAnalyzer, LevelCandidate, IncrementalLevelTracker
 
 from .atr_calculator import ATRCalculator
 
@@ -42,6 +51,12 @@ from .pattern_detector import (
     BPUPattern
 )
 
+from .vectorized_patterns import (
+    VectorizedPatternDetector,
+    CandleArrays,
+    PatternScanResult
+)
+
 from .breakout_analyzer import (
     BreakoutAnalyzer,
     BreakoutAnalysis,
@@ -52,6 +67,7 @@ from .breakout_analyzer import (
 from .market_conditions import (
     MarketConditionsAnalyzer,
     MarketConditionsAnalysis,
+    IncrementalMarketConditionsAnalyzer,
     VolatilityLevel,
     EnergyLevel,
     TrendStrength
@@ -65,7 +81,11 @@ __all__ = [
     # Context & Manager
     "TechnicalAnalysisContext",
     "TechnicalAnalysisContextManager",
+    "ContextSnapshotStore",
+    "RefreshScheduler",
+    "ContextCache",
     "SupportResistanceLevel",
+    "LevelIndex",
     "ATRData",
     "MarketCondition",
     "TrendDirection",
@@ -73,6 +93,7 @@ __all__ = [
     # Level Analyzer
     "LevelAnalyzer",
     "LevelCandidate",
+    "IncrementalLevelTracker",
     
     # ATR Calculator
     "ATRCalculator",
@@ -83,6 +104,11 @@ __all__ = [
     "BSUPattern",
     "BPUPattern",
     
+    # Vectorized Pattern Detector
+    "VectorizedPatternDetector",
+    "CandleArrays",
+    "PatternScanResult",
+    
     # Breakout Analyzer
     "BreakoutAnalyzer",
     "BreakoutAnalysis",
@@ -92,6 +118,7 @@ __all__ = [
     # Market Conditions Analyzer
     "MarketConditionsAnalyzer",
     "MarketConditionsAnalysis",
+    "IncrementalMarketConditionsAnalyzer",
     "VolatilityLevel",
     "EnergyLevel",
     "TrendStrength",
@@ -112,6 +139,7 @@ MODULE_STATUS = {
     "level_analyzer": "✅ Ready",
     "atr_calculator": "✅ Ready",
     "pattern_detector": "✅ Ready",
+    "vectorized_patterns": "✅ Ready",
     "breakout_analyzer": "✅ Ready",
     "market_conditions": "✅ Ready"
 }
@@ -168,6 +196,7 @@ def get_available_analyzers():
         "level": LevelAnalyzer,
         "atr": ATRCalculator,
         "pattern": PatternDetector,
+        "vectorized_pattern": VectorizedPatternDetector,
         "breakout": BreakoutAnalyzer,
         "market_conditions": MarketConditionsAnalyzer
     }
@@ -221,6 +250,7 @@ if is_fully_ready():
     logger.info("  • LevelAnalyzer - анализ уровней S/R")
     logger.info("  • ATRCalculator - расчет запаса хода")
     logger.info("  • PatternDetector - детекция паттернов (БСУ-БПУ, поджатие)")
+    logger.info("  • VectorizedPatternDetector - векторная детекция паттернов (NumPy)")
     logger.info("  • BreakoutAnalyzer - анализ пробоев (истинные/ложные)")
     logger.info("  • MarketConditionsAnalyzer - анализ рыночных условий")
 else:
@@ -8,10 +8,11 @@ Author: Trading Bot Team
 Version: 1.0.0
 """
 
+import bisect
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable
 from enum import Enum
 
 logger = logging.getLogger(__name__)
@@ -143,6 +144,122 @@ class ATRData:
         }
 
 
+class LevelIndex:
+    """
+    🗂️ Индекс уровней по цене
+    
+    Уровни хранятся в отсортированных по цене массивах отдельно для
+    support / resistance (и общий массив). Запросы ближайшего уровня
+    выше/ниже и уровней в диапазоне цен - через bisect.
+    
+    При равной цене порядок совпадает с исходным списком, поэтому
+    результаты идентичны линейному поиску по levels_d1.
+    """
+    
+    ALL = "all"
+    
+    def __init__(self, levels: Optional[List[SupportResistanceLevel]] = None):
+        self.source = levels
+        self.size = len(levels) if levels else 0
+        
+        self._prices: Dict[str, List[float]] = {}
+        self._orders: Dict[str, List[int]] = {}
+        self._levels: Dict[str, List[SupportResistanceLevel]] = {}
+        
+        entries = sorted(
+            ((level.price, order, level) for order, level in enumerate(levels or [])),
+            key=lambda entry: (entry[0], entry[1])
+        )
+        
+        for kind in (self.ALL, "support", "resistance"):
+            selected = [e for e in entries if kind == self.ALL or e[2].level_type == kind]
+            self._prices[kind] = [e[0] for e in selected]
+            self._orders[kind] = [e[1] for e in selected]
+            self._levels[kind] = [e[2] for e in selected]
+    
+    def is_stale(self, levels: List[SupportResistanceLevel]) -> bool:
+        """Индекс построен не для этого списка уровней"""
+        return levels is not self.source or len(levels) != self.size
+    
+    def _kind(self, level_type: Optional[str]) -> str:
+        return level_type if level_type in ("support", "resistance") else self.ALL
+    
+    def nearest_below(
+        self,
+        price: float,
+        level_type: Optional[str] = "support",
+        predicate: Optional[Callable[[SupportResistanceLevel], bool]] = None
+    ) -> Optional[SupportResistanceLevel]:
+        """Ближайший уровень строго ниже цены (опционально - удовлетворяющий predicate)"""
+        kind = self._kind(level_type)
+        prices, levels = self._prices[kind], self._levels[kind]
+        
+        end = bisect.bisect_left(prices, price)
+        
+        # Идем вниз группами равной цены; внутри группы - в исходном порядке
+        while end > 0:
+            start = bisect.bisect_left(prices, prices[end - 1], 0, end)
+            for i in range(start, end):
+                if predicate is None or predicate(levels[i]):
+                    return levels[i]
+            end = start
+        
+        return None
+    
+    def nearest_above(
+        self,
+        price: float,
+        level_type: Optional[str] = "resistance",
+        predicate: Optional[Callable[[SupportResistanceLevel], bool]] = None
+    ) -> Optional[SupportResistanceLevel]:
+        """Ближайший уровень строго выше цены (опционально - удовлетворяющий predicate)"""
+        kind = self._kind(level_type)
+        prices, levels = self._prices[kind], self._levels[kind]
+        
+        for i in range(bisect.bisect_right(prices, price), len(prices)):
+            if predicate is None or predicate(levels[i]):
+                return levels[i]
+        
+        return None
+    
+    def in_price_range(
+        self,
+        low: float,
+        high: float,
+        level_type: Optional[str] = None
+    ) -> List[SupportResistanceLevel]:
+        """Уровни с low <= price <= high в исходном порядке levels_d1"""
+        kind = self._kind(level_type)
+        prices = self._prices[kind]
+        
+        start = bisect.bisect_left(prices, low)
+        end = bisect.bisect_right(prices, high)
+        
+        selected = sorted(range(start, end), key=lambda i: self._orders[kind][i])
+        return [self._levels[kind][i] for i in selected]
+    
+    def within(
+        self,
+        price: float,
+        max_distance: float,
+        level_type: Optional[str] = None
+    ) -> List[SupportResistanceLevel]:
+        """
+        Уровни с |level.price - price| / price <= max_distance (исходный порядок)
+        
+        Диапазон bisect слегка расширен, точная проверка - той же формулой,
+        что и в линейном поиске.
+        """
+        margin = abs(price) * max_distance * (1 + 1e-9) + 1e-12
+        return [
+            level for level in self.in_price_range(price - margin, price + margin, level_type)
+            if abs(level.price - price) / price <= max_distance
+        ]
+    
+    def __len__(self) -> int:
+        return self.size
+
+
 @dataclass
 class TechnicalAnalysisContext:
     """
@@ -156,9 +273,11 @@ class TechnicalAnalysisContext:
     - Рыночные условия
     
     Кэширование:
-    - levels_d1: обновление раз в 24 часа
-    - atr_data: обновление раз в час
-    - candles: обновление каждую минуту
+    - каждый компонент помнит водяной знак входа (input_watermarks):
+      open_time последней свечи каждого интервала, из которых он посчитан;
+      менеджер пересчитывает компонент, когда синхронизация записала
+      более новую свечу
+    - без событий синхронизации - TTL: уровни 24 часа, ATR час, свечи минута
     
     Usage:
         context = await ta_manager.get_context("BTCUSDT")
@@ -175,6 +294,7 @@ class TechnicalAnalysisContext:
     levels_d1: List[SupportResistanceLevel] = field(default_factory=list)
     levels_updated_at: Optional[datetime] = None
     levels_cache_ttl_hours: int = 24
+    level_index: LevelIndex = field(default_factory=LevelIndex, repr=False)
     
     # ==================== ATR ====================
     atr_data: Optional[ATRData] = None
@@ -207,6 +327,8 @@ class TechnicalAnalysisContext:
     context_created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     last_full_update: Optional[datetime] = None
     update_count: int = 0
+    # Водяные знаки входа: компонент -> {interval: open_time последней свечи}
+    input_watermarks: Dict[str, Dict[str, datetime]] = field(default_factory=dict)
     error_count: int = 0
     last_error: Optional[str] = None
     
@@ -245,6 +367,22 @@ class TechnicalAnalysisContext:
     
     # ==================== ПОИСК УРОВНЕЙ ====================
     
+    def set_levels(self, levels: List[SupportResistanceLevel]):
+        """Заменить уровни D1 и перестроить индекс по цене"""
+        self.levels_d1 = levels
+        self.level_index = LevelIndex(levels)
+    
+    def get_level_index(self) -> LevelIndex:
+        """
+        Индекс уровней по цене
+        
+        Перестраивается в set_levels(); если levels_d1 заменили или
+        изменили напрямую - перестраивается здесь.
+        """
+        if self.level_index.is_stale(self.levels_d1):
+            self.level_index = LevelIndex(self.levels_d1)
+        return self.level_index
+    
     def get_nearest_support(self, current_price: float, max_distance_percent: float = 5.0) -> Optional[SupportResistanceLevel]:
         """
         Найти ближайший уровень поддержки ниже текущей цены
@@ -256,18 +394,11 @@ class TechnicalAnalysisContext:
         Returns:
             Ближайший уровень поддержки или None
         """
-        supports = [
-            level for level in self.levels_d1
-            if level.level_type == "support" and level.price < current_price
-        ]
+        nearest = self.get_level_index().nearest_below(current_price, "support")
         
-        if not supports:
+        if not nearest:
             return None
         
-        # Сортируем по расстоянию от текущей цены
-        supports.sort(key=lambda l: abs(l.price - current_price))
-        
-        nearest = supports[0]
         distance_percent = abs(nearest.price - current_price) / current_price * 100
         
         if distance_percent <= max_distance_percent:
@@ -286,18 +417,11 @@ class TechnicalAnalysisContext:
         Returns:
             Ближайший уровень сопротивления или None
         """
-        resistances = [
-            level for level in self.levels_d1
-            if level.level_type == "resistance" and level.price > current_price
-        ]
+        nearest = self.get_level_index().nearest_above(current_price, "resistance")
         
-        if not resistances:
+        if not nearest:
             return None
         
-        # Сортируем по расстоянию
-        resistances.sort(key=lambda l: abs(l.price - current_price))
-        
-        nearest = resistances[0]
         distance_percent = abs(nearest.price - current_price) / current_price * 100
         
         if distance_percent <= max_distance_percent:
@@ -320,7 +444,10 @@ class TechnicalAnalysisContext:
         Returns:
             Уровень если рядом, иначе None
         """
-        for level in self.levels_d1:
+        margin = abs(current_price) * tolerance_percent / 100 * (1 + 1e-9) + 1e-12
+        candidates = self.get_level_index().in_price_range(current_price - margin, current_price + margin)
+        
+        for level in candidates:
             distance_percent = abs(level.price - current_price) / current_price * 100
             if distance_percent <= tolerance_percent:
                 return level
@@ -431,6 +558,7 @@ class TechnicalAnalysisContext:
 __all__ = [
     "TechnicalAnalysisContext",
     "SupportResistanceLevel",
+    "LevelIndex",
     "ATRData",
     "MarketCondition",
     "TrendDirection"
@@ -0,0 +1,258 @@
+"""
+Context Cache - Ограниченный LRU кэш контекстов технического анализа
+
+Контекст держит списки свечей M5/M30/H1/H4/D1 (сотни dict) и уровни D1.
+Контекст создается для любого запрошенного символа, и без ограничения
+кэш растет вместе с числом символов, которые спрашивали пользователи.
+
+ContextCache - словарь symbol -> контекст с вытеснением:
+- порядок LRU задают обращения пользователей (touch из get_context);
+  фоновые обновления и слушатели свечей порядок не меняют
+- лимиты: количество контекстов и/или бюджет памяти (оценка в байтах)
+- закрепленные символы (продакшн-список) не вытесняются никогда
+- оценка памяти контекста пересчитывается после загрузки свечей/уровней
+
+Вытесненный контекст пропадает из кэша, поэтому фоновый планировщик
+перестает его обновлять; при следующем запросе он создается заново.
+
+Usage:
+    manager = TechnicalAnalysisContextManager(
+        repository,
+        max_contexts=Config.TA_MAX_CONTEXTS,
+        memory_budget_mb=Config.TA_MEMORY_BUDGET_MB,
+        pinned_symbols=Config.get_production_symbols()
+    )
+    manager.contexts.get_stats()  # ContextCache: память, вытеснения
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+import sys
+from collections import OrderedDict, defaultdict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from .context import TechnicalAnalysisContext
+
+logger = logging.getLogger(__name__)
+
+# Лимиты по умолчанию (совпадают с Config.TA_MAX_CONTEXTS / TA_MEMORY_BUDGET_MB)
+DEFAULT_MAX_CONTEXTS = 200
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+_CANDLE_LISTS = (
+    "recent_candles_m5",
+    "recent_candles_m30",
+    "recent_candles_h1",
+    "recent_candles_h4",
+    "recent_candles_d1"
+)
+
+
+# ==================== ОЦЕНКА ПАМЯТИ ====================
+
+def _object_bytes(value: Any) -> int:
+    """Объект + его значения на один уровень вглубь (ключи dict - общие строки)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(v) for v in value.values())
+    elif hasattr(value, "__dict__"):
+        size += sys.getsizeof(value.__dict__) + sum(sys.getsizeof(v) for v in vars(value).values())
+    return size
+
+
+def _sequence_bytes(items: Any) -> int:
+    """Список однотипных элементов: контейнер + первый элемент * длина"""
+    try:
+        count = len(items)
+    except TypeError:
+        return sys.getsizeof(items)
+    if not count:
+        return sys.getsizeof(items)
+    return sys.getsizeof(items) + _object_bytes(items[0]) * count
+
+
+def estimate_context_bytes(context: TechnicalAnalysisContext) -> int:
+    """
+    Оценка памяти контекста в байтах
+
+    Свечи и уровни однотипны, поэтому размер считается по первому элементу
+    списка: O(1) на список, точность - порядок величины, для бюджета этого
+    достаточно.
+    """
+    size = sys.getsizeof(context) + sys.getsizeof(context.__dict__)
+
+    for attr in _CANDLE_LISTS:
+        size += _sequence_bytes(getattr(context, attr))
+
+    size += _sequence_bytes(context.levels_d1)
+
+    if context.atr_data is not None:
+        size += _object_bytes(context.atr_data)
+
+    return size
+
+
+# ==================== КЭШ ====================
+
+class ContextCache(MutableMapping):
+    """
+    🗃️ LRU кэш контекстов с лимитом количества и бюджетом памяти
+    """
+
+    def __init__(
+        self,
+        max_contexts: Optional[int] = DEFAULT_MAX_CONTEXTS,
+        memory_budget_bytes: Optional[int] = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024,
+        pinned: Optional[Iterable[str]] = None,
+        on_evict: Optional[Callable[[str, TechnicalAnalysisContext], None]] = None
+    ):
+        """
+        Args:
+            max_contexts: Максимум контекстов (None = без лимита)
+            memory_budget_bytes: Бюджет памяти по оценке (None = без лимита)
+            pinned: Символы, которые не вытесняются
+            on_evict: Вызывается для каждого вытесненного контекста
+        """
+        self.max_contexts = max_contexts
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pinned = {symbol.upper() for symbol in (pinned or [])}
+        self.on_evict = on_evict
+
+        self._data: "OrderedDict[str, TechnicalAnalysisContext]" = OrderedDict()  # старые -> новые
+        self._sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+
+        self.stats = {
+            "inserts": 0,
+            "evictions": 0,
+            "evicted_bytes": 0,
+            "evictions_by_reason": defaultdict(int),
+            "over_budget_pinned": 0
+        }
+
+    # ==================== MAPPING ====================
+
+    def __getitem__(self, symbol: str) -> TechnicalAnalysisContext:
+        return self._data[symbol]
+
+    def __setitem__(self, symbol: str, context: TechnicalAnalysisContext):
+        if symbol in self._data:
+            self._forget(symbol)
+        self._data[symbol] = context
+        self._sizes[symbol] = estimate_context_bytes(context)
+        self.total_bytes += self._sizes[symbol]
+        self.stats["inserts"] += 1
+        self._enforce(protect=symbol)
+
+    def __delitem__(self, symbol: str):
+        self._forget(symbol)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
+
+    def _forget(self, symbol: str) -> TechnicalAnalysisContext:
+        context = self._data.pop(symbol)
+        self.total_bytes -= self._sizes.pop(symbol, 0)
+        return context
+
+    # ==================== LRU И ПАМЯТЬ ====================
+
+    def touch(self, symbol: str):
+        """Отметить обращение пользователя (самый свежий в LRU)"""
+        if symbol in self._data:
+            self._data.move_to_end(symbol)
+
+    def account(self, context: TechnicalAnalysisContext):
+        """Пересчитать оценку памяти после обновления данных контекста"""
+        symbol = context.symbol
+        if self._data.get(symbol) is not context:
+            return  # уже вытеснен или пересоздан
+
+        size = estimate_context_bytes(context)
+        self.total_bytes += size - self._sizes.get(symbol, 0)
+        self._sizes[symbol] = size
+        self._enforce(protect=symbol)
+
+    def pin(self, symbols: Iterable[str]):
+        """Закрепить символы (не вытесняются)"""
+        self.pinned.update(symbol.upper() for symbol in symbols)
+
+    def unpin(self, symbols: Iterable[str]):
+        """Снять закрепление (символы снова участвуют в LRU)"""
+        self.pinned.difference_update(symbol.upper() for symbol in symbols)
+        self._enforce()
+
+    def _over_limit(self) -> Optional[str]:
+        if self.max_contexts is not None and len(self._data) > self.max_contexts:
+            return "max_contexts"
+        if self.memory_budget_bytes is not None and self.total_bytes > self.memory_budget_bytes:
+            return "memory_budget"
+        return None
+
+    def _enforce(self, protect: Optional[str] = None):
+        """Вытеснять самые давние незакрепленные контексты, пока лимит превышен"""
+        reason = self._over_limit()
+        if reason is None:
+            return
+
+        candidates = [s for s in self._data if s not in self.pinned and s != protect]
+
+        for symbol in candidates:
+            size = self._sizes.get(symbol, 0)
+            context = self._forget(symbol)
+
+            self.stats["evictions"] += 1
+            self.stats["evicted_bytes"] += size
+            self.stats["evictions_by_reason"][reason] += 1
+            logger.debug(f"♻️ Контекст {symbol} вытеснен ({reason}, ~{size / 1024:.0f} KB)")
+
+            if self.on_evict:
+                self.on_evict(symbol, context)
+
+            reason = self._over_limit()
+            if reason is None:
+                return
+
+        # Остались только закрепленные (и защищенный) - лимит не достижим
+        self.stats["over_budget_pinned"] += 1
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша + оценка памяти по контекстам"""
+        return {
+            **self.stats,
+            "evictions_by_reason": dict(self.stats["evictions_by_reason"]),
+            "contexts": len(self._data),
+            "pinned": sorted(self.pinned),
+            "max_contexts": self.max_contexts,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "total_bytes": self.total_bytes,
+            "context_bytes": dict(self._sizes),
+            "lru_order": list(self._data)
+        }
+
+    def __repr__(self) -> str:
+        return (f"ContextCache(contexts={len(self._data)}, pinned={len(self.pinned)}, "
+                f"bytes={self.total_bytes}, evictions={self.stats['evictions']})")
+
+
+__all__ = [
+    "ContextCache",
+    "estimate_context_bytes",
+    "DEFAULT_MAX_CONTEXTS",
+    "DEFAULT_MEMORY_BUDGET_MB"
+]
+
+logger.info("✅ Context Cache module loaded")
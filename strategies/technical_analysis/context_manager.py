@@ -8,6 +8,28 @@ Technical Analysis Context Manager
 - Свечи: каждую минуту
 - Рыночные условия: каждые 15 минут
 
+Расписание ведет один RefreshScheduler: символы, у которых подошел срок
+компонента, обновляются батчем - один запрос к БД на интервал для всего
+батча (get_candles_multi), а не запрос на символ.
+
+Обновление компонента символа - single-flight: один in-flight таск на
+(symbol, компонент), остальные вызывающие (get_context, фоновые циклы,
+оркестратор, Telegram) ждут его же. get_context отдает уже заполненный
+контекст сразу и обновляет устаревшее в фоне (stale-while-revalidate).
+
+Устаревание - по водяным знакам, а не по часам: менеджер подписан на
+записи синхронизатора свечей (on_candles) и пересчитывает компонент,
+только когда появилась свеча новее той, из которой он посчитан. Для
+символов без событий синхронизации остаются TTL контекста.
+
+С snapshot_store контексты периодически сохраняются на диск и
+восстанавливаются при старте фоновых обновлений: пересчитывается только
+то, у чего сдвинулся водяной знак входных D1 свечей.
+
+Контексты хранятся в ContextCache: LRU по обращениям get_context с
+лимитом количества и бюджетом памяти; закрепленные (продакшн) символы не
+вытесняются, вытесненные - не обновляются в фоне.
+
 Author: Trading Bot Team
 Version: 2.0.1 (Production Ready - Fixed)
 """
@@ -15,8 +37,8 @@ Version: 2.0.1 (Production Ready - Fixed)
 import asyncio
 import logging
 import traceback
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, List, Any
+from datetime import datetime, timezone
+from typing import Dict, Optional, List, Any, Callable, Awaitable, Tuple
 from collections import defaultdict
 
 from .context import (
@@ -27,15 +49,37 @@ from .context import (
     TrendDirection
 )
 
-from .level_analyzer import LevelAnalyzer
+from .level_analyzer import LevelAnalyzer, IncrementalLevelTracker
 from .atr_calculator import ATRCalculator
-from .pattern_detector import PatternDetector
+from .vectorized_patterns import VectorizedPatternDetector, CandleArrays
 from .breakout_analyzer import BreakoutAnalyzer
-from .market_conditions import MarketConditionsAnalyzer
+from .market_conditions import MarketConditionsAnalyzer, IncrementalMarketConditionsAnalyzer
+from .context_snapshot import restore_context, snapshot_watermark
+from .refresh_scheduler import RefreshScheduler
+from .context_cache import ContextCache, DEFAULT_MAX_CONTEXTS, DEFAULT_MEMORY_BUDGET_MB
 
 logger = logging.getLogger(__name__)
 
 
+# Входные интервалы компонентов контекста (водяные знаки)
+COMPONENT_INPUTS: Dict[str, Tuple[str, ...]] = {
+    "levels": ("1d",),
+    "atr": ("1d",),
+    "candles": ("5m", "30m", "1h", "4h")
+}
+WATERMARK_INTERVALS = frozenset(i for inputs in COMPONENT_INPUTS.values() for i in inputs)
+
+# Загрузка свечей компонента candles: (interval, limit, атрибут контекста)
+CANDLE_FETCHES: Tuple[Tuple[str, int, str], ...] = (
+    ("5m", 100, "recent_candles_m5"),    # 8 часов
+    ("30m", 50, "recent_candles_m30"),   # 25 часов
+    ("1h", 24, "recent_candles_h1"),     # 1 день
+    ("4h", 24, "recent_candles_h4"),     # 4 дня
+)
+LEVELS_D1_LIMIT = 180  # 6 месяцев D1 для уровней
+ATR_D1_LIMIT = 5       # D1 для ATR, если уровни еще не загружали
+
+
 class TechnicalAnalysisContextManager:
     """
     🧠 Менеджер контекстов технического анализа (PRODUCTION READY)
@@ -53,10 +97,28 @@ class TechnicalAnalysisContextManager:
     - ATR: раз в час
     - Свечи: каждую минуту
     - Рыночные условия: каждые 15 минут
+    Символы с одним сроком обновляются батчем (RefreshScheduler).
+    
+    Устаревание:
+    - компонент пересчитывается, когда водяной знак его входа сдвинулся
+      (новая свеча записана синхронизатором, см. on_candles)
+    - символы без событий синхронизации - по TTL контекста
+    
+    Конкурентные обновления:
+    - (symbol, компонент) обновляется не более чем одним таском
+    - get_context с устаревшим кэшем возвращает прежние данные сразу,
+      обновление идет в фоне (stale_while_revalidate=False - ждать)
+    
+    Память:
+    - max_contexts / memory_budget_mb ограничивают кэш контекстов (LRU,
+      по умолчанию 200 контекстов / 256 MB, None - без лимита)
+    - pinned_symbols не вытесняются; вытесненный символ пересоздается
+      при следующем get_context
     
     Usage:
         manager = TechnicalAnalysisContextManager(repository)
-        await manager.start()
+        candle_sync.add_candle_listener(manager.on_candles)
+        await manager.start_background_updates()
         
         context = await manager.get_context("BTCUSDT")
         levels = context.levels_d1
@@ -77,6 +139,24 @@ class TechnicalAnalysisContextManager:
         pattern_detector_config: Optional[Dict] = None,
         breakout_analyzer_config: Optional[Dict] = None,
         market_conditions_config: Optional[Dict] = None,
+        
+        # Часы анализа (None = реальное время; бэктест передает время реплея)
+        clock: Optional[Callable[[], datetime]] = None,
+        
+        # Отдавать устаревший контекст сразу и обновлять в фоне
+        stale_while_revalidate: bool = True,
+        
+        # Теплый старт: ContextSnapshotStore (None = без снапшотов)
+        snapshot_store=None,
+        snapshot_interval_seconds: int = 300,
+        
+        # Параметры RefreshScheduler (None = по умолчанию)
+        scheduler_config: Optional[Dict] = None,
+        
+        # Ограничение кэша контекстов (None = без лимита)
+        max_contexts: Optional[int] = DEFAULT_MAX_CONTEXTS,
+        memory_budget_mb: Optional[float] = DEFAULT_MEMORY_BUDGET_MB,
+        pinned_symbols: Optional[List[str]] = None,
     ):
         """
         Инициализация менеджера
@@ -89,9 +169,21 @@ class TechnicalAnalysisContextManager:
             pattern_detector_config: Конфигурация для PatternDetector
             breakout_analyzer_config: Конфигурация для BreakoutAnalyzer
             market_conditions_config: Конфигурация для MarketConditionsAnalyzer
+            clock: Источник текущего времени для расчетов (давность касаний уровней)
+            stale_while_revalidate: get_context не ждет обновления уже заполненного контекста
+            snapshot_store: ContextSnapshotStore для сохранения/восстановления контекстов
+            snapshot_interval_seconds: Период сохранения снапшота
+            scheduler_config: Конфигурация для RefreshScheduler (батчи, джиттер, лимиты)
+            max_contexts: Максимум контекстов в кэше
+            memory_budget_mb: Бюджет памяти кэша контекстов (оценка), MB
+            pinned_symbols: Символы, контексты которых не вытесняются (продакшн-список)
         """
         self.repository = repository
         self.auto_start = auto_start_background_updates
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.stale_while_revalidate = stale_while_revalidate
+        self.snapshot_store = snapshot_store
+        self.snapshot_interval = snapshot_interval_seconds
         
         # ==================== ИНИЦИАЛИЗАЦИЯ АНАЛИЗАТОРОВ ====================
         
@@ -110,10 +202,10 @@ class TechnicalAnalysisContextManager:
         logger.info("✅ ATRCalculator инициализирован")
         
         # 3. Pattern Detector - детекция паттернов (БСУ-БПУ, поджатие, пучки)
-        self.pattern_detector = PatternDetector(
+        self.pattern_detector = VectorizedPatternDetector(
             **(pattern_detector_config or {})
         )
-        logger.info("✅ PatternDetector инициализирован")
+        logger.info("✅ VectorizedPatternDetector инициализирован")
         
         # 4. Breakout Analyzer - анализ пробоев (истинные/ложные)
         self.breakout_analyzer = BreakoutAnalyzer(
@@ -127,8 +219,34 @@ class TechnicalAnalysisContextManager:
         )
         logger.info("✅ MarketConditionsAnalyzer инициализирован")
         
-        # Кэш контекстов для каждого символа
-        self.contexts: Dict[str, TechnicalAnalysisContext] = {}
+        # Кэш контекстов для каждого символа (LRU с лимитами)
+        self.contexts = ContextCache(
+            max_contexts=max_contexts,
+            memory_budget_bytes=int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None,
+            pinned=pinned_symbols,
+            on_evict=self._on_context_evicted
+        )
+        
+        # Инкрементальные анализаторы условий: (symbol, interval) -> analyzer
+        self.incremental_conditions: Dict[tuple, IncrementalMarketConditionsAnalyzer] = {}
+        
+        # Инкрементальные трекеры уровней D1: symbol -> tracker
+        self.level_trackers: Dict[str, IncrementalLevelTracker] = {}
+        
+        # Последние записанные синхронизатором свечи: symbol -> {interval: open_time}
+        self.latest_watermarks: Dict[str, Dict[str, datetime]] = defaultdict(dict)
+        
+        # In-flight обновления: (symbol, компонент) -> (контекст, таск)
+        self._inflight: Dict[Tuple[str, str], Tuple[TechnicalAnalysisContext, asyncio.Task]] = {}
+        self._component_updaters = {
+            "levels": self._update_levels,
+            "atr": self._update_atr,
+            "candles": self._update_candles,
+            "market_conditions": self._update_market_conditions
+        }
+        
+        # Планировщик батчевых фоновых обновлений
+        self.scheduler = RefreshScheduler(self, **(scheduler_config or {}))
         
         # Фоновые задачи обновления
         self._update_tasks: List[asyncio.Task] = []
@@ -145,6 +263,22 @@ class TechnicalAnalysisContextManager:
             "atr_updates": 0,
             "candles_updates": 0,
             "market_conditions_updates": 0,
+            "incremental_conditions_syncs": 0,
+            "incremental_conditions_rebuilds": 0,
+            "incremental_levels_syncs": 0,
+            "incremental_levels_rebuilds": 0,
+            "refreshes_started": 0,
+            "refreshes_joined": 0,
+            "stale_served": 0,
+            "watermark_events": 0,
+            "watermark_refreshes": 0,
+            "batch_refreshes": 0,
+            "batch_symbols": 0,
+            "batch_queries": 0,
+            "contexts_evicted": 0,
+            "snapshot_saves": 0,
+            "snapshot_restored": 0,
+            "snapshot_invalidated": 0,
             "last_update_time": None,
             "update_times": defaultdict(list),  # Время обновления по типу
             "errors_by_type": defaultdict(int)
@@ -154,6 +288,9 @@ class TechnicalAnalysisContextManager:
         logger.info("🏗️ TechnicalAnalysisContextManager инициализирован")
         logger.info(f"   • Auto-start background updates: {self.auto_start}")
         logger.info(f"   • Анализаторов подключено: 5")
+        if max_contexts or memory_budget_mb:
+            logger.info(f"   • Кэш контекстов: max={max_contexts}, budget={memory_budget_mb} MB, "
+                        f"pinned={len(self.contexts.pinned)}")
         logger.info("=" * 70)
     
     # ==================== ОСНОВНЫЕ МЕТОДЫ ====================
@@ -168,7 +305,9 @@ class TechnicalAnalysisContextManager:
         Получить контекст технического анализа для символа
         
         Если контекст не существует - создается новый.
-        Если кэш устарел - обновляется автоматически.
+        Если кэш устарел - обновляется автоматически: пустой контекст
+        ожидается, заполненный отдается сразу и обновляется в фоне
+        (stale-while-revalidate). Параллельные вызовы делят одно обновление.
         
         Args:
             symbol: Торговый символ (BTCUSDT, ETHUSDT, etc.)
@@ -191,13 +330,18 @@ class TechnicalAnalysisContextManager:
                 self.stats["contexts_created"] += 1
             
             context = self.contexts[symbol]
+            self.contexts.touch(symbol)
             
             # Обновляем если нужно
             if force_update:
                 logger.info(f"🔄 Принудительное обновление контекста {symbol}")
                 await self._full_update_context(context)
+            elif self.stale_while_revalidate and context.update_count > 0:
+                if self._stale_components(context):
+                    self._start_refresh(context, "context", lambda: self._update_context_if_needed(context))
+                    self.stats["stale_served"] += 1
             else:
-                await self._update_context_if_needed(context)
+                await self._single_flight(context, "context", lambda: self._update_context_if_needed(context))
             
             return context
             
@@ -206,42 +350,324 @@ class TechnicalAnalysisContextManager:
             logger.error(traceback.format_exc())
             raise
     
-    async def _update_context_if_needed(self, context: TechnicalAnalysisContext):
+    async def refresh_context(
+        self,
+        symbol: str,
+        levels: bool = False,
+        atr: bool = False,
+        candles: bool = False,
+        market_conditions: bool = True,
+        data_source: str = "bybit"
+    ) -> TechnicalAnalysisContext:
         """
-        Обновить контекст если кэш устарел
+        Явно обновить выбранные компоненты контекста (без проверки TTL)
         
-        Проверяет валидность каждого типа данных и обновляет только устаревшие.
+        Используется реплеем бэктеста, который сам решает, когда данные
+        устарели (новый D1/H1 бар), вместо проверки по реальному времени.
+        Порядок обновления тот же, что и в get_context().
+        """
+        symbol = symbol.upper()
+        
+        if symbol not in self.contexts:
+            self.contexts[symbol] = TechnicalAnalysisContext(symbol=symbol, data_source=data_source)
+            self.stats["contexts_created"] += 1
+        
+        context = self.contexts[symbol]
+        
+        if levels:
+            await self._update_levels(context)
+        if atr:
+            await self._update_atr(context)
+        if candles:
+            await self._update_candles(context)
+        if market_conditions:
+            await self._update_market_conditions(context)
+        
+        context.update_count += 1
+        return context
+    
+    # ==================== SINGLE-FLIGHT ====================
+    
+    def _start_refresh(
+        self,
+        context: TechnicalAnalysisContext,
+        name: str,
+        factory: Callable[[], Awaitable[None]]
+    ) -> asyncio.Task:
+        """
+        In-flight таск обновления (symbol, name) - существующий или новый
+        
+        Args:
+            context: Контекст символа
+            name: Компонент ("levels", "atr", "candles", "market_conditions")
+                  или "context" для обновления устаревшего целиком
+            factory: Создает корутину обновления (вызывается только для нового таска)
+        """
+        key = (context.symbol, name)
+        entry = self._inflight.get(key)
+        
+        # Контекст мог быть пересоздан (clear_context) - старый таск не подходит
+        if entry is not None and entry[0] is context:
+            self.stats["refreshes_joined"] += 1
+            return entry[1]
+        
+        task = asyncio.create_task(factory(), name=f"ta_refresh_{context.symbol}_{name}")
+        self._inflight[key] = (context, task)
+        task.add_done_callback(lambda t, key=key: self._on_refresh_done(key, t))
+        self.stats["refreshes_started"] += 1
+        return task
+    
+    def _on_refresh_done(self, key: Tuple[str, str], task: asyncio.Task):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[1] is task:
+            del self._inflight[key]
+        # Ошибка уже залогирована в _update_*; забираем ее, если таск никто не ждал
+        if not task.cancelled():
+            task.exception()
+    
+    async def _single_flight(
+        self,
+        context: TechnicalAnalysisContext,
+        name: str,
+        factory: Callable[[], Awaitable[None]]
+    ):
+        """Дождаться общего обновления (отмена ожидающего не отменяет таск)"""
+        await asyncio.shield(self._start_refresh(context, name, factory))
+    
+    async def _refresh_component(self, context: TechnicalAnalysisContext, component: str):
+        """Обновить компонент контекста через single-flight"""
+        updater = self._component_updaters[component]
+        await self._single_flight(context, component, lambda: updater(context))
+    
+    # ==================== БАТЧЕВЫЕ ОБНОВЛЕНИЯ ====================
+    
+    def _start_batch_refresh(
+        self,
+        component: str,
+        contexts: List[TechnicalAnalysisContext],
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Tuple[Optional[asyncio.Task], List[TechnicalAnalysisContext]]:
+        """
+        Один таск обновления компонента для набора контекстов
+        
+        Таск регистрируется in-flight для каждого (symbol, component), так что
+        get_context и другие вызывающие присоединяются к батчу. Контексты, у
+        которых компонент уже обновляется, в батч не попадают.
+        
+        Args:
+            component: "levels", "atr", "candles" или "market_conditions"
+            contexts: Контексты символов
+            semaphore: Ограничение одновременно выполняемых батчей
+        
+        Returns:
+            Tuple: (таск или None, если все уже обновляются; контексты батча)
+        """
+        batch = []
+        for context in contexts:
+            entry = self._inflight.get((context.symbol, component))
+            if entry is None or entry[0] is not context:
+                batch.append(context)
+        
+        if not batch:
+            return None, []
+        
+        async def run():
+            if semaphore is None:
+                await self._refresh_batch(component, batch)
+                return
+            async with semaphore:
+                await self._refresh_batch(component, batch)
+        
+        task = asyncio.create_task(run(), name=f"ta_batch_{component}_{len(batch)}")
+        for context in batch:
+            key = (context.symbol, component)
+            self._inflight[key] = (context, task)
+            task.add_done_callback(lambda t, key=key: self._on_refresh_done(key, t))
+        
+        self.stats["refreshes_started"] += len(batch)
+        return task, batch
+    
+    async def _refresh_batch(self, component: str, contexts: List[TechnicalAnalysisContext]):
+        """
+        Обновить компонент набора контекстов
+        
+        Свечи загружаются одним запросом на интервал для всех символов
+        (get_candles_multi), расчет - по контекстам. Ошибка расчета одного
+        символа логируется и не прерывает батч; ошибка загрузки - исключение
+        для всех ожидающих. Репозиторий без get_candles_multi (реплей
+        бэктеста) обновляется по символам. Вытесненные из кэша контексты
+        пропускаются.
         """
+        contexts = [context for context in contexts if self.contexts.get(context.symbol) is context]
+        if not contexts:
+            return
+        
+        if component == "market_conditions" or not hasattr(self.repository, "get_candles_multi"):
+            # Без загрузки (рыночные условия) или по символам
+            updater = self._component_updaters[component]
+            for context in contexts:
+                try:
+                    await updater(context)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка обновления {component} {context.symbol}: {e}")
+            return
+        
+        update_start = datetime.now()
+        symbols = [context.symbol for context in contexts]
+        
         try:
-            updates_needed = []
+            if component == "candles":
+                results = await asyncio.gather(*[
+                    self.repository.get_candles_multi(symbols, interval, limit)
+                    for interval, limit, _ in CANDLE_FETCHES
+                ], return_exceptions=True)
+                self.stats["batch_queries"] += len(CANDLE_FETCHES)
+                
+                if all(isinstance(result, Exception) for result in results):
+                    raise results[0]
+                
+                def apply(context):
+                    self._apply_candles(context, [
+                        result if isinstance(result, Exception) else result.get(context.symbol, [])
+                        for result in results
+                    ])
             
-            # 1. Проверяем уровни D1
-            if not context.is_levels_cache_valid():
-                updates_needed.append("levels")
+            elif component == "levels":
+                candles_d1 = await self.repository.get_candles_multi(symbols, "1d", LEVELS_D1_LIMIT)
+                self.stats["batch_queries"] += 1
+                
+                def apply(context):
+                    self._apply_levels(context, candles_d1.get(context.symbol, []))
             
-            # 2. Проверяем ATR
-            if not context.is_atr_cache_valid():
-                updates_needed.append("atr")
+            else:  # atr
+                # Уже загруженные D1 свечи уровней; остальным - один общий запрос
+                missing = [c.symbol for c in contexts if len(c.recent_candles_d1) < ATR_D1_LIMIT]
+                candles_d1 = {}
+                if missing:
+                    candles_d1 = await self.repository.get_candles_multi(missing, "1d", ATR_D1_LIMIT)
+                    self.stats["batch_queries"] += 1
+                
+                def apply(context):
+                    candles = candles_d1.get(context.symbol)
+                    if candles is None:
+                        candles = context.recent_candles_d1[-ATR_D1_LIMIT:]
+                    self._apply_atr(context, candles)
             
-            # 3. Проверяем свечи
-            if not context.is_candles_cache_valid():
-                updates_needed.append("candles")
+        except Exception as e:
+            logger.error(f"❌ Ошибка батчевой загрузки {component} ({len(symbols)} символов): {e}")
+            self.stats["errors_by_type"][component] += 1
+            raise
+        
+        for context in contexts:
+            try:
+                apply(context)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обновления {component} {context.symbol}: {e}")
+                self.stats["errors_by_type"][component] += 1
+        
+        self.stats["batch_refreshes"] += 1
+        self.stats["batch_symbols"] += len(contexts)
+        self.stats["update_times"][f"{component}_batch"].append((datetime.now() - update_start).total_seconds())
+    
+    # ==================== ВОДЯНЫЕ ЗНАКИ ====================
+    
+    async def on_candles(self, symbol: str, interval: str, candles: List[Any]):
+        """
+        Слушатель синхронизатора свечей: сдвигает водяной знак интервала
+        
+        Если знак сдвинулся и зависящие от интервала компоненты контекста
+        устарели - они пересчитываются в фоне (single-flight).
+        
+        Args:
+            symbol: Символ
+            interval: Интервал (не входящие в контекст игнорируются)
+            candles: MarketDataCandle или dict формата репозитория, по возрастанию времени
+        """
+        if interval not in WATERMARK_INTERVALS or not candles:
+            return
+        
+        symbol = symbol.upper()
+        last = candles[-1]
+        open_time = last["open_time"] if isinstance(last, dict) else last.open_time
+        
+        latest = self.latest_watermarks[symbol]
+        if interval in latest and open_time <= latest[interval]:
+            return
+        latest[interval] = open_time
+        self.stats["watermark_events"] += 1
+        
+        context = self.contexts.get(symbol)
+        if context is None or context.update_count == 0:
+            return  # пустой контекст загрузится при первом get_context
+        
+        if self._stale_components(context):
+            self.stats["watermark_refreshes"] += 1
+            self._start_refresh(context, "context", lambda: self._update_context_if_needed(context))
+    
+    def _inputs_changed(self, context: TechnicalAnalysisContext, component: str) -> Optional[bool]:
+        """
+        Сдвинулся ли водяной знак входа компонента
+        
+        Returns:
+            Optional[bool]: None - по входам компонента не было событий
+                            синхронизации (решает TTL)
+        """
+        latest = self.latest_watermarks.get(context.symbol)
+        inputs = [i for i in COMPONENT_INPUTS.get(component, ()) if latest and i in latest]
+        if not inputs:
+            return None
+        
+        recorded = context.input_watermarks.get(component, {})
+        return any(i not in recorded or latest[i] > recorded[i] for i in inputs)
+    
+    def _stale_components(self, context: TechnicalAnalysisContext) -> List[str]:
+        """Устаревшие компоненты (в порядке обновления)"""
+        stale = []
+        
+        checks = (
+            # 1. Уровни D1
+            ("levels", context.levels_updated_at is not None, context.is_levels_cache_valid),
+            # 2. ATR
+            ("atr", bool(context.atr_data and context.atr_data.updated_at), context.is_atr_cache_valid),
+            # 3. Свечи
+            ("candles", context.candles_updated_at is not None, context.is_candles_cache_valid)
+        )
+        
+        for component, computed, ttl_valid in checks:
+            changed = self._inputs_changed(context, component)
+            if changed is None:
+                if not ttl_valid():
+                    stale.append(component)
+            elif changed or not computed:
+                stale.append(component)
+        
+        return stale
+    
+    @staticmethod
+    def _record_watermark(context: TechnicalAnalysisContext, component: str, interval: str, candles: List[Dict]):
+        """Запомнить open_time последней входной свечи компонента"""
+        if candles:
+            context.input_watermarks.setdefault(component, {})[interval] = candles[-1]['open_time']
+    
+    async def _update_context_if_needed(self, context: TechnicalAnalysisContext):
+        """
+        Обновить контекст если кэш устарел
+        
+        Проверяет валидность каждого типа данных и обновляет только устаревшие.
+        Компоненты, которые уже обновляет фоновый цикл, не запрашиваются повторно.
+        """
+        try:
+            updates_needed = self._stale_components(context)
             
             # Обновляем только то, что нужно
             if updates_needed:
                 logger.debug(f"🔄 Обновление {context.symbol}: {', '.join(updates_needed)}")
                 
-                if "levels" in updates_needed:
-                    await self._update_levels(context)
-                
-                if "atr" in updates_needed:
-                    await self._update_atr(context)
-                
-                if "candles" in updates_needed:
-                    await self._update_candles(context)
+                for component in updates_needed:
+                    await self._refresh_component(context, component)
                 
                 # После обновления основных данных - обновляем рыночные условия
-                await self._update_market_conditions(context)
+                await self._refresh_component(context, "market_conditions")
                 
                 context.last_full_update = datetime.now(timezone.utc)
                 context.update_count += 1
@@ -258,11 +684,11 @@ class TechnicalAnalysisContextManager:
             logger.info(f"🔄 Полное обновление контекста {context.symbol}")
             start_time = datetime.now()
             
-            # Обновляем все типы данных
-            await self._update_levels(context)
-            await self._update_atr(context)
-            await self._update_candles(context)
-            await self._update_market_conditions(context)
+            # Обновляем все типы данных (присоединяясь к уже идущим обновлениям)
+            await self._refresh_component(context, "levels")
+            await self._refresh_component(context, "atr")
+            await self._refresh_component(context, "candles")
+            await self._refresh_component(context, "market_conditions")
             
             # Обновляем метаданные
             context.last_full_update = datetime.now(timezone.utc)
@@ -297,33 +723,11 @@ class TechnicalAnalysisContextManager:
             candles_d1 = await self.repository.get_candles(
                 symbol=context.symbol,
                 interval="1d",
-                limit=180
-            )
-            
-            if not candles_d1:
-                logger.warning(f"⚠️ Нет данных D1 для {context.symbol}")
-                return
-            
-            logger.debug(f"📊 Загружено {len(candles_d1)} свечей D1 для {context.symbol}")
-            
-            # Сохраняем свечи D1 в контексте
-            context.recent_candles_d1 = candles_d1
-            
-            # Текущая цена
-            current_price = float(candles_d1[-1]['close_price'])
-            
-            # ИСПОЛЬЗУЕМ РЕАЛЬНЫЙ LEVEL ANALYZER
-            levels = self.level_analyzer.find_all_levels(
-                candles=candles_d1,
-                current_price=current_price
+                limit=LEVELS_D1_LIMIT
             )
             
-            context.levels_d1 = levels
-            context.levels_updated_at = datetime.now(timezone.utc)
+            self._apply_levels(context, candles_d1)
             
-            logger.info(f"✅ Найдено {len(levels)} уровней для {context.symbol}")
-            
-            self.stats["levels_updates"] += 1
             update_duration = (datetime.now() - update_start).total_seconds()
             self.stats["update_times"]["levels"].append(update_duration)
             
@@ -332,8 +736,64 @@ class TechnicalAnalysisContextManager:
             self.stats["errors_by_type"]["levels"] += 1
             raise
     
-    # ==================== ОБНОВЛЕНИЕ ATR ====================
+    def _apply_levels(self, context: TechnicalAnalysisContext, candles_d1: List[Dict]):
+        """Найти уровни по загруженным D1 свечам (без обращений к БД)"""
+        if not candles_d1:
+            logger.warning(f"⚠️ Нет данных D1 для {context.symbol}")
+            return
+        
+        logger.debug(f"📊 Загружено {len(candles_d1)} свечей D1 для {context.symbol}")
+        
+        # Сохраняем свечи D1 в контексте
+        context.recent_candles_d1 = candles_d1
+        
+        # Текущая цена
+        current_price = float(candles_d1[-1]['close_price'])
+        
+        # Инкрементальный трекер: тот же результат, что find_all_levels(candles_d1),
+        # но пересчитываются только новые бары и затронутые ими уровни
+        levels = self._find_levels_incremental(context.symbol, candles_d1, current_price)
+        
+        context.set_levels(levels)  # + индекс уровней по цене
+        context.levels_updated_at = datetime.now(timezone.utc)
+        self._record_watermark(context, "levels", "1d", candles_d1)
+        
+        logger.info(f"✅ Найдено {len(levels)} уровней для {context.symbol}")
+        
+        self.stats["levels_updates"] += 1
+        self.contexts.account(context)
     
+    def _find_levels_incremental(
+        self,
+        symbol: str,
+        candles_d1: List[Dict],
+        current_price: float
+    ) -> List[SupportResistanceLevel]:
+        """
+        Уровни D1 через инкрементальный трекер символа
+
+        Окно синхронизируется с переданными свечами: новые закрытые бары
+        подтверждают экстремумы и обновляют касания, исправленная история
+        перестраивает окно. Результат совпадает с find_all_levels(candles_d1).
+        """
+        tracker = self.level_trackers.get(symbol)
+
+        if tracker is None or tracker.window_size < len(candles_d1):
+            tracker = IncrementalLevelTracker(
+                analyzer=self.level_analyzer,
+                window_size=max(len(candles_d1), 180)
+            )
+            self.level_trackers[symbol] = tracker
+
+        if tracker.sync(candles_d1):
+            self.stats["incremental_levels_syncs"] += 1
+        else:
+            self.stats["incremental_levels_rebuilds"] += 1
+
+        return tracker.find_levels(current_price=current_price, as_of=self.clock())
+
+    # ==================== ОБНОВЛЕНИЕ ATR ====================
+
     async def _update_atr(self, context: TechnicalAnalysisContext):
         """
         Обновить данные ATR (Average True Range)
@@ -351,28 +811,11 @@ class TechnicalAnalysisContextManager:
                 candles_for_atr = await self.repository.get_candles(
                     symbol=context.symbol,
                     interval="1d",
-                    limit=5
+                    limit=ATR_D1_LIMIT
                 )
             
-            if not candles_for_atr or len(candles_for_atr) < 3:
-                logger.warning(f"⚠️ Недостаточно данных для ATR {context.symbol}")
-                return
-            
-            # ✅ ИСПРАВЛЕНИЕ: Определяем current_price из последней свечи
-            current_price = float(candles_for_atr[-1]['close_price'])
-            
-            # ИСПОЛЬЗУЕМ РЕАЛЬНЫЙ ATR CALCULATOR
-            atr_data = self.atr_calculator.calculate_atr(
-                candles=candles_for_atr,
-                levels=context.levels_d1,
-                current_price=current_price
-            )
-            
-            context.atr_data = atr_data
+            self._apply_atr(context, candles_for_atr)
             
-            logger.debug(f"✅ ATR обновлен для {context.symbol}: {atr_data.calculated_atr:.2f}")
-            
-            self.stats["atr_updates"] += 1
             update_duration = (datetime.now() - update_start).total_seconds()
             self.stats["update_times"]["atr"].append(update_duration)
             
@@ -381,6 +824,29 @@ class TechnicalAnalysisContextManager:
             self.stats["errors_by_type"]["atr"] += 1
             raise
     
+    def _apply_atr(self, context: TechnicalAnalysisContext, candles_for_atr: List[Dict]):
+        """Рассчитать ATR по загруженным D1 свечам (без обращений к БД)"""
+        if not candles_for_atr or len(candles_for_atr) < 3:
+            logger.warning(f"⚠️ Недостаточно данных для ATR {context.symbol}")
+            return
+        
+        # ✅ ИСПРАВЛЕНИЕ: Определяем current_price из последней свечи
+        current_price = float(candles_for_atr[-1]['close_price'])
+        
+        # ИСПОЛЬЗУЕМ РЕАЛЬНЫЙ ATR CALCULATOR
+        atr_data = self.atr_calculator.calculate_atr(
+            candles=candles_for_atr,
+            levels=context.levels_d1,
+            current_price=current_price
+        )
+        
+        context.atr_data = atr_data
+        self._record_watermark(context, "atr", "1d", candles_for_atr)
+        
+        logger.debug(f"✅ ATR обновлен для {context.symbol}: {atr_data.calculated_atr:.2f}")
+        
+        self.stats["atr_updates"] += 1
+    
     # ==================== ОБНОВЛЕНИЕ СВЕЧЕЙ ====================
     
     async def _update_candles(self, context: TechnicalAnalysisContext):
@@ -394,28 +860,14 @@ class TechnicalAnalysisContextManager:
             
             # Параллельная загрузка всех таймфреймов
             tasks = [
-                self.repository.get_candles(context.symbol, "5m", limit=100),   # 8 часов
-                self.repository.get_candles(context.symbol, "30m", limit=50),   # 25 часов
-                self.repository.get_candles(context.symbol, "1h", limit=24),    # 1 день
-                self.repository.get_candles(context.symbol, "4h", limit=24),    # 4 дня
+                self.repository.get_candles(context.symbol, interval, limit=limit)
+                for interval, limit, _ in CANDLE_FETCHES
             ]
             
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Обрабатываем результаты
-            context.recent_candles_m5 = results[0] if not isinstance(results[0], Exception) else []
-            context.recent_candles_m30 = results[1] if not isinstance(results[1], Exception) else []
-            context.recent_candles_h1 = results[2] if not isinstance(results[2], Exception) else []
-            context.recent_candles_h4 = results[3] if not isinstance(results[3], Exception) else []
-            
-            context.candles_updated_at = datetime.now(timezone.utc)
+            self._apply_candles(context, results)
             
-            # Логируем результаты
-            candle_counts = f"M5={len(context.recent_candles_m5)}, M30={len(context.recent_candles_m30)}, " \
-                          f"H1={len(context.recent_candles_h1)}, H4={len(context.recent_candles_h4)}"
-            logger.debug(f"✅ Свечи обновлены для {context.symbol}: {candle_counts}")
-            
-            self.stats["candles_updates"] += 1
             update_duration = (datetime.now() - update_start).total_seconds()
             self.stats["update_times"]["candles"].append(update_duration)
             
@@ -424,6 +876,23 @@ class TechnicalAnalysisContextManager:
             self.stats["errors_by_type"]["candles"] += 1
             raise
     
+    def _apply_candles(self, context: TechnicalAnalysisContext, results: List[Any]):
+        """Разложить загруженные свечи по таймфреймам (ошибка загрузки -> пусто)"""
+        for (interval, _, attr), candles in zip(CANDLE_FETCHES, results):
+            candles = candles if not isinstance(candles, Exception) else []
+            setattr(context, attr, candles)
+            self._record_watermark(context, "candles", interval, candles)
+        
+        context.candles_updated_at = datetime.now(timezone.utc)
+        
+        # Логируем результаты
+        candle_counts = f"M5={len(context.recent_candles_m5)}, M30={len(context.recent_candles_m30)}, " \
+                      f"H1={len(context.recent_candles_h1)}, H4={len(context.recent_candles_h4)}"
+        logger.debug(f"✅ Свечи обновлены для {context.symbol}: {candle_counts}")
+        
+        self.stats["candles_updates"] += 1
+        self.contexts.account(context)
+    
     # ==================== ОБНОВЛЕНИЕ РЫНОЧНЫХ УСЛОВИЙ ====================
     
     async def _update_market_conditions(self, context: TechnicalAnalysisContext):
@@ -438,19 +907,25 @@ class TechnicalAnalysisContextManager:
         try:
             update_start = datetime.now()
             
+            # H1 - основной таймфрейм, без истории H1 - D1 (как analyze_conditions)
+            primary_interval = "1h" if context.recent_candles_h1 else "1d"
+            primary_candles = context.recent_candles_h1 or context.recent_candles_d1
+            
             # Проверяем что есть необходимые данные
-            if not context.recent_candles_h1 or not context.atr_data:
+            if not primary_candles or not context.atr_data:
                 logger.debug(f"⚠️ Недостаточно данных для анализа условий {context.symbol}")
                 return
             
-            current_price = float(context.recent_candles_h1[-1]['close_price']) if context.recent_candles_h1 else None
+            current_price = float(primary_candles[-1]['close_price'])
             
-            # 1. АНАЛИЗ РЫНОЧНЫХ УСЛОВИЙ
-            market_analysis = self.market_conditions_analyzer.analyze_conditions(
-                candles_h1=context.recent_candles_h1,
-                candles_d1=context.recent_candles_d1,
+            # 1. АНАЛИЗ РЫНОЧНЫХ УСЛОВИЙ (инкрементально - только новые бары)
+            market_analysis = self._analyze_conditions_incremental(
+                symbol=context.symbol,
+                interval=primary_interval,
+                candles=primary_candles,
                 atr=context.atr_data.calculated_atr if context.atr_data else None,
-                current_price=current_price
+                current_price=current_price,
+                candles_d1_count=len(context.recent_candles_d1)
             )
             
             # Обновляем контекст
@@ -467,9 +942,12 @@ class TechnicalAnalysisContextManager:
             
             # 2. АНАЛИЗ ТРЕНДА НА D1 (долгосрочный)
             if context.recent_candles_d1 and len(context.recent_candles_d1) >= 10:
-                d1_analysis = self.market_conditions_analyzer.analyze_conditions(
-                    candles_d1=context.recent_candles_d1,
-                    current_price=current_price
+                d1_analysis = self._analyze_conditions_incremental(
+                    symbol=context.symbol,
+                    interval="1d",
+                    candles=context.recent_candles_d1,
+                    current_price=current_price,
+                    candles_d1_count=len(context.recent_candles_d1)
                 )
                 context.dominant_trend_d1 = d1_analysis.trend_direction
             
@@ -481,23 +959,14 @@ class TechnicalAnalysisContextManager:
                 nearest_resistance = context.get_nearest_resistance(current_price) if current_price else None
                 nearest_support = context.get_nearest_support(current_price) if current_price else None
                 
-                has_compression = False
-                
-                if nearest_resistance:
-                    compression_up, _ = self.pattern_detector.detect_compression(
-                        candles=context.recent_candles_m5,
-                        level=nearest_resistance,
-                        atr=context.atr_data.calculated_atr if context.atr_data else None
-                    )
-                    has_compression = has_compression or compression_up
+                # Один векторный проход по M5 для обоих уровней
+                scan = self.pattern_detector.scan(
+                    CandleArrays.from_candles(context.recent_candles_m5),
+                    levels=[nearest_resistance, nearest_support],
+                    atr=context.atr_data.calculated_atr if context.atr_data else None
+                )
                 
-                if nearest_support:
-                    compression_down, _ = self.pattern_detector.detect_compression(
-                        candles=context.recent_candles_m5,
-                        level=nearest_support,
-                        atr=context.atr_data.calculated_atr if context.atr_data else None
-                    )
-                    has_compression = has_compression or compression_down
+                has_compression = any(has for has, _ in scan.compression.values())
                 
                 context.has_compression = has_compression
             
@@ -533,17 +1002,52 @@ class TechnicalAnalysisContextManager:
             self.stats["errors_by_type"]["market_conditions"] += 1
             # Не бросаем исключение - это не критичная ошибка
     
+    def _analyze_conditions_incremental(
+        self,
+        symbol: str,
+        interval: str,
+        candles: List[Dict],
+        atr: Optional[float] = None,
+        current_price: Optional[float] = None,
+        candles_d1_count: int = 0
+    ):
+        """
+        Анализ рыночных условий через инкрементальный анализатор символа
+        
+        Окно синхронизируется с переданными свечами (добавляются только новые
+        бары), результат совпадает с MarketConditionsAnalyzer.analyze_conditions().
+        """
+        key = (symbol, interval)
+        incremental = self.incremental_conditions.get(key)
+        
+        if incremental is None or incremental.window_size < len(candles):
+            incremental = IncrementalMarketConditionsAnalyzer(
+                analyzer=self.market_conditions_analyzer,
+                window_size=max(len(candles), 1)
+            )
+            self.incremental_conditions[key] = incremental
+        
+        if incremental.sync(candles):
+            self.stats["incremental_conditions_syncs"] += 1
+        else:
+            self.stats["incremental_conditions_rebuilds"] += 1
+        
+        return incremental.analyze(
+            atr=atr,
+            current_price=current_price,
+            candles_d1_count=candles_d1_count
+        )
+    
     # ==================== ФОНОВЫЕ ОБНОВЛЕНИЯ ====================
     
     async def start_background_updates(self):
         """
         Запустить фоновые задачи автоматического обновления
         
-        Создает 4 фоновых задачи:
-        - Обновление свечей (каждую минуту)
-        - Обновление ATR (каждый час)
-        - Обновление уровней (раз в сутки)
-        - Обновление рыночных условий (каждые 15 минут)
+        Создает фоновые задачи:
+        - Планировщик обновлений (RefreshScheduler): свечи каждую минуту,
+          ATR каждый час, уровни раз в сутки, рыночные условия каждые 15 минут
+        - Снапшот контекстов (если задан snapshot_store)
         """
         if self.is_running:
             logger.warning("⚠️ Фоновые обновления уже запущены")
@@ -554,31 +1058,27 @@ class TechnicalAnalysisContextManager:
         self.is_running = True
         self.stats["start_time"] = datetime.now()
         
-        # Задача 1: Обновление свечей (каждую минуту)
-        self._update_tasks.append(
-            asyncio.create_task(self._candles_update_loop(), name="candles_update")
-        )
-        
-        # Задача 2: Обновление ATR (каждый час)
-        self._update_tasks.append(
-            asyncio.create_task(self._atr_update_loop(), name="atr_update")
-        )
+        # Теплый старт из снапшота
+        if self.snapshot_store:
+            await self.restore_snapshot()
         
-        # Задача 3: Обновление уровней (раз в сутки)
+        # Задача 1: Планировщик батчевых обновлений
         self._update_tasks.append(
-            asyncio.create_task(self._levels_update_loop(), name="levels_update")
+            asyncio.create_task(self.scheduler.run(), name="context_refresh_scheduler")
         )
         
-        # Задача 4: Обновление рыночных условий (каждые 15 минут)
-        self._update_tasks.append(
-            asyncio.create_task(self._market_conditions_update_loop(), name="market_conditions_update")
-        )
+        # Задача 2: Снапшот контекстов
+        if self.snapshot_store:
+            self._update_tasks.append(
+                asyncio.create_task(self._snapshot_loop(), name="context_snapshot")
+            )
         
         logger.info(f"✅ Запущено {len(self._update_tasks)} фоновых задач")
         logger.info("   • Свечи: каждую минуту")
         logger.info("   • ATR: каждый час")
         logger.info("   • Уровни: раз в сутки (00:00 UTC)")
         logger.info("   • Рыночные условия: каждые 15 минут")
+        logger.info("   • Символы с одним сроком - одним батчем")
     
     async def stop_background_updates(self):
         """Остановить все фоновые задачи"""
@@ -601,109 +1101,126 @@ class TechnicalAnalysisContextManager:
         
         self._update_tasks.clear()
         
+        # Незавершенные обновления символов
+        inflight = [task for _, task in self._inflight.values()]
+        for task in inflight:
+            task.cancel()
+        if inflight:
+            await asyncio.gather(*inflight, return_exceptions=True)
+        
+        # Последний снапшот перед остановкой
+        if self.snapshot_store:
+            await self.save_snapshot()
+        
         logger.info("✅ Фоновые обновления остановлены")
     
-    async def _candles_update_loop(self):
-        """Цикл обновления свечей (каждую минуту)"""
-        logger.info("🔄 Запущен цикл обновления свечей (1 минута)")
+    async def _snapshot_loop(self):
+        """Цикл сохранения снапшота контекстов"""
+        logger.info(f"🔄 Запущен цикл снапшотов контекстов ({self.snapshot_interval}s)")
         
         while self.is_running:
             try:
-                # Обновляем свечи для всех существующих контекстов
-                for symbol, context in self.contexts.items():
-                    try:
-                        await self._update_candles(context)
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка обновления свечей {symbol}: {e}")
-                
-                # Ждем 60 секунд
-                await asyncio.sleep(60)
+                await asyncio.sleep(self.snapshot_interval)
+                await self.save_snapshot()
                 
             except asyncio.CancelledError:
-                logger.info("🛑 Цикл обновления свечей остановлен")
+                logger.info("🛑 Цикл снапшотов контекстов остановлен")
                 break
             except Exception as e:
-                logger.error(f"❌ Критическая ошибка в цикле свечей: {e}")
+                logger.error(f"❌ Критическая ошибка в цикле снапшотов: {e}")
                 logger.error(traceback.format_exc())
-                await asyncio.sleep(60)
     
-    async def _atr_update_loop(self):
-        """Цикл обновления ATR (каждый час)"""
-        logger.info("🔄 Запущен цикл обновления ATR (1 час)")
-        
-        while self.is_running:
-            try:
-                # Обновляем ATR для всех контекстов
-                for symbol, context in self.contexts.items():
-                    try:
-                        await self._update_atr(context)
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка обновления ATR {symbol}: {e}")
-                
-                # Ждем 1 час
-                await asyncio.sleep(3600)
-                
-            except asyncio.CancelledError:
-                logger.info("🛑 Цикл обновления ATR остановлен")
-                break
-            except Exception as e:
-                logger.error(f"❌ Критическая ошибка в цикле ATR: {e}")
-                logger.error(traceback.format_exc())
-                await asyncio.sleep(3600)
+    # ==================== СНАПШОТЫ ====================
     
-    async def _levels_update_loop(self):
-        """Цикл обновления уровней (раз в сутки в 00:00 UTC)"""
-        logger.info("🔄 Запущен цикл обновления уровней (24 часа)")
+    async def save_snapshot(self) -> int:
+        """
+        Сохранить заполненные контексты в snapshot_store
         
-        while self.is_running:
-            try:
-                # Обновляем уровни для всех контекстов
-                for symbol, context in self.contexts.items():
-                    try:
-                        await self._update_levels(context)
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка обновления уровней {symbol}: {e}")
-                
-                # Ждем до следующего 00:00 UTC
-                now = datetime.now(timezone.utc)
-                next_midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-                sleep_seconds = (next_midnight - now).total_seconds()
-                
-                logger.info(f"⏰ Следующее обновление уровней: {next_midnight.strftime('%Y-%m-%d %H:%M UTC')}")
-                
-                await asyncio.sleep(sleep_seconds)
-                
-            except asyncio.CancelledError:
-                logger.info("🛑 Цикл обновления уровней остановлен")
-                break
-            except Exception as e:
-                logger.error(f"❌ Критическая ошибка в цикле уровней: {e}")
-                logger.error(traceback.format_exc())
-                await asyncio.sleep(86400)  # 24 часа
+        Сериализация и сжатие - в event loop (контексты меняются в нем же),
+        запись файла - в потоке.
+        
+        Returns:
+            int: Количество сохраненных контекстов
+        """
+        if not self.snapshot_store:
+            return 0
+        
+        contexts = {
+            symbol: context for symbol, context in self.contexts.items()
+            if context.levels_updated_at is not None and context.recent_candles_d1
+        }
+        if not contexts:
+            return 0
+        
+        try:
+            blob = self.snapshot_store.encode(contexts)
+            await asyncio.to_thread(self.snapshot_store.write, blob)
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения снапшота контекстов: {e}")
+            self.stats["errors_by_type"]["snapshot"] += 1
+            return 0
+        
+        self.stats["snapshot_saves"] += 1
+        logger.debug(f"💾 Снапшот: {len(contexts)} контекстов, {len(blob) / 1024:.1f} KB")
+        return len(contexts)
     
-    async def _market_conditions_update_loop(self):
-        """Цикл обновления рыночных условий (каждые 15 минут)"""
-        logger.info("🔄 Запущен цикл обновления рыночных условий (15 минут)")
+    async def restore_snapshot(self) -> int:
+        """
+        Восстановить контексты из snapshot_store
         
-        while self.is_running:
+        Водяной знак снапшота (последняя D1 свеча) сверяется с БД одним
+        запросом: если в БД появилась новая D1 свеча, уровни и ATR символа
+        помечаются устаревшими и пересчитаются при первом get_context.
+        Свечи M5-H4 и рыночные условия дозагружаются как обычно.
+        Уже существующие контексты не перезаписываются.
+        
+        Returns:
+            int: Количество восстановленных контекстов
+        """
+        if not self.snapshot_store:
+            return 0
+        
+        entries = await asyncio.to_thread(self.snapshot_store.read)
+        if not entries:
+            return 0
+        
+        symbols = [symbol for symbol in entries if symbol not in self.contexts]
+        
+        try:
+            latest_d1 = await self.repository.get_latest_open_times(symbols, "1d")
+        except Exception as e:
+            logger.warning(f"⚠️ Водяные знаки D1 недоступны, уровни будут пересчитаны: {e}")
+            latest_d1 = {}
+        
+        restored = 0
+        for symbol in symbols:
             try:
-                # Обновляем рыночные условия для всех контекстов
-                for symbol, context in self.contexts.items():
-                    try:
-                        await self._update_market_conditions(context)
-                    except Exception as e:
-                        logger.error(f"❌ Ошибка обновления рыночных условий {symbol}: {e}")
-                
-                # Ждем 15 минут
-                await asyncio.sleep(900)
-                
-            except asyncio.CancelledError:
-                logger.info("🛑 Цикл обновления рыночных условий остановлен")
-                break
+                data = entries[symbol]
+                context = restore_context(symbol, data)
             except Exception as e:
-                logger.error(f"❌ Критическая ошибка в цикле рыночных условий: {e}")
-                logger.error(traceback.format_exc())
-                await asyncio.sleep(900)
+                logger.warning(f"⚠️ Контекст {symbol} из снапшота не восстановлен: {e}")
+                continue
+            
+            watermark = snapshot_watermark(data)
+            latest = latest_d1.get(symbol)
+            if latest is not None:
+                self.latest_watermarks[symbol].setdefault("1d", latest)
+            if watermark is None or latest is None or latest > watermark:
+                # Входные D1 свечи изменились - уровни и ATR пересчитать
+                context.levels_updated_at = None
+                if context.atr_data:
+                    context.atr_data.updated_at = None
+                self.stats["snapshot_invalidated"] += 1
+            
+            self.contexts[symbol] = context
+            restored += 1
+        
+        self.stats["snapshot_restored"] += restored
+        logger.info(
+            f"💾 Восстановлено {restored} контекстов из снапшота "
+            f"(к пересчету уровней: {self.stats['snapshot_invalidated']})"
+        )
+        return restored
     
     # ==================== УПРАВЛЕНИЕ ====================
     
@@ -711,7 +1228,7 @@ class TechnicalAnalysisContextManager:
         """Принудительно обновить все контексты"""
         logger.info(f"🔄 Принудительное обновление всех контекстов ({len(self.contexts)})")
         
-        for symbol, context in self.contexts.items():
+        for symbol, context in list(self.contexts.items()):
             try:
                 await self._full_update_context(context)
             except Exception as e:
@@ -722,14 +1239,29 @@ class TechnicalAnalysisContextManager:
     def clear_context(self, symbol: str):
         """Удалить контекст для символа"""
         symbol = symbol.upper()
+        self._drop_symbol_state(symbol)
         if symbol in self.contexts:
             del self.contexts[symbol]
             logger.info(f"🗑️ Контекст {symbol} удален")
     
+    def _drop_symbol_state(self, symbol: str):
+        """Инкрементальные анализаторы символа (живут вместе с контекстом)"""
+        for key in [k for k in self.incremental_conditions if k[0] == symbol]:
+            del self.incremental_conditions[key]
+        self.level_trackers.pop(symbol, None)
+    
+    def _on_context_evicted(self, symbol: str, context: TechnicalAnalysisContext):
+        """Контекст вытеснен из кэша: освободить состояние символа"""
+        self._drop_symbol_state(symbol)
+        self.stats["contexts_evicted"] += 1
+        logger.debug(f"♻️ Контекст {symbol} вытеснен из кэша")
+    
     def clear_all_contexts(self):
         """Очистить все контексты"""
         count = len(self.contexts)
         self.contexts.clear()
+        self.incremental_conditions.clear()
+        self.level_trackers.clear()
         logger.info(f"🗑️ Удалено {count} контекстов")
     
     # ==================== СТАТИСТИКА ====================
@@ -751,6 +1283,9 @@ class TechnicalAnalysisContextManager:
             "uptime_seconds": uptime,
             "is_running": self.is_running,
             "active_tasks": len([t for t in self._update_tasks if not t.done()]),
+            "inflight_refreshes": len(self._inflight),
+            "scheduler": self.scheduler.get_stats(),
+            "context_cache": self.contexts.get_stats(),
             "contexts_count": len(self.contexts),
             "contexts_symbols": list(self.contexts.keys()),
             "success_rate": (self.stats["successful_updates"] / self.stats["total_updates"] * 100) 
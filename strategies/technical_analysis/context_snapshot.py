@@ -0,0 +1,270 @@
+"""
+Context Snapshot - Теплый старт контекстов технического анализа
+
+После рестарта все контексты пусты, и первый цикл заново грузит 180 D1
+свечей, ищет уровни и считает ATR по всем символам - как раз пока слой
+синхронизации догружает пропуски. Снапшот сохраняет дорогую часть
+контекста и восстанавливает ее на старте:
+
+- уровни D1, ATR, рыночные условия + время их расчета
+- D1 свечи, из которых они посчитаны (вход ATR и тренда D1)
+- водяной знак входа: open_time последней D1 свечи
+
+Свечи M5-H4 не сохраняются: они дешевые и устаревают за минуту.
+
+Формат файла: заголовок b"TACS" + версия (uint8), далее zlib(JSON).
+Даты - секунды epoch UTC, D1 свечи - по колонкам. Запись атомарная
+(tmp + os.replace), поэтому упавший процесс не оставит битый снапшот.
+
+Usage:
+    store = ContextSnapshotStore("~/.cache/v3prostaya/ta_contexts.snap")
+    manager = TechnicalAnalysisContextManager(repository, snapshot_store=store)
+    await manager.start_background_updates()  # восстановит и будет сохранять
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .context import (
+    TechnicalAnalysisContext,
+    SupportResistanceLevel,
+    ATRData,
+    MarketCondition,
+    TrendDirection
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"TACS"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sB")
+
+_CANDLE_COLUMNS = (
+    ("open_time", "t"), ("close_time", "ct"), ("open_price", "o"), ("high_price", "h"),
+    ("low_price", "l"), ("close_price", "c"), ("volume", "v")
+)
+
+
+# ==================== ДАТЫ ====================
+
+def _ts(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _dt(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Not serializable: {type(value).__name__}")
+
+
+# ==================== КОНТЕКСТ <-> СЛОВАРЬ ====================
+
+def snapshot_context(context: TechnicalAnalysisContext) -> Dict[str, Any]:
+    """Дорогая часть контекста в JSON-совместимом виде"""
+    candles_d1 = context.recent_candles_d1
+    atr = context.atr_data
+
+    return {
+        "data_source": context.data_source,
+        "levels": [
+            [
+                level.price, level.level_type, level.strength, level.touches,
+                _ts(level.last_touch), _ts(level.created_at),
+                level.distance_from_current, level.metadata
+            ]
+            for level in context.levels_d1
+        ],
+        "levels_updated_at": _ts(context.levels_updated_at),
+        "atr": {
+            "calculated_atr": atr.calculated_atr,
+            "technical_atr": atr.technical_atr,
+            "atr_percent": atr.atr_percent,
+            "current_range_used": atr.current_range_used,
+            "is_exhausted": atr.is_exhausted,
+            "last_5_ranges": list(atr.last_5_ranges),
+            "updated_at": _ts(atr.updated_at)
+        } if atr is not None else None,
+        "conditions": {
+            "market_condition": context.market_condition.value,
+            "dominant_trend_h1": context.dominant_trend_h1.value,
+            "dominant_trend_d1": context.dominant_trend_d1.value,
+            "volatility_level": context.volatility_level,
+            "consolidation_detected": context.consolidation_detected,
+            "consolidation_bars_count": context.consolidation_bars_count,
+            "has_recent_breakout": context.has_recent_breakout,
+            "has_compression": context.has_compression,
+            "has_v_formation": context.has_v_formation
+        },
+        "candles_d1": {
+            short: [_ts(c[name]) if name.endswith("_time") else float(c[name]) for c in candles_d1]
+            for name, short in _CANDLE_COLUMNS
+        },
+        "watermark_d1": _ts(candles_d1[-1]["open_time"]) if candles_d1 else None,
+        "last_full_update": _ts(context.last_full_update)
+    }
+
+
+def restore_context(symbol: str, data: Dict[str, Any]) -> TechnicalAnalysisContext:
+    """Контекст из снапшота (свечи M5-H4 пустые, update_count = 0)"""
+    context = TechnicalAnalysisContext(symbol=symbol, data_source=data.get("data_source", "bybit"))
+
+    context.set_levels([
+        SupportResistanceLevel(
+            price=price, level_type=level_type, strength=strength, touches=touches,
+            last_touch=_dt(last_touch), created_at=_dt(created_at),
+            distance_from_current=distance, metadata=metadata or {}
+        )
+        for price, level_type, strength, touches, last_touch, created_at, distance, metadata
+        in data["levels"]
+    ])
+    context.levels_updated_at = _dt(data.get("levels_updated_at"))
+
+    atr = data.get("atr")
+    if atr is not None:
+        context.atr_data = ATRData(**{**atr, "updated_at": _dt(atr.get("updated_at"))})
+
+    conditions = data.get("conditions") or {}
+    if conditions:
+        context.market_condition = MarketCondition(conditions["market_condition"])
+        context.dominant_trend_h1 = TrendDirection(conditions["dominant_trend_h1"])
+        context.dominant_trend_d1 = TrendDirection(conditions["dominant_trend_d1"])
+        context.volatility_level = conditions["volatility_level"]
+        context.consolidation_detected = conditions["consolidation_detected"]
+        context.consolidation_bars_count = conditions["consolidation_bars_count"]
+        context.has_recent_breakout = conditions["has_recent_breakout"]
+        context.has_compression = conditions["has_compression"]
+        context.has_v_formation = conditions["has_v_formation"]
+
+    columns = data.get("candles_d1") or {}
+    count = len(columns.get("t", []))
+    context.recent_candles_d1 = [
+        {
+            name: _dt(columns[short][i]) if name.endswith("_time") else columns[short][i]
+            for name, short in _CANDLE_COLUMNS
+        }
+        for i in range(count)
+    ]
+
+    context.last_full_update = _dt(data.get("last_full_update"))
+
+    watermark = snapshot_watermark(data)
+    if watermark is not None:
+        context.input_watermarks["levels"] = {"1d": watermark}
+        if context.atr_data is not None:
+            context.input_watermarks["atr"] = {"1d": watermark}
+    return context
+
+
+def snapshot_watermark(data: Dict[str, Any]) -> Optional[datetime]:
+    """open_time последней D1 свечи, из которой посчитан контекст"""
+    return _dt(data.get("watermark_d1"))
+
+
+# ==================== ХРАНИЛИЩЕ ====================
+
+class ContextSnapshotStore:
+    """
+    💾 Снапшот контекстов в одном файле на локальном диске
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Файл снапшота (директория создается при записи)
+        """
+        self.path = Path(path).expanduser()
+
+        self.stats = {
+            "saves": 0,
+            "loads": 0,
+            "last_size_bytes": 0,
+            "load_errors": 0
+        }
+
+    def encode(self, contexts: Dict[str, TechnicalAnalysisContext]) -> bytes:
+        """Сериализовать контексты (вызывать в потоке event loop - контексты живые)"""
+        payload = {
+            "created_at": _ts(datetime.now(timezone.utc)),
+            "contexts": {symbol: snapshot_context(context) for symbol, context in contexts.items()}
+        }
+        # numpy-скаляры из анализаторов -> python
+        raw = json.dumps(payload, separators=(",", ":"), default=_plain).encode("utf-8")
+        return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION) + zlib.compress(raw, 6)
+
+    def decode(self, blob: bytes) -> Dict[str, Dict[str, Any]]:
+        """
+        Разобрать снапшот
+
+        Returns:
+            Dict[str, Dict]: symbol -> данные snapshot_context()
+
+        Raises:
+            ValueError: Чужой файл или другая версия формата
+        """
+        magic, version = _HEADER.unpack_from(blob)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {magic!r} v{version}")
+
+        payload = json.loads(zlib.decompress(blob[_HEADER.size:]))
+        return payload["contexts"]
+
+    def write(self, blob: bytes):
+        """Атомарно записать снапшот (блокирующий ввод-вывод)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, self.path)
+
+        self.stats["saves"] += 1
+        self.stats["last_size_bytes"] = len(blob)
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Прочитать снапшот (None - файла нет или он поврежден)"""
+        if not self.path.exists():
+            return None
+
+        try:
+            entries = self.decode(self.path.read_bytes())
+        except Exception as e:
+            self.stats["load_errors"] += 1
+            logger.warning(f"⚠️ Снапшот контекстов {self.path} не прочитан: {e}")
+            return None
+
+        self.stats["loads"] += 1
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        return {**self.stats, "path": str(self.path)}
+
+    def __repr__(self) -> str:
+        return f"ContextSnapshotStore(path={self.path}, saves={self.stats['saves']})"
+
+
+__all__ = [
+    "ContextSnapshotStore",
+    "snapshot_context",
+    "restore_context",
+    "snapshot_watermark"
+]
+
+logger.info("✅ Context Snapshot module loaded")
@@ -19,11 +19,12 @@ Author: Trading Bot Team
 Version: 1.0.1
 """
 
+import bisect
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from .context import SupportResistanceLevel
 
@@ -134,7 +135,8 @@ class LevelAnalyzer:
         candles: List,
         min_touches: Optional[int] = None,
         min_strength: Optional[float] = None,
-        current_price: Optional[float] = None
+        current_price: Optional[float] = None,
+        as_of: Optional[datetime] = None
     ) -> List[SupportResistanceLevel]:
         """
         🔍 Найти все уровни поддержки и сопротивления
@@ -151,6 +153,7 @@ class LevelAnalyzer:
             min_touches: Переопределить минимум касаний
             min_strength: Переопределить минимальную силу
             current_price: Текущая цена (для расчета расстояний)
+            as_of: Момент анализа для давности касаний (None = сейчас; бэктест)
             
         Returns:
             Список найденных уровней SupportResistanceLevel
@@ -200,7 +203,7 @@ class LevelAnalyzer:
             
             # ШАГ 4: Расчет силы уровней
             for level in support_clusters:
-                strength = self._calculate_level_strength(level, candles)
+                strength = self._calculate_level_strength(level, candles, as_of)
                 
                 # Создаем финальный уровень
                 sr_level = self._create_support_resistance_level(
@@ -214,7 +217,7 @@ class LevelAnalyzer:
                     support_levels.append(sr_level)
             
             for level in resistance_clusters:
-                strength = self._calculate_level_strength(level, candles)
+                strength = self._calculate_level_strength(level, candles, as_of)
                 
                 sr_level = self._create_support_resistance_level(
                     candidate=level,
@@ -464,7 +467,12 @@ class LevelAnalyzer:
     
     # ==================== РАСЧЕТ СИЛЫ УРОВНЯ ====================
     
-    def _calculate_level_strength(self, level: LevelCandidate, candles: List) -> float:
+    def _calculate_level_strength(
+        self,
+        level: LevelCandidate,
+        candles: List,
+        as_of: Optional[datetime] = None
+    ) -> float:
         """
         Расчет силы уровня (0.0 - 1.0)
         
@@ -505,7 +513,7 @@ class LevelAnalyzer:
         
         # Недавность последнего касания
         if level.touches:
-            days_since_last = (datetime.now(timezone.utc) - level.touches[-1]).days
+            days_since_last = ((as_of or datetime.now(timezone.utc)) - level.touches[-1]).days
             
             # Недавние касания ценнее: <7 дней = 0.2, <30 дней = 0.1, >30 дней = 0
             if days_since_last < 7:
@@ -775,7 +783,391 @@ class LevelAnalyzer:
                 f"  Config: touches≥{self.min_touches}, strength≥{self.min_strength}")
 
 
+class IncrementalLevelTracker:
+    """
+    ⚡ Инкрементальный трекер уровней (на один символ, окно D1)
+
+    Держит скользящее окно баров и при закрытии нового бара обновляет
+    состояние вместо полного пересчёта find_all_levels():
+    - Экстремумы: бар i подтверждается как локальный min/max, когда закрылся
+      бар i + lookback_window (O(lookback) на бар); экстремумы, чье левое
+      окно вышло за начало окна, вытесняются
+    - Кластеры: экстремумы хранятся отсортированными по (цена, индекс),
+      кластеры пересобираются только при изменении набора экстремумов
+    - Касания: новый бар проверяется против текущих уровней (O(уровней)),
+      вытесненный бар снимается с начала списков касаний; полный пересчёт
+      касаний - только для уровня, у которого сменился центр кластера
+
+    Результат find_levels() совпадает с LevelAnalyzer.find_all_levels()
+    на том же окне свечей (те же SupportResistanceLevel в том же порядке).
+
+    Usage:
+        tracker = IncrementalLevelTracker(analyzer, window_size=180)
+        tracker.sync(candles_d1)        # или push_bar(candle) на каждый закрытый бар
+        levels = tracker.find_levels(as_of=now)
+    """
+
+    def __init__(self, analyzer: LevelAnalyzer, window_size: int = 180):
+        """
+        Args:
+            analyzer: Batch-анализатор (параметры, сила и фильтрация берутся из него)
+            window_size: Максимальный размер окна (= limit свечей в batch-вызове)
+        """
+        if window_size < 1:
+            raise ValueError("window_size должен быть >= 1")
+
+        self.analyzer = analyzer
+        self.window_size = window_size
+
+        self._reset_state()
+
+        # Статистика
+        self.stats = {
+            "bars_pushed": 0,
+            "bars_replaced": 0,
+            "pivots_confirmed": 0,
+            "pivots_expired": 0,
+            "reclusters": 0,
+            "touch_recounts": 0,
+            "incremental_syncs": 0,
+            "full_rebuilds": 0,
+            "analyses_count": 0
+        }
+
+    def _reset_state(self):
+        """Сбросить окно, экстремумы и касания"""
+        # Бары: (open_time, low, high, close), глобальный индекс = self._offset + позиция
+        self._buf: List[Tuple[Any, float, float, float]] = []
+        self._offset = 0
+        self._start = 0   # глобальный индекс первого бара окна
+        self._end = 0     # глобальный индекс после последнего бара
+
+        # Подтвержденные экстремумы: [(цена, индекс бара)] по возрастанию
+        self._pivots: Dict[str, List[Tuple[float, int]]] = {"support": [], "resistance": []}
+        self._pivots_changed = False
+
+        # Кластеры: [(цена центра, индекс самого раннего экстремума)] по возрастанию цены
+        self._clusters: Dict[str, List[Tuple[float, int]]] = {"support": [], "resistance": []}
+
+        # Касания центров кластеров: цена -> индексы баров по возрастанию
+        self._touches: Dict[str, Dict[float, deque]] = {"support": {}, "resistance": {}}
+
+    # ==================== ОКНО ====================
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _bar(self, index: int) -> Tuple[Any, float, float, float]:
+        return self._buf[index - self._offset]
+
+    @staticmethod
+    def _to_bar(candle: Dict) -> Tuple[Any, float, float, float]:
+        return (
+            candle['open_time'],
+            float(candle['low_price']),
+            float(candle['high_price']),
+            float(candle['close_price'])
+        )
+
+    @staticmethod
+    def _extreme(bar: Tuple[Any, float, float, float], level_type: str) -> float:
+        """Цена бара для типа уровня: Low для поддержки, High для сопротивления"""
+        return bar[1] if level_type == "support" else bar[2]
+
+    def _is_touch(self, price: float, level_price: float) -> bool:
+        """Тот же критерий, что и в LevelAnalyzer._count_touches"""
+        return abs(price - level_price) <= level_price * self.analyzer.touch_tolerance
+
+    def push_bar(self, candle: Dict):
+        """Добавить новый закрытый бар (самый старый вытесняется при переполнении)"""
+        bar = self._to_bar(candle)
+
+        self._buf.append(bar)
+        index = self._end
+        self._end += 1
+        self.stats["bars_pushed"] += 1
+
+        # Касания текущих уровней новым баром
+        for level_type, touches in self._touches.items():
+            price = self._extreme(bar, level_type)
+            for level_price, indices in touches.items():
+                if self._is_touch(price, level_price):
+                    indices.append(index)
+
+        # Бар index - lookback_window получил полное правое окно
+        self._confirm_pivot(index - self.analyzer.lookback_window)
+
+        while len(self) > self.window_size:
+            self._pop_left()
+
+        self._expire_pivots()
+        self._recluster_if_needed()
+
+    def replace_last_bar(self, candle: Dict):
+        """Заменить последний бар (исправленные/дозаполненные данные)"""
+        if len(self) == 0:
+            self.push_bar(candle)
+            return
+
+        self._pop_right()
+        self.push_bar(candle)
+        self.stats["bars_replaced"] += 1
+
+    def _pop_left(self):
+        """Вытеснить самый старый бар"""
+        index = self._start
+        for touches in self._touches.values():
+            for indices in touches.values():
+                if indices and indices[0] == index:
+                    indices.popleft()
+
+        self._start += 1
+
+        # Компактизация буфера (амортизированно O(1))
+        if self._start - self._offset > self.window_size:
+            del self._buf[:self._start - self._offset]
+            self._offset = self._start
+
+    def _pop_right(self):
+        """Удалить последний бар (и экстремум, который он подтвердил)"""
+        index = self._end - 1
+        for touches in self._touches.values():
+            for indices in touches.values():
+                if indices and indices[-1] == index:
+                    indices.pop()
+
+        confirmed = index - self.analyzer.lookback_window
+        for level_type, pivots in self._pivots.items():
+            pivot = next((p for p in pivots if p[1] == confirmed), None)
+            if pivot is not None:
+                pivots.remove(pivot)
+                self._pivots_changed = True
+
+        self._buf.pop()
+        self._end -= 1
+        self._recluster_if_needed()
+
+    # ==================== ЭКСТРЕМУМЫ ====================
+
+    def _confirm_pivot(self, index: int):
+        """Проверить бар index на локальный min/max (как _find_local_minima/maxima)"""
+        window = self.analyzer.lookback_window
+        if index - window < self._start or index + window >= self._end:
+            return
+
+        neighbours = [self._bar(j) for j in range(index - window, index + window + 1) if j != index]
+        bar = self._bar(index)
+
+        if all(n[1] >= bar[1] for n in neighbours):
+            bisect.insort(self._pivots["support"], (bar[1], index))
+            self._pivots_changed = True
+            self.stats["pivots_confirmed"] += 1
+
+        if all(n[2] <= bar[2] for n in neighbours):
+            bisect.insort(self._pivots["resistance"], (bar[2], index))
+            self._pivots_changed = True
+            self.stats["pivots_confirmed"] += 1
+
+    def _expire_pivots(self):
+        """Убрать экстремумы, левое окно которых вышло за начало окна"""
+        first_valid = self._start + self.analyzer.lookback_window
+        for level_type, pivots in self._pivots.items():
+            kept = [p for p in pivots if p[1] >= first_valid]
+            if len(kept) != len(pivots):
+                self.stats["pivots_expired"] += len(pivots) - len(kept)
+                self._pivots[level_type] = kept
+                self._pivots_changed = True
+
+    # ==================== КЛАСТЕРЫ И КАСАНИЯ ====================
+
+    def _recluster_if_needed(self):
+        """Пересобрать кластеры (как _cluster_levels) при изменении экстремумов"""
+        if not self._pivots_changed:
+            return
+        self._pivots_changed = False
+        self.stats["reclusters"] += 1
+
+        tolerance = self.analyzer.cluster_tolerance
+
+        for level_type, pivots in self._pivots.items():
+            groups = []
+            for pivot in pivots:
+                if groups and abs(pivot[0] - groups[-1][-1][0]) / groups[-1][-1][0] <= tolerance:
+                    groups[-1].append(pivot)
+                else:
+                    groups.append([pivot])
+
+            # Центр - первый экстремум с медианной ценой, БСУ - самый ранний экстремум
+            clusters = [
+                (group[len(group) // 2][0], min(p[1] for p in group))
+                for group in groups
+            ]
+            self._clusters[level_type] = clusters
+
+            old_touches = self._touches[level_type]
+            self._touches[level_type] = {
+                price: old_touches[price] if price in old_touches else self._recount(price, level_type)
+                for price, _ in clusters
+            }
+
+    def _recount(self, level_price: float, level_type: str) -> deque:
+        """Полный подсчет касаний уровня по окну"""
+        self.stats["touch_recounts"] += 1
+        return deque(
+            i for i in range(self._start, self._end)
+            if self._is_touch(self._extreme(self._bar(i), level_type), level_price)
+        )
+
+    # ==================== СИНХРОНИЗАЦИЯ ====================
+
+    def sync(self, candles: List[Dict]) -> bool:
+        """
+        Синхронизировать окно со списком свечей (тем же, что ушёл бы в batch)
+
+        Добавляет только новые бары после последнего известного open_time,
+        заменяет последний бар если он изменился. Если история не стыкуется
+        или исправлен более ранний бар - окно перестраивается целиком.
+
+        Returns:
+            bool: True если обновление было инкрементальным
+        """
+        if not candles:
+            self._reset_state()
+            return False
+
+        target_len = min(len(candles), self.window_size)
+        candles = candles[-target_len:]
+
+        position = None
+        if len(self) > 0:
+            last_time = self._bar(self._end - 1)[0]
+            for idx in range(len(candles) - 1, -1, -1):
+                if candles[idx]['open_time'] == last_time:
+                    position = idx
+                    break
+
+        if position is not None and self._matches(candles, position):
+            if self._to_bar(candles[position]) != self._bar(self._end - 1):
+                self.replace_last_bar(candles[position])
+
+            for candle in candles[position + 1:]:
+                self.push_bar(candle)
+
+            while len(self) > target_len:
+                self._pop_left()
+            self._expire_pivots()
+            self._recluster_if_needed()
+
+            if len(self) == target_len and self._bar(self._start)[0] == candles[0]['open_time']:
+                self.stats["incremental_syncs"] += 1
+                return True
+
+        # Полная перестройка окна
+        self._reset_state()
+        for candle in candles:
+            self.push_bar(candle)
+        self.stats["full_rebuilds"] += 1
+        return False
+
+    def _matches(self, candles: List[Dict], position: int) -> bool:
+        """Бары до position совпадают с окном (исправления истории -> перестройка)"""
+        first = self._end - 1 - position
+        for offset in range(max(0, self._start - first), position):
+            if self._to_bar(candles[offset]) != self._bar(first + offset):
+                return False
+        return True
+
+    # ==================== УРОВНИ ====================
+
+    def find_levels(
+        self,
+        min_touches: Optional[int] = None,
+        min_strength: Optional[float] = None,
+        current_price: Optional[float] = None,
+        as_of: Optional[datetime] = None
+    ) -> List[SupportResistanceLevel]:
+        """
+        Уровни текущего окна - как LevelAnalyzer.find_all_levels(candles_окна, ...)
+
+        Args:
+            min_touches: Переопределить минимум касаний
+            min_strength: Переопределить минимальную силу
+            current_price: Текущая цена (None = close последнего бара)
+            as_of: Момент анализа для давности касаний (None = сейчас)
+        """
+        analyzer = self.analyzer
+
+        try:
+            self.stats["analyses_count"] += 1
+            analyzer.stats["analyses_count"] += 1
+
+            if len(self) < 20:
+                logger.warning(f"⚠️ Недостаточно свечей для анализа: {len(self)}")
+                return []
+
+            min_touches = min_touches or analyzer.min_touches
+            min_strength = min_strength or analyzer.min_strength
+
+            if current_price is None:
+                current_price = self._bar(self._end - 1)[3]
+
+            analyzer.stats["candidates_clustered"] += sum(
+                len(self._pivots[t]) - len(self._clusters[t]) for t in self._pivots
+            )
+
+            result = {}
+            for level_type in ("support", "resistance"):
+                levels = []
+                for price, created_index in self._clusters[level_type]:
+                    touches = self._touches[level_type][price]
+                    if len(touches) < min_touches:
+                        continue  # batch отбросил бы уровень по числу касаний
+
+                    candidate = LevelCandidate(
+                        price=price,
+                        level_type=level_type,
+                        touches=[self._bar(i)[0] for i in touches],
+                        created_at=self._bar(created_index)[0]
+                    )
+
+                    sr_level = analyzer._create_support_resistance_level(
+                        candidate=candidate,
+                        strength=analyzer._calculate_level_strength(candidate, [], as_of),
+                        current_price=current_price
+                    )
+
+                    if sr_level.touches >= min_touches and sr_level.strength >= min_strength:
+                        levels.append(sr_level)
+
+                levels = analyzer._filter_overlapping_levels(levels)
+                levels.sort(key=lambda l: l.strength, reverse=True)
+                result[level_type] = levels[:analyzer.max_levels_per_type]
+
+            analyzer._update_stats(result["support"], result["resistance"])
+
+            return result["support"] + result["resistance"]
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка инкрементального поиска уровней: {e}")
+            return []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика трекера"""
+        return {
+            **self.stats,
+            "window": len(self),
+            "support_pivots": len(self._pivots["support"]),
+            "resistance_pivots": len(self._pivots["resistance"]),
+            "support_clusters": len(self._clusters["support"]),
+            "resistance_clusters": len(self._clusters["resistance"])
+        }
+
+    def __repr__(self) -> str:
+        return (f"IncrementalLevelTracker(window={len(self)}/{self.window_size}, "
+                f"clusters={len(self._clusters['support'])}+{len(self._clusters['resistance'])})")
+
+
 # Export
-__all__ = ["LevelAnalyzer", "LevelCandidate"]
+__all__ = ["LevelAnalyzer", "LevelCandidate", "IncrementalLevelTracker"]
 
 logger.info("✅ Level Analyzer module loaded")
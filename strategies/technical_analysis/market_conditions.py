@@ -18,7 +18,9 @@ Author: Trading Bot Team
 Version: 1.0.0
 """
 
+import bisect
 import logging
+from math import fsum
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
@@ -144,6 +146,10 @@ class MarketConditionsAnalyzer:
             strategy = BounceStrategy()
     """
     
+    # Окно поиска консолидации и допустимый тренд внутри неё
+    CONSOLIDATION_LOOKBACK = 30
+    CONSOLIDATION_MAX_TREND = 0.015
+    
     def __init__(
         self,
         # Параметры консолидации
@@ -275,81 +281,121 @@ class MarketConditionsAnalyzer:
             # 5. V-ФОРМАЦИЯ
             has_v, v_type = self._analyze_v_formation(primary_candles)
             
-            # 6. ОБЩЕЕ СОСТОЯНИЕ РЫНКА
-            market_condition = self._determine_market_condition(
-                has_consolidation=has_consolidation,
-                trend_strength=trend_strength,
-                volatility_level=volatility_level
-            )
-            
-            # 7. ПОДХОДЯЩИЕ СТРАТЕГИИ
-            suitable_breakout = self._is_suitable_for_breakout(
-                has_consolidation=has_consolidation,
-                energy_level=energy_level,
-                trend_strength=trend_strength
-            )
-            
-            suitable_bounce = self._is_suitable_for_bounce(
-                has_consolidation=has_consolidation,
-                volatility_level=volatility_level,
-                trend_strength=trend_strength
-            )
-            
-            suitable_false_breakout = self._is_suitable_for_false_breakout(
-                volatility_level=volatility_level,
-                trend_strength=trend_strength,
-                has_v=has_v
-            )
-            
-            # 8. УВЕРЕННОСТЬ
-            confidence = self._calculate_confidence(
-                market_condition=market_condition,
-                data_quality=len(primary_candles)
-            )
-            
-            # Метаданные
-            metadata = {
-                "candles_h1_count": len(candles_h1) if candles_h1 else 0,
-                "candles_d1_count": len(candles_d1) if candles_d1 else 0,
-                "atr": atr,
-                "current_price": current_price,
-                "analyzed_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            # Создаем результат
-            analysis = MarketConditionsAnalysis(
-                market_condition=market_condition,
+            return self._build_analysis(
                 trend_direction=trend_direction,
                 trend_strength=trend_strength,
                 volatility_level=volatility_level,
-                energy_level=energy_level,
                 has_consolidation=has_consolidation,
                 consolidation_bars=consol_bars,
-                consolidation_range_percent=consol_range * 100,
-                has_v_formation=has_v,
-                v_formation_type=v_type,
-                is_suitable_for_breakout=suitable_breakout,
-                is_suitable_for_bounce=suitable_bounce,
-                is_suitable_for_false_breakout=suitable_false_breakout,
-                confidence=confidence,
-                metadata=metadata
+                consolidation_range=consol_range,
+                energy_level=energy_level,
+                has_v=has_v,
+                v_type=v_type,
+                primary_count=len(primary_candles),
+                candles_h1_count=len(candles_h1) if candles_h1 else 0,
+                candles_d1_count=len(candles_d1) if candles_d1 else 0,
+                atr=atr,
+                current_price=current_price
             )
             
-            # Обновляем статистику
-            self._update_stats(analysis)
-            
-            logger.info(f"✅ Анализ условий завершен: {market_condition.value}, "
-                       f"trend={trend_direction.value}/{trend_strength.value}, "
-                       f"energy={energy_level.value}")
-            
-            return analysis
-            
         except Exception as e:
             logger.error(f"❌ Ошибка анализа условий: {e}")
             import traceback
             logger.error(traceback.format_exc())
             return self._create_default_analysis()
     
+    def _build_analysis(
+        self,
+        trend_direction: TrendDirection,
+        trend_strength: TrendStrength,
+        volatility_level: VolatilityLevel,
+        has_consolidation: bool,
+        consolidation_bars: int,
+        consolidation_range: float,
+        energy_level: EnergyLevel,
+        has_v: bool,
+        v_type: Optional[str],
+        primary_count: int,
+        candles_h1_count: int,
+        candles_d1_count: int,
+        atr: Optional[float],
+        current_price: Optional[float]
+    ) -> MarketConditionsAnalysis:
+        """
+        Сборка итогового результата из рассчитанных компонентов
+        
+        Общая часть для batch (analyze_conditions) и
+        инкрементального (IncrementalMarketConditionsAnalyzer) анализа.
+        """
+        # 6. ОБЩЕЕ СОСТОЯНИЕ РЫНКА
+        market_condition = self._determine_market_condition(
+            has_consolidation=has_consolidation,
+            trend_strength=trend_strength,
+            volatility_level=volatility_level
+        )
+        
+        # 7. ПОДХОДЯЩИЕ СТРАТЕГИИ
+        suitable_breakout = self._is_suitable_for_breakout(
+            has_consolidation=has_consolidation,
+            energy_level=energy_level,
+            trend_strength=trend_strength
+        )
+        
+        suitable_bounce = self._is_suitable_for_bounce(
+            has_consolidation=has_consolidation,
+            volatility_level=volatility_level,
+            trend_strength=trend_strength
+        )
+        
+        suitable_false_breakout = self._is_suitable_for_false_breakout(
+            volatility_level=volatility_level,
+            trend_strength=trend_strength,
+            has_v=has_v
+        )
+        
+        # 8. УВЕРЕННОСТЬ
+        confidence = self._calculate_confidence(
+            market_condition=market_condition,
+            data_quality=primary_count
+        )
+        
+        # Метаданные
+        metadata = {
+            "candles_h1_count": candles_h1_count,
+            "candles_d1_count": candles_d1_count,
+            "atr": atr,
+            "current_price": current_price,
+            "analyzed_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        # Создаем результат
+        analysis = MarketConditionsAnalysis(
+            market_condition=market_condition,
+            trend_direction=trend_direction,
+            trend_strength=trend_strength,
+            volatility_level=volatility_level,
+            energy_level=energy_level,
+            has_consolidation=has_consolidation,
+            consolidation_bars=consolidation_bars,
+            consolidation_range_percent=consolidation_range * 100,
+            has_v_formation=has_v,
+            v_formation_type=v_type,
+            is_suitable_for_breakout=suitable_breakout,
+            is_suitable_for_bounce=suitable_bounce,
+            is_suitable_for_false_breakout=suitable_false_breakout,
+            confidence=confidence,
+            metadata=metadata
+        )
+        
+        # Обновляем статистику
+        self._update_stats(analysis)
+        
+        logger.info(f"✅ Анализ условий завершен: {market_condition.value}, "
+                   f"trend={trend_direction.value}/{trend_strength.value}, "
+                   f"energy={energy_level.value}")
+        
+        return analysis
+    
     # ==================== АНАЛИЗ ТРЕНДА ====================
     
     def _analyze_trend(self, candles: List) -> Tuple[TrendDirection, TrendStrength]:
@@ -383,6 +429,15 @@ class MarketConditionsAnalyzer:
             # Процент изменения
             change_percent = (second_avg - first_avg) / first_avg
             
+            return self._classify_trend(change_percent)
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка анализа тренда: {e}")
+            return TrendDirection.UNKNOWN, TrendStrength.VERY_WEAK
+    
+    def _classify_trend(self, change_percent: float) -> Tuple[TrendDirection, TrendStrength]:
+        """Классификация тренда по изменению средних половин"""
+        try:
             # Определяем направление
             if change_percent > 0.005:  # > 0.5%
                 direction = TrendDirection.BULLISH
@@ -410,7 +465,7 @@ class MarketConditionsAnalyzer:
             return direction, strength
             
         except Exception as e:
-            logger.error(f"❌ Ошибка анализа тренда: {e}")
+            logger.error(f"❌ Ошибка классификации тренда: {e}")
             return TrendDirection.UNKNOWN, TrendStrength.VERY_WEAK
     
     # ==================== АНАЛИЗ ВОЛАТИЛЬНОСТИ ====================
@@ -495,7 +550,7 @@ class MarketConditionsAnalyzer:
                 return False, 0, 0.0
             
             # Анализируем последние N свечей
-            lookback = min(30, len(candles))
+            lookback = min(self.CONSOLIDATION_LOOKBACK, len(candles))
             recent = candles[-lookback:]
             
             # Находим максимальную последовательность консолидации
@@ -524,7 +579,7 @@ class MarketConditionsAnalyzer:
                         second_half_avg = mean(closes[len(closes)//2:])
                         trend = abs(second_half_avg - first_half_avg) / first_half_avg
                         
-                        if trend < 0.015:  # Тренд < 1.5%
+                        if trend < self.CONSOLIDATION_MAX_TREND:  # Тренд < 1.5%
                             bars_count = end_idx - start_idx
                             if bars_count > max_consol_bars:
                                 max_consol_bars = bars_count
@@ -868,10 +923,401 @@ class MarketConditionsAnalyzer:
                 f"  High volatility: {stats['high_volatility_detected']}")
 
 
+class IncrementalMarketConditionsAnalyzer:
+    """
+    ⚡ Инкрементальный анализатор рыночных условий (на один символ/таймфрейм)
+    
+    Держит скользящее окно баров и при поступлении нового закрытого бара
+    обновляет состояние вместо полного пересчёта:
+    - Тренд: суммы закрытий двух половин окна - O(1) на бар
+    - Консолидация: валидность окон, заканчивающихся на новом баре,
+      считается один раз (O(lookback)) и кэшируется; поиск самой длинной
+      консолидации - бинарный поиск по кэшу вместо O(n³) перебора
+    - Волатильность, энергия, V-формация: хвосты фиксированной длины
+      (20/20/10 баров) - переиспользуются методы batch-анализатора
+    
+    Результат совпадает с MarketConditionsAnalyzer.analyze_conditions()
+    на том же окне свечей (с точностью до округления float в суммах).
+    
+    Usage:
+        incremental = IncrementalMarketConditionsAnalyzer(analyzer, window_size=24)
+        incremental.sync(candles_h1)        # или push_bar(candle) на каждый закрытый бар
+        analysis = incremental.analyze(atr=atr)
+    """
+    
+    def __init__(self, analyzer: MarketConditionsAnalyzer, window_size: int = 24):
+        """
+        Args:
+            analyzer: Batch-анализатор (пороги и классификация берутся из него)
+            window_size: Максимальный размер окна (= limit свечей в batch-вызове)
+        """
+        if window_size < 1:
+            raise ValueError("window_size должен быть >= 1")
+        
+        self.analyzer = analyzer
+        self.window_size = window_size
+        
+        self._reset_state()
+        
+        # Статистика
+        self.stats = {
+            "bars_pushed": 0,
+            "bars_replaced": 0,
+            "incremental_syncs": 0,
+            "full_rebuilds": 0,
+            "analyses_count": 0
+        }
+    
+    def _reset_state(self):
+        """Сбросить окно и кэши"""
+        # Бары: (open_time, high, low, close), глобальный индекс = self._offset + позиция
+        self._buf: List[Tuple[Any, float, float, float]] = []
+        self._offset = 0
+        self._start = 0   # глобальный индекс первого бара окна
+        self._end = 0     # глобальный индекс после последнего бара
+        
+        # Тренд: суммы закрытий половин окна, _split - первый бар второй половины
+        self._first_sum = 0.0
+        self._second_sum = 0.0
+        self._split = 0
+        self._ops_since_resum = 0
+        
+        # Консолидация: end -> [(start, range_percent), ...] по возрастанию start
+        self._consolidations: Dict[int, List[Tuple[int, float]]] = {}
+    
+    # ==================== ОКНО ====================
+    
+    def __len__(self) -> int:
+        return self._end - self._start
+    
+    def _bar(self, index: int) -> Tuple[Any, float, float, float]:
+        return self._buf[index - self._offset]
+    
+    def _close(self, index: int) -> float:
+        return self._buf[index - self._offset][3]
+    
+    @staticmethod
+    def _to_bar(candle: Dict) -> Tuple[Any, float, float, float]:
+        return (
+            candle.get('open_time'),
+            float(candle['high_price']),
+            float(candle['low_price']),
+            float(candle['close_price'])
+        )
+    
+    def push_bar(self, candle: Dict):
+        """Добавить новый закрытый бар (самый старый вытесняется при переполнении)"""
+        bar = self._to_bar(candle)
+        
+        self._buf.append(bar)
+        self._second_sum += bar[3]
+        self._end += 1
+        self.stats["bars_pushed"] += 1
+        
+        self._index_consolidations(self._end)
+        
+        while len(self) > self.window_size:
+            self._pop_left()
+        
+        self._rebalance_halves()
+    
+    def replace_last_bar(self, candle: Dict):
+        """Заменить последний бар (исправленные/дозаполненные данные)"""
+        if len(self) == 0:
+            self.push_bar(candle)
+            return
+        
+        self._pop_right()
+        self.push_bar(candle)
+        self.stats["bars_replaced"] += 1
+    
+    def _pop_left(self):
+        """Вытеснить самый старый бар"""
+        close = self._close(self._start)
+        if self._start < self._split:
+            self._first_sum -= close
+        else:
+            self._second_sum -= close
+            self._split += 1
+        self._start += 1
+        
+        # Компактизация буфера (амортизированно O(1))
+        if self._start - self._offset > self.window_size:
+            del self._buf[:self._start - self._offset]
+            self._offset = self._start
+    
+    def _pop_right(self):
+        """Удалить последний бар"""
+        last = self._end - 1
+        close = self._close(last)
+        if last >= self._split:
+            self._second_sum -= close
+        else:
+            self._first_sum -= close
+            self._split -= 1
+        
+        self._buf.pop()
+        self._consolidations.pop(self._end, None)
+        self._end -= 1
+        self._rebalance_halves()
+    
+    def _rebalance_halves(self):
+        """Сдвинуть границу половин к start + n // 2 (как в _analyze_trend)"""
+        target = self._start + len(self) // 2
+        
+        while self._split < target:
+            close = self._close(self._split)
+            self._first_sum += close
+            self._second_sum -= close
+            self._split += 1
+        
+        while self._split > target:
+            self._split -= 1
+            close = self._close(self._split)
+            self._first_sum -= close
+            self._second_sum += close
+        
+        # Периодически пересчитываем суммы, чтобы не копить ошибку округления
+        self._ops_since_resum += 1
+        if self._ops_since_resum >= self.window_size:
+            self._first_sum = fsum(self._close(i) for i in range(self._start, self._split))
+            self._second_sum = fsum(self._close(i) for i in range(self._split, self._end))
+            self._ops_since_resum = 0
+    
+    # ==================== СИНХРОНИЗАЦИЯ ====================
+    
+    def sync(self, candles: List[Dict]) -> bool:
+        """
+        Синхронизировать окно со списком свечей (тем же, что ушёл бы в batch)
+        
+        Добавляет только новые бары после последнего известного open_time,
+        заменяет последний бар если он изменился (незакрытая свеча).
+        Если история не стыкуется - окно перестраивается целиком.
+        
+        Returns:
+            bool: True если обновление было инкрементальным
+        """
+        if not candles:
+            self._reset_state()
+            return False
+        
+        target_len = min(len(candles), self.window_size)
+        candles = candles[-target_len:]
+        
+        position = None
+        if len(self) > 0:
+            last_time = self._bar(self._end - 1)[0]
+            for idx in range(len(candles) - 1, -1, -1):
+                if candles[idx].get('open_time') == last_time:
+                    position = idx
+                    break
+        
+        if position is not None:
+            if self._to_bar(candles[position]) != self._bar(self._end - 1):
+                self.replace_last_bar(candles[position])
+            
+            for candle in candles[position + 1:]:
+                self.push_bar(candle)
+            
+            while len(self) > target_len:
+                self._pop_left()
+            self._rebalance_halves()
+            
+            if len(self) == target_len and self._bar(self._start)[0] == candles[0].get('open_time'):
+                self.stats["incremental_syncs"] += 1
+                return True
+        
+        # Полная перестройка окна
+        self._reset_state()
+        for candle in candles:
+            self.push_bar(candle)
+        self.stats["full_rebuilds"] += 1
+        return False
+    
+    # ==================== КОНСОЛИДАЦИЯ ====================
+    
+    def _index_consolidations(self, end: int):
+        """
+        Найти все окна консолидации, заканчивающиеся на end (не включительно)
+        
+        Условия те же, что в MarketConditionsAnalyzer._analyze_consolidation.
+        """
+        min_bars = self.analyzer.consolidation_min_bars
+        lowest_start = max(self._start, end - self.analyzer.CONSOLIDATION_LOOKBACK)
+        
+        # Префиксные суммы закрытий на участке [lowest_start, end)
+        prefix = [0.0]
+        for i in range(lowest_start, end):
+            prefix.append(prefix[-1] + self._close(i))
+        
+        found = []
+        max_high = float('-inf')
+        min_low = float('inf')
+        
+        for start in range(end - 1, lowest_start - 1, -1):
+            _, high, low, _ = self._bar(start)
+            max_high = max(max_high, high)
+            min_low = min(min_low, low)
+            
+            length = end - start
+            if length < min_bars:
+                continue
+            
+            base = start - lowest_start
+            avg_close = (prefix[base + length] - prefix[base]) / length
+            range_percent = (max_high - min_low) / avg_close if avg_close > 0 else 0
+            
+            if range_percent > self.analyzer.consolidation_max_range:
+                continue
+            
+            half = length // 2
+            first_half_avg = (prefix[base + half] - prefix[base]) / half
+            second_half_avg = (prefix[base + length] - prefix[base + half]) / (length - half)
+            trend = abs(second_half_avg - first_half_avg) / first_half_avg
+            
+            if trend < self.analyzer.CONSOLIDATION_MAX_TREND:
+                found.append((start, range_percent))
+        
+        if found:
+            found.reverse()
+            self._consolidations[end] = found
+    
+    def _find_consolidation(self) -> Tuple[bool, int, float]:
+        """Самая длинная консолидация в последних CONSOLIDATION_LOOKBACK барах"""
+        min_bars = self.analyzer.consolidation_min_bars
+        n = len(self)
+        
+        if n < min_bars:
+            return False, 0, 0.0
+        
+        lower_bound = self._end - min(self.analyzer.CONSOLIDATION_LOOKBACK, n)
+        
+        # Удаляем окна, которые уже не могут попасть в lookback
+        for end in [e for e in self._consolidations if e < lower_bound + min_bars]:
+            del self._consolidations[end]
+        
+        best_bars = 0
+        best_start = None
+        best_range = 0.0
+        
+        for end, windows in self._consolidations.items():
+            idx = bisect.bisect_left(windows, (lower_bound, float('-inf')))
+            if idx == len(windows):
+                continue
+            
+            start, range_percent = windows[idx]
+            bars = end - start
+            # Как в batch-версии: при равной длине побеждает окно с меньшим start
+            if bars > best_bars or (bars == best_bars and start < best_start):
+                best_bars = bars
+                best_start = start
+                best_range = range_percent
+        
+        has_consolidation = best_bars >= min_bars
+        return has_consolidation, best_bars, best_range
+    
+    # ==================== АНАЛИЗ ====================
+    
+    def _tail(self, count: int) -> List[Dict[str, float]]:
+        """Последние count баров в формате свечей для batch-методов"""
+        return [
+            {"high_price": high, "low_price": low, "close_price": close}
+            for _, high, low, close in (self._bar(i) for i in range(max(self._start, self._end - count), self._end))
+        ]
+    
+    def analyze(
+        self,
+        atr: Optional[float] = None,
+        current_price: Optional[float] = None,
+        candles_d1_count: int = 0
+    ) -> MarketConditionsAnalysis:
+        """
+        Анализ условий по текущему окну
+        
+        Args:
+            atr: ATR для расчетов
+            current_price: Текущая цена (None = закрытие последнего бара)
+            candles_d1_count: Количество D1 свечей (только для metadata)
+            
+        Returns:
+            MarketConditionsAnalysis, как у batch-анализатора
+        """
+        analyzer = self.analyzer
+        
+        try:
+            self.stats["analyses_count"] += 1
+            analyzer.stats["analyses_count"] += 1
+            
+            n = len(self)
+            if n < 10:
+                return analyzer._create_default_analysis()
+            
+            if current_price is None:
+                current_price = self._close(self._end - 1)
+            
+            # 1. ТРЕНД - из поддерживаемых сумм половин
+            first_avg = self._first_sum / (self._split - self._start)
+            second_avg = self._second_sum / (self._end - self._split)
+            trend_direction, trend_strength = analyzer._classify_trend(
+                (second_avg - first_avg) / first_avg
+            )
+            
+            # 2-5. Хвосты фиксированной длины
+            tail = self._tail(20)
+            volatility_level = analyzer._analyze_volatility(tail, atr)
+            
+            has_consolidation, consol_bars, consol_range = self._find_consolidation()
+            
+            energy_level = analyzer._analyze_energy(
+                candles=tail,
+                has_consolidation=has_consolidation,
+                consolidation_bars=consol_bars
+            )
+            
+            has_v, v_type = analyzer._analyze_v_formation(tail[-10:])
+            
+            return analyzer._build_analysis(
+                trend_direction=trend_direction,
+                trend_strength=trend_strength,
+                volatility_level=volatility_level,
+                has_consolidation=has_consolidation,
+                consolidation_bars=consol_bars,
+                consolidation_range=consol_range,
+                energy_level=energy_level,
+                has_v=has_v,
+                v_type=v_type,
+                primary_count=n,
+                candles_h1_count=n,
+                candles_d1_count=candles_d1_count,
+                atr=atr,
+                current_price=current_price
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка инкрементального анализа условий: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return analyzer._create_default_analysis()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Получить статистику"""
+        return {
+            **self.stats,
+            "window_size": self.window_size,
+            "bars_in_window": len(self),
+            "cached_consolidation_ends": len(self._consolidations)
+        }
+    
+    def __repr__(self) -> str:
+        return (f"IncrementalMarketConditionsAnalyzer(window={len(self)}/{self.window_size}, "
+                f"rebuilds={self.stats['full_rebuilds']})")
+
+
 # Export
 __all__ = [
     "MarketConditionsAnalyzer",
     "MarketConditionsAnalysis",
+    "IncrementalMarketConditionsAnalyzer",
     "VolatilityLevel",
     "EnergyLevel",
     "TrendStrength"
@@ -0,0 +1,277 @@
+"""
+Refresh Scheduler - Единый планировщик фоновых обновлений контекстов
+
+Вместо четырех независимых циклов (свечи, ATR, уровни, рыночные условия),
+каждый из которых по очереди обходит все контексты своими запросами,
+один планировщик:
+
+- очередь с приоритетом (due, symbol, component) на heapq
+- сроки выровнены по сетке периода компонента (свечи - минута, ATR - час,
+  рыночные условия - 15 минут, уровни - 00:00 UTC), поэтому у всех символов
+  срок компонента наступает одновременно и они обновляются одним батчем:
+  один запрос к БД на интервал для всех символов батча
+  (MarketDataRepository.get_candles_multi)
+- джиттер: у каждого компонента случайная фаза внутри периода, чтобы
+  компоненты не били в БД в одну секунду
+- пропущенные сроки не накапливаются: следующий срок - ближайший слот
+  сетки после текущего момента
+- лимит одновременно выполняемых батчей
+- метрики задержки: от срока до завершения обновления
+
+Контексты, удаленные из менеджера (clear_context, вытеснение), выпадают
+из очереди и больше не обновляются.
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import asyncio
+import heapq
+import logging
+import random
+import time
+import traceback
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ComponentSchedule:
+    """Период обновления компонента контекста"""
+    component: str
+    period_seconds: float
+
+
+# Сетка от epoch: уровни - 00:00 UTC, остальные - границы минут/часов
+DEFAULT_SCHEDULE: Tuple[ComponentSchedule, ...] = (
+    ComponentSchedule("candles", 60),
+    ComponentSchedule("atr", 3600),
+    ComponentSchedule("levels", 86400),
+    ComponentSchedule("market_conditions", 900),
+)
+
+
+class _LagStats:
+    """Задержка от срока до завершения обновления (секунды)"""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, lag: float):
+        self.count += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+        self.recent.append(lag)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            "completed": self.count,
+            "avg_lag_seconds": self.total / self.count if self.count else 0.0,
+            "max_lag_seconds": self.max,
+            "p95_lag_seconds": recent[int(0.95 * (len(recent) - 1))] if recent else 0.0
+        }
+
+
+class RefreshScheduler:
+    """
+    ⏱️ Планировщик батчевых обновлений контекстов TechnicalAnalysisContextManager
+    """
+
+    def __init__(
+        self,
+        manager,  # TechnicalAnalysisContextManager
+        schedule: Optional[Tuple[ComponentSchedule, ...]] = None,
+        max_phase_jitter_seconds: float = 30.0,
+        max_concurrent_batches: int = 2,
+        max_batch_size: int = 100,
+        tick_seconds: float = 1.0,
+        clock: Optional[Callable[[], float]] = None
+    ):
+        """
+        Args:
+            manager: Менеджер контекстов (источник символов и исполнитель батчей)
+            schedule: Периоды компонентов (None = DEFAULT_SCHEDULE)
+            max_phase_jitter_seconds: Максимальная фаза компонента (не больше 10% периода)
+            max_concurrent_batches: Сколько батчей выполняется одновременно
+            max_batch_size: Символов в одном батче (больше - несколько батчей)
+            tick_seconds: Как часто проверять новые/удаленные контексты
+            clock: Источник времени epoch seconds (None = time.time)
+        """
+        self.manager = manager
+        self.schedule: Dict[str, ComponentSchedule] = {
+            item.component: item for item in (schedule or DEFAULT_SCHEDULE)
+        }
+        self.max_batch_size = max(1, max_batch_size)
+        self.tick_seconds = tick_seconds
+        self.clock = clock or time.time
+
+        self.phases: Dict[str, float] = {
+            component: random.uniform(0, min(item.period_seconds * 0.1, max_phase_jitter_seconds))
+            for component, item in self.schedule.items()
+        }
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_batches)
+        self._heap: List[Tuple[float, int, str, str, int]] = []  # (due, seq, symbol, component, generation)
+        self._seq = 0
+        self._generations: Dict[str, int] = {}  # symbol -> поколение записей в очереди
+        self._next_generation = 0
+        self._batches: set = set()
+
+        self.lag: Dict[str, _LagStats] = defaultdict(_LagStats)
+        self.stats = {
+            "batches_started": 0,
+            "batches_failed": 0,
+            "items_dispatched": 0,
+            "items_skipped_inflight": 0,
+            "items_skipped_unchanged": 0,
+            "items_dropped": 0,
+            "slots_missed": 0
+        }
+
+    # ==================== СЕТКА СРОКОВ ====================
+
+    def next_due(self, component: str, after: float) -> float:
+        """Ближайший слот компонента строго после after"""
+        period = self.schedule[component].period_seconds
+        phase = self.phases[component]
+        return ((after - phase) // period + 1) * period + phase
+
+    def _push(self, due: float, symbol: str, component: str, generation: int):
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, symbol, component, generation))
+
+    def _sync_symbols(self, now: float):
+        """Поставить в очередь новые контексты, забыть удаленные"""
+        contexts = self.manager.contexts
+
+        for symbol in [s for s in self._generations if s not in contexts]:
+            del self._generations[symbol]  # записи в очереди отбросятся по поколению
+
+        for symbol in contexts:
+            if symbol in self._generations:
+                continue
+            self._next_generation += 1
+            self._generations[symbol] = self._next_generation
+            for component in self.schedule:
+                self._push(self.next_due(component, now), symbol, component, self._next_generation)
+
+    # ==================== ДИСПЕТЧЕРИЗАЦИЯ ====================
+
+    def _pop_due(self, now: float) -> Dict[str, List[Tuple[Any, float]]]:
+        """Снять с очереди наступившие сроки: component -> [(context, due)]"""
+        due_items: Dict[str, List[Tuple[Any, float]]] = defaultdict(list)
+
+        while self._heap and self._heap[0][0] <= now:
+            due, _, symbol, component, generation = heapq.heappop(self._heap)
+
+            context = self.manager.contexts.get(symbol)
+            if context is None or self._generations.get(symbol) != generation:
+                self.stats["items_dropped"] += 1
+                continue
+
+            # Следующий срок - ближайший слот после now (пропущенные не копятся)
+            next_due = self.next_due(component, now)
+            if next_due - due > self.schedule[component].period_seconds * 1.5:
+                self.stats["slots_missed"] += 1
+            self._push(next_due, symbol, component, generation)
+
+            due_items[component].append((context, due))
+
+        return due_items
+
+    def _dispatch(self, now: float):
+        for component, items in self._pop_due(now).items():
+            selected = []
+            for context, due in items:
+                if self.manager._inputs_changed(context, component) is False:
+                    self.stats["items_skipped_unchanged"] += 1
+                    continue
+                selected.append((context, due))
+
+            for i in range(0, len(selected), self.max_batch_size):
+                chunk = selected[i:i + self.max_batch_size]
+                self._start_batch(component, chunk)
+
+    def _start_batch(self, component: str, items: List[Tuple[Any, float]]):
+        dues = {context.symbol: due for context, due in items}
+        task, started = self.manager._start_batch_refresh(
+            component, [context for context, _ in items], semaphore=self._semaphore
+        )
+
+        self.stats["items_skipped_inflight"] += len(items) - len(started)
+        if task is None:
+            return
+
+        self.stats["batches_started"] += 1
+        self.stats["items_dispatched"] += len(started)
+        self._batches.add(task)
+
+        def on_done(t: asyncio.Task):
+            self._batches.discard(t)
+            if t.cancelled():
+                return
+            if t.exception() is not None:
+                self.stats["batches_failed"] += 1
+                return
+            completed = self.clock()
+            for context in started:
+                self.lag[component].add(max(0.0, completed - dues[context.symbol]))
+
+        task.add_done_callback(on_done)
+
+    # ==================== ЦИКЛ ====================
+
+    async def run(self):
+        """Основной цикл (до отмены или остановки менеджера)"""
+        logger.info(
+            "🔄 Запущен планировщик обновлений контекстов: " +
+            ", ".join(f"{c}={int(s.period_seconds)}s" for c, s in self.schedule.items())
+        )
+
+        while self.manager.is_running:
+            try:
+                now = self.clock()
+                self._sync_symbols(now)
+                self._dispatch(now)
+
+                delay = self._heap[0][0] - self.clock() if self._heap else self.tick_seconds
+                await asyncio.sleep(min(max(delay, 0.0), self.tick_seconds))
+
+            except asyncio.CancelledError:
+                logger.info("🛑 Планировщик обновлений контекстов остановлен")
+                break
+            except Exception as e:
+                logger.error(f"❌ Критическая ошибка в планировщике контекстов: {e}")
+                logger.error(traceback.format_exc())
+                await asyncio.sleep(self.tick_seconds)
+
+    # ==================== СТАТИСТИКА ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика планировщика"""
+        return {
+            **self.stats,
+            "queued": len(self._heap),
+            "symbols": len(self._generations),
+            "running_batches": len(self._batches),
+            "phases_seconds": dict(self.phases),
+            "lag": {component: lag.to_dict() for component, lag in self.lag.items()}
+        }
+
+    def __repr__(self) -> str:
+        return (f"RefreshScheduler(symbols={len(self._generations)}, queued={len(self._heap)}, "
+                f"batches={self.stats['batches_started']})")
+
+
+__all__ = ["RefreshScheduler", "ComponentSchedule", "DEFAULT_SCHEDULE"]
+
+logger.info("✅ Refresh Scheduler module loaded")
@@ -0,0 +1,693 @@
+"""
+Vectorized Pattern Detector - Векторизованный детектор паттернов (NumPy)
+
+Те же паттерны, что и PatternDetector, но над колоночным представлением
+свечей (CandleArrays) - без Python-циклов по барам:
+1. Поджатие - диапазоны баров и длины серий маленьких баров одним проходом
+2. БСУ/БПУ - маски касаний уровня (сразу для набора уровней)
+3. V-формация - argmin/argmax экстремумов
+4. Консолидация и пучки - агрегаты по окну
+
+Один вызов scan() считает общие массивы один раз и отдает результаты
+для всех уровней, которые проверяют стратегии пробоя, отбоя и ЛП.
+
+VectorizedPatternDetector наследует PatternDetector: методы принимают
+как список свечей, так и CandleArrays, и возвращают те же типы
+(Tuple[bool, details], BSUPattern, List[BPUPattern]).
+
+Author: Trading Bot Team
+Version: 1.0.0
+"""
+
+import logging
+from statistics import mean
+from typing import List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .context import SupportResistanceLevel
+from .pattern_detector import PatternDetector, BSUPattern, BPUPattern
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== КОЛОНОЧНЫЕ СВЕЧИ ====================
+
+def _to_datetime64(value: Any) -> np.datetime64:
+    """datetime (naive = UTC) -> datetime64[us]"""
+    if value is None:
+        return np.datetime64("NaT", "us")
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return np.datetime64(value, "us")
+    return np.datetime64(value, "us")
+
+
+@dataclass
+class CandleArrays:
+    """
+    Колоночное представление свечей
+
+    Все массивы одной длины; срезы (tail/window) - это views без копирования.
+    source хранит исходные свечи, чтобы БСУ/БПУ возвращали те же объекты.
+    """
+    open_time: np.ndarray   # datetime64[us], UTC
+    open: np.ndarray        # float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    source: Optional[List] = None
+    source_offset: int = 0
+
+    @classmethod
+    def from_candles(cls, candles: List[Dict]) -> "CandleArrays":
+        """Построить колонки из списка свечей-словарей (формат MarketDataRepository)"""
+        # Окна реплея бэктеста уже колоночные - отдают views без копирования
+        if hasattr(candles, "to_candle_arrays"):
+            return candles.to_candle_arrays()
+
+        n = len(candles)
+        data = np.empty((5, n), dtype=np.float64)
+
+        for i, c in enumerate(candles):
+            data[0, i] = float(c['open_price'])
+            data[1, i] = float(c['high_price'])
+            data[2, i] = float(c['low_price'])
+            data[3, i] = float(c['close_price'])
+            data[4, i] = float(c.get('volume') or 0.0)
+
+        open_time = np.array(
+            [_to_datetime64(c.get('open_time')) for c in candles],
+            dtype="datetime64[us]"
+        )
+
+        return cls(
+            open_time=open_time,
+            open=data[0],
+            high=data[1],
+            low=data[2],
+            close=data[3],
+            volume=data[4],
+            source=candles
+        )
+
+    @classmethod
+    def ensure(cls, candles: Union["CandleArrays", List[Dict], None]) -> "CandleArrays":
+        """Принять список свечей или CandleArrays"""
+        if isinstance(candles, cls):
+            return candles
+        return cls.from_candles(candles or [])
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def window(self, start: int, stop: int) -> "CandleArrays":
+        """Срез [start, stop) - views на те же массивы"""
+        return CandleArrays(
+            open_time=self.open_time[start:stop],
+            open=self.open[start:stop],
+            high=self.high[start:stop],
+            low=self.low[start:stop],
+            close=self.close[start:stop],
+            volume=self.volume[start:stop],
+            source=self.source,
+            source_offset=self.source_offset + start
+        )
+
+    def tail(self, count: int) -> "CandleArrays":
+        """Последние count баров (как candles[-count:])"""
+        n = len(self)
+        return self.window(max(0, n - count), n)
+
+    @property
+    def ranges(self) -> np.ndarray:
+        """Диапазоны High-Low"""
+        return self.high - self.low
+
+    def candle(self, index: int) -> Any:
+        """Исходная свеча по индексу (или словарь, если source нет)"""
+        if self.source is not None:
+            return self.source[self.source_offset + index]
+
+        return {
+            "open_time": self.open_time[index].astype(datetime).replace(tzinfo=timezone.utc),
+            "open_price": float(self.open[index]),
+            "high_price": float(self.high[index]),
+            "low_price": float(self.low[index]),
+            "close_price": float(self.close[index]),
+            "volume": float(self.volume[index])
+        }
+
+
+def _mean(values: np.ndarray) -> float:
+    """
+    Среднее окна - точно как statistics.mean в PatternDetector
+
+    Окна короткие (lookback), поэтому точная арифметика statistics
+    дешевле, чем расхождение пороговых решений на последнем бите.
+    """
+    return mean(values.tolist())
+
+
+def small_bar_runs(ranges: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Длина серии маленьких баров, заканчивающейся на каждом баре
+
+    runs[i] = 0 если бар i не маленький, иначе число маленьких баров подряд до i включительно.
+    """
+    small = ranges < threshold
+    idx = np.arange(len(ranges))
+    last_break = np.maximum.accumulate(np.where(small, -1, idx))
+    return np.where(small, idx - last_break, 0)
+
+
+@dataclass
+class PatternScanResult:
+    """
+    Результат одного прохода scan() по свечам для набора уровней
+
+    Attributes:
+        bars_count: Количество баров во входных данных
+        max_small_streak: Максимальная серия маленьких баров (окно поджатия)
+        compression: level.price -> (has_compression, details)
+        bpu: level.price -> список БПУ
+        v_formation: (has_v, details)
+        consolidation: (has_consolidation, details)
+        cluster: (has_cluster, details)
+    """
+    bars_count: int
+    max_small_streak: int = 0
+    compression: Dict[float, Tuple[bool, Dict[str, Any]]] = field(default_factory=dict)
+    bpu: Dict[float, List[BPUPattern]] = field(default_factory=dict)
+    v_formation: Tuple[bool, Dict[str, Any]] = (False, {})
+    consolidation: Tuple[bool, Dict[str, Any]] = (False, {})
+    cluster: Tuple[bool, Dict[str, Any]] = (False, {})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bars_count": self.bars_count,
+            "max_small_streak": self.max_small_streak,
+            "compression": {price: has for price, (has, _) in self.compression.items()},
+            "bpu_count": {price: len(items) for price, items in self.bpu.items()},
+            "has_v_formation": self.v_formation[0],
+            "has_consolidation": self.consolidation[0],
+            "has_cluster": self.cluster[0]
+        }
+
+
+# ==================== ДЕТЕКТОР ====================
+
+class VectorizedPatternDetector(PatternDetector):
+    """
+    🔍⚡ Векторизованный детектор паттернов
+
+    Drop-in замена PatternDetector: те же параметры, результаты и статистика,
+    но вычисления выполняются над NumPy-массивами.
+
+    Usage:
+        detector = VectorizedPatternDetector()
+        arrays = CandleArrays.from_candles(candles_m5)
+
+        has_compression, details = detector.detect_compression(arrays, level, atr)
+
+        # Один проход для всех уровней
+        scan = detector.scan(arrays, levels=[support, resistance], atr=atr)
+        scan.compression[support.price]
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.stats["vectorized_scans"] = 0
+
+    # ==================== ПОДЖАТИЕ ====================
+
+    def detect_compression(
+        self,
+        candles: Union[CandleArrays, List],
+        level: Optional[SupportResistanceLevel] = None,
+        atr: Optional[float] = None,
+        lookback: int = 20
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Поджатие (см. PatternDetector.detect_compression)"""
+        try:
+            arrays = CandleArrays.ensure(candles)
+
+            if len(arrays) < self.compression_min_bars:
+                return False, {}
+
+            recent = arrays.tail(lookback)
+            ranges = recent.ranges
+            runs, atr = self._compression_runs(ranges, atr)
+
+            if runs is None:
+                return False, {}
+
+            levels = [level] if level else []
+            return self._compression_result(recent, runs, atr, levels)[level.price if level else None]
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторной детекции поджатия: {e}")
+            return False, {}
+
+    def _compression_runs(
+        self,
+        ranges: np.ndarray,
+        atr: Optional[float]
+    ) -> Tuple[Optional[np.ndarray], float]:
+        """Серии маленьких баров для окна поджатия"""
+        if atr is None:
+            atr = _mean(ranges) if len(ranges) else 0
+
+        if atr <= 0:
+            return None, atr
+
+        return small_bar_runs(ranges, atr * self.compression_threshold), atr
+
+    def _compression_result(
+        self,
+        recent: CandleArrays,
+        runs: np.ndarray,
+        atr: float,
+        levels: List[SupportResistanceLevel]
+    ) -> Dict[Optional[float], Tuple[bool, Dict[str, Any]]]:
+        """Результаты поджатия для набора уровней (близость - вектором по уровням)"""
+        max_streak = int(runs.max()) if len(runs) else 0
+        small_count = int(np.count_nonzero(runs))
+        has_compression = max_streak >= self.compression_min_bars
+
+        results: Dict[Optional[float], Tuple[bool, Dict[str, Any]]] = {}
+
+        near = np.zeros(len(levels), dtype=bool)
+        if levels and has_compression:
+            avg_price = _mean(recent.close[-self.compression_min_bars:])
+            prices = np.array([lvl.price for lvl in levels], dtype=np.float64)
+            near = np.abs(avg_price - prices) / prices < 0.01
+
+        for i, lvl in enumerate(levels or [None]):
+            details = {
+                "max_streak": max_streak,
+                "small_bars_count": small_count,
+                "near_level": bool(near[i]) if lvl is not None else False,
+                "atr": atr,
+                "threshold_used": atr * self.compression_threshold
+            }
+
+            if has_compression:
+                self.stats["compressions_detected"] += 1
+                self.stats["total_patterns"] += 1
+
+            results[lvl.price if lvl is not None else None] = (has_compression, details)
+
+        if has_compression:
+            logger.info(f"✅ Поджатие обнаружено: {max_streak} маленьких баров (ATR={atr:.2f})")
+
+        return results
+
+    # ==================== ПУЧКИ ====================
+
+    def detect_cluster(
+        self,
+        candles: Union[CandleArrays, List],
+        lookback: int = 10
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Пучок свечей (см. PatternDetector.detect_cluster)"""
+        try:
+            arrays = CandleArrays.ensure(candles)
+
+            if len(arrays) < self.cluster_min_bars:
+                return False, {}
+
+            recent = arrays.tail(lookback)
+
+            if len(recent) < self.cluster_min_bars:
+                return False, {}
+
+            max_high, min_high = float(recent.high.max()), float(recent.high.min())
+            max_low, min_low = float(recent.low.max()), float(recent.low.min())
+
+            high_range_percent = (max_high - min_high) / min_high
+            low_range_percent = (max_low - min_low) / min_low
+
+            has_cluster = (
+                high_range_percent <= self.cluster_tolerance and
+                low_range_percent <= self.cluster_tolerance
+            )
+
+            details = {
+                "high_range_percent": high_range_percent * 100,
+                "low_range_percent": low_range_percent * 100,
+                "max_high": max_high,
+                "min_high": min_high,
+                "max_low": max_low,
+                "min_low": min_low,
+                "candles_in_cluster": len(recent)
+            }
+
+            if has_cluster:
+                self.stats["clusters_detected"] += 1
+                self.stats["total_patterns"] += 1
+
+            return has_cluster, details
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторной детекции пучка: {e}")
+            return False, {}
+
+    # ==================== БСУ ====================
+
+    def find_bsu(
+        self,
+        candles: Union[CandleArrays, List],
+        level: SupportResistanceLevel,
+        max_age_days: int = 180
+    ) -> Optional[BSUPattern]:
+        """
+        БСУ (см. PatternDetector.find_bsu)
+
+        Время бара берется из колонки open_time, поэтому работает и со
+        свечами-словарями из MarketDataRepository.
+        """
+        try:
+            if candles is None or not level:
+                return None
+
+            arrays = CandleArrays.ensure(candles)
+            if len(arrays) == 0:
+                return None
+
+            prices = arrays.low if level.level_type == "support" else arrays.high
+            tolerance = level.price * 0.005  # 0.5%
+
+            now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us")
+            age_days = (now - arrays.open_time) // np.timedelta64(1, "D")
+
+            mask = (np.abs(prices - level.price) <= tolerance) & ~np.isnat(arrays.open_time)
+            mask &= age_days <= max_age_days
+
+            hits = np.flatnonzero(mask)
+            if len(hits) == 0:
+                logger.debug(f"⚠️ БСУ не найден для уровня {level.price:.2f}")
+                return None
+
+            index = int(hits[0])
+            created_at = arrays.open_time[index].astype(datetime).replace(tzinfo=timezone.utc)
+
+            bsu = BSUPattern(
+                candle=arrays.candle(index),
+                level_price=level.price,
+                level_type=level.level_type,
+                created_at=created_at,
+                is_strong=level.is_strong
+            )
+
+            self.stats["bsu_found"] += 1
+            self.stats["total_patterns"] += 1
+
+            logger.info(f"✅ БСУ найден: {level.level_type} @ {level.price:.2f}, "
+                       f"age={int(age_days[index])} дней")
+
+            return bsu
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторного поиска БСУ: {e}")
+            return None
+
+    # ==================== БПУ ====================
+
+    def find_bpu(
+        self,
+        candles: Union[CandleArrays, List],
+        level: SupportResistanceLevel,
+        lookback: int = 50
+    ) -> List[BPUPattern]:
+        """БПУ (см. PatternDetector.find_bpu)"""
+        try:
+            if candles is None or not level:
+                return []
+
+            recent = CandleArrays.ensure(candles).tail(lookback)
+
+            if len(recent) < 2:
+                return []
+
+            return self._bpu_for_levels(recent, [level])[level.price]
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторного поиска БПУ: {e}")
+            return []
+
+    def _bpu_for_levels(
+        self,
+        recent: CandleArrays,
+        levels: List[SupportResistanceLevel]
+    ) -> Dict[float, List[BPUPattern]]:
+        """Матрица касаний (уровни × бары) одним broadcasting-вычислением"""
+        results: Dict[float, List[BPUPattern]] = {}
+
+        if not levels:
+            return results
+
+        level_prices = np.array([lvl.price for lvl in levels], dtype=np.float64)
+        is_support = np.array([lvl.level_type == "support" for lvl in levels])
+
+        # Для поддержки - Low, для сопротивления - High
+        bar_prices = np.where(is_support[:, None], recent.low[None, :], recent.high[None, :])
+        distances = np.abs(bar_prices - level_prices[:, None])
+        tolerances = level_prices * self.bpu_touch_tolerance
+        touches = distances <= tolerances[:, None]
+
+        for row, lvl in enumerate(levels):
+            bpu_list = []
+            for index in np.flatnonzero(touches[row]):
+                bpu_list.append(BPUPattern(
+                    candle=recent.candle(int(index)),
+                    level_price=lvl.price,
+                    level_type=lvl.level_type,
+                    touch_accuracy=float(1.0 - distances[row, index] / tolerances[row])
+                ))
+
+            if len(bpu_list) >= 1:
+                bpu_list[0].is_bpu1 = True
+
+            if len(bpu_list) >= 2:
+                bpu_list[1].is_bpu2 = True
+                if self._check_bpu_cluster(bpu_list[0], bpu_list[1]):
+                    bpu_list[1].forms_cluster_with = bpu_list[0]
+
+            if bpu_list:
+                self.stats["bpu_found"] += len(bpu_list)
+                self.stats["total_patterns"] += len(bpu_list)
+
+            results[lvl.price] = bpu_list
+
+        return results
+
+    # ==================== КОНСОЛИДАЦИЯ ====================
+
+    def detect_consolidation(
+        self,
+        candles: Union[CandleArrays, List],
+        lookback: int = 20
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Консолидация (см. PatternDetector.detect_consolidation)"""
+        try:
+            arrays = CandleArrays.ensure(candles)
+
+            if len(arrays) < self.consolidation_min_bars:
+                return False, {}
+
+            recent = arrays.tail(lookback)
+
+            if len(recent) < self.consolidation_min_bars:
+                return False, {}
+
+            max_high = float(recent.high.max())
+            min_low = float(recent.low.min())
+            avg_close = _mean(recent.close)
+
+            range_percent = (max_high - min_low) / avg_close
+            has_consolidation = range_percent <= self.consolidation_max_range
+
+            if has_consolidation:
+                half = len(recent) // 2
+                avg_first = _mean(recent.close[:half])
+                avg_second = _mean(recent.close[half:])
+
+                if abs(avg_second - avg_first) / avg_first > 0.015:
+                    has_consolidation = False
+
+            details = {
+                "bars_count": len(recent),
+                "range_percent": range_percent * 100,
+                "max_high": max_high,
+                "min_low": min_low,
+                "avg_close": avg_close
+            }
+
+            if has_consolidation:
+                self.stats["consolidations_detected"] += 1
+                self.stats["total_patterns"] += 1
+
+            return has_consolidation, details
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторной детекции консолидации: {e}")
+            return False, {}
+
+    # ==================== V-ФОРМАЦИЯ ====================
+
+    def detect_v_formation(
+        self,
+        candles: Union[CandleArrays, List],
+        lookback: int = 10
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """V-формация (см. PatternDetector.detect_v_formation)"""
+        try:
+            arrays = CandleArrays.ensure(candles)
+
+            if len(arrays) < 5:
+                return False, {}
+
+            recent = arrays.tail(lookback)
+            n = len(recent)
+
+            if n < 5:
+                return False, {}
+
+            # argmax/argmin возвращают первое вхождение - как list.index()
+            max_idx = int(np.argmax(recent.high))
+            min_idx = int(np.argmin(recent.low))
+            max_high = float(recent.high[max_idx])
+            min_low = float(recent.low[min_idx])
+            first_close = float(recent.close[0])
+            last_close = float(recent.close[-1])
+
+            has_v_formation = False
+            details: Dict[str, Any] = {}
+
+            # V вниз-вверх (дно)
+            if 0 < min_idx < n - 2:
+                down_move = (first_close - min_low) / first_close
+                up_move = (last_close - min_low) / min_low
+
+                if down_move >= self.v_min_move and up_move >= self.v_min_move * 0.7:
+                    has_v_formation = True
+                    details = {
+                        "v_type": "bullish_v",
+                        "down_move_percent": down_move * 100,
+                        "up_move_percent": up_move * 100,
+                        "bottom_price": min_low,
+                        "bottom_index": min_idx
+                    }
+
+            # V вверх-вниз (вершина)
+            if not has_v_formation and 0 < max_idx < n - 2:
+                up_move = (max_high - first_close) / first_close
+                down_move = (max_high - last_close) / max_high
+
+                if up_move >= self.v_min_move and down_move >= self.v_min_move * 0.7:
+                    has_v_formation = True
+                    details = {
+                        "v_type": "bearish_v",
+                        "up_move_percent": up_move * 100,
+                        "down_move_percent": down_move * 100,
+                        "top_price": max_high,
+                        "top_index": max_idx
+                    }
+
+            if has_v_formation:
+                self.stats["v_formations_detected"] += 1
+                self.stats["total_patterns"] += 1
+                logger.info(f"✅ V-формация обнаружена: {details['v_type']}")
+
+            return has_v_formation, details
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторной детекции V-формации: {e}")
+            return False, {}
+
+    # ==================== ОДИН ПРОХОД ====================
+
+    def scan(
+        self,
+        candles: Union[CandleArrays, List],
+        levels: Optional[List[SupportResistanceLevel]] = None,
+        atr: Optional[float] = None,
+        compression_lookback: int = 20,
+        bpu_lookback: int = 50,
+        consolidation_lookback: int = 20,
+        cluster_lookback: int = 10,
+        v_lookback: int = 10
+    ) -> PatternScanResult:
+        """
+        🎯 Все паттерны для набора уровней за один проход по свечам
+
+        Колонки строятся один раз; поджатие и БПУ считаются сразу для всех
+        уровней (вектор/матрица по уровням). Результаты совпадают с
+        отдельными вызовами detect_*/find_bpu для каждого уровня.
+
+        Args:
+            candles: Свечи (список или CandleArrays)
+            levels: Уровни, которые проверяют стратегии
+            atr: ATR для порога маленьких баров (None = средний диапазон)
+
+        Returns:
+            PatternScanResult
+        """
+        arrays = CandleArrays.ensure(candles)
+        levels = [lvl for lvl in (levels or []) if lvl is not None]
+        result = PatternScanResult(bars_count=len(arrays))
+
+        self.stats["vectorized_scans"] += 1
+
+        try:
+            # Поджатие
+            if len(arrays) >= self.compression_min_bars:
+                recent = arrays.tail(compression_lookback)
+                runs, used_atr = self._compression_runs(recent.ranges, atr)
+
+                if runs is not None:
+                    result.max_small_streak = int(runs.max()) if len(runs) else 0
+                    compression = self._compression_result(recent, runs, used_atr, levels)
+                    result.compression = {price: value for price, value in compression.items() if price is not None}
+
+            # БПУ
+            recent_bpu = arrays.tail(bpu_lookback)
+            if len(recent_bpu) >= 2:
+                result.bpu = self._bpu_for_levels(recent_bpu, levels)
+
+            # Паттерны, не зависящие от уровней
+            result.v_formation = self.detect_v_formation(arrays, lookback=v_lookback)
+            result.consolidation = self.detect_consolidation(arrays, lookback=consolidation_lookback)
+            result.cluster = self.detect_cluster(arrays, lookback=cluster_lookback)
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка векторного сканирования паттернов: {e}")
+
+        return result
+
+    # ==================== СТАТИСТИКА ====================
+
+    def reset_stats(self):
+        """Сброс статистики"""
+        super().reset_stats()
+        self.stats["vectorized_scans"] = 0
+
+    def __repr__(self) -> str:
+        return (f"VectorizedPatternDetector(total_patterns={self.stats['total_patterns']}, "
+                f"scans={self.stats['vectorized_scans']})")
+
+
+# Export
+__all__ = [
+    "VectorizedPatternDetector",
+    "CandleArrays",
+    "PatternScanResult",
+    "small_bar_runs"
+]
+
+logger.info("✅ Vectorized Pattern Detector module loaded")
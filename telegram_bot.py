@@ -10,6 +10,7 @@ from aiogram.enums import ParseMode
 
 from openai_integration import OpenAIAnalyzer
 from database import get_database_manager
+from core.subscription_index import SubscriptionIndex, normalize_strategy
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +29,17 @@ class TelegramBot:
     - Автоматическая синхронизация с БД
     - Статистика использования
     - Управление заблокированными пользователями
+    - Пользовательские ценовые алерты (/alert, PriceAlertEngine)
+    - Фильтры рассылки сигналов по символам/стратегиям/силе (/subscribe)
     """
     
-    def __init__(self, token: str, repository=None, ta_context_manager=None):
+    def __init__(self, token: str, repository=None, ta_context_manager=None, alert_engine=None):
         """
         Args:
             token: Telegram bot token
             repository: MarketDataRepository для доступа к данным
             ta_context_manager: TechnicalAnalysisContextManager для технического анализа
+            alert_engine: PriceAlertEngine для команды /alert (опционально)
         """
         self.bot = Bot(token=token)
         self.dp = Dispatcher()
@@ -44,10 +48,14 @@ class TelegramBot:
         self.openai_analyzer = OpenAIAnalyzer()
         self.repository = repository
         self.ta_context_manager = ta_context_manager
+        self.alert_engine = alert_engine
         
         # ✅ Все пользователи в памяти (для быстрого доступа)
         self.all_users: Set[int] = set()
         
+        # Подписки: (символ, стратегия) -> пользователи
+        self.subscriptions = SubscriptionIndex()
+        
         self.user_analysis_state: Dict[int, Dict[str, Any]] = {}
         
         self._register_handlers()
@@ -58,6 +66,7 @@ class TelegramBot:
         logger.info(f"   • Repository: {'✅' if repository else '❌'}")
         logger.info(f"   • TA Context Manager: {'✅' if ta_context_manager else '❌'}")
         logger.info(f"   • OpenAI Analyzer: {'✅' if self.openai_analyzer else '❌'}")
+        logger.info(f"   • Price Alerts: {'✅' if alert_engine else '❌'}")
     
     # ==================== DATABASE METHODS ====================
     
@@ -87,10 +96,16 @@ class TelegramBot:
             if not table_exists:
                 logger.warning("⚠️ Таблица bot_users не существует, создаю...")
                 await self._create_bot_users_table()
+                has_subscriptions = True
+            else:
+                has_subscriptions = await self._ensure_subscription_columns()
             
             # Загружаем активных пользователей
-            query = """
-                SELECT user_id 
+            # (без колонок подписок - старый набор, все подписаны на всё)
+            columns = "user_id, subscribed_symbols, subscribed_strategies, min_signal_strength" \
+                if has_subscriptions else "user_id"
+            query = f"""
+                SELECT {columns}
                 FROM bot_users 
                 WHERE is_active = TRUE AND is_blocked = FALSE
                 ORDER BY last_interaction_at DESC;
@@ -101,6 +116,15 @@ class TelegramBot:
             # Добавляем в память
             for row in rows:
                 self.all_users.add(row['user_id'])
+                if has_subscriptions:
+                    self.subscriptions.set_user(
+                        row['user_id'],
+                        symbols=row['subscribed_symbols'],
+                        strategies=row['subscribed_strategies'],
+                        min_strength=row['min_signal_strength']
+                    )
+                else:
+                    self.subscriptions.set_user(row['user_id'])
             
             logger.info(f"✅ Загружено {len(self.all_users)} активных пользователей")
             
@@ -129,7 +153,10 @@ class TelegramBot:
                     is_blocked BOOLEAN DEFAULT FALSE,
                     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
                     last_interaction_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    signals_received_count INTEGER DEFAULT 0
+                    signals_received_count INTEGER DEFAULT 0,
+                    subscribed_symbols TEXT[],
+                    subscribed_strategies TEXT[],
+                    min_signal_strength REAL DEFAULT 0
                 );
                 
                 CREATE INDEX IF NOT EXISTS idx_bot_users_active 
@@ -145,6 +172,64 @@ class TelegramBot:
         except Exception as e:
             logger.error(f"❌ Ошибка создания таблицы bot_users: {e}")
     
+    async def _ensure_subscription_columns(self) -> bool:
+        """
+        Добавить колонки подписок в bot_users, созданную до их появления
+        
+        Returns:
+            bool: True если колонки есть (добавлены или уже были)
+        """
+        try:
+            db_manager = get_database_manager()
+            
+            await db_manager.execute("""
+                ALTER TABLE bot_users
+                    ADD COLUMN IF NOT EXISTS subscribed_symbols TEXT[],
+                    ADD COLUMN IF NOT EXISTS subscribed_strategies TEXT[],
+                    ADD COLUMN IF NOT EXISTS min_signal_strength REAL DEFAULT 0;
+            """)
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка добавления колонок подписок в bot_users: {e}")
+            logger.warning("⚠️ Пользователи загружаются без фильтров подписок")
+            return False
+    
+    async def save_user_preferences(self, user_id: int) -> bool:
+        """
+        Сохранить настройки подписки пользователя из индекса в БД
+        
+        Args:
+            user_id: ID пользователя Telegram
+            
+        Returns:
+            bool: True если успешно
+        """
+        try:
+            db_manager = get_database_manager()
+            prefs = self.subscriptions.get_user(user_id)
+            if prefs is None:
+                return False
+            
+            query = """
+                UPDATE bot_users 
+                SET subscribed_symbols = $2,
+                    subscribed_strategies = $3,
+                    min_signal_strength = $4,
+                    last_interaction_at = NOW()
+                WHERE user_id = $1;
+            """
+            
+            data = prefs.to_dict()
+            await db_manager.execute(query, user_id, data["symbols"], data["strategies"], prefs.min_strength)
+            
+            logger.debug(f"💾 Подписка пользователя {user_id} сохранена: {data}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения подписки пользователя {user_id}: {e}")
+            return False
+    
     async def save_user_to_db(
         self, 
         user_id: int, 
@@ -392,6 +477,8 @@ class TelegramBot:
         """Регистрация всех обработчиков"""
         self.router.message.register(self.start_command, Command("start"))
         self.router.message.register(self.help_command, Command("help"))
+        self.router.message.register(self.alert_command, Command("alert"))
+        self.router.message.register(self.subscribe_command, Command("subscribe"))
         
         self.router.callback_query.register(
             self.handle_market_analysis_start,
@@ -447,6 +534,7 @@ class TelegramBot:
             
             # ✅ Добавляем в память
             self.all_users.add(user_id)
+            self.subscriptions.ensure_user(user_id)
             
             # ✅ Сохраняем в БД
             await self.save_user_to_db(
@@ -524,6 +612,8 @@ class TelegramBot:
 🔧 <b>Доступные команды:</b>
 /start - Запуск бота
 /help - Эта справка
+/alert - Ценовые алерты (порог или подход к уровню)
+/subscribe - Какие сигналы получать (символы, стратегии, сила)
 
 📊 <b>Функции:</b>
 - 🔄 Автоматическая синхронизация свечей
@@ -581,6 +671,177 @@ class TelegramBot:
             logger.error(f"❌ Ошибка в help_command: {e}")
             await message.answer("❌ Произошла ошибка. Попробуйте /start")
     
+    ALERT_USAGE = """🔔 <b>Ценовые алерты</b>
+
+/alert BTCUSDT &gt; 70000 - цена выше порога
+/alert BTCUSDT &lt; 60000 - цена ниже порога
+/alert BTCUSDT level 0.5 - подход к ближайшему уровню D1 на 0.5%
+/alert list - мои алерты
+/alert del 12 - удалить алерт #12
+
+Алерт срабатывает один раз."""
+    
+    async def alert_command(self, message: Message):
+        """Обработчик команды /alert - создание, список и удаление алертов"""
+        try:
+            user_id = message.from_user.id
+            await self.update_user_interaction(user_id)
+            
+            if not self.alert_engine:
+                await message.answer("⚠️ Алерты временно недоступны")
+                return
+            
+            args = (message.text or "").split()[1:]
+            
+            if not args or args[0].lower() == "list":
+                alerts = self.alert_engine.user_alerts(user_id)
+                if not alerts:
+                    await message.answer(f"📭 Активных алертов нет\n\n{self.ALERT_USAGE}", parse_mode=ParseMode.HTML)
+                    return
+                lines = [f"🔔 <b>Ваши алерты ({len(alerts)}):</b>", ""]
+                lines.extend(f"• {self.escape_html(self.alert_engine.format_alert(a))}" for a in alerts)
+                await message.answer("\n".join(lines), parse_mode=ParseMode.HTML)
+                return
+            
+            if args[0].lower() in ("del", "delete"):
+                alert_ref = args[1].lstrip("#") if len(args) == 2 else ""
+                if not alert_ref.isdigit():
+                    await message.answer("⚠️ Укажите номер алерта: /alert del 12\n"
+                                         "Номера алертов - в /alert list")
+                    return
+                alert_id = int(alert_ref)
+                if await self.alert_engine.remove_alert(user_id, alert_id):
+                    await message.answer(f"🗑 Алерт #{alert_id} удален")
+                else:
+                    await message.answer(f"❓ Алерт #{alert_id} не найден")
+                return
+            
+            symbol = args[0].upper()
+            from config import Config
+            known = set(Config.get_bybit_symbols()) | set(Config.get_yfinance_symbols())
+            if symbol not in known or len(args) < 2:
+                await message.answer(self.ALERT_USAGE, parse_mode=ParseMode.HTML)
+                return
+            
+            candle = await self.repository.get_latest_candle(symbol, "1m") if self.repository else None
+            if not candle:
+                await message.answer(f"⚠️ Нет данных по {symbol}")
+                return
+            current_price = float(candle["close_price"])
+            
+            kind = args[1].lower()
+            if kind == "level":
+                distance = float(args[2].replace(",", ".")) if len(args) > 2 else 0.5
+                context = await self.ta_context_manager.get_context(symbol) if self.ta_context_manager else None
+                levels = getattr(context, "levels_d1", None) if context else None
+                if not levels or not 0 < distance <= 10:
+                    await message.answer(f"⚠️ Нет уровней D1 для {symbol}" if not levels
+                                         else "⚠️ Расстояние до уровня: от 0 до 10%")
+                    return
+                alert = await self.alert_engine.add_level_alert(
+                    user_id, symbol, current_price, levels, distance_percent=distance
+                )
+            elif kind in (">", "above", "<", "below") and len(args) == 3:
+                direction = "above" if kind in (">", "above") else "below"
+                threshold = float(args[2].replace(",", "."))
+                if (direction == "above") == (current_price >= threshold):
+                    await message.answer(f"⚠️ Цена {symbol} уже {'выше' if direction == 'above' else 'ниже'} "
+                                         f"{threshold:g} (сейчас {current_price:g})")
+                    return
+                alert = await self.alert_engine.add_alert(user_id, symbol, direction, threshold)
+            else:
+                await message.answer(self.ALERT_USAGE, parse_mode=ParseMode.HTML)
+                return
+            
+            logger.info(f"🔔 Пользователь {user_id}: алерт #{alert['id']} {symbol} "
+                       f"{alert['direction']} {alert['threshold_price']:.6g}")
+            await message.answer(
+                f"✅ Алерт создан: {self.escape_html(self.alert_engine.format_alert(alert))}\n"
+                f"Текущая цена: {current_price:g}",
+                parse_mode=ParseMode.HTML
+            )
+            
+        except ValueError as e:
+            await message.answer(f"⚠️ Не удалось создать алерт: {self.escape_html(str(e))}\n\n{self.ALERT_USAGE}",
+                                 parse_mode=ParseMode.HTML)
+        except Exception as e:
+            logger.error(f"❌ Ошибка в alert_command: {e}")
+            await message.answer("❌ Произошла ошибка. Попробуйте позже.")
+    
+    SUBSCRIBE_USAGE = """📬 <b>Какие сигналы получать</b>
+
+/subscribe symbols BTCUSDT ETHUSDT - только эти символы
+/subscribe strategies breakout bounce - только эти стратегии
+/subscribe strength 0.6 - сигналы не слабее 0.6
+/subscribe symbols all - снова все символы (так же strategies all)
+/subscribe reset - получать все сигналы
+
+Стратегии: breakout, bounce, false_breakout"""
+    
+    async def subscribe_command(self, message: Message):
+        """Обработчик команды /subscribe - фильтры рассылки сигналов"""
+        try:
+            user_id = message.from_user.id
+            await self.update_user_interaction(user_id)
+            
+            prefs = self.subscriptions.ensure_user(user_id)
+            args = (message.text or "").split()[1:]
+            
+            if args:
+                field, values = args[0].lower(), args[1:]
+                symbols, strategies, strength = prefs.symbols, prefs.strategies, prefs.min_strength
+                
+                if field == "reset":
+                    symbols, strategies, strength = None, None, 0.0
+                elif field == "symbols" and values:
+                    from config import Config
+                    known = set(Config.get_bybit_symbols()) | set(Config.get_yfinance_symbols())
+                    requested = {v.upper().strip(",") for v in values}
+                    unknown = requested - known - {"ALL"}
+                    if unknown:
+                        await message.answer(f"⚠️ Неизвестные символы: {self.escape_html(', '.join(sorted(unknown)))}")
+                        return
+                    symbols = None if "ALL" in requested else requested
+                elif field == "strategies" and values:
+                    from strategies import get_available_strategies
+                    known = set(get_available_strategies())
+                    requested = {normalize_strategy(v.strip(",")) for v in values}
+                    unknown = requested - known - {"all"}
+                    if unknown:
+                        await message.answer(f"⚠️ Неизвестные стратегии: {self.escape_html(', '.join(sorted(unknown)))}")
+                        return
+                    strategies = None if "all" in requested else requested
+                elif field == "strength" and len(values) == 1:
+                    strength = float(values[0].replace(",", "."))
+                    if not 0 <= strength <= 1:
+                        await message.answer("⚠️ Сила сигнала: от 0 до 1")
+                        return
+                else:
+                    await message.answer(self.SUBSCRIBE_USAGE, parse_mode=ParseMode.HTML)
+                    return
+                
+                prefs = self.subscriptions.set_user(user_id, symbols, strategies, strength)
+                await self.save_user_preferences(user_id)
+                logger.info(f"📬 Пользователь {user_id}: подписка {prefs.to_dict()}")
+            
+            data = prefs.to_dict()
+            text = (
+                "📬 <b>Ваша подписка</b>\n\n"
+                f"• Символы: {', '.join(data['symbols']) if data['symbols'] else 'все'}\n"
+                f"• Стратегии: {', '.join(data['strategies']) if data['strategies'] else 'все'}\n"
+                f"• Мин. сила: {data['min_strength']:g}"
+            )
+            if not args:
+                text += f"\n\n{self.SUBSCRIBE_USAGE}"
+            
+            await message.answer(text, parse_mode=ParseMode.HTML)
+            
+        except ValueError:
+            await message.answer(self.SUBSCRIBE_USAGE, parse_mode=ParseMode.HTML)
+        except Exception as e:
+            logger.error(f"❌ Ошибка в subscribe_command: {e}")
+            await message.answer("❌ Произошла ошибка. Попробуйте позже.")
+    
     # ==================== CALLBACK HANDLERS ====================
     
     async def handle_market_analysis_start(self, callback: CallbackQuery):
@@ -1172,59 +1433,36 @@ Multi-Strategy + AI + DB Storage Edition (Fixed)
     
     # ==================== BROADCAST ====================
     
-    async def broadcast_signal(self, message: str):
+    async def broadcast_signal(self, message: str, signal=None):
         """
-        ✅ Отправляет сигнал ВСЕМ активным пользователям
+        ✅ Отправляет сигнал активным пользователям, чьи подписки его пропускают
         + Обновляет статистику в БД
+        
+        Args:
+            message: Текст сигнала (HTML)
+            signal: TradingSignal (None = всем активным пользователям)
         """
         try:
             if not self.all_users:
                 logger.info("📡 Нет пользователей для отправки сигнала")
                 return
             
-            sent_count = 0
-            failed_count = 0
-            blocked_users = []
-            
-            logger.info(f"📤 Отправка сигнала {len(self.all_users)} пользователям...")
+            recipients = self.all_users.copy()
+            if signal is not None:
+                recipients &= self.subscriptions.recipients(
+                    signal.symbol, signal.strategy_name, signal.strength
+                )
             
-            for user_id in self.all_users.copy():
-                try:
-                    await self.bot.send_message(
-                        chat_id=user_id,
-                        text=message,
-                        parse_mode=ParseMode.HTML
-                    )
-                    sent_count += 1
-                    
-                    # ✅ Увеличиваем счетчик сигналов в БД
-                    await self.increment_signals_count(user_id)
-                    
-                    await asyncio.sleep(0.05)
-                    
-                except Exception as e:
-                    failed_count += 1
-                    error_msg = str(e).lower()
-                    
-                    if any(phrase in error_msg for phrase in [
-                        "bot was blocked by the user",
-                        "user is deactivated", 
-                        "chat not found"
-                    ]):
-                        blocked_users.append(user_id)
-                        logger.info(f"🚫 Пользователь {user_id} заблокировал бота")
-                        
-                        # ✅ Помечаем в БД как заблокированного
-                        await self.mark_user_blocked(user_id)
-                    else:
-                        logger.warning(f"⚠️ Не удалось отправить сигнал пользователю {user_id}: {e}")
+            if not recipients:
+                logger.info(f"📡 Сигнал {signal.symbol}: нет подписчиков с подходящими фильтрами")
+                return
             
-            # Удаляем заблокированных из памяти
-            for user_id in blocked_users:
-                self.all_users.discard(user_id)
+            logger.info(f"📤 Отправка сигнала {len(recipients)}/{len(self.all_users)} пользователям...")
             
-            if blocked_users:
-                logger.info(f"🧹 Удалено {len(blocked_users)} заблокированных пользователей")
+            sent_count, failed_count = await self._send_messages(
+                {user_id: message for user_id in recipients},
+                count_signals=True
+            )
             
             logger.info(f"📨 Сигнал отправлен: ✅{sent_count} успешно, ❌{failed_count} ошибок. "
                        f"Осталось: {len(self.all_users)} активных")
@@ -1232,6 +1470,77 @@ Multi-Strategy + AI + DB Storage Edition (Fixed)
         except Exception as e:
             logger.error(f"💥 Ошибка рассылки сигнала: {e}")
     
+    async def send_to_users(self, messages: Dict[int, str]):
+        """
+        Персональные сообщения пачкой (уведомления PriceAlertEngine)
+        
+        Args:
+            messages: user_id -> текст (HTML)
+        """
+        try:
+            sent_count, failed_count = await self._send_messages(messages, count_signals=False)
+            logger.info(f"📨 Уведомления отправлены: ✅{sent_count} успешно, ❌{failed_count} ошибок")
+            
+        except Exception as e:
+            logger.error(f"💥 Ошибка рассылки уведомлений: {e}")
+    
+    async def _send_messages(self, messages: Dict[int, str], count_signals: bool) -> tuple:
+        """
+        Общий путь рассылки: пауза между отправками, учет заблокировавших бота
+        
+        Args:
+            messages: user_id -> текст (HTML)
+            count_signals: Увеличивать счетчик сигналов пользователя в БД
+            
+        Returns:
+            tuple: (отправлено, ошибок)
+        """
+        sent_count = 0
+        failed_count = 0
+        blocked_users = []
+        
+        for user_id, text in messages.items():
+            try:
+                await self.bot.send_message(
+                    chat_id=user_id,
+                    text=text,
+                    parse_mode=ParseMode.HTML
+                )
+                sent_count += 1
+                
+                # ✅ Увеличиваем счетчик сигналов в БД
+                if count_signals:
+                    await self.increment_signals_count(user_id)
+                
+                await asyncio.sleep(0.05)
+                
+            except Exception as e:
+                failed_count += 1
+                error_msg = str(e).lower()
+                
+                if any(phrase in error_msg for phrase in [
+                    "bot was blocked by the user",
+                    "user is deactivated", 
+                    "chat not found"
+                ]):
+                    blocked_users.append(user_id)
+                    logger.info(f"🚫 Пользователь {user_id} заблокировал бота")
+                    
+                    # ✅ Помечаем в БД как заблокированного
+                    await self.mark_user_blocked(user_id)
+                else:
+                    logger.warning(f"⚠️ Не удалось отправить сообщение пользователю {user_id}: {e}")
+        
+        # Удаляем заблокированных из памяти
+        for user_id in blocked_users:
+            self.all_users.discard(user_id)
+            self.subscriptions.remove_user(user_id)
+        
+        if blocked_users:
+            logger.info(f"🧹 Удалено {len(blocked_users)} заблокированных пользователей")
+        
+        return sent_count, failed_count
+    
     # ==================== OTHER HANDLERS ====================
     
     async def handle_back_to_menu(self, callback: CallbackQuery):
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: BacktestEngine.run_backtest - реплей свечей одного интервала
+
+Без БД и сети: свечи в формате отчетов строятся в памяти, старшие
+таймфреймы движок получает ресемплингом. Запуск: python test_backtest_engine.py (или pytest)
+"""
+
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from backtesting import BacktestEngine
+from backtesting.replay_data import CandleWindow
+from strategies.base_strategy import BaseStrategy, TradingSignal, SignalType
+
+START = datetime(2025, 3, 1)
+STEP = timedelta(minutes=5)
+
+
+def report_candles(days: float) -> list:
+    """5m свечи в формате отчетов (open/high/low/close, ISO строка в open_time)"""
+    candles = []
+    for i in range(int(days * 288)):
+        price = 100.0 + 5.0 * math.sin(i / 24.0)
+        candles.append({
+            "open_time": (START + STEP * i).isoformat(),
+            "interval": "5m",
+            "open": price,
+            "high": price * 1.001,
+            "low": price * 0.999,
+            "close": price * 1.0005,
+            "volume": 1.0
+        })
+    return candles
+
+
+class _RecordingStrategy(BaseStrategy):
+    """Запоминает, что видела на каждом шаге; один BUY на первом вызове"""
+
+    def __init__(self):
+        super().__init__(name="Recording", symbol="PLACEHOLDER", min_signal_strength=0.1,
+                         signal_cooldown_minutes=0, max_signals_per_hour=0)
+        self.calls = []
+
+    async def analyze_with_data(self, symbol, candles_1m, candles_5m, candles_1h, candles_1d,
+                                ta_context=None, features=None, state=None) -> Optional[TradingSignal]:
+        self.calls.append({
+            "now": features.now,
+            "windows": (candles_1m, candles_5m, candles_1h, candles_1d),
+            "last_close": {w.series.interval: w[-1]["close_time"] for w in (candles_5m, candles_1h, candles_1d)}
+        })
+        if len(self.calls) > 1:
+            return None
+        return TradingSignal(
+            signal_type=SignalType.BUY,
+            strength=0.9,
+            confidence=0.8,
+            price=float(candles_5m[-1]["close_price"]),
+            timestamp=features.now,
+            strategy_name=self.name,
+            symbol=symbol
+        )
+
+
+async def _run_backtest_without_lookahead():
+    candles = report_candles(31.5)
+    engine = BacktestEngine()
+    strategy = _RecordingStrategy()
+
+    result = await engine.run_backtest(candles, strategy, "BTCUSDT")
+
+    # Реплей начинается после 30 закрытых D1 баров и идет шагами 5m до конца данных
+    assert len(strategy.calls) == 36 * 12 + 1
+    assert strategy.calls[0]["now"] == datetime(2025, 3, 31, tzinfo=timezone.utc)
+
+    for call in strategy.calls:
+        # Окна - views в предзагруженные колонки, старшие ТФ построены ресемплингом,
+        # младше загруженного интервала (1m) - пусто
+        m1, m5, h1, d1 = call["windows"]
+        assert all(isinstance(w, CandleWindow) for w in call["windows"])
+        assert len(m1) == 0 and len(m5) and len(h1) and len(d1) >= 30
+        # Видны только закрытые к моменту шага бары
+        assert all(close_time < call["now"] for close_time in call["last_close"].values())
+        assert call["now"] - call["last_close"]["5m"] <= timedelta(seconds=1)
+
+    # Вход по open следующего бара после сигнала, выход в конце данных
+    assert result.total_trades == 1
+    trade = result.trades[0]
+    assert trade.side == "BUY" and trade.exit_reason == "end_of_data"
+    entry_bar = candles[30 * 288]
+    assert trade.entry_time == datetime.fromisoformat(entry_bar["open_time"]).replace(tzinfo=timezone.utc)
+    assert trade.entry_price == entry_bar["open"]
+    assert engine.trades == result.trades
+
+
+def test_run_backtest_without_lookahead():
+    asyncio.run(_run_backtest_without_lookahead())
+
+
+if __name__ == "__main__":
+    for test in (test_run_backtest_without_lookahead,):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты BacktestEngine пройдены")
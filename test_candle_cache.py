@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: CandleCache.sync - дозапись, правка на месте и пересборка
+memmap-колонок по водяному знаку БД
+
+Без БД: _TableRepository хранит "таблицу" свечей с updated_at и отвечает
+теми же методами, что MarketDataRepository. После каждой синхронизации
+колонки на диске сверяются с таблицей.
+Запуск: python test_candle_cache.py (или pytest)
+"""
+
+import asyncio
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backtesting import CandleCache, CandleSeries
+from backtesting.candle_cache import COLUMNS
+
+START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+HOUR = timedelta(hours=1)
+
+
+class _TableRepository:
+    """market_data_candles одного символа/интервала: open_time -> строка"""
+
+    def __init__(self):
+        self.rows = {}
+        self.now = datetime(2025, 4, 1, tzinfo=timezone.utc)
+
+    def put(self, index: int, price: float):
+        """Вставить или исправить бар (updated_at = "время коммита")"""
+        self.now += timedelta(minutes=5)
+        open_time = START + index * HOUR
+        self.rows[open_time] = {
+            "open_time": open_time,
+            "close_time": open_time + HOUR - timedelta(microseconds=1),
+            "open_price": price,
+            "high_price": price + 1.0,
+            "low_price": price - 1.0,
+            "close_price": price + 0.5,
+            "volume": 10.0 + index,
+            "updated_at": self.now
+        }
+
+    def delete(self, index: int):
+        """Удаление не меняет MAX(updated_at) - видно только по COUNT"""
+        del self.rows[START + index * HOUR]
+
+    def source(self) -> CandleSeries:
+        return CandleSeries.from_candles(
+            [self.rows[t] for t in sorted(self.rows)], "BTCUSDT", "1h"
+        )
+
+    async def get_candles_watermark(self, symbol, interval):
+        times = sorted(self.rows)
+        return {
+            "count": len(times),
+            "earliest_open_time": times[0] if times else None,
+            "latest_open_time": times[-1] if times else None,
+            "latest_updated_at": max(r["updated_at"] for r in self.rows.values()) if times else None
+        }
+
+    async def get_candles_updated_since(self, symbol, interval, since):
+        return [self.rows[t] for t in sorted(self.rows) if self.rows[t]["updated_at"] > since]
+
+    async def get_candles(self, symbol, interval, start_time=None, end_time=None, **kwargs):
+        return [self.rows[t] for t in sorted(self.rows) if start_time <= t <= end_time]
+
+
+def assert_matches(root, repository):
+    """Колонки на диске (новый экземпляр кэша - чтение заголовка и memmap) == таблица"""
+    cached = CandleCache(root).series("BTCUSDT", "1h")
+    source = repository.source()
+    assert len(cached) == len(source) == len(repository.rows)
+    for name in COLUMNS:
+        assert np.array_equal(getattr(cached, name), getattr(source, name)), name
+
+
+async def _sync_paths():
+    with tempfile.TemporaryDirectory() as root:
+        cache = CandleCache(root)
+        repository = _TableRepository()
+        for i in range(48):
+            if i != 20:  # пропуск в истории - для вставки внутрь
+                repository.put(i, 100.0 + i)
+
+        async def sync(expected):
+            status = await cache.sync(repository, "BTCUSDT", "1h")
+            assert status == expected, (status, expected)
+            assert_matches(root, repository)
+            return cache.file("BTCUSDT", "1h").header["generation"]
+
+        generation = await sync("created")
+        assert await sync("fresh") == generation
+
+        # Новые бары - дозапись в конец тех же файлов
+        for i in range(48, 53):
+            repository.put(i, 150.0 + i)
+        assert await sync("appended") == generation
+        assert cache.stats["appended_bars"] == 5
+
+        # Исправленные бары - правка на месте
+        repository.put(3, 90.0)
+        repository.put(50, 95.0)
+        assert await sync("patched") == generation
+        assert cache.stats["patched_bars"] == 2
+
+        # Повторная отдача тех же строк (перекрытие по updated_at) ничего не меняет
+        cache.overlap_us = int(timedelta(days=1).total_seconds() * 1_000_000)
+        assert await sync("fresh") == generation
+        assert cache.stats["patched_bars"] == 2
+
+        # Правка и новый бар в одной синхронизации
+        repository.put(10, 80.0)
+        repository.put(53, 200.0)
+        assert await sync("appended") == generation
+        assert cache.stats["patched_bars"] == 3 and cache.stats["appended_bars"] == 6
+
+        # Бар внутри истории - пересборка в новом поколении
+        repository.put(20, 120.0)
+        rebuilt = await sync("rebuilt")
+        assert rebuilt == generation + 1
+        assert cache.stats["rebuilds"] == 1
+
+        # Удаление видно только по числу баров - полная пересборка
+        repository.delete(30)
+        assert await sync("rebuilt") == rebuilt + 1
+        assert cache.stats["rebuilds"] == 2
+
+        assert await sync("fresh") == rebuilt + 1
+        assert not cache.stats["sync_errors"]
+
+
+async def _range_reads_after_sync():
+    with tempfile.TemporaryDirectory() as root:
+        cache = CandleCache(root)
+        repository = _TableRepository()
+        for i in range(24):
+            repository.put(i, 100.0 + i)
+
+        await cache.load(repository, "BTCUSDT", "1h")
+        for i in range(24, 30):
+            repository.put(i, 100.0 + i)
+
+        series = await cache.load(repository, "BTCUSDT", "1h", START + 20 * HOUR, START + 26 * HOUR)
+        expected = repository.source()
+        assert len(series) == 6
+        for name in COLUMNS:
+            assert np.array_equal(getattr(series, name), getattr(expected, name)[20:26]), name
+
+
+def test_sync_paths():
+    asyncio.run(_sync_paths())
+
+
+def test_range_reads_after_sync():
+    asyncio.run(_range_reads_after_sync())
+
+
+if __name__ == "__main__":
+    for test in (test_sync_paths, test_range_reads_after_sync):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты CandleCache пройдены")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: ContextCache - порядок вытеснения LRU, закрепленные символы,
+бюджет памяти и фоновые обновления вытесненных контекстов
+
+Без БД и сети. Запуск: python test_context_cache.py (или pytest)
+"""
+
+import asyncio
+
+from config import Config
+from strategies.technical_analysis import ContextCache
+from strategies.technical_analysis.context import TechnicalAnalysisContext
+from strategies.technical_analysis.context_cache import (
+    DEFAULT_MAX_CONTEXTS,
+    DEFAULT_MEMORY_BUDGET_MB,
+    estimate_context_bytes
+)
+from test_refresh_scheduler import T0, make_manager, add_contexts, run_slot
+
+
+def fill(cache, symbols):
+    for symbol in symbols:
+        cache[symbol] = TechnicalAnalysisContext(symbol=symbol)
+
+
+def candles(count):
+    return [{"open_time": i, "open_price": 1.0, "high_price": 1.0, "low_price": 1.0,
+             "close_price": 1.0, "volume": 1.0} for i in range(count)]
+
+
+def test_lru_eviction_order():
+    evicted = []
+    cache = ContextCache(max_contexts=3, on_evict=lambda symbol, context: evicted.append(symbol))
+    fill(cache, ["A", "B", "C"])
+
+    # Обращение к A делает его самым свежим: первым уходит B, затем C
+    cache.touch("A")
+    fill(cache, ["D"])
+    assert evicted == ["B"]
+    fill(cache, ["E"])
+    assert evicted == ["B", "C"]
+    assert list(cache) == ["A", "D", "E"]
+
+    # Без обращений порядок вставки
+    fill(cache, ["F", "G"])
+    assert evicted == ["B", "C", "A", "D"]
+    assert cache.get_stats()["lru_order"] == ["E", "F", "G"]
+    assert cache.stats["evictions_by_reason"]["max_contexts"] == 4
+
+    # Повторная запись того же символа не вытесняет соседей
+    fill(cache, ["E"])
+    assert len(evicted) == 4 and list(cache) == ["F", "G", "E"]
+
+
+def test_pinned_symbols_survive_eviction():
+    evicted = []
+    cache = ContextCache(max_contexts=2, pinned=["btcusdt"],
+                         on_evict=lambda symbol, context: evicted.append(symbol))
+    fill(cache, ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT"])
+
+    assert "BTCUSDT" in cache  # самый давний, но закреплен
+    assert evicted == ["ETHUSDT", "SOLUSDT"]
+    assert list(cache) == ["BTCUSDT", "XRPUSDT"]
+
+    # Только закрепленные - лимит недостижим, они остаются
+    cache.pin(["XRPUSDT", "BNBUSDT"])
+    fill(cache, ["BNBUSDT"])
+    assert set(cache) == {"BTCUSDT", "XRPUSDT", "BNBUSDT"}
+    assert cache.stats["over_budget_pinned"] == 1
+
+    # Снятие закрепления возвращает символ в LRU и сразу применяет лимит
+    cache.unpin(["BTCUSDT"])
+    assert "BTCUSDT" not in cache and evicted[-1] == "BTCUSDT"
+
+
+def test_memory_budget_eviction():
+    small = TechnicalAnalysisContext(symbol="X")
+    big = TechnicalAnalysisContext(symbol="X")
+    big.recent_candles_m5 = candles(500)
+    budget = estimate_context_bytes(big) + estimate_context_bytes(small) * 3 // 2
+
+    cache = ContextCache(max_contexts=None, memory_budget_bytes=budget, pinned=["PIN"])
+    fill(cache, ["PIN", "A", "B"])
+    assert len(cache) == 3
+
+    # A загрузил свечи: пересчет оценки вытесняет самый давний незакрепленный (B после touch)
+    cache.touch("A")
+    cache["A"].recent_candles_m5 = candles(500)
+    cache.account(cache["A"])
+    assert list(cache) == ["PIN", "A"]
+    assert cache.stats["evictions_by_reason"]["memory_budget"] == 1
+    assert cache.total_bytes == sum(cache.get_stats()["context_bytes"].values()) <= budget
+
+    # Оценка вытесненного (пересозданного) контекста игнорируется
+    stale = TechnicalAnalysisContext(symbol="B")
+    stale.recent_candles_m5 = candles(500)
+    cache.account(stale)
+    assert "B" not in cache
+
+
+def test_manager_defaults_bounded():
+    manager, _ = make_manager()
+    assert manager.contexts.max_contexts == DEFAULT_MAX_CONTEXTS
+    assert manager.contexts.memory_budget_bytes == DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024
+    assert ContextCache().max_contexts == DEFAULT_MAX_CONTEXTS
+
+    # Значения Config по умолчанию совпадают с константами модуля
+    assert Config.TA_MAX_CONTEXTS == DEFAULT_MAX_CONTEXTS
+    assert Config.TA_MEMORY_BUDGET_MB == DEFAULT_MEMORY_BUDGET_MB
+    assert Config.get_production_symbols() == Config.get_bybit_symbols() + Config.get_yfinance_symbols()
+
+    unbounded, _ = make_manager(max_contexts=None, memory_budget_mb=None)
+    assert unbounded.contexts.max_contexts is None and unbounded.contexts.memory_budget_bytes is None
+
+
+async def _evicted_symbols_not_refreshed():
+    manager, repository = make_manager(max_contexts=2, pinned_symbols=["BTCUSDT"])
+    add_contexts(manager, ["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+    manager.scheduler._sync_symbols(T0)
+    assert set(manager.contexts) == {"BTCUSDT", "SOLUSDT"}
+    assert manager.stats["contexts_evicted"] == 1
+
+    await run_slot(manager, T0 + 60)
+    refreshed = {symbol for _, symbols in repository.calls for symbol in symbols}
+    assert refreshed == {"BTCUSDT", "SOLUSDT"}
+
+    # Вытесненный после постановки в очередь: слот планировщика его отбрасывает
+    add_contexts(manager, ["XRPUSDT"])
+    assert set(manager.contexts) == {"BTCUSDT", "XRPUSDT"}
+    repository.calls.clear()
+    await run_slot(manager, T0 + 120)
+    refreshed = {symbol for _, symbols in repository.calls for symbol in symbols}
+    assert refreshed == {"BTCUSDT"}  # XRPUSDT - со своего первого слота
+    assert manager.scheduler.stats["items_dropped"] >= 1
+
+
+def test_evicted_symbols_not_refreshed():
+    asyncio.run(_evicted_symbols_not_refreshed())
+
+
+if __name__ == "__main__":
+    for test in (test_lru_eviction_order, test_pinned_symbols_survive_eviction,
+                 test_memory_budget_eviction, test_manager_defaults_bounded,
+                 test_evicted_symbols_not_refreshed):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты ContextCache пройдены")
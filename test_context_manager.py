@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: TechnicalAnalysisContextManager.get_context - single-flight,
+stale-while-revalidate и водяные знаки входов
+
+Без БД: _GatedRepository отдает синтетические свечи, умеет придерживать
+ответы (gate) и падать (fail). Запуск: python test_context_manager.py (или pytest)
+"""
+
+import asyncio
+import math
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from strategies.technical_analysis import TechnicalAnalysisContextManager
+
+INTERVAL_SECONDS = {"5m": 300, "30m": 1800, "1h": 3600, "4h": 14400, "1d": 86400}
+
+
+class _GatedRepository:
+    """get_candles() как у MarketDataRepository: последние limit закрытых баров"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail = False
+
+    async def get_candles(self, symbol, interval, limit=None, **kwargs):
+        self.calls[interval] += 1
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("database is unavailable")
+
+        step = INTERVAL_SECONDS[interval]
+        last = (int(datetime.now(timezone.utc).timestamp()) // step - 1) * step
+        candles = []
+        for t in range(last - (limit - 1) * step, last + 1, step):
+            price = 100.0 + 5.0 * math.sin(t / 86400.0)
+            open_time = datetime.fromtimestamp(t, tz=timezone.utc)
+            candles.append({
+                "symbol": symbol,
+                "interval": interval,
+                "open_time": open_time,
+                "close_time": open_time + timedelta(seconds=step - 1),
+                "open_price": price,
+                "high_price": price * 1.01,
+                "low_price": price * 0.99,
+                "close_price": price,
+                "volume": 1.0
+            })
+        return candles
+
+
+def make_manager():
+    repository = _GatedRepository()
+    manager = TechnicalAnalysisContextManager(repository, auto_start_background_updates=False)
+    return manager, repository
+
+
+async def settle():
+    """Дать запущенным таскам дойти до ожидания gate"""
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+async def _concurrent_callers_share_refresh():
+    solo, solo_repository = make_manager()
+    await solo.get_context("BTCUSDT")
+
+    manager, repository = make_manager()
+    repository.gate.clear()
+    callers = [asyncio.create_task(manager.get_context("BTCUSDT")) for _ in range(5)]
+    await settle()
+    assert manager.stats["refreshes_joined"] == 4
+    assert len([key for key in manager._inflight if key[1] == "context"]) == 1
+
+    repository.gate.set()
+    contexts = await asyncio.gather(*callers)
+
+    assert all(context is contexts[0] for context in contexts)
+    assert contexts[0].update_count == 1
+    assert repository.calls == solo_repository.calls  # запросы одного обновления
+    assert not manager._inflight
+
+
+async def _stale_context_served_immediately():
+    manager, repository = make_manager()
+    context = await manager.get_context("BTCUSDT")
+    previous_candles = context.recent_candles_h1
+    calls_before = sum(repository.calls.values())
+
+    # Свечи устарели по TTL; БД отвечает медленно
+    context.candles_updated_at -= timedelta(hours=1)
+    stale_since = context.candles_updated_at
+    repository.gate.clear()
+
+    served = await asyncio.wait_for(manager.get_context("BTCUSDT"), timeout=1)
+    assert served is context
+    assert served.recent_candles_h1 is previous_candles  # прежние данные, без ожидания
+    assert manager.stats["stale_served"] == 1
+
+    # Обновление идет в фоне; повторный вызов к нему присоединяется
+    refresh = manager._inflight[("BTCUSDT", "context")][1]
+    await manager.get_context("BTCUSDT")
+    assert manager.stats["refreshes_joined"] >= 1
+
+    repository.gate.set()
+    await refresh
+    assert context.candles_updated_at > stale_since
+    assert context.recent_candles_h1 is not previous_candles
+    assert sum(repository.calls.values()) == calls_before + 4  # только свечи (4 интервала)
+
+
+async def _failed_refresh_does_not_poison():
+    manager, repository = make_manager()
+    repository.fail = True
+
+    for _ in range(2):
+        try:
+            await manager.get_context("BTCUSDT")
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("ошибка загрузки должна дойти до вызывающего")
+        assert not manager._inflight  # упавший таск не остается in-flight
+
+    repository.fail = False
+    context = await manager.get_context("BTCUSDT")
+    assert context.update_count == 1 and context.levels_d1 is not None
+
+    # Упавшее фоновое обновление устаревшего контекста: следующий вызов начинает новое
+    context.levels_updated_at -= timedelta(days=2)
+    stale_since, errors = context.levels_updated_at, context.error_count
+    repository.fail = True
+    assert await manager.get_context("BTCUSDT") is context
+    await settle()
+    assert not manager._inflight
+    assert context.levels_updated_at == stale_since and context.error_count == errors + 1
+
+    repository.fail = False
+    started = manager.stats["refreshes_started"]
+    await manager.get_context("BTCUSDT")
+    assert manager.stats["refreshes_started"] > started
+    await asyncio.gather(*[task for _, task in list(manager._inflight.values())])
+    assert context.is_levels_cache_valid()
+
+
+async def _unchanged_watermark_skips_refresh():
+    manager, repository = make_manager()
+    context = await manager.get_context("BTCUSDT")
+    last_d1 = context.recent_candles_d1[-1]["open_time"]
+    assert context.input_watermarks["levels"]["1d"] == last_d1
+
+    # Синхронизатор прислал ту же D1 свечу: TTL уровней истек, но вход тот же
+    context.levels_updated_at -= timedelta(days=2)
+    context.atr_data.updated_at -= timedelta(days=2)
+    await manager.on_candles("BTCUSDT", "1d", context.recent_candles_d1[-1:])
+    assert manager.stats["watermark_events"] == 1
+    assert manager._inputs_changed(context, "levels") is False
+    assert manager._stale_components(context) == []
+    assert manager.stats["watermark_refreshes"] == 0 and not manager._inflight
+
+    calls_d1 = repository.calls["1d"]
+    levels_before = context.levels_d1
+    await manager.get_context("BTCUSDT")
+    await settle()
+    assert repository.calls["1d"] == calls_d1  # пересчета нет
+    assert context.levels_d1 is levels_before
+
+    # Повтор того же события знак не сдвигает
+    await manager.on_candles("BTCUSDT", "1d", context.recent_candles_d1[-1:])
+    assert manager.stats["watermark_events"] == 1
+
+
+async def _changed_watermark_runs_refresh():
+    manager, repository = make_manager()
+    context = await manager.get_context("BTCUSDT")
+    last_d1 = context.recent_candles_d1[-1]["open_time"]
+
+    # Контекст посчитан по предыдущей D1 свече, синхронизатор принес новую
+    context.input_watermarks["levels"]["1d"] = last_d1 - timedelta(days=1)
+    context.input_watermarks["atr"]["1d"] = last_d1 - timedelta(days=1)
+    levels_since = context.levels_updated_at
+    calls_d1 = repository.calls["1d"]
+
+    await manager.on_candles("BTCUSDT", "1d", [{"open_time": last_d1}])
+    assert manager._inputs_changed(context, "levels") is True
+    assert manager._stale_components(context) == ["levels", "atr"]  # по TTL еще валидны
+    assert manager.stats["watermark_refreshes"] == 1
+
+    refresh = manager._inflight[("BTCUSDT", "context")][1]
+    await refresh
+    assert repository.calls["1d"] > calls_d1
+    assert context.levels_updated_at > levels_since
+    assert context.input_watermarks["levels"]["1d"] == last_d1
+    assert manager._inputs_changed(context, "levels") is False
+    assert manager._stale_components(context) == []
+
+    # Интервалы вне входов контекста игнорируются
+    await manager.on_candles("BTCUSDT", "1m", [{"open_time": last_d1 + timedelta(days=1)}])
+    assert "1m" not in manager.latest_watermarks["BTCUSDT"]
+
+
+def test_concurrent_callers_share_refresh():
+    asyncio.run(_concurrent_callers_share_refresh())
+
+
+def test_stale_context_served_immediately():
+    asyncio.run(_stale_context_served_immediately())
+
+
+def test_failed_refresh_does_not_poison():
+    asyncio.run(_failed_refresh_does_not_poison())
+
+
+def test_unchanged_watermark_skips_refresh():
+    asyncio.run(_unchanged_watermark_skips_refresh())
+
+
+def test_changed_watermark_runs_refresh():
+    asyncio.run(_changed_watermark_runs_refresh())
+
+
+if __name__ == "__main__":
+    for test in (test_concurrent_callers_share_refresh, test_stale_context_served_immediately,
+                 test_failed_refresh_does_not_poison, test_unchanged_watermark_skips_refresh,
+                 test_changed_watermark_runs_refresh):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты TechnicalAnalysisContextManager пройдены")
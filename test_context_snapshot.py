@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: снапшот контекстов - сохранение, восстановление и сверка
+водяного знака D1
+
+Без БД и сети: синтетические свечи из test_context_manager, снапшот -
+во временной директории. Запуск: python test_context_snapshot.py (или pytest)
+"""
+
+import asyncio
+import math
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from strategies.technical_analysis import (
+    TechnicalAnalysisContextManager,
+    ContextSnapshotStore
+)
+from test_context_manager import _GatedRepository
+
+
+class _WatermarkRepository(_GatedRepository):
+    """+ get_latest_open_times() как у MarketDataRepository"""
+
+    def __init__(self):
+        super().__init__()
+        self.latest_d1 = {}
+
+    async def get_latest_open_times(self, symbols, interval):
+        assert interval == "1d"
+        return {symbol: self.latest_d1[symbol] for symbol in symbols if symbol in self.latest_d1}
+
+
+def make_manager(path):
+    repository = _WatermarkRepository()
+    manager = TechnicalAnalysisContextManager(
+        repository,
+        auto_start_background_updates=False,
+        snapshot_store=ContextSnapshotStore(path)
+    )
+    return manager, repository
+
+
+def level_key(level):
+    return (level.price, level.level_type, level.strength, level.touches,
+            level.last_touch, level.created_at)
+
+
+def assert_restored(restored, original):
+    """Дорогая часть контекста совпадает с исходной"""
+    assert [level_key(level) for level in restored.levels_d1] == \
+        [level_key(level) for level in original.levels_d1]
+    assert restored.levels_updated_at == original.levels_updated_at
+
+    for field in ("calculated_atr", "technical_atr", "atr_percent", "current_range_used",
+                  "is_exhausted", "updated_at"):
+        a, b = getattr(restored.atr_data, field), getattr(original.atr_data, field)
+        assert a == b or (isinstance(a, float) and math.isclose(a, b)), (field, a, b)
+    assert list(restored.atr_data.last_5_ranges) == list(original.atr_data.last_5_ranges)
+
+    for field in ("market_condition", "dominant_trend_h1", "dominant_trend_d1",
+                  "volatility_level", "consolidation_detected", "consolidation_bars_count",
+                  "has_recent_breakout", "has_compression", "has_v_formation"):
+        assert getattr(restored, field) == getattr(original, field), field
+
+    assert len(restored.recent_candles_d1) == len(original.recent_candles_d1)
+    for a, b in zip(restored.recent_candles_d1, original.recent_candles_d1):
+        for name in ("open_time", "close_time", "open_price", "high_price",
+                     "low_price", "close_price", "volume"):
+            assert a[name] == b[name], (name, a[name], b[name])
+
+    assert restored.last_full_update == original.last_full_update
+    assert restored.update_count == 0
+    assert not restored.recent_candles_h1  # M5-H4 не сохраняются
+
+
+async def _snapshot_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "contexts.snap"
+
+        source, _ = make_manager(path)
+        originals = {symbol: await source.get_context(symbol) for symbol in ("BTCUSDT", "ETHUSDT")}
+        assert all(context.levels_d1 and context.atr_data for context in originals.values())
+        assert await source.save_snapshot() == 2
+        assert path.exists()
+
+        target, repository = make_manager(path)
+        for symbol, context in originals.items():
+            repository.latest_d1[symbol] = context.recent_candles_d1[-1]["open_time"]
+
+        assert await target.restore_snapshot() == 2
+        assert target.stats["snapshot_restored"] == 2
+        assert target.stats["snapshot_invalidated"] == 0
+        for symbol, original in originals.items():
+            assert_restored(target.contexts[symbol], original)
+
+        # Водяной знак совпал - уровни и ATR не пересчитываются
+        restored = target.contexts["BTCUSDT"]
+        levels_before = restored.levels_d1
+        context = await target.get_context("BTCUSDT")
+        assert context is restored
+        assert context.levels_d1 is levels_before
+        assert context.levels_updated_at == originals["BTCUSDT"].levels_updated_at
+        assert context.recent_candles_h1  # M5-H4 дозагружены
+
+
+async def _stale_watermark_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "contexts.snap"
+
+        source, _ = make_manager(path)
+        original = await source.get_context("BTCUSDT")
+        await source.save_snapshot()
+        watermark = original.recent_candles_d1[-1]["open_time"]
+
+        # После снапшота в БД появилась новая D1 свеча
+        target, repository = make_manager(path)
+        repository.latest_d1["BTCUSDT"] = watermark + timedelta(days=1)
+
+        assert await target.restore_snapshot() == 1
+        assert target.stats["snapshot_invalidated"] == 1
+        restored = target.contexts["BTCUSDT"]
+        assert restored.levels_updated_at is None
+        assert restored.atr_data.updated_at is None
+        assert not restored.is_levels_cache_valid()
+
+        calls_d1 = repository.calls["1d"]
+        context = await target.get_context("BTCUSDT")
+        assert context is restored
+        assert repository.calls["1d"] > calls_d1  # D1 перечитаны
+        assert context.is_levels_cache_valid()
+        assert context.atr_data.updated_at is not None
+
+        # Водяной знак неизвестен (в БД нет символа) - тоже пересчет
+        other, _ = make_manager(path)
+        await other.restore_snapshot()
+        assert other.stats["snapshot_invalidated"] == 1
+        assert other.contexts["BTCUSDT"].levels_updated_at is None
+
+
+def test_snapshot_round_trip():
+    asyncio.run(_snapshot_round_trip())
+
+
+def test_stale_watermark_rejected():
+    asyncio.run(_stale_watermark_rejected())
+
+
+if __name__ == "__main__":
+    for test in (test_snapshot_round_trip, test_stale_watermark_rejected):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты снапшота контекстов пройдены")
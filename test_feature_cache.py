@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: FeatureCache - переиспользование признаков и учет времени
+
+Без БД и сети. Запуск: python test_feature_cache.py (или pytest)
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from strategies import FeatureCache
+
+
+def candles(count: int) -> list:
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    return [
+        {"open_time": start + timedelta(hours=i), "open_price": 100.0 + i, "high_price": 101.0 + i,
+         "low_price": 99.0 + i, "close_price": 100.5 + i, "volume": 1.0}
+        for i in range(count)
+    ]
+
+
+def slow(value, seconds: float = 0.02):
+    time.sleep(seconds)
+    return value
+
+
+def test_nested_compute_time_counted_once():
+    features = FeatureCache("BTCUSDT", [], [], candles(10), [])
+
+    # Родитель вычисляет вложенный признак: его время уже входит во время родителя
+    def parent():
+        return features._get(("child",), lambda: slow(1)) + slow(1)
+
+    started = time.perf_counter()
+    assert features._get(("parent",), parent) == 2
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    stats = features.get_stats()
+    assert stats["computed"] == 2
+    assert 40 <= stats["compute_time_ms"] <= elapsed_ms
+
+    # Повторный запрос и вложенный признак отдельно - из кэша, время не растет
+    assert features._get(("child",), lambda: slow(5)) == 1
+    assert features._get(("parent",), parent) == 2
+    assert features.get_stats()["compute_time_ms"] == stats["compute_time_ms"]
+
+
+def test_reuse_across_strategies():
+    features = FeatureCache("BTCUSDT", [], [], candles(10), [])
+
+    assert features.avg_range("1h", 5) == 2.0  # считает ranges внутри
+    assert features.ranges("1h", 5) == [2.0] * 5
+    assert features.avg_range("1h", 5) == 2.0
+
+    stats = features.get_stats()
+    assert stats["by_feature"]["ranges"] == {"computed": 1, "hits": 1}
+    assert stats["by_feature"]["avg_range"] == {"computed": 1, "hits": 1}
+
+
+if __name__ == "__main__":
+    for test in (test_nested_compute_time_counted_once, test_reuse_across_strategies):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты FeatureCache пройдены")
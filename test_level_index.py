@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: LevelIndex - bisect-запросы против линейного поиска по levels_d1
+
+Цены уровней на грубой сетке: много равных цен и запросов ровно по цене
+уровня. Без БД и сети. Запуск: python test_level_index.py (или pytest)
+"""
+
+import random
+
+from strategies.technical_analysis import LevelIndex
+from strategies.technical_analysis.context import TechnicalAnalysisContext, SupportResistanceLevel
+
+TYPES = (None, "support", "resistance")
+
+
+def random_levels(rng, count):
+    return [
+        SupportResistanceLevel(
+            price=100.0 + rng.randint(-20, 20) * 0.5,
+            level_type=rng.choice(("support", "resistance")),
+            strength=round(rng.random(), 2),
+            touches=rng.randint(0, 4)
+        )
+        for _ in range(count)
+    ]
+
+
+def query_prices(rng, levels):
+    """Цены уровней (граничный случай), между ними и за пределами"""
+    prices = [level.price for level in levels]
+    prices += [100.0 + rng.uniform(-12, 12) for _ in range(20)]
+    return prices + [80.0, 89.75, 110.25, 120.0]
+
+
+def matches(level, level_type, predicate):
+    return (level_type is None or level.level_type == level_type) and (predicate is None or predicate(level))
+
+
+def linear_below(levels, price, level_type, predicate=None):
+    candidates = [l for l in levels if l.price < price and matches(l, level_type, predicate)]
+    return min(candidates, key=lambda l: abs(l.price - price)) if candidates else None
+
+
+def linear_above(levels, price, level_type, predicate=None):
+    candidates = [l for l in levels if l.price > price and matches(l, level_type, predicate)]
+    return min(candidates, key=lambda l: abs(l.price - price)) if candidates else None
+
+
+def same(a, b):
+    """Один и тот же объект уровня (или оба None)"""
+    return a is b
+
+
+def same_list(a, b):
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def test_nearest_matches_linear():
+    rng = random.Random(30)
+    for _ in range(200):
+        levels = random_levels(rng, rng.randint(0, 25))
+        index = LevelIndex(levels)
+        threshold = rng.random()
+
+        def strong(level):
+            return level.strength >= threshold
+
+        for price in query_prices(rng, levels):
+            for level_type in TYPES:
+                for predicate in (None, strong):
+                    assert same(index.nearest_below(price, level_type, predicate),
+                                linear_below(levels, price, level_type, predicate))
+                    assert same(index.nearest_above(price, level_type, predicate),
+                                linear_above(levels, price, level_type, predicate))
+
+
+def test_ranges_match_linear():
+    rng = random.Random(31)
+    for _ in range(200):
+        levels = random_levels(rng, rng.randint(0, 25))
+        index = LevelIndex(levels)
+        prices = query_prices(rng, levels)
+
+        for _ in range(20):
+            # Границы диапазона часто ровно на цене уровня
+            low, high = sorted(rng.sample(prices, 2))
+            for level_type in TYPES:
+                expected = [l for l in levels if low <= l.price <= high and matches(l, level_type, None)]
+                assert same_list(index.in_price_range(low, high, level_type), expected)
+
+        for price in prices:
+            for max_distance in (0.0, 0.005, 0.01, 0.025, 0.1):
+                for level_type in TYPES:
+                    expected = [l for l in levels
+                                if abs(l.price - price) / price <= max_distance and matches(l, level_type, None)]
+                    assert same_list(index.within(price, max_distance, level_type), expected)
+
+
+def test_edge_prices():
+    support = SupportResistanceLevel(price=100.0, level_type="support", strength=0.5)
+    twin = SupportResistanceLevel(price=100.0, level_type="support", strength=0.9)
+    resistance = SupportResistanceLevel(price=100.0, level_type="resistance", strength=0.7)
+    index = LevelIndex([support, resistance, twin])
+
+    # Цена ровно на уровне: уровень не "ниже" и не "выше"
+    assert index.nearest_below(100.0) is None and index.nearest_above(100.0) is None
+    # Равные цены - в исходном порядке; predicate пропускает первый
+    assert index.nearest_below(100.5) is support
+    assert index.nearest_below(100.5, "support", lambda l: l.strength > 0.6) is twin
+    assert index.nearest_above(99.5, None) is support
+    # Диапазон и расстояние включают границы
+    assert same_list(index.in_price_range(100.0, 100.0), [support, resistance, twin])
+    assert same_list(index.within(101.0, 0.01), [support, resistance, twin])
+    assert index.within(101.0, 0.0099) == []
+
+    empty = LevelIndex()
+    assert empty.nearest_below(1.0) is None and empty.in_price_range(0, 10) == [] and len(empty) == 0
+
+
+def test_context_queries_match_linear():
+    rng = random.Random(32)
+    for _ in range(100):
+        levels = random_levels(rng, rng.randint(0, 25))
+        context = TechnicalAnalysisContext(symbol="BTCUSDT")
+        context.set_levels(levels)
+
+        for price in query_prices(rng, levels):
+            for max_distance in (0.5, 5.0):
+                support = linear_below(levels, price, "support")
+                expected = support if support and (price - support.price) / price * 100 <= max_distance else None
+                assert same(context.get_nearest_support(price, max_distance), expected)
+
+                resistance = linear_above(levels, price, "resistance")
+                expected = resistance if resistance and (resistance.price - price) / price * 100 <= max_distance else None
+                assert same(context.get_nearest_resistance(price, max_distance), expected)
+
+            near = [l for l in levels if abs(l.price - price) / price * 100 <= 0.5]
+            assert same(context.is_near_level(price), near[0] if near else None)
+
+    # levels_d1 изменили напрямую - индекс перестраивается при запросе
+    context = TechnicalAnalysisContext(symbol="BTCUSDT")
+    context.set_levels([SupportResistanceLevel(price=90.0, level_type="support", strength=0.5)])
+    added = SupportResistanceLevel(price=95.0, level_type="support", strength=0.5)
+    context.levels_d1.append(added)
+    assert context.get_nearest_support(100.0) is added
+    replaced = [SupportResistanceLevel(price=98.0, level_type="support", strength=0.5)]
+    context.levels_d1 = replaced
+    assert context.get_nearest_support(100.0) is replaced[0]
+
+
+if __name__ == "__main__":
+    for test in (test_nearest_matches_linear, test_ranges_match_linear, test_edge_prices,
+                 test_context_queries_match_linear):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты LevelIndex пройдены")
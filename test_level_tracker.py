@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: IncrementalLevelTracker против LevelAnalyzer.find_all_levels
+
+На случайных блужданиях цены окно D1 сдвигается бар за баром: после
+каждого добавления/вытеснения уровни трекера должны совпадать с
+batch-анализом того же окна. Без БД и сети.
+Запуск: python test_level_tracker.py (или pytest)
+"""
+
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+
+from strategies.technical_analysis.level_analyzer import LevelAnalyzer, IncrementalLevelTracker
+
+SEEDS = range(30)
+WINDOW = 60
+AS_OF = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+logging.getLogger("strategies.technical_analysis.level_analyzer").setLevel(logging.ERROR)
+
+
+def random_d1(rng: random.Random, count: int) -> list:
+    start = AS_OF - timedelta(days=count)
+    price = rng.uniform(50, 150)
+    volatility = rng.choice([0.005, 0.01, 0.02])
+    candles = []
+    for i in range(count):
+        close = price * (1 + rng.gauss(0, volatility))
+        # Округление дает равные экстремумы - ветки с одинаковыми ценами
+        high = round(max(price, close) * (1 + abs(rng.gauss(0, volatility / 2))), 1)
+        low = round(min(price, close) * (1 - abs(rng.gauss(0, volatility / 2))), 1)
+        candles.append({
+            "open_time": start + timedelta(days=i),
+            "open_price": price,
+            "high_price": high,
+            "low_price": low,
+            "close_price": close
+        })
+        price = close
+    return candles
+
+
+def make_analyzer(rng: random.Random) -> LevelAnalyzer:
+    return LevelAnalyzer(
+        min_touches=rng.choice([1, 2]),
+        min_strength=0.05,
+        lookback_window=rng.choice([2, 3, 5]),
+        cluster_tolerance_percent=rng.choice([0.5, 1.0, 2.0])
+    )
+
+
+def test_sliding_window_matches_batch():
+    windows = levels_found = 0
+
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        analyzer = make_analyzer(rng)
+        tracker = IncrementalLevelTracker(analyzer, window_size=WINDOW)
+        candles = random_d1(rng, 3 * WINDOW)
+
+        for i, candle in enumerate(candles):
+            tracker.push_bar(candle)
+            window = candles[max(0, i + 1 - WINDOW):i + 1]
+            assert len(tracker) == len(window)
+
+            expected = analyzer.find_all_levels(window, as_of=AS_OF)
+            assert tracker.find_levels(as_of=AS_OF) == expected, (seed, i)
+            windows += 1
+            levels_found += len(expected)
+
+    assert tracker.stats["pivots_expired"] > 0  # вытеснение действительно происходило
+    assert windows == len(SEEDS) * 3 * WINDOW and levels_found > 0
+
+
+def test_sync_replace_and_rebuild():
+    for seed in SEEDS:
+        rng = random.Random(1000 + seed)
+        analyzer = make_analyzer(rng)
+        tracker = IncrementalLevelTracker(analyzer, window_size=WINDOW)
+        candles = random_d1(rng, 2 * WINDOW)
+
+        # Окно догружается порциями, как из get_candles(limit=WINDOW)
+        for end in range(WINDOW, len(candles) + 1, rng.randint(1, 7)):
+            window = candles[:end][-WINDOW:]
+            assert tracker.sync(window) == (end > WINDOW)  # первая синхронизация - перестройка
+            assert tracker.find_levels(as_of=AS_OF) == analyzer.find_all_levels(window, as_of=AS_OF)
+
+        # Дозаполненный последний бар - замена без перестройки
+        window = [dict(c) for c in candles[-WINDOW:]]
+        window[-1]["low_price"] = round(window[-1]["low_price"] * 0.97, 1)
+        assert tracker.sync(window)
+        assert tracker.find_levels(as_of=AS_OF) == analyzer.find_all_levels(window, as_of=AS_OF)
+
+        # Исправлен бар в середине истории - окно перестраивается
+        window[WINDOW // 2]["high_price"] = round(window[WINDOW // 2]["high_price"] * 1.05, 1)
+        assert not tracker.sync(window)
+        assert tracker.find_levels(as_of=AS_OF) == analyzer.find_all_levels(window, as_of=AS_OF)
+
+
+if __name__ == "__main__":
+    for test in (test_sliding_window_matches_batch, test_sync_replace_and_rebuild):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты IncrementalLevelTracker пройдены")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: LevelWatchEngine - события уровней по потоку 1m свечей
+
+Без БД и сети. Запуск: python test_level_watch.py (или pytest)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from core.level_watch import LevelWatchEngine, EVENT_CROSS, EVENT_APPROACH
+
+T0 = datetime(2025, 3, 3, 12, 0, tzinfo=timezone.utc)
+
+
+def bar(minute: int, close: float) -> dict:
+    open_time = T0 + timedelta(minutes=minute)
+    return {
+        "open_time": open_time,
+        "close_time": open_time + timedelta(minutes=1),
+        "open_price": close,
+        "high_price": close,
+        "low_price": close,
+        "close_price": close,
+        "volume": 1.0
+    }
+
+
+def engine_with_level(price: float = 100.0):
+    engine = LevelWatchEngine(approach_pct=1.0, tolerance_pct=0.5)
+    engine.set_levels("BTCUSDT", [SimpleNamespace(price=price, level_type="resistance", strength=0.9)])
+
+    received = []
+
+    async def listener(symbol, events):
+        received.extend(events)
+
+    engine.add_listener(listener)
+    return engine, received
+
+
+async def _cross_up():
+    engine, received = engine_with_level()
+
+    await engine.on_candles("BTCUSDT", "1m", [bar(0, 97.0), bar(1, 99.5), bar(2, 101.0)])
+
+    assert [e.event_type for e in received] == [EVENT_APPROACH, EVENT_CROSS]
+    assert received[1].direction == "up"
+    assert received[1].timestamp == T0 + timedelta(minutes=3)
+
+
+async def _history_replay_ignored():
+    """Догрузка истории: старые бары по другую сторону уровня не дают событий"""
+    engine, received = engine_with_level()
+
+    await engine.on_candles("BTCUSDT", "1m", [bar(0, 102.0), bar(1, 102.5)])
+    await engine.on_candles("BTCUSDT", "1m", [bar(-60, 95.0), bar(-59, 96.0)])
+
+    assert received == []
+    assert engine.stats["bars_out_of_order"] == 2
+
+    # Повтор последнего (незакрытого) бара допустим
+    await engine.on_candles("BTCUSDT", "1m", [bar(1, 98.0)])
+    assert [e.event_type for e in received] == [EVENT_CROSS]
+    assert received[0].direction == "down"
+
+
+def test_cross_up():
+    asyncio.run(_cross_up())
+
+
+def test_history_replay_ignored():
+    asyncio.run(_history_replay_ignored())
+
+
+if __name__ == "__main__":
+    for test in (test_cross_up, test_history_replay_ignored):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты LevelWatchEngine пройдены")
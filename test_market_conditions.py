@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: IncrementalMarketConditionsAnalyzer против analyze_conditions
+
+Скользящее окно H1 на случайных блужданиях (тренды, боковики, всплески
+волатильности): после каждого бара и каждой замены последнего бара
+результат должен совпадать с batch-анализом того же окна.
+Без БД и сети. Запуск: python test_market_conditions.py (или pytest)
+"""
+
+import asyncio
+import math
+import random
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+
+from strategies.technical_analysis import TechnicalAnalysisContextManager
+from strategies.technical_analysis.context import TechnicalAnalysisContext
+from strategies.technical_analysis.market_conditions import (
+    MarketConditionsAnalyzer,
+    IncrementalMarketConditionsAnalyzer
+)
+
+SEEDS = range(30)
+START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def random_h1(rng: random.Random, count: int) -> list:
+    price = rng.uniform(50, 150)
+    candles = []
+    regime_left = 0
+    for i in range(count):
+        if regime_left == 0:
+            # Режим: дрейф и волатильность (боковик дает консолидации)
+            drift = rng.choice([0.0, 0.0, 0.003, -0.003])
+            volatility = rng.choice([0.001, 0.003, 0.01, 0.03])
+            regime_left = rng.randint(5, 40)
+        regime_left -= 1
+
+        close = price * (1 + drift + rng.gauss(0, volatility))
+        candles.append({
+            "open_time": START + timedelta(hours=i),
+            "open_price": price,
+            "high_price": max(price, close) * (1 + abs(rng.gauss(0, volatility / 2))),
+            "low_price": min(price, close) * (1 - abs(rng.gauss(0, volatility / 2))),
+            "close_price": close
+        })
+        price = close
+    return candles
+
+
+def assert_same(actual, expected, where):
+    """Поля результата равны; float - с точностью до округления сумм"""
+    for f in fields(expected):
+        a, e = getattr(actual, f.name), getattr(expected, f.name)
+        if f.name == "metadata":
+            assert a.keys() == e.keys(), where
+            for key in e.keys() - {"analyzed_at"}:  # время вызова
+                if isinstance(e[key], float):
+                    assert math.isclose(a[key], e[key], rel_tol=1e-9, abs_tol=1e-9), (where, key)
+                else:
+                    assert a[key] == e[key], (where, key)
+        elif isinstance(e, float):
+            assert math.isclose(a, e, rel_tol=1e-9, abs_tol=1e-9), (where, f.name)
+        else:
+            assert a == e, (where, f.name, a, e)
+
+
+def test_sliding_window_matches_batch():
+    windows = 0
+    consolidations = set()
+
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        analyzer = MarketConditionsAnalyzer()
+        window_size = rng.choice([24, 30, 36])
+        incremental = IncrementalMarketConditionsAnalyzer(analyzer, window_size=window_size)
+        candles = random_h1(rng, 2 * window_size + 20)
+        atr = rng.choice([None, rng.uniform(0.5, 5.0)])
+
+        for i, candle in enumerate(candles):
+            incremental.push_bar(candle)
+            window = candles[max(0, i + 1 - window_size):i + 1]
+
+            expected = analyzer.analyze_conditions(candles_h1=window, atr=atr)
+            assert_same(incremental.analyze(atr=atr), expected, (seed, i))
+            consolidations.add(expected.has_consolidation)
+            windows += 1
+
+            # Незакрытая свеча обновилась - замена последнего бара
+            if rng.random() < 0.2:
+                patched = dict(candle, close_price=candle["close_price"] * (1 + rng.gauss(0, 0.01)))
+                patched["high_price"] = max(patched["high_price"], patched["close_price"])
+                patched["low_price"] = min(patched["low_price"], patched["close_price"])
+                candles[i] = patched
+                incremental.replace_last_bar(patched)
+                window = candles[max(0, i + 1 - window_size):i + 1]
+                expected = analyzer.analyze_conditions(candles_h1=window, atr=atr)
+                assert_same(incremental.analyze(atr=atr), expected, (seed, i, "patched"))
+                windows += 1
+
+    # Выборка покрывает окна с консолидацией и без
+    assert consolidations == {True, False}
+    assert windows > 2_000
+
+
+def test_sync_incremental_and_rebuild():
+    rng = random.Random(7)
+    analyzer = MarketConditionsAnalyzer()
+    incremental = IncrementalMarketConditionsAnalyzer(analyzer, window_size=48)
+    candles = random_h1(rng, 200)
+
+    assert not incremental.sync(candles[:48])
+    for end in range(49, 200, 3):
+        window = candles[:end][-48:]
+        assert incremental.sync(window)
+        assert_same(incremental.analyze(), analyzer.analyze_conditions(candles_h1=window), end)
+
+    # Разрыв истории - перестройка окна
+    window = random_h1(random.Random(8), 48)
+    assert not incremental.sync(window)
+    assert_same(incremental.analyze(), analyzer.analyze_conditions(candles_h1=window), "rebuild")
+
+
+async def _conditions_fall_back_to_d1():
+    """Без истории H1 рыночные условия считаются по D1, как в analyze_conditions"""
+    manager = TechnicalAnalysisContextManager(repository=None, auto_start_background_updates=False)
+    context = TechnicalAnalysisContext(symbol="NEWUSDT")
+    context.recent_candles_d1 = random_h1(random.Random(3), 60)
+    context.atr_data = type("ATR", (), {"calculated_atr": 2.0})()
+    manager.contexts["NEWUSDT"] = context
+
+    await manager._update_market_conditions(context)
+
+    expected = manager.market_conditions_analyzer.analyze_conditions(
+        candles_h1=[], candles_d1=context.recent_candles_d1, atr=2.0
+    )
+    assert context.market_condition == expected.market_condition
+    assert context.dominant_trend_h1 == expected.trend_direction
+    assert context.consolidation_bars_count == expected.consolidation_bars
+    assert ("NEWUSDT", "1d") in manager.incremental_conditions
+
+
+def test_conditions_fall_back_to_d1():
+    asyncio.run(_conditions_fall_back_to_d1())
+
+
+if __name__ == "__main__":
+    for test in (test_sliding_window_matches_batch, test_sync_incremental_and_rebuild,
+                 test_conditions_fall_back_to_d1):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты IncrementalMarketConditionsAnalyzer пройдены")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: ParameterSweep и SharedCandleStore - перебор параметров в процессах
+
+Без БД и сети: свечи из test_portfolio_engine._MemoryRepository.
+Запуск: python test_parameter_sweep.py (или pytest)
+"""
+
+import asyncio
+
+import numpy as np
+
+from backtesting import (
+    SharedCandleStore,
+    ParameterSweep,
+    EarlyStopping,
+    grid_configs
+)
+from backtesting.parameter_sweep import split_params, clear_context_caches
+from strategies.base_strategy import SignalType
+from test_portfolio_engine import START, END, _MemoryRepository, _FixedSignalStrategy
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT"]
+
+
+class SweepStrategy(_FixedSignalStrategy):
+    """Конструктор как у стратегий перебора: symbol + параметры"""
+
+    def __init__(self, symbol: str, cooldown_minutes: int = 0):
+        super().__init__("SweepBuy", SignalType.BUY, 0.9, cooldown_minutes=cooldown_minutes)
+
+
+def load_store() -> SharedCandleStore:
+    return asyncio.run(SharedCandleStore.load(_MemoryRepository(), SYMBOLS, START, END, warmup_days=2))
+
+
+def test_store_attach_shares_columns():
+    with load_store() as store:
+        attached = SharedCandleStore.attach(store.descriptor())
+        try:
+            for symbol in SYMBOLS:
+                for interval, series in store.series(symbol).items():
+                    view = attached.series(symbol)[interval]
+                    assert np.array_equal(view.close, series.close)
+                    assert np.array_equal(view.open_time, series.open_time)
+                    # View на общую память, а не копия; только чтение
+                    assert np.shares_memory(view.close, np.frombuffer(attached.shm.buf, dtype=np.uint8))
+                    assert not view.close.flags.writeable
+        finally:
+            attached.close()
+
+
+def test_split_params_and_grid():
+    configs = grid_configs({"cooldown_minutes": [0, 60], "level_analyzer.min_touches": [2, 3]})
+    assert len(configs) == 4
+
+    strategy_kwargs, context_config = split_params(configs[-1])
+    assert strategy_kwargs == {"cooldown_minutes": 60}
+    assert context_config == {"level_analyzer_config": {"min_touches": 3}}
+
+    try:
+        split_params({"unknown.value": 1})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("неизвестный префикс должен отклоняться")
+
+
+def test_workers_match_in_process():
+    """Процессы с общей памятью дают те же строки, что и прогон в текущем процессе"""
+    configs = grid_configs({"cooldown_minutes": [0, 60, 120]})
+    clear_context_caches()
+
+    with load_store() as store:
+        rows = {}
+        for workers in (1, 2):
+            sweep = ParameterSweep(store, SweepStrategy, start=START, end=END,
+                                   engine_params={"step_interval": "5m"}, workers=workers)
+            results = sweep.run(configs)
+            assert results.get_stats()["errors"] == 0, results.rows
+            rows[workers] = results.rows
+
+    # Счетчики времени и кэша зависят от того, какой процесс взял задачу
+    counters = ("elapsed_sec", "context_cache_hits")
+    assert [{k: v for k, v in row.items() if k not in counters} for row in rows[1]] == \
+           [{k: v for k, v in row.items() if k not in counters} for row in rows[2]]
+    assert [row["symbols_run"] for row in rows[1]] == [2, 2, 2]
+    assert all(row["total_trades"] > 0 for row in rows[1])
+    # Конфигурации с теми же анализаторами переиспользуют контексты шагов
+    assert rows[1][-1]["context_cache_hits"] > 0
+
+
+def test_early_stopping_skips_remaining_symbols():
+    with load_store() as store:
+        sweep = ParameterSweep(store, SweepStrategy, start=START, end=END,
+                               engine_params={"step_interval": "5m"}, workers=1,
+                               early_stopping=EarlyStopping(max_drawdown=-1.0, check_every=1))
+        results = sweep.run([{}])
+
+    row = results.rows[0]
+    assert row["stopped_early"] and row["symbols_run"] == 1
+    assert results.best() is None
+    assert sweep.get_stats()["configs_stopped_early"] == 1
+
+
+if __name__ == "__main__":
+    for test in (test_store_attach_shares_columns, test_split_params_and_grid,
+                 test_workers_match_in_process, test_early_stopping_skips_remaining_symbols):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты ParameterSweep пройдены")
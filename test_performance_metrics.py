@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: PerformanceMetrics - скользящая просадка порциями, прежние поля
+метрик и короткие кривые
+
+Без БД и сети. Запуск: python test_performance_metrics.py (или pytest)
+"""
+
+import math
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backtesting import EquityCurve, PerformanceMetrics, Trade
+
+
+def random_curve(n: int, seed: int = 7) -> EquityCurve:
+    rng = np.random.default_rng(seed)
+    equity = 10000 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    curve = EquityCurve(capacity=n)
+    for i, value in enumerate(equity):
+        curve.append(1_700_000_000_000_000 + i * 300_000_000, float(value))
+    return curve
+
+
+def scalar_max_drawdown(equity, window: int):
+    """Эталон: просадка каждого окна отдельным проходом"""
+    result = []
+    for start in range(len(equity) - window + 1):
+        peak, worst = equity[start], 0.0
+        for value in equity[start:start + window]:
+            peak = max(peak, value)
+            worst = max(worst, (peak - value) / peak)
+        result.append(worst * 100)
+    return np.array(result)
+
+
+def test_rolling_max_drawdown_matches_scalar():
+    curve = random_curve(500)
+    expected = scalar_max_drawdown(curve.equity.tolist(), 48)
+
+    rolling = PerformanceMetrics.rolling(curve, 48)
+    assert len(rolling["max_drawdown_pct"]) == len(expected)
+    assert np.allclose(rolling["max_drawdown_pct"], expected, rtol=0, atol=1e-12)
+
+    # Порции меньше одного окна и некратные числу окон дают тот же результат
+    for chunk_elements in (1, 48 * 7, 48 * 1000):
+        chunked = PerformanceMetrics._rolling_max_drawdown(curve.equity, 48, chunk_elements=chunk_elements)
+        assert np.array_equal(chunked, rolling["max_drawdown_pct"])
+
+
+def test_rolling_short_curve():
+    rolling = PerformanceMetrics.rolling(random_curve(10), 48)
+    assert all(len(values) == 0 for values in rolling.values())
+
+
+def baseline_calculate(trades, equity_curve):
+    """Эталон: PerformanceMetrics.calculate из исходной версии (поля до векторизации)"""
+    winning_trades = [t for t in trades if t.pnl > 0]
+    losing_trades = [t for t in trades if t.pnl <= 0]
+
+    total_wins = sum(t.pnl for t in winning_trades)
+    total_losses = abs(sum(t.pnl for t in losing_trades))
+
+    peak, max_dd = equity_curve[0]["equity"], 0.0
+    for point in equity_curve:
+        peak = max(peak, point["equity"])
+        max_dd = max(max_dd, ((peak - point["equity"]) / peak) * 100)
+
+    return {
+        "win_rate": (len(winning_trades) / len(trades)) * 100 if trades else 0,
+        "profit_factor": (total_wins / total_losses) if total_losses > 0 else float('inf'),
+        "max_drawdown": max_dd,
+        "winning_trades": len(winning_trades),
+        "losing_trades": len(losing_trades),
+        "avg_win": (total_wins / len(winning_trades)) if winning_trades else 0,
+        "avg_loss": (total_losses / len(losing_trades)) if losing_trades else 0,
+        "largest_win": max((t.pnl for t in winning_trades), default=0),
+        "largest_loss": min((t.pnl for t in losing_trades), default=0),
+        "total_pnl": total_wins - total_losses
+    }
+
+
+def test_legacy_fields_match_baseline():
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        count = int(rng.integers(1, 60))
+        trades = [
+            Trade(entry_time=start, entry_price=100.0, exit_price=100.0, quantity=1.0,
+                  pnl=float(rng.choice([0.0, rng.normal(0, 50)])), is_open=False,
+                  symbol="BTCUSDT", strategy="breakout")
+            for _ in range(count)
+        ]
+        equity = 10000 * np.cumprod(1 + rng.normal(0, 0.01, 300))
+        points = [{"timestamp": start + timedelta(minutes=5 * i), "equity": float(value)}
+                  for i, value in enumerate(equity)]
+
+        metrics = PerformanceMetrics.calculate(trades, points, 10000)
+        for field, expected in baseline_calculate(trades, points).items():
+            assert math.isclose(metrics[field], expected, rel_tol=1e-12, abs_tol=1e-12), \
+                (seed, field, metrics[field], expected)
+
+    empty = PerformanceMetrics.calculate([], [], 10000)
+    assert all(empty[field] == 0 for field in baseline_calculate([], [{"equity": 1.0}]))
+
+
+def test_short_curve_not_annualized():
+    curve = EquityCurve(capacity=3)
+    for i, value in enumerate((10000.0, 9500.0, 12000.0)):
+        curve.append(1_700_000_000_000_000 + i * 3600_000_000, value)
+
+    # 2 часа +20%: аннуализация дала бы inf и RuntimeWarning
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        metrics = PerformanceMetrics.calculate([], curve, 10000)
+
+    assert math.isclose(metrics["annualized_return"], 20.0)
+    assert math.isclose(metrics["calmar_ratio"], 20.0 / 5.0)
+
+    # Длинная кривая по-прежнему аннуализируется
+    long_curve = EquityCurve(capacity=2)
+    long_curve.append(1_700_000_000_000_000, 10000.0)
+    long_curve.append(1_700_000_000_000_000 + 2 * 365 * 86400 * 1_000_000, 12100.0)
+    assert math.isclose(PerformanceMetrics.calculate([], long_curve, 10000)["annualized_return"], 10.0)
+
+
+if __name__ == "__main__":
+    for test in (test_rolling_max_drawdown_matches_scalar, test_rolling_short_curve,
+                 test_legacy_fields_match_baseline, test_short_curve_not_annualized):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты PerformanceMetrics пройдены")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: PortfolioBacktestEngine - портфельный реплей на синтетической истории
+
+Без БД и сети: свечи генерируются в памяти. Запуск: python test_portfolio_engine.py (или pytest)
+"""
+
+import asyncio
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from backtesting import PortfolioBacktestEngine
+from strategies.base_strategy import BaseStrategy, TradingSignal, SignalType
+
+START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+END = START + timedelta(hours=6)
+
+INTERVALS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+
+class _MemoryRepository:
+    """get_candles() как у MarketDataRepository по синусоиде цены"""
+
+    async def get_candles(self, symbol, interval, start_time=None, end_time=None, limit=None, **kwargs):
+        step = INTERVALS[interval]
+        first = math.ceil(start_time.timestamp() / step) * step
+        last = min(end_time, END).timestamp()
+
+        candles = []
+        t = first
+        while t + step <= last + 1:
+            price = 100.0 + 5.0 * math.sin(t / 7200.0)
+            open_time = datetime.fromtimestamp(t, tz=timezone.utc)
+            candles.append({
+                "open_time": open_time,
+                "close_time": open_time + timedelta(seconds=step) - timedelta(microseconds=1),
+                "open_price": price,
+                "high_price": price * 1.001,
+                "low_price": price * 0.999,
+                "close_price": price,
+                "volume": 1.0
+            })
+            t += step
+        return candles
+
+
+class _FixedSignalStrategy(BaseStrategy):
+    """Каждый шаг выдает один и тот же тип сигнала с заданной силой"""
+
+    def __init__(self, name: str, signal_type: SignalType, strength: float, cooldown_minutes: int = 0):
+        super().__init__(name=name, symbol="PLACEHOLDER", min_signal_strength=0.1,
+                         signal_cooldown_minutes=cooldown_minutes, max_signals_per_hour=0)
+        self.signal_type = signal_type
+        self.strength = strength
+
+    async def analyze_with_data(self, symbol, candles_1m, candles_5m, candles_1h, candles_1d,
+                                ta_context=None, features=None, state=None) -> Optional[TradingSignal]:
+        price = float(candles_1m[-1]["close_price"])
+        return TradingSignal(
+            signal_type=self.signal_type,
+            strength=self.strength,
+            confidence=0.8,
+            price=price,
+            timestamp=datetime.now(timezone.utc),
+            strategy_name=self.name,
+            symbol=symbol
+        )
+
+
+async def _only_chosen_signal_recorded():
+    """Более слабый сигнал шага не записывается в cooldown SignalManager"""
+    engine = PortfolioBacktestEngine(
+        step_interval="5m",
+        signal_manager_config={"cooldown_minutes": 60, "max_signals_per_hour": 100,
+                               "min_signal_strength": 0.1},
+        context_manager_config={},
+        warmup_days=2
+    )
+    strategies = [
+        _FixedSignalStrategy("StrongBuy", SignalType.BUY, 0.9),
+        _FixedSignalStrategy("WeakSell", SignalType.SELL, 0.6)
+    ]
+
+    result = await engine.run_from_repository(_MemoryRepository(), ["BTCUSDT"], strategies, START, END)
+
+    # Шаг 1: BUY выбран, SELL не записан. Шаг 2: BUY в cooldown - проходит SELL
+    assert engine.stats["signals_sent"] >= 2
+    assert engine.stats["reversals"] >= 1
+    assert engine.stats["signals_filtered_cooldown"] >= 1
+    sides = [trade.side for trade in result.trades]
+    assert sides[:2] == ["BUY", "SELL"], sides
+
+
+async def _strategy_cooldown_per_symbol():
+    """accept_signal стратегии: cooldown в StrategyState пары (стратегия, символ)"""
+    engine = PortfolioBacktestEngine(
+        step_interval="5m",
+        signal_manager_config={"cooldown_minutes": 0, "max_signals_per_hour": 1000,
+                               "min_signal_strength": 0.1},
+        warmup_days=2
+    )
+    strategy = _FixedSignalStrategy("HourlyBuy", SignalType.BUY, 0.9, cooldown_minutes=60)
+
+    await engine.run_from_repository(_MemoryRepository(), ["BTCUSDT", "ETHUSDT"], [strategy], START, END)
+
+    # 6 часов по 5m: сигнал принимается раз в час на каждом символе
+    assert engine.stats["signals_sent"] == 12
+    assert engine.stats["signals_filtered_by_strategy"] == engine.stats["signals_generated"] - 12
+
+    for symbol in ("BTCUSDT", "ETHUSDT"):
+        state = engine.strategy_states.get("HourlyBuy", symbol)
+        assert state.counters["signals_sent"] == 6
+        assert state.counters["signals_filtered_by_cooldown"] > 0
+        assert state.last_signal_time < END
+
+
+def test_only_chosen_signal_recorded():
+    asyncio.run(_only_chosen_signal_recorded())
+
+
+def test_strategy_cooldown_per_symbol():
+    asyncio.run(_strategy_cooldown_per_symbol())
+
+
+if __name__ == "__main__":
+    for test in (test_only_chosen_signal_recorded, test_strategy_cooldown_per_symbol):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты PortfolioBacktestEngine пройдены")
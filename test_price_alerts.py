@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: PriceAlertEngine и команда /alert
+
+Без БД, сети и Telegram. Запуск: python test_price_alerts.py (или pytest)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from core.price_alerts import PriceAlertEngine
+
+
+def bar(open_time: datetime, low: float, high: float) -> dict:
+    return {
+        "open_time": open_time,
+        "close_time": open_time + timedelta(minutes=1),
+        "open_price": (low + high) / 2,
+        "high_price": high,
+        "low_price": low,
+        "close_price": (low + high) / 2,
+        "volume": 1.0
+    }
+
+
+def minute(offset: int = 0) -> datetime:
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    return now + timedelta(minutes=offset)
+
+
+async def _fires_once():
+    engine = PriceAlertEngine()
+    await engine.add_alert(1, "BTCUSDT", "above", 70000)
+    await engine.add_alert(2, "BTCUSDT", "below", 60000)
+
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(1), 65000, 70500)])
+    assert engine.stats["alerts_triggered"] == 1
+    assert [a["user_id"] for a in engine.user_alerts(2)] == [2]
+
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(2), 65000, 71000)])
+    assert engine.stats["alerts_triggered"] == 1  # одноразовый
+
+
+async def _old_prices_ignored():
+    """Бары, закрытые до создания алерта, и догрузка истории не срабатывают"""
+    engine = PriceAlertEngine()
+    alert = await engine.add_alert(1, "BTCUSDT", "above", 70000)
+
+    # Бар закрылся раньше created_at
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(-10), 65000, 71000)])
+    assert engine.stats["alerts_triggered"] == 0
+    assert engine.user_alerts(1) == [alert]
+
+    # Живой бар, затем страница истории со старым high
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(1), 65000, 66000)])
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(-30), 65000, 75000)])
+    assert engine.stats["alerts_triggered"] == 0
+    assert engine.stats["bars_out_of_order"] == 1
+
+    await engine.on_candles("BTCUSDT", "1m", [bar(minute(2), 65000, 70001)])
+    assert engine.stats["alerts_triggered"] == 1
+
+
+async def _delete_command_validates_id():
+    from telegram_bot import TelegramBot
+
+    bot = object.__new__(TelegramBot)
+    bot.alert_engine = PriceAlertEngine()
+
+    async def update_user_interaction(user_id):
+        pass
+    bot.update_user_interaction = update_user_interaction
+
+    answers = []
+
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    for text in ("/alert del abc", "/alert del"):
+        message = SimpleNamespace(text=text, from_user=SimpleNamespace(id=1), answer=answer)
+        await bot.alert_command(message)
+
+    assert len(answers) == 2
+    assert all("/alert del 12" in a and "Не удалось создать" not in a for a in answers)
+
+
+def test_fires_once():
+    asyncio.run(_fires_once())
+
+
+def test_old_prices_ignored():
+    asyncio.run(_old_prices_ignored())
+
+
+def test_delete_command_validates_id():
+    asyncio.run(_delete_command_validates_id())
+
+
+if __name__ == "__main__":
+    for test in (test_fires_once, test_old_prices_ignored, test_delete_command_validates_id):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты PriceAlertEngine пройдены")
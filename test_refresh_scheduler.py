@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: RefreshScheduler - батчевые фоновые обновления контекстов
+
+Без БД: _MultiRepository считает запросы get_candles_multi, время
+планировщика задается вручную. Запуск: python test_refresh_scheduler.py (или pytest)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from strategies.technical_analysis import TechnicalAnalysisContextManager
+from strategies.technical_analysis.context import TechnicalAnalysisContext
+from strategies.technical_analysis.context_manager import CANDLE_FETCHES
+from strategies.technical_analysis.refresh_scheduler import ComponentSchedule
+
+T0 = 1_740_960_000.0  # 00:00 UTC - слот всех компонентов
+
+SCHEDULE = (ComponentSchedule("candles", 60), ComponentSchedule("levels", 86400))
+
+
+class _MultiRepository:
+    """get_candles_multi с журналом запросов: (interval, символы)"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_candles_multi(self, symbols, interval, limit):
+        self.calls.append((interval, tuple(symbols)))
+        return {symbol: [] for symbol in symbols}
+
+    async def get_candles(self, *args, **kwargs):
+        raise AssertionError("батч не должен загружать свечи по символам")
+
+
+def make_manager(**kwargs):
+    repository = _MultiRepository()
+    manager = TechnicalAnalysisContextManager(
+        repository,
+        auto_start_background_updates=False,
+        scheduler_config={"schedule": SCHEDULE, **kwargs.pop("scheduler_config", {})},
+        **kwargs
+    )
+    manager.scheduler.phases = {component: 0.0 for component in manager.scheduler.phases}
+    return manager, repository
+
+
+def add_contexts(manager, symbols):
+    for symbol in symbols:
+        manager.contexts[symbol] = TechnicalAnalysisContext(symbol=symbol)
+
+
+async def run_slot(manager, now: float):
+    """Один проход цикла планировщика в момент now и ожидание его батчей"""
+    scheduler = manager.scheduler
+    scheduler._sync_symbols(now)
+    scheduler._dispatch(now)
+    await asyncio.gather(*list(scheduler._batches))
+
+
+async def _one_query_per_interval():
+    manager, repository = make_manager()
+    symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "BNBUSDT"]
+    add_contexts(manager, symbols)
+    manager.scheduler._sync_symbols(T0)
+
+    # Минутный слот: свечи всех символов - один запрос на интервал
+    await run_slot(manager, T0 + 60)
+    assert repository.calls == [(interval, tuple(symbols)) for interval, _, _ in CANDLE_FETCHES]
+    assert manager.stats["batch_queries"] == len(CANDLE_FETCHES)
+    assert manager.scheduler.stats["batches_started"] == 1
+
+    # Суточный слот: уровни - один запрос D1 на всех
+    repository.calls.clear()
+    await run_slot(manager, T0 + 86400)
+    assert ("1d", tuple(symbols)) in repository.calls
+    assert len(repository.calls) == len(CANDLE_FETCHES) + 1
+
+
+async def _batches_chunked():
+    manager, repository = make_manager(scheduler_config={"max_batch_size": 2})
+    add_contexts(manager, ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "BNBUSDT"])
+    manager.scheduler._sync_symbols(T0)
+
+    await run_slot(manager, T0 + 60)
+
+    assert manager.scheduler.stats["batches_started"] == 3
+    sizes = sorted(len(symbols) for interval, symbols in repository.calls if interval == "5m")
+    assert sizes == [1, 2, 2]
+    assert len(repository.calls) == 3 * len(CANDLE_FETCHES)
+
+
+async def _evicted_contexts_not_refreshed():
+    manager, repository = make_manager(max_contexts=2)
+    add_contexts(manager, ["BTCUSDT", "ETHUSDT"])
+    manager.scheduler._sync_symbols(T0)
+
+    # Третий контекст вытесняет самый давний (BTCUSDT), ETHUSDT удаляется явно
+    add_contexts(manager, ["SOLUSDT"])
+    manager.scheduler._sync_symbols(T0)
+    assert "BTCUSDT" not in manager.contexts
+    manager.clear_context("ETHUSDT")
+
+    await run_slot(manager, T0 + 60)
+
+    assert {symbols for _, symbols in repository.calls} == {("SOLUSDT",)}
+    assert manager.scheduler.stats["items_dropped"] == 2  # свечи BTCUSDT и ETHUSDT
+    assert manager.scheduler.get_stats()["symbols"] == 1
+
+    # Вытеснение после постановки батча: контекст пропускается в самом батче
+    repository.calls.clear()
+    scheduler = manager.scheduler
+    scheduler._dispatch(T0 + 120)
+    assert scheduler.stats["batches_started"] == 2
+    add_contexts(manager, ["XRPUSDT", "BNBUSDT"])  # SOLUSDT вытеснен до старта батча
+    await asyncio.gather(*list(scheduler._batches))
+
+    assert "SOLUSDT" not in manager.contexts
+    assert repository.calls == []
+
+
+async def _unchanged_inputs_skipped():
+    manager, repository = make_manager()
+    add_contexts(manager, ["BTCUSDT", "ETHUSDT"])
+    manager.scheduler._sync_symbols(T0)
+
+    # D1 BTCUSDT не менялась с прошлого расчета уровней, у ETHUSDT - новая свеча
+    day = datetime.fromtimestamp(T0, tz=timezone.utc)
+    for symbol, recorded in (("BTCUSDT", day), ("ETHUSDT", day - timedelta(days=1))):
+        manager.latest_watermarks[symbol]["1d"] = day
+        manager.contexts[symbol].input_watermarks["levels"] = {"1d": recorded}
+
+    await run_slot(manager, T0 + 86400)
+
+    assert manager.scheduler.stats["items_skipped_unchanged"] == 1
+    assert ("1d", ("ETHUSDT",)) in repository.calls
+    assert not [symbols for interval, symbols in repository.calls if interval == "1d" and "BTCUSDT" in symbols]
+    # Свечи без событий синхронизации решает расписание
+    assert ("5m", ("BTCUSDT", "ETHUSDT")) in repository.calls
+
+
+def test_one_query_per_interval():
+    asyncio.run(_one_query_per_interval())
+
+
+def test_batches_chunked():
+    asyncio.run(_batches_chunked())
+
+
+def test_evicted_contexts_not_refreshed():
+    asyncio.run(_evicted_contexts_not_refreshed())
+
+
+def test_unchanged_inputs_skipped():
+    asyncio.run(_unchanged_inputs_skipped())
+
+
+if __name__ == "__main__":
+    for test in (test_one_query_per_interval, test_batches_chunked, test_evicted_contexts_not_refreshed,
+                 test_unchanged_inputs_skipped):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты RefreshScheduler пройдены")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: ReplayBacktestEngine - реплей одного символа на синтетической истории
+
+Без БД и сети: свечи из test_portfolio_engine._MemoryRepository.
+Запуск: python test_replay_engine.py (или pytest)
+"""
+
+import asyncio
+
+from backtesting import ReplayBacktestEngine
+from strategies.base_strategy import SignalType
+from test_portfolio_engine import START, END, _MemoryRepository, _FixedSignalStrategy
+
+
+async def _accept_signal_with_replay_clock():
+    """Cooldown стратегии считается по времени реплея через StrategyState"""
+    engine = ReplayBacktestEngine(step_interval="5m")
+    strategy = _FixedSignalStrategy("HourlyBuy", SignalType.BUY, 0.9, cooldown_minutes=60)
+
+    await engine.run_from_repository(_MemoryRepository(), "BTCUSDT", [strategy], START, END, warmup_days=2)
+
+    state = engine.strategy_states.get("HourlyBuy", "BTCUSDT")
+    assert state.counters["analysis_calls"] == engine.stats["strategy_calls"]
+    assert state.counters["signals_sent"] == 6
+    assert engine.stats["signals_filtered_by_strategy"] == engine.stats["signals_generated"] - 6
+    assert START < state.last_signal_time < END
+
+    # Экземпляр стратегии не хранит состояние реплея
+    assert not strategy.default_state.signal_history
+
+
+async def _expired_by_replay_time():
+    """Срок сигнала сравнивается с часами реплея, а не с реальным временем"""
+    engine = ReplayBacktestEngine(step_interval="5m")
+    strategy = _FixedSignalStrategy("AlwaysBuy", SignalType.BUY, 0.9)
+
+    await engine.run_from_repository(_MemoryRepository(), "BTCUSDT", [strategy], START, END, warmup_days=2)
+
+    assert engine.stats["signals_filtered_by_strategy"] == 0
+    assert len(engine.trades) == 1  # сигналы в ту же сторону позицию не переоткрывают
+
+
+def test_accept_signal_with_replay_clock():
+    asyncio.run(_accept_signal_with_replay_clock())
+
+
+def test_expired_by_replay_time():
+    asyncio.run(_expired_by_replay_time())
+
+
+if __name__ == "__main__":
+    for test in (test_accept_signal_with_replay_clock, test_expired_by_replay_time):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты ReplayBacktestEngine пройдены")
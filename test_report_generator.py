@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: ReportGenerator - обзор и детализация графиков дашборда
+
+Без БД и сети. Запуск: python test_report_generator.py (или pytest)
+"""
+
+import math
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from backtesting import EquityCurve
+from backtesting.report_generator import ReportGenerator
+
+START = datetime(2025, 3, 3)
+
+
+def synthetic_result(n: int):
+    candles, curve = [], EquityCurve(capacity=n)
+    for i in range(n):
+        open_time = START + timedelta(minutes=i)
+        price = 100.0 + 5.0 * math.sin(i / 50.0)
+        candles.append({"open_time": open_time, "open": price, "high": price * 1.001,
+                        "low": price * 0.999, "close": price})
+        curve.append(open_time, 10000.0 + i)
+    return SimpleNamespace(candles_data=candles, equity_curve=curve, initial_capital=10000.0)
+
+
+def test_chunk_request_matches_generate_backtest_chunk():
+    result = synthetic_result(12000)
+    body = {"symbol": "BTCUSDT", "interval": "1m",  # параметры /backtest/run
+            "start": "2025-03-03 01:00:00.25", "end": "2025-03-03 02:00:00",
+            "max_points": 100}
+
+    detail = ReportGenerator.handle_chunk_request(result, body)
+
+    assert detail == ReportGenerator.generate_backtest_chunk(
+        result, start=body["start"], end=body["end"], max_points=100)
+    assert detail["status"] == "success"
+    # Свечи 01:01 .. 02:00 включительно, прорежены до лимита
+    assert detail["range"]["candles"] == 60
+    assert 0 < len(detail["price_times"]) <= 100
+    assert detail["price_times"][0] == START + timedelta(hours=1, minutes=1)
+
+
+def test_chunk_request_by_index_and_bad_bounds():
+    result = synthetic_result(12000)
+
+    detail = ReportGenerator.handle_chunk_request(result, {"chunk": 2})
+    assert detail["range"]["candles"] == 12000 - 2 * ReportGenerator.DEFAULT_CHUNK_SIZE
+
+    error = ReportGenerator.handle_chunk_request(result, {"start": "не дата"})
+    assert error["status"] == "error"
+
+
+if __name__ == "__main__":
+    for test in (test_chunk_request_matches_generate_backtest_chunk, test_chunk_request_by_index_and_bad_bounds):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты ReportGenerator пройдены")
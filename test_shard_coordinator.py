@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: ShardCoordinator - шардирование символов между узлами
+
+1. Кольцо consistent hashing (без БД)
+2. Продление lease символов heartbeat'ом (без БД)
+3. ShardCoordinator.from_config - настройки SHARD_* (без БД)
+4. Несколько процессов против одной PostgreSQL (нужен DATABASE_URL,
+   иначе пропускается): каждый символ у одного узла, после остановки
+   узла его символы переходят к остальным
+
+Запуск: python test_shard_coordinator.py (или pytest)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+
+from core.shard_coordinator import ShardCoordinator, ConsistentHashRing
+
+SYMBOLS = [
+    "BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "ADAUSDT",
+    "AVAXUSDT", "LINKUSDT", "DOTUSDT", "TONUSDT", "TRXUSDT", "LTCUSDT", "BCHUSDT",
+    "NEARUSDT", "APTUSDT", "SUIUSDT"
+]
+
+
+# ==================== КОЛЬЦО ====================
+
+def test_ring_assignment():
+    """Каждый символ ровно у одного узла; уход узла двигает только его символы"""
+    ring = ConsistentHashRing(["node-a", "node-b", "node-c"])
+    before = {s: ring.get_node(s) for s in SYMBOLS}
+
+    assignment = ring.get_assignment(SYMBOLS)
+    assert sorted(s for symbols in assignment.values() for s in symbols) == sorted(SYMBOLS)
+
+    ring.set_nodes(["node-a", "node-b"])
+    after = {s: ring.get_node(s) for s in SYMBOLS}
+
+    moved = [s for s in SYMBOLS if before[s] != after[s]]
+    assert all(before[s] == "node-c" for s in moved)
+
+
+# ==================== ПРОДЛЕНИЕ LEASE ====================
+
+class _RecordingDB:
+    """Отвечает на запросы координатора как пустая БД и запоминает их"""
+
+    def __init__(self):
+        self.queries = []
+
+    async def execute(self, query, *args):
+        self.queries.append((query, args))
+        return "OK"
+
+    async def fetch(self, query, *args):
+        self.queries.append((query, args))
+        if "UPDATE symbol_leases" in query:
+            return [{"symbol": s} for s in args[1]]
+        if "FROM orchestrator_nodes" in query:
+            return [{"node_id": "node-a"}]
+        return []
+
+
+async def _heartbeat_renews_symbol_leases():
+    db = _RecordingDB()
+    coordinator = ShardCoordinator(db, node_id="node-a", heartbeat_interval_seconds=1, lease_ttl_seconds=3)
+    await coordinator.start()
+    coordinator.owned_symbols = {"BTCUSDT", "ETHUSDT"}
+
+    await asyncio.sleep(1.2)
+    await coordinator.stop()
+
+    renewals = [args for query, args in db.queries if "UPDATE symbol_leases" in query]
+    assert renewals, "heartbeat не продлил lease символов"
+    assert renewals[0][1] == ["BTCUSDT", "ETHUSDT"]
+    assert coordinator.stats["symbols_renewed"] >= 2
+
+
+def test_heartbeat_renews_symbol_leases():
+    asyncio.run(_heartbeat_renews_symbol_leases())
+
+
+# ==================== НАСТРОЙКИ ====================
+
+class _ShardConfig:
+    """Настройки SHARD_* как у config.Config"""
+    SHARDING_ENABLED = True
+    SHARD_NODE_ID = "node-cfg"
+    SHARD_HEARTBEAT_SECONDS = 7
+    SHARD_LEASE_TTL_SECONDS = 21
+    SHARD_VIRTUAL_NODES = 16
+
+
+def test_from_config():
+    db = _RecordingDB()
+    coordinator = ShardCoordinator.from_config(db, _ShardConfig)
+
+    assert coordinator.db is db
+    assert coordinator.node_id == "node-cfg"
+    assert coordinator.heartbeat_interval == 7 and coordinator.lease_ttl == 21
+    assert coordinator.ring.virtual_nodes == 16
+
+    # Пустой SHARD_NODE_ID - hostname-pid
+    class _NoNodeId(_ShardConfig):
+        SHARD_NODE_ID = None
+    assert ShardCoordinator.from_config(db, _NoNodeId).node_id.endswith(f"-{os.getpid()}")
+
+    # Шардирование выключено - координатора нет
+    class _Disabled(_ShardConfig):
+        SHARDING_ENABLED = False
+    assert ShardCoordinator.from_config(db, _Disabled) is None
+
+    # По умолчанию - config.Config
+    from config import Config
+    assert (ShardCoordinator.from_config(db) is None) == (not Config.SHARDING_ENABLED)
+
+
+# ==================== НЕСКОЛЬКО ПРОЦЕССОВ ====================
+
+def _node_process(node_id: str, run_seconds: float, results):
+    """Узел: каждые 0.5s захватывает символы и пишет (node, t, owned)"""
+    async def run():
+        from database import initialize_database, close_database, get_database_manager
+
+        await initialize_database()
+        coordinator = ShardCoordinator(
+            get_database_manager(), node_id=node_id,
+            heartbeat_interval_seconds=1, lease_ttl_seconds=3
+        )
+        await coordinator.start()
+
+        deadline = time.time() + run_seconds
+        while time.time() < deadline:
+            owned = await coordinator.claim_symbols(SYMBOLS)
+            results.put((node_id, time.time(), owned))
+            await asyncio.sleep(0.5)
+
+        await coordinator.stop()
+        await close_database()
+
+    asyncio.run(run())
+
+
+def test_multi_process_exclusive_ownership():
+    if not os.getenv("DATABASE_URL"):
+        print("⏭️ DATABASE_URL не задан - мультипроцессный тест пропущен")
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_node_process, args=("test-node-a", 12, results)),
+        ctx.Process(target=_node_process, args=("test-node-b", 12, results)),
+        ctx.Process(target=_node_process, args=("test-node-c", 5, results)),  # уходит раньше
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    samples = []
+    while not results.empty():
+        samples.append(results.get())
+    assert samples, "узлы не вернули результатов"
+
+    # В каждом полусекундном окне символ есть не более чем у одного узла
+    windows = {}
+    for node_id, t, owned in samples:
+        window = windows.setdefault(int(t * 2), {})
+        for symbol in owned:
+            window.setdefault(symbol, set()).add(node_id)
+    conflicts = {w: s for w, owners in windows.items() for s, nodes in owners.items() if len(nodes) > 1}
+    assert not conflicts, f"символ у нескольких узлов: {conflicts}"
+
+    # После ухода test-node-c все символы у оставшихся узлов
+    last = {}
+    for node_id, t, owned in sorted(samples, key=lambda x: x[1]):
+        last[node_id] = owned
+    survivors = set(last.get("test-node-a", [])) | set(last.get("test-node-b", []))
+    assert survivors == set(SYMBOLS), f"не перераспределены: {set(SYMBOLS) - survivors}"
+
+
+if __name__ == "__main__":
+    for test in (test_ring_assignment, test_heartbeat_renews_symbol_leases, test_from_config,
+                 test_multi_process_exclusive_ownership):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты ShardCoordinator пройдены")
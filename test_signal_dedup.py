@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: SignalDedupStore и SignalClaimRepository - дедупликация между инстансами
+
+Без PostgreSQL: _ClaimsDB воспроизводит то, что важно для claim -
+READ COMMITTED снимок для NOT EXISTS, уникальный ключ, видящий
+незакоммиченные строки, и pg_advisory_xact_lock.
+Запуск: python test_signal_dedup.py (или pytest)
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from core.signal_dedup import SignalDedupStore
+from database.repositories.signal_claim_repository import SignalClaimRepository
+
+T0 = datetime(2025, 3, 3, 12, 0, tzinfo=timezone.utc)
+
+
+class _ClaimsDB:
+    """signal_claims в памяти с семантикой, важной для гонки на границе bucket"""
+
+    def __init__(self):
+        self.committed = []
+        self.transactions = []  # открытые транзакции (их строки видит только уникальный ключ)
+        self.locks = {}
+        self.lock_calls = 0
+
+    @asynccontextmanager
+    async def get_transaction(self):
+        conn = _ClaimsConnection(self)
+        self.transactions.append(conn)
+        try:
+            yield conn
+            self.committed.extend(conn.pending)
+        finally:
+            self.transactions.remove(conn)
+            for lock in conn.held:
+                lock.release()
+
+    async def execute(self, query, *args):
+        if "DELETE FROM signal_claims" in query:
+            return "DELETE 0"
+        raise AssertionError(f"неожиданный запрос: {query}")
+
+
+class _ClaimsConnection:
+    def __init__(self, db: _ClaimsDB):
+        self.db = db
+        self.pending = []
+        self.held = []
+
+    async def execute(self, query, *args):
+        assert "pg_advisory_xact_lock" in query
+        self.db.lock_calls += 1
+        lock = self.db.locks.setdefault(args, asyncio.Lock())
+        await lock.acquire()
+        self.held.append(lock)
+
+    async def fetchval(self, query, symbol, signal_type, bucket_start, claimed_at,
+                       strategy, strength, node_id, cooldown_start):
+        # Снимок READ COMMITTED на начало оператора
+        snapshot = list(self.db.committed)
+        await asyncio.sleep(0)  # второй инстанс успевает выполнить свой INSERT
+
+        if any(r["symbol"] == symbol and r["signal_type"] == signal_type and r["claimed_at"] > cooldown_start
+               for r in snapshot):
+            return None
+
+        # Уникальный ключ видит и незакоммиченные строки других транзакций
+        everyone = self.db.committed + [r for conn in self.db.transactions for r in conn.pending]
+        if any((r["symbol"], r["signal_type"], r["bucket_start"]) == (symbol, signal_type, bucket_start)
+               for r in everyone):
+            return None
+
+        row = {"symbol": symbol, "signal_type": signal_type, "bucket_start": bucket_start,
+               "claimed_at": claimed_at, "node_id": node_id}
+        self.pending.append(row)
+        return len(self.db.committed) + 1
+
+
+def signal(symbol: str = "BTCUSDT"):
+    return SimpleNamespace(
+        symbol=symbol,
+        signal_type=SimpleNamespace(value="BUY"),
+        strategy_name="TestStrategy",
+        strength=0.8
+    )
+
+
+async def _boundary_claims_serialized():
+    """Два инстанса по разные стороны границы bucket: сигнал уходит один раз"""
+    db = _ClaimsDB()
+    repository = SignalClaimRepository(db)
+    a = SignalDedupStore(repository=repository, cooldown_minutes=5, node_id="a")
+    b = SignalDedupStore(repository=repository, cooldown_minutes=5, node_id="b")
+
+    before = T0 + timedelta(minutes=4, seconds=59, milliseconds=900)
+    after = T0 + timedelta(minutes=5, milliseconds=100)
+    assert a.bucket_start(before) != b.bucket_start(after)
+
+    won = await asyncio.gather(a.claim(signal(), before), b.claim(signal(), after))
+
+    assert sorted(won) == [False, True]
+    assert len(db.committed) == 1
+    assert db.lock_calls == 2
+
+
+async def _memory_cooldown_and_rate_limit():
+    store = SignalDedupStore(cooldown_minutes=5, max_signals_per_hour=2)
+    key = store.key("BTCUSDT", "BUY")
+
+    assert await store.claim(signal(), T0)
+    assert store.cooldown_remaining(key, T0 + timedelta(minutes=1)) == timedelta(minutes=1)
+    assert not await store.claim(signal(), T0 + timedelta(minutes=1))
+    assert store.cooldown_remaining(key, T0 + timedelta(minutes=5)) is None
+
+    assert await store.claim(signal("ETHUSDT"), T0 + timedelta(minutes=2))
+    assert store.is_rate_limited(T0 + timedelta(minutes=30))
+    assert not store.is_rate_limited(T0 + timedelta(minutes=61))
+
+
+def test_boundary_claims_serialized():
+    asyncio.run(_boundary_claims_serialized())
+
+
+def test_memory_cooldown_and_rate_limit():
+    asyncio.run(_memory_cooldown_and_rate_limit())
+
+
+if __name__ == "__main__":
+    for test in (test_boundary_claims_serialized, test_memory_cooldown_and_rate_limit):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты SignalDedupStore пройдены")
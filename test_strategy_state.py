@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: StrategyState + BaseStrategy.accept_signal - cooldown и rate limit
+изолированы по паре (стратегия, символ)
+
+Без БД и сети, время задается явно. Запуск: python test_strategy_state.py (или pytest)
+"""
+
+from datetime import datetime, timedelta
+
+from strategies import StrategyStateStore
+from strategies.base_strategy import BaseStrategy, SignalType, TradingSignal
+
+T0 = datetime(2025, 3, 3, 12, 0)
+MINUTE = timedelta(minutes=1)
+
+
+class _LimitedStrategy(BaseStrategy):
+    """Cooldown 15 минут, не больше 2 сигналов в час"""
+
+    def __init__(self, name: str):
+        super().__init__(name=name, symbol="PLACEHOLDER", min_signal_strength=0.1,
+                         signal_cooldown_minutes=15, max_signals_per_hour=2)
+
+    async def analyze_with_data(self, symbol, candles_1m, candles_5m, candles_1h, candles_1d,
+                                ta_context=None, features=None, state=None):
+        return None
+
+    def signal(self, symbol: str, signal_type: SignalType, at: datetime) -> TradingSignal:
+        return TradingSignal(signal_type=signal_type, strength=0.8, confidence=0.8, price=100.0,
+                             timestamp=at, strategy_name=self.name, symbol=symbol)
+
+
+def offer(strategy, store, symbol, signal_type, at):
+    """Сигнал через фильтры состояния пары (стратегия, символ), как в оркестраторе"""
+    state = store.get(strategy.name, symbol)
+    return strategy.accept_signal(strategy.signal(symbol, signal_type, at), state, now=at)
+
+
+def test_cooldown_isolated_per_symbol():
+    strategy = _LimitedStrategy("Breakout")
+    store = StrategyStateStore()
+
+    assert offer(strategy, store, "BTCUSDT", SignalType.BUY, T0)
+    # BTCUSDT в cooldown по BUY; другие символы и другой тип сигнала - нет
+    assert not offer(strategy, store, "BTCUSDT", SignalType.BUY, T0 + MINUTE)
+    assert offer(strategy, store, "ETHUSDT", SignalType.BUY, T0 + MINUTE)
+    assert offer(strategy, store, "SOLUSDT", SignalType.BUY, T0 + MINUTE)
+    assert offer(strategy, store, "BTCUSDT", SignalType.SELL, T0 + MINUTE)
+
+    btc, eth = store.get("Breakout", "BTCUSDT"), store.get("Breakout", "ethusdt")
+    assert btc.counters["signals_filtered_by_cooldown"] == 1
+    assert eth.counters["signals_filtered_by_cooldown"] == 0
+    assert btc.last_signals_by_type[SignalType.BUY] == T0
+    assert eth.last_signals_by_type[SignalType.BUY] == T0 + MINUTE
+
+    # Cooldown ETHUSDT отсчитывается от его сигнала (T0 + 1), а не от BTCUSDT
+    assert offer(strategy, store, "ETHUSDT", SignalType.SELL, T0 + 2 * MINUTE)
+    assert not offer(strategy, store, "ETHUSDT", SignalType.BUY, T0 + 15 * MINUTE)
+    assert eth.counters["signals_filtered_by_cooldown"] == 1
+    # После cooldown ETHUSDT упирается уже в свой лимит (2 в час)
+    assert not offer(strategy, store, "ETHUSDT", SignalType.BUY, T0 + 16 * MINUTE)
+    assert eth.counters["signals_filtered_by_rate_limit"] == 1
+    assert btc.counters["signals_filtered_by_rate_limit"] == 0
+
+    # Экземпляр стратегии не хранит состояние символов
+    assert not strategy.default_state.signal_history
+    assert strategy.stats["signals_filtered_by_cooldown"] == 0
+
+
+def test_rate_limit_isolated_per_symbol():
+    strategy = _LimitedStrategy("Bounce")
+    store = StrategyStateStore()
+
+    assert offer(strategy, store, "BTCUSDT", SignalType.BUY, T0)
+    assert offer(strategy, store, "BTCUSDT", SignalType.SELL, T0 + MINUTE)
+    # Лимит BTCUSDT исчерпан (2 в час) даже после cooldown
+    assert not offer(strategy, store, "BTCUSDT", SignalType.BUY, T0 + 20 * MINUTE)
+    assert store.get("Bounce", "BTCUSDT").counters["signals_filtered_by_rate_limit"] == 1
+
+    # ...а у ETHUSDT свой лимит
+    assert offer(strategy, store, "ETHUSDT", SignalType.BUY, T0 + 20 * MINUTE)
+    assert offer(strategy, store, "ETHUSDT", SignalType.SELL, T0 + 21 * MINUTE)
+    assert not offer(strategy, store, "ETHUSDT", SignalType.STRONG_BUY, T0 + 22 * MINUTE)
+
+    # Через час окно BTCUSDT освобождается
+    assert offer(strategy, store, "BTCUSDT", SignalType.BUY, T0 + 61 * MINUTE)
+    assert store.get("Bounce", "BTCUSDT").counters["signals_sent"] == 3
+
+
+def test_strategies_isolated_on_same_symbol():
+    breakout, bounce = _LimitedStrategy("Breakout"), _LimitedStrategy("Bounce")
+    store = StrategyStateStore()
+
+    assert offer(breakout, store, "BTCUSDT", SignalType.BUY, T0)
+    assert offer(breakout, store, "BTCUSDT", SignalType.SELL, T0 + MINUTE)
+    assert not offer(breakout, store, "BTCUSDT", SignalType.BUY, T0 + 2 * MINUTE)
+
+    # Cooldown и лимит Breakout не касаются Bounce на том же символе
+    assert offer(bounce, store, "BTCUSDT", SignalType.BUY, T0 + 2 * MINUTE)
+    assert offer(bounce, store, "BTCUSDT", SignalType.SELL, T0 + 3 * MINUTE)
+
+    assert len(store) == 2
+    assert store.totals("Breakout") == {"signals_generated": 3, "signals_sent": 2,
+                                        "signals_filtered_by_cooldown": 1}
+    assert store.totals("Bounce") == {"signals_generated": 2, "signals_sent": 2}
+    assert store.totals()["signals_sent"] == 4
+
+    # Символ ушел с узла: его состояния удаляются, вернулся - чистый лист
+    assert offer(bounce, store, "ETHUSDT", SignalType.BUY, T0)
+    assert store.drop_symbol("btcusdt") == 2
+    assert [state.symbol for state in store.for_symbol("ETHUSDT")] == ["ETHUSDT"]
+    assert offer(breakout, store, "BTCUSDT", SignalType.BUY, T0 + 3 * MINUTE)
+
+
+if __name__ == "__main__":
+    for test in (test_cooldown_isolated_per_symbol, test_rate_limit_isolated_per_symbol,
+                 test_strategies_isolated_on_same_symbol):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты StrategyState пройдены")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: подписки TelegramBot - загрузка пользователей из bot_users
+
+Без PostgreSQL и Telegram: _UsersDB отвечает на запросы load_users_from_db.
+Запуск: python test_subscriptions.py (или pytest)
+"""
+
+import asyncio
+
+import telegram_bot
+from core.subscription_index import SubscriptionIndex
+from telegram_bot import TelegramBot
+
+
+class _UsersDB:
+    """bot_users без колонок подписок; ALTER TABLE может быть запрещен"""
+
+    def __init__(self, alter_fails: bool):
+        self.alter_fails = alter_fails
+        self.queries = []
+
+    async def fetchval(self, query, *args):
+        return True  # таблица есть
+
+    async def execute(self, query, *args):
+        self.queries.append(query)
+        if "ALTER TABLE" in query and self.alter_fails:
+            raise PermissionError("must be owner of table bot_users")
+
+    async def fetch(self, query, *args):
+        self.queries.append(query)
+        if "subscribed_symbols" in query and self.alter_fails:
+            raise LookupError('column "subscribed_symbols" does not exist')
+        if "subscribed_symbols" in query:
+            return [{"user_id": 1, "subscribed_symbols": ["BTCUSDT"], "subscribed_strategies": None,
+                     "min_signal_strength": 0.5},
+                    {"user_id": 2, "subscribed_symbols": None, "subscribed_strategies": None,
+                     "min_signal_strength": 0}]
+        return [{"user_id": 1}, {"user_id": 2}]
+
+
+def make_bot() -> TelegramBot:
+    bot = object.__new__(TelegramBot)
+    bot.all_users = set()
+    bot.subscriptions = SubscriptionIndex()
+    return bot
+
+
+async def _load(alter_fails: bool):
+    db = _UsersDB(alter_fails)
+    original = telegram_bot.get_database_manager
+    telegram_bot.get_database_manager = lambda: db
+    try:
+        bot = make_bot()
+        loaded = await bot.load_users_from_db()
+    finally:
+        telegram_bot.get_database_manager = original
+    return bot, loaded
+
+
+def test_load_with_subscription_columns():
+    bot, loaded = asyncio.run(_load(alter_fails=False))
+
+    assert loaded == 2
+    assert bot.subscriptions.get_user(1).min_strength == 0.5
+    assert bot.subscriptions.get_user(2).symbols is None
+
+
+def test_load_falls_back_when_alter_fails():
+    """Без колонок подписок пользователи грузятся старым набором колонок"""
+    bot, loaded = asyncio.run(_load(alter_fails=True))
+
+    assert loaded == 2
+    assert bot.all_users == {1, 2}
+    prefs = bot.subscriptions.get_user(1)
+    assert prefs.symbols is None and prefs.strategies is None and prefs.min_strength == 0.0
+
+
+if __name__ == "__main__":
+    for test in (test_load_with_subscription_columns, test_load_falls_back_when_alter_fails):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты подписок TelegramBot пройдены")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: SymbolScreen - отсеянные символы не дали бы сигнала, статистика
+прохождения скрининга в StrategyOrchestrator
+
+Без БД и сети: синтетические контексты (уровни D1 + ATR) и плоские свечи,
+стратегии - настоящие экземпляры оркестратора.
+Запуск: python test_symbol_screen.py (или pytest)
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from strategies import StrategyOrchestrator, FeatureCache, SymbolScreen
+from strategies.strategy_orchestrator import CycleStats
+from strategies.technical_analysis.context import (
+    TechnicalAnalysisContext,
+    SupportResistanceLevel,
+    ATRData
+)
+
+NOW = datetime(2025, 3, 3, 12, tzinfo=timezone.utc)
+CANDLES = (("1m", 100, 60), ("5m", 50, 300), ("1h", 24, 3600), ("1d", 180, 86400))
+
+
+class _PriceRepository:
+    """get_latest_prices() как у MarketDataRepository"""
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    async def get_latest_prices(self, symbols, interval="1m"):
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+
+class _ContextHolder:
+    """Только contexts - скрининг не обновляет контексты"""
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+
+
+def make_orchestrator(prices, contexts):
+    return StrategyOrchestrator(
+        repository=_PriceRepository(prices),
+        ta_context_manager=_ContextHolder(contexts),
+        signal_manager=None,
+        symbols=sorted(prices)
+    )
+
+
+def random_context(rng, symbol: str, price: float) -> TechnicalAnalysisContext:
+    """Уровни на случайном расстоянии 0-6%, ATR 0.3-5% цены"""
+    context = TechnicalAnalysisContext(symbol=symbol)
+    levels = []
+    for _ in range(int(rng.integers(1, 7))):
+        offset = float(rng.uniform(-0.06, 0.06))
+        levels.append(SupportResistanceLevel(
+            price=round(price * (1 + offset), 4),
+            level_type="support" if offset < 0 else "resistance",
+            strength=round(float(rng.uniform(0.2, 1.0)), 2),
+            touches=int(rng.integers(1, 5)),
+            last_touch=NOW - timedelta(days=3)
+        ))
+    context.set_levels(levels)
+
+    atr = price * float(rng.uniform(0.003, 0.05))
+    context.atr_data = ATRData(
+        calculated_atr=atr,
+        technical_atr=atr,
+        atr_percent=atr / price * 100,
+        current_range_used=float(rng.uniform(0.0, 1.2)),
+        updated_at=NOW
+    )
+    return context
+
+
+def flat_candles(price: float):
+    """Свечи всех таймфреймов вокруг цены, close последней = price"""
+    result = {}
+    for interval, count, step in CANDLES:
+        candles = []
+        for i in range(count):
+            open_time = NOW - timedelta(seconds=step * (count - i))
+            close = price * (1 + 0.001 * np.sin(i)) if i < count - 1 else price
+            candles.append({
+                "open_time": open_time,
+                "close_time": open_time + timedelta(seconds=step - 1),
+                "open_price": close,
+                "high_price": close * 1.0005,
+                "low_price": close * 0.9995,
+                "close_price": close,
+                "volume": 100.0
+            })
+        result[interval] = candles
+    return result
+
+
+def strategy_finds_level(strategy, features, price) -> bool:
+    """Собственный фильтр уровней стратегии (до паттернов и подтверждений)"""
+    name = type(strategy).__name__
+    if name == "BounceStrategy":
+        level, _ = strategy._find_nearest_level_for_bounce(features, price)
+        return level is not None
+    if name == "BreakoutStrategy":
+        if features.atr_used > strategy.atr_exhaustion_threshold:
+            return False
+        level, _ = strategy._find_nearest_level_for_breakout(features, price)
+        return level is not None
+    return bool(strategy._find_nearest_levels(features, price))
+
+
+async def _screened_out_would_not_signal():
+    rng = np.random.default_rng(41)
+    prices = {f"S{i:03d}USDT": float(rng.uniform(1, 1000)) for i in range(150)}
+    contexts = {symbol: random_context(rng, symbol, price) for symbol, price in prices.items()}
+
+    orchestrator = make_orchestrator(prices, contexts)
+    screen = await orchestrator._screen_symbols(sorted(prices))
+    strategies = {s.name: s for s in orchestrator.strategies}
+    assert len(strategies) == 3
+
+    rejected = found_passed = 0
+    for symbol, price in prices.items():
+        allowed = set(screen.strategies_for(symbol) or [])
+        candles = flat_candles(price)
+        features = FeatureCache(symbol, candles["1m"], candles["5m"], candles["1h"],
+                                candles["1d"], contexts[symbol])
+
+        for name, strategy in strategies.items():
+            finds = strategy_finds_level(strategy, features, price)
+            if name in allowed:
+                found_passed += finds
+                continue
+
+            rejected += 1
+            assert not finds, (symbol, name)
+            signal = await strategy.analyze_with_data(
+                symbol, candles["1m"], candles["5m"], candles["1h"], candles["1d"],
+                ta_context=contexts[symbol], features=features
+            )
+            assert signal is None, (symbol, name)
+
+    # Проверка не пустая: есть и отсеянные пары, и прошедшие с подходящим уровнем
+    assert rejected == screen.strategies_skipped > 50
+    assert found_passed > 50
+    assert screen.skipped > 0
+
+
+async def _pass_rate_stats():
+    rng = np.random.default_rng(7)
+    prices = {f"S{i}USDT": 100.0 for i in range(6)}
+    contexts = {symbol: random_context(rng, symbol, 100.0) for symbol in prices}
+
+    # S0: уровень вплотную к цене - проходит всеми стратегиями
+    contexts["S0USDT"].set_levels([SupportResistanceLevel(99.9, "support", 0.9, 3)])
+    contexts["S0USDT"].atr_data.current_range_used = 0.1
+    # S1-S3: ближайший уровень в 30% от цены - отсеиваются
+    for symbol in ("S1USDT", "S2USDT", "S3USDT"):
+        contexts[symbol].set_levels([SupportResistanceLevel(70.0, "support", 0.9, 3)])
+        contexts[symbol].atr_data.calculated_atr = 1.0
+    # S4: без контекста, S5: без цены - без проверки
+    del contexts["S4USDT"]
+    del prices["S5USDT"]
+
+    orchestrator = make_orchestrator(prices, contexts)
+    symbols = sorted([*contexts, "S4USDT"])
+    screen = await orchestrator._screen_symbols(symbols)
+
+    assert screen.symbols_screened == 6
+    assert screen.passthrough == ["S4USDT", "S5USDT"]
+    assert screen.candidates == ["S0USDT", "S4USDT", "S5USDT"]
+    assert screen.strategies_for("S0USDT") == [s.name for s in orchestrator.strategies]
+    assert screen.strategies_for("S4USDT") is None  # без проверки - все стратегии
+    assert screen.skipped == 3 and screen.pass_rate == 50.0
+    assert screen.strategies_skipped == 3 * 3
+
+    # Статистика цикла: отсеянные × среднее время анализа символа
+    orchestrator.stats["average_symbol_time"] = 0.2
+    cycle = CycleStats(cycle_number=1, start_time=NOW)
+    orchestrator._apply_screen_stats(cycle, screen, [0.2, 0.2])
+    assert cycle.symbols_screened_out == 3
+    assert cycle.strategies_screened_out == 9
+    assert cycle.screen_pass_rate == 50.0
+    assert abs(cycle.estimated_time_saved - (0.6 - screen.screen_time_ms / 1000)) < 1e-9
+    assert orchestrator.stats["total_time_saved"] == cycle.estimated_time_saved
+
+    # Накопленная статистика скрининга
+    await orchestrator._screen_symbols(["S0USDT", "S1USDT"])
+    stats = orchestrator.symbol_screen.get_stats()
+    assert stats["screens_run"] == 2
+    assert stats["symbols_screened"] == 8 and stats["symbols_passed"] == 4
+    assert stats["pass_rate"] == 50.0
+    assert stats["symbols_passthrough"] == 2
+
+    # Без цен скрининг пропускается - цикл анализирует все символы
+    orchestrator.repository = None
+    assert await orchestrator._screen_symbols(symbols) is None
+
+
+def test_gates_follow_strategy_attributes():
+    orchestrator = make_orchestrator({}, {})
+    screen = SymbolScreen(orchestrator.strategies)
+    for gate, strategy in zip(screen.gates, orchestrator.strategies):
+        assert gate.max_distance == strategy.max_distance_to_level
+        assert gate.min_strength == strategy.min_level_strength
+        assert gate.min_touches == getattr(strategy, "min_level_touches", 0)
+
+
+def test_screened_out_would_not_signal():
+    asyncio.run(_screened_out_would_not_signal())
+
+
+def test_pass_rate_stats():
+    asyncio.run(_pass_rate_stats())
+
+
+if __name__ == "__main__":
+    for test in (test_screened_out_would_not_signal, test_pass_rate_stats,
+                 test_gates_follow_strategy_attributes):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты SymbolScreen пройдены")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: VectorizedPatternDetector против PatternDetector
+
+Векторный детектор должен давать те же решения и детали, что и
+построчный, на одних и тех же свечах (списком и CandleArrays).
+Без БД и сети. Запуск: python test_vectorized_patterns.py (или pytest)
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from strategies.technical_analysis.context import SupportResistanceLevel
+from strategies.technical_analysis.pattern_detector import PatternDetector
+from strategies.technical_analysis.vectorized_patterns import VectorizedPatternDetector, CandleArrays
+
+SEEDS = range(200)
+
+
+class _Candle(dict):
+    """Свеча-словарь с доступом к полям как к атрибутам (как MarketDataCandle)"""
+    __getattr__ = dict.__getitem__
+
+
+def random_candles(rng: random.Random, count: int, interval: timedelta, volatility: float) -> list:
+    start = datetime.now(timezone.utc).replace(microsecond=0) - interval * count
+    price = rng.uniform(50, 150)
+    candles = []
+    for i in range(count):
+        open_price = price
+        close = price * (1 + rng.gauss(0, volatility))
+        high = max(open_price, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+        low = min(open_price, close) * (1 - abs(rng.gauss(0, volatility / 2)))
+        candles.append(_Candle(
+            open_time=start + interval * i,
+            open_price=open_price,
+            high_price=high,
+            low_price=low,
+            close_price=close,
+            volume=rng.uniform(1, 100)
+        ))
+        price = close
+    return candles
+
+
+def level_near(rng: random.Random, candles: list) -> SupportResistanceLevel:
+    candle = rng.choice(candles)
+    level_type = rng.choice(["support", "resistance"])
+    price = candle["low_price"] if level_type == "support" else candle["high_price"]
+    return SupportResistanceLevel(price=price * (1 + rng.uniform(-0.002, 0.002)),
+                                  level_type=level_type, strength=0.8)
+
+
+def bpu_key(patterns):
+    return [(id(p.candle), p.is_bpu1, p.is_bpu2, round(p.touch_accuracy, 12)) for p in patterns]
+
+
+def test_compression_cluster_consolidation_v_formation():
+    scalar, vectorized = PatternDetector(), VectorizedPatternDetector()
+    decisions = {"compression": 0, "cluster": 0, "consolidation": 0, "v_formation": 0}
+
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        candles = random_candles(rng, 60, timedelta(minutes=5), rng.choice([0.001, 0.004, 0.02]))
+        arrays = CandleArrays.from_candles(candles)
+        level = level_near(rng, candles)
+        atr = rng.uniform(0.5, 3.0)
+
+        for source in (candles, arrays):
+            expected = scalar.detect_compression(candles, level, atr)
+            assert vectorized.detect_compression(source, level, atr) == expected, seed
+            decisions["compression"] += expected[0]
+
+            expected = scalar.detect_cluster(candles)
+            assert vectorized.detect_cluster(source) == expected, seed
+            decisions["cluster"] += expected[0]
+
+            expected = scalar.detect_consolidation(candles)
+            assert vectorized.detect_consolidation(source) == expected, seed
+            decisions["consolidation"] += expected[0]
+
+            expected = scalar.detect_v_formation(candles)
+            assert vectorized.detect_v_formation(source) == expected, seed
+            decisions["v_formation"] += expected[0]
+
+    # Выборка покрывает обе ветки каждого решения
+    assert all(0 < count < 2 * len(SEEDS) for count in decisions.values()), decisions
+
+
+def test_bsu_bpu():
+    scalar, vectorized = PatternDetector(), VectorizedPatternDetector()
+    found_bsu = found_bpu = 0
+
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        d1 = random_candles(rng, 120, timedelta(days=1), 0.02)
+        m30 = random_candles(rng, 80, timedelta(minutes=30), 0.003)
+        level = level_near(rng, d1)
+        if seed % 4 == 0:
+            # Уровень вдали от всех баров - БСУ нет
+            level = SupportResistanceLevel(price=max(c["high_price"] for c in d1) * 1.5,
+                                           level_type="resistance", strength=0.8)
+
+        expected = scalar.find_bsu(d1, level)
+        actual = vectorized.find_bsu(CandleArrays.from_candles(d1), level)
+        assert (expected is None) == (actual is None), seed
+        if expected is not None:
+            assert actual.candle is expected.candle and actual.created_at == expected.created_at
+            found_bsu += 1
+
+        bpu_level = level_near(rng, m30)
+        expected = scalar.find_bpu(m30, bpu_level)
+        for source in (m30, CandleArrays.from_candles(m30)):
+            assert bpu_key(vectorized.find_bpu(source, bpu_level)) == bpu_key(expected), seed
+        found_bpu += bool(expected)
+
+    assert 0 < found_bsu < len(SEEDS) and found_bpu > 0
+
+
+def test_scan_matches_single_calls():
+    detector = VectorizedPatternDetector()
+    rng = random.Random(42)
+    candles = random_candles(rng, 60, timedelta(minutes=5), 0.004)
+    levels = [level_near(rng, candles) for _ in range(3)]
+
+    scan = detector.scan(CandleArrays.from_candles(candles), levels=levels, atr=1.0)
+
+    assert scan.v_formation == detector.detect_v_formation(candles)
+    assert scan.consolidation == detector.detect_consolidation(candles)
+    assert scan.cluster == detector.detect_cluster(candles)
+    for level in levels:
+        assert scan.compression[level.price] == detector.detect_compression(candles, level, 1.0)
+        assert bpu_key(scan.bpu.get(level.price, [])) == bpu_key(detector.find_bpu(candles, level))
+
+
+if __name__ == "__main__":
+    for test in (test_compression_cluster_consolidation_v_formation, test_bsu_bpu, test_scan_matches_single_calls):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты VectorizedPatternDetector пройдены")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+🧪 ТЕСТ: walk-forward - окна rolling/anchored, выбор параметров на каждом
+train окне и агрегированная OOS статистика
+
+Без БД и сети: общая память из test_parameter_sweep, прогоны конфигураций
+заменены детерминированной оценкой _ScoredExecute.
+Запуск: python test_walk_forward.py (или pytest)
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+
+from backtesting import WalkForwardOptimizer, WalkForwardResult, grid_configs
+from backtesting.parameter_sweep import SweepResults
+from backtesting.walk_forward import build_windows
+from test_parameter_sweep import SweepStrategy, load_store
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DAY = timedelta(days=1)
+
+# Лучший cooldown для train окна с данным индексом
+TARGETS = [0, 120, 60, 120]
+
+
+def test_rolling_windows():
+    windows = build_windows(START, START + 100 * DAY, train_days=30, test_days=10)
+
+    assert len(windows) == 7  # (100 - 30) / 10
+    for i, w in enumerate(windows):
+        assert w.index == i
+        assert w.train_end - w.train_start == 30 * DAY
+        assert w.test_end - w.test_start == 10 * DAY
+        assert w.train_start == START + i * 10 * DAY
+        assert w.train_end == w.test_start  # train и test не пересекаются
+        assert START <= w.train_start and w.test_end <= START + 100 * DAY
+    # OOS периоды идут подряд без пересечений
+    for a, b in zip(windows, windows[1:]):
+        assert b.test_start == a.test_end
+
+    # Шаг меньше test - OOS перекрываются, окон больше
+    overlapping = build_windows(START, START + 100 * DAY, train_days=30, test_days=10, step_days=5)
+    assert len(overlapping) == 13
+    assert all(w.train_end == w.test_start for w in overlapping)
+
+    assert build_windows(START, START + 39 * DAY, train_days=30, test_days=10) == []
+
+
+def test_anchored_windows():
+    windows = build_windows(START, START + 100 * DAY, train_days=30, test_days=10, mode="anchored")
+
+    assert len(windows) == 7
+    for i, w in enumerate(windows):
+        assert w.train_start == START  # начало обучения зафиксировано
+        assert w.train_end - w.train_start == (30 + i * 10) * DAY
+        assert w.train_end == w.test_start
+        assert w.test_end - w.test_start == 10 * DAY
+        assert w.test_end <= START + 100 * DAY
+
+    try:
+        build_windows(START, START + 100 * DAY, 30, 10, mode="expanding")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("неизвестный режим должен отклоняться")
+
+
+class _ScoredExecute:
+    """
+    Вместо прогонов: метрика конфигурации зависит от расстояния до TARGETS[окно]
+
+    Train окна 2 все конфигурации без сделок, у окна 1 лучшая - без сделок
+    (выбирается следующая). Test прогоны записываются.
+    """
+
+    def __init__(self, windows):
+        self.windows = {w.train_start: w for w in windows}
+        self.tests = []
+
+    def __call__(self, tasks, pool=None):
+        results = SweepResults(metric="total_pnl_percent")
+        for task in tasks:
+            cooldown = task["params"]["cooldown_minutes"]
+            window = self.windows.get(task["start"])
+            if window is not None and task["end"] == window.train_end:
+                score = 10.0 - abs(cooldown - TARGETS[window.index]) / 10
+                trades = 0 if window.index == 2 or (window.index == 1 and cooldown == 120) else 5
+            else:
+                self.tests.append((task["config_id"], cooldown, task["start"], task["end"]))
+                score, trades = 1.0, 4
+            results.rows.append({
+                "config_id": task["config_id"],
+                "params": task["params"],
+                "total_trades": trades,
+                "total_pnl_percent": score,
+                "win_rate": 50.0,
+                "max_drawdown": 2.0
+            })
+        return results
+
+
+def test_best_params_per_train_window():
+    configs = grid_configs({"cooldown_minutes": [0, 60, 120]})
+    end = START + 70 * DAY
+
+    with load_store() as store:
+        wfo = WalkForwardOptimizer(store, SweepStrategy, configs, train_days=30, test_days=10,
+                                   workers=1, min_trades=1)
+        windows = build_windows(START, end, 30, 10)
+        assert len(windows) == len(TARGETS)
+        wfo.sweep.execute = _ScoredExecute(windows)
+
+        result = wfo.run(START, end)
+
+    chosen = [row["params"] and row["params"]["cooldown_minutes"] for row in result.windows]
+    # Окно 1: лучший (120) без сделок - следующий по метрике; окно 2: выбрать нечего
+    assert chosen == [0, 60, None, 120]
+    assert wfo.stats["windows_without_best"] == 1
+
+    for row, window in zip(result.windows, windows):
+        assert row["train_start"] == window.train_start and row["test_end"] == window.test_end
+        if row["params"] is not None:
+            assert row["train"]["params"] == row["params"]
+            assert row["test"]["config_id"] == window.index
+        else:
+            assert row["train"] is None and row["test"] is None
+
+    # OOS прогон: лучшие параметры на test периоде своего окна
+    tests = wfo.sweep.execute.tests
+    assert [(cooldown, s, e) for _, cooldown, s, e in tests] == [
+        (chosen[w.index], w.test_start, w.test_end) for w in windows if chosen[w.index] is not None
+    ]
+    assert wfo.stats["train_tasks"] == len(windows) * len(configs)
+    assert wfo.stats["test_tasks"] == 3
+    assert result.oos_stats()["evaluated"] == 3
+
+
+def window_row(train_metric, pnl, trades, win_rate, drawdown, error=None):
+    test = {"total_pnl_percent": pnl, "total_trades": trades, "win_rate": win_rate,
+            "max_drawdown": drawdown, "error": error}
+    return {"train": {"total_pnl_percent": train_metric}, "test": test}
+
+
+def test_oos_stats_aggregation():
+    result = WalkForwardResult(windows=[
+        window_row(8.0, 10.0, 4, 75.0, 3.0),
+        window_row(4.0, -5.0, 6, 50.0, 7.5),
+        window_row(6.0, 2.0, 0, 0.0, 1.0),
+        window_row(9.0, 50.0, 10, 90.0, 40.0, error="crashed"),  # не учитывается
+        {"train": None, "test": None}  # окно без лучшей конфигурации
+    ])
+    stats = result.oos_stats()
+
+    assert stats["windows"] == 5 and stats["evaluated"] == 3
+    assert stats["total_trades"] == 10
+    assert math.isclose(stats["compounded_pnl_percent"], (1.10 * 0.95 * 1.02 - 1) * 100)
+    assert math.isclose(stats["mean_pnl_percent"], 7.0 / 3)
+    assert math.isclose(stats["positive_windows_pct"], 200.0 / 3)
+    assert math.isclose(stats["win_rate"], (75.0 * 4 + 50.0 * 6) / 10)
+    assert stats["worst_drawdown"] == 7.5
+    assert math.isclose(stats["mean_train_total_pnl_percent"], 6.0)
+    assert math.isclose(stats["walk_forward_efficiency"], (7.0 / 3) / 6.0)
+
+    assert WalkForwardResult(windows=[{"train": None, "test": None}]).oos_stats() == \
+        {"windows": 1, "evaluated": 0}
+
+
+def test_efficiency_undefined_for_non_positive_train():
+    for train in (0.0, -3.0):
+        result = WalkForwardResult(windows=[window_row(train, 2.0, 3, 60.0, 1.0)])
+        assert result.oos_stats()["walk_forward_efficiency"] is None
+
+
+if __name__ == "__main__":
+    for test in (test_rolling_windows, test_anchored_windows, test_best_params_per_train_window,
+                 test_oos_stats_aggregation, test_efficiency_undefined_for_non_positive_train):
+        test()
+        print(f"✅ {test.__name__}")
+    print("🏁 Все тесты walk-forward пройдены")